@@ -0,0 +1,97 @@
+"""
+Load benchmark: public gallery photo latency while logins run concurrently
+
+Runs against a live backend. Login traffic keeps bcrypt busy; before the
+password pool it ran on the event loop and stalled every other request.
+
+Usage (from backend/):
+    python benchmarks/bench_login_load.py --base-url http://localhost:8001 \\
+        --share-link <share_link> --email user@example.com --password secret \\
+        --logins 20 --seconds 15
+
+Reports p50 / p99 latency of GET /api/public/gallery/{share_link}/photos:
+- idle:  with no login traffic
+- login: with `--logins` concurrent clients logging in back to back
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _report(label, samples):
+    if not samples:
+        print(f"{label:<22} no samples")
+        return
+    ms = [s * 1000 for s in samples]
+    print(f"{label:<22} n={len(ms):<5} mean={statistics.mean(ms):7.2f}ms  p50={_percentile(ms, 50):7.2f}ms  p99={_percentile(ms, 99):7.2f}ms")
+
+
+async def _sample_photos(session, url, deadline):
+    samples = []
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        async with session.get(url) as resp:
+            await resp.read()
+            resp.raise_for_status()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def _login_loop(session, url, credentials, deadline, stats):
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        async with session.post(url, json=credentials) as resp:
+            await resp.read()
+            stats[resp.status] = stats.get(resp.status, 0) + 1
+        stats["seconds"] = stats.get("seconds", 0) + time.perf_counter() - start
+
+
+async def run(base_url: str, share_link: str, email: str, password: str, logins: int, seconds: float):
+    photos_url = f"{base_url}/api/public/gallery/{share_link}/photos"
+    login_url = f"{base_url}/api/auth/login"
+    credentials = {"email": email, "password": password}
+
+    connector = aiohttp.TCPConnector(limit=logins + 10)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        # Warm up
+        await _sample_photos(session, photos_url, time.monotonic() + 1)
+
+        _report("photos (idle)", await _sample_photos(session, photos_url, time.monotonic() + seconds))
+
+        deadline = time.monotonic() + seconds
+        login_stats = {}
+        results = await asyncio.gather(
+            _sample_photos(session, photos_url, deadline),
+            *[_login_loop(session, login_url, credentials, deadline, login_stats) for _ in range(logins)]
+        )
+        _report(f"photos ({logins} logins)", results[0])
+
+        total = sum(v for k, v in login_stats.items() if k != "seconds")
+        by_status = ", ".join(f"{k}={v}" for k, v in sorted((k, v) for k, v in login_stats.items() if k != "seconds"))
+        mean_ms = login_stats.get("seconds", 0) / total * 1000 if total else 0
+        print(f"{'logins':<22} n={total:<5} mean={mean_ms:7.2f}ms  status: {by_status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--share-link", required=True, help="share link of a public gallery")
+    parser.add_argument("--email", required=True, help="login email (any existing account)")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=20, help="concurrent login clients")
+    parser.add_argument("--seconds", type=float, default=15, help="duration of each phase")
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url.rstrip("/"), args.share_link, args.email, args.password, args.logins, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
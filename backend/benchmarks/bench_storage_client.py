@@ -0,0 +1,118 @@
+"""
+Micro-benchmark: per-call S3 client vs. the persistent pooled client
+
+Runs against a local moto S3 server so no real R2 credentials are needed.
+
+Usage (from backend/):
+    pip install "moto[server]"
+    python benchmarks/bench_storage_client.py --ops 200
+
+Reports mean / p50 / p99 latency per operation for:
+- per-call: a fresh session.client("s3") context for every object (old behaviour)
+- pooled:   StorageService with its long-lived client (current behaviour)
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def _load_storage_module():
+    """Load services/storage.py directly, the same way server.py does"""
+    spec = importlib.util.spec_from_file_location("storage", str(BACKEND_DIR / "services" / "storage.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _report(label, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"{label:<22} mean={statistics.mean(ms):7.2f}ms  p50={_percentile(ms, 50):7.2f}ms  p99={_percentile(ms, 99):7.2f}ms")
+
+
+async def run(ops: int, payload_size: int):
+    # Configure storage to point at moto before importing it
+    try:
+        from moto.server import ThreadedMotoServer
+    except ImportError:
+        print("moto is required: pip install 'moto[server]'")
+        sys.exit(1)
+
+    # Keep per-request server and storage logs out of the report
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    logging.getLogger("storage").setLevel(logging.WARNING)
+
+    server = ThreadedMotoServer(port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    os.environ.update({
+        "R2_ACCESS_KEY_ID": "bench",
+        "R2_SECRET_ACCESS_KEY": "bench",
+        "R2_ENDPOINT_URL": f"http://{host}:{port}",
+        "R2_BUCKET_NAME": "bench-bucket",
+    })
+
+    storage_mod = _load_storage_module()
+    service = storage_mod.StorageService()
+    payload = os.urandom(payload_size)
+
+    try:
+        async with service.session.client("s3", endpoint_url=storage_mod.R2_ENDPOINT_URL, region_name="us-east-1") as s3:
+            await s3.create_bucket(Bucket=storage_mod.R2_BUCKET_NAME)
+
+        async def per_call_put(key):
+            async with service.session.client("s3", endpoint_url=storage_mod.R2_ENDPOINT_URL, region_name="auto") as s3:
+                await s3.put_object(Bucket=storage_mod.R2_BUCKET_NAME, Key=key, Body=payload)
+
+        async def per_call_head(key):
+            async with service.session.client("s3", endpoint_url=storage_mod.R2_ENDPOINT_URL, region_name="auto") as s3:
+                await s3.head_object(Bucket=storage_mod.R2_BUCKET_NAME, Key=key)
+
+        async def timed(fn, keys):
+            samples = []
+            for key in keys:
+                start = time.perf_counter()
+                await fn(key)
+                samples.append(time.perf_counter() - start)
+            return samples
+
+        keys = [f"photos/bench-{i}.jpg" for i in range(ops)]
+
+        # Warm up both paths once
+        await per_call_put("photos/warmup.jpg")
+        await service.start()
+        await service.upload_file("photos/warmup.jpg", payload)
+
+        _report("per-call put_object", await timed(per_call_put, keys))
+        _report("pooled put_object", await timed(lambda k: service.upload_file(k, payload), keys))
+        _report("per-call head_object", await timed(per_call_head, keys))
+        _report("pooled head_object", await timed(service.file_exists, keys))
+    finally:
+        await service.close()
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=200, help="operations per scenario")
+    parser.add_argument("--payload-kb", type=int, default=64, help="object size for put_object")
+    args = parser.parse_args()
+    asyncio.run(run(args.ops, args.payload_kb * 1024))
+
+
+if __name__ == "__main__":
+    main()
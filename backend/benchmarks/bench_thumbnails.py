@@ -0,0 +1,151 @@
+"""
+Benchmark: single-decode thumbnail pipeline vs. the previous per-size path
+
+Generates a corpus of synthetic JPEGs (12-48 MP by default) and renders the
+small + medium thumbnails used on upload with:
+- legacy:   one full decode per size, manual EXIF scan (previous
+            StorageService.generate_thumbnail_bytes behaviour)
+- pipeline: utils.thumbnails.render_thumbnails (draft-mode decode once,
+            exif_transpose, large -> small cascade)
+
+Each scenario runs in a fresh process so peak RSS is measured in isolation.
+
+Usage (from backend/):
+    python benchmarks/bench_thumbnails.py
+    python benchmarks/bench_thumbnails.py --megapixels 12 24 48 --repeat 3
+"""
+import argparse
+import multiprocessing
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ExifTags
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from utils.thumbnails import render_thumbnails  # noqa: E402
+
+UPLOAD_SIZES = {'small': (300, 300), 'medium': (800, 800)}
+JPEG_QUALITY = 85
+
+
+def legacy_generate_thumbnail_bytes(image_content: bytes, size) -> bytes:
+    """Previous StorageService.generate_thumbnail_bytes, kept here for comparison"""
+    with Image.open(BytesIO(image_content)) as img:
+        max_pixels = 50_000_000
+        if img.width * img.height > max_pixels:
+            scale = (max_pixels / (img.width * img.height)) ** 0.5
+            img = img.resize((int(img.width * scale), int(img.height * scale)), Image.Resampling.LANCZOS)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        try:
+            for orientation in ExifTags.TAGS.keys():
+                if ExifTags.TAGS[orientation] == 'Orientation':
+                    break
+            exif = img._getexif()
+            if exif:
+                value = exif.get(orientation)
+                if value == 3:
+                    img = img.rotate(180, expand=True)
+                elif value == 6:
+                    img = img.rotate(270, expand=True)
+                elif value == 8:
+                    img = img.rotate(90, expand=True)
+        except (AttributeError, KeyError, IndexError, TypeError):
+            pass
+        img.thumbnail(size, Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        img.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+        return buffer.getvalue()
+
+
+def legacy_render(content: bytes):
+    return {name: legacy_generate_thumbnail_bytes(content, size) for name, size in UPLOAD_SIZES.items()}
+
+
+def pipeline_render(content: bytes):
+    return render_thumbnails(content, UPLOAD_SIZES, JPEG_QUALITY)
+
+
+def make_corpus(directory: Path, megapixels: list) -> list:
+    """Write one noisy, camera-like JPEG per requested megapixel count"""
+    paths = []
+    for mp in megapixels:
+        width = int((mp * 1_000_000 * 3 / 2) ** 0.5)
+        height = int(width * 2 / 3)
+        noise = Image.effect_noise((width // 4, height // 4), 40).resize((width, height))
+        gradient = Image.linear_gradient('L').resize((width, height))
+        img = Image.merge('RGB', (noise, gradient, Image.blend(noise, gradient, 0.5)))
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotated 90 CW, as phones commonly write
+        path = directory / f"synthetic_{mp}mp.jpg"
+        img.save(path, 'JPEG', quality=92, exif=exif)
+        paths.append(path)
+        print(f"  corpus: {path.name} {width}x{height} ({path.stat().st_size / 1e6:.1f} MB)")
+    return paths
+
+
+def _run_scenario(name: str, paths: list, repeat: int, queue):
+    render = legacy_render if name == 'legacy' else pipeline_render
+    timings = []
+    for path in paths:
+        content = path.read_bytes()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            render(content)
+            timings.append((time.perf_counter() - start) * 1000)
+    queue.put((timings, _peak_rss_mb()))
+
+
+def _peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process in MB.
+    VmHWM is per address space, so unlike ru_maxrss it is not inherited from
+    the parent that generated the corpus.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is KB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+
+def run_isolated(name: str, paths: list, repeat: int):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run_scenario, args=(name, paths, repeat, queue))
+    process.start()
+    timings, peak_rss_mb = queue.get()
+    process.join()
+    return timings, peak_rss_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megapixels", type=int, nargs="+", default=[12, 24, 36, 48])
+    parser.add_argument("--repeat", type=int, default=2, help="renders per image")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("Generating corpus...")
+        paths = make_corpus(Path(tmp), args.megapixels)
+
+        print(f"\n{'path':<10} {'ms/photo (mean)':>16} {'ms/photo (p50)':>15} {'peak RSS':>10}")
+        for name in ('legacy', 'pipeline'):
+            timings, peak_rss_mb = run_isolated(name, paths, args.repeat)
+            print(f"{name:<10} {statistics.mean(timings):16.1f} {statistics.median(timings):15.1f} {peak_rss_mb:8.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -133,6 +133,7 @@ class Photo(BaseModel):
     url: str
     thumbnail_url: Optional[str] = None  # Small thumbnail for grids
     thumbnail_medium_url: Optional[str] = None  # Medium thumbnail for gallery view
+    thumbnail_status: Optional[str] = None  # "pending", "ready" or "failed"
     uploaded_by: str  # "photographer", "guest", or "contributor"
     contributor_name: Optional[str] = None  # Company name if uploaded by contributor
     section_id: Optional[str] = None
@@ -146,6 +147,13 @@ class Photo(BaseModel):
     flagged_reason: Optional[str] = None
 
 
+class PhotoPage(BaseModel):
+    """One page of a cursor-paginated photo listing"""
+    photos: List[Photo]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to fetch the next page
+    has_more: bool = False
+
+
 class PasswordVerify(BaseModel):
     """Model for password verification"""
     password: str
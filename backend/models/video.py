@@ -103,4 +103,5 @@ class PCloudPhoto(BaseModel):
 class SectionDownloadRequest(BaseModel):
     """Request model for downloading a section"""
     password: Optional[str] = None
+    token: Optional[str] = None  # download token from download-info, instead of the password
     section_id: Optional[str] = None  # None means download all
@@ -1,6 +1,7 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Request, BackgroundTasks, Query, Body
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import RedirectResponse, StreamingResponse, HTMLResponse, FileResponse, Response
+from fastapi.responses import RedirectResponse, StreamingResponse, HTMLResponse, Response, JSONResponse
+from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -8,18 +9,15 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from typing import List, Optional, Union
 import uuid
 from datetime import datetime, timezone, timedelta
-import bcrypt
 from jose import JWTError, jwt
 import shutil
 import secrets
 import string
 import asyncio
 import resend
-import zipfile
-import httpx
 from contextlib import asynccontextmanager
 from google_auth_oauthlib.flow import Flow
 from google.oauth2.credentials import Credentials
@@ -52,6 +50,7 @@ from models.gallery import (
     GalleryUpdate,
     Section,
     Photo,
+    PhotoPage,
     PasswordVerify,
     BulkPhotoAction,
     PhotoReorder,
@@ -158,6 +157,54 @@ from utils.helpers import (
     extract_pcloud_code,
     extract_gdrive_folder_id,
 )
+from utils.zip_stream import stream_zip, iter_file_chunks
+from utils.prefetch import prefetch_ordered
+from utils.thumbnails import get_thumbnail_pool, ThumbnailPoolBusy
+from utils.passwords import get_password_service, PasswordServiceBusy
+from utils.gallery_tokens import GalleryTokens
+from utils.gallery_cache import get_gallery_cache
+from utils.user_cache import get_user_cache, request_memo, USER_CACHE_PROJECTION
+from utils.feature_config import get_feature_config
+from utils.proxy_cache import ProxyCache
+from utils.pcloud_links import PcloudLinkResolver
+from utils.http_clients import get_http_clients
+from utils.http_stream import (
+    open_upstream,
+    stream_open_file,
+    stream_upstream_response,
+    stream_file,
+    stream_storage_body,
+    key_etag,
+    etag_matches,
+)
+from utils.display_feed import (
+    record_display_changes,
+    record_photo_changes,
+    get_display_state,
+    get_display_changes,
+    display_etag,
+    display_meta_hash,
+)
+from utils.pagination import fetch_page, clamp_page_size, encode_cursor, decode_cursor, InvalidCursor
+from utils.gdrive_verify import (
+    GDRIVE_VERIFY_BURST, GDRIVE_VERIFY_RATE, GDRIVE_VERIFIED_TTL_DAYS, verify_folder_candidates,
+)
+from utils.sync_scheduler import TokenBucket
+from utils.source_sync import (
+    SOURCE_KEY_FIELDS, gdrive_fingerprint, gdrive_photo_doc, gdrive_watermark,
+    pcloud_fingerprint, pcloud_photo_doc, upsert_section_photos,
+)
+from utils.gallery_counters import (
+    insert_counted,
+    delete_counted,
+    empty_gallery_counts,
+    get_gallery_counts,
+    reconcile_all_gallery_counts,
+    gallery_photo_total,
+    gallery_video_total,
+    photo_counts_by_uploader,
+)
+from utils.analytics_rollups import insert_analytics_event, daily_counts, total_since, rebuild_daily_rollups
 
 # Import background tasks from tasks package (Phase 3 refactoring)
 from tasks import (
@@ -169,6 +216,14 @@ from tasks import (
     auto_sync_drive_backup_task,
     auto_delete_expired_galleries,
     check_expiring_subscriptions,
+    reconcile_gallery_counters,
+    get_sync_stats,
+    prioritize_fotoshare_section,
+    init_thumbnail_jobs,
+    stop_thumbnail_jobs,
+    enqueue_thumbnail_job,
+    get_thumbnail_job_stats,
+    thumbnail_job_worker,
 )
 
 # Import routes from routes package (Phase 4 refactoring)
@@ -247,8 +302,7 @@ async def scrape_fotoshare_videos(url: str) -> dict:
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
         }
         
-        timeout = aiohttp.ClientTimeout(total=30)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with http_clients.client('fotoshare') as session:
             async with session.get(url, headers=headers, allow_redirects=True) as response:
                 if response.status == 404:
                     result['error'] = 'Event not found or link has expired'
@@ -399,8 +453,7 @@ async def fetch_pcloud_folder(code: str) -> dict:
     try:
         api_url = f"https://api.pcloud.com/showpublink?code={code}"
         
-        timeout = aiohttp.ClientTimeout(total=30)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with http_clients.client('pcloud') as session:
             async with session.get(api_url) as response:
                 if response.status != 200:
                     result['error'] = f'pCloud API returned status {response.status}'
@@ -473,45 +526,37 @@ async def fetch_pcloud_folder(code: str) -> dict:
     
     return result
 
-async def get_pcloud_download_url(code: str, fileid: int) -> Optional[dict]:
+async def request_pcloud_download_link(code: str, fileid: int) -> Optional[dict]:
     """
-    Get direct download URL for a pCloud file.
-    Returns dict with 'url', 'expires' or None on error.
+    Call pCloud's getpublinkdownload for one file (uncached).
+    Returns the API response ('hosts', 'path', 'expires') or None on error.
     """
-    import aiohttp
+    api_url = f"https://api.pcloud.com/getpublinkdownload?code={code}&fileid={fileid}"
     
-    try:
-        api_url = f"https://api.pcloud.com/getpublinkdownload?code={code}&fileid={fileid}"
-        
-        timeout = aiohttp.ClientTimeout(total=15)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(api_url) as response:
-                if response.status != 200:
-                    return None
-                
-                data = await response.json()
-        
-        if data.get('result') != 0:
-            logger.warning(f"pCloud download URL error: {data}")
-            return None
-        
-        # Construct full URL from host + path
-        hosts = data.get('hosts', [])
-        path = data.get('path', '')
-        
-        if not hosts or not path:
+    timeout = aiohttp.ClientTimeout(total=15)
+    async with http_clients.client('pcloud').get(api_url, timeout=timeout) as response:
+        if response.status != 200:
             return None
         
-        # Use first host
-        url = f"https://{hosts[0]}{path}"
-        
-        return {
-            'url': url,
-            'expires': data.get('expires'),
-            'hosts': hosts,
-            'path': path
-        }
-        
+        data = await response.json()
+    
+    if data.get('result') != 0:
+        logger.warning(f"pCloud download URL error: {data}")
+        return None
+    
+    return data
+
+# Download links stay valid for hours - resolve each (code, fileid) once per expiry window
+pcloud_links = PcloudLinkResolver(request_pcloud_download_link)
+PCLOUD_LINK_PREWARM_LIMIT = 200  # links resolved ahead per public section listing
+
+async def get_pcloud_download_url(code: str, fileid: int) -> Optional[dict]:
+    """
+    Get direct download URL for a pCloud file (memoized until shortly before it expires).
+    Returns dict with 'url', 'urls' (all hosts, failover order), 'expires' or None on error.
+    """
+    try:
+        return await pcloud_links.resolve(code, fileid)
     except Exception as e:
         logger.error(f"Error getting pCloud download URL: {e}")
         return None
@@ -531,11 +576,10 @@ async def proxy_pcloud_image(code: str, fileid: int) -> Optional[bytes]:
         
         # Fetch the actual image
         timeout = aiohttp.ClientTimeout(total=60)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(download_info['url']) as response:
-                if response.status != 200:
-                    return None
-                return await response.read()
+        async with http_clients.client('proxy').get(download_info['url'], timeout=timeout) as response:
+            if response.status != 200:
+                return None
+            return await response.read()
                 
     except Exception as e:
         logger.error(f"Error proxying pCloud image: {e}")
@@ -559,6 +603,14 @@ db = client[os.environ['DB_NAME']]
 
 # Initialize storage service (R2 or local filesystem)
 storage = storage_module.get_storage_service()
+
+# Process pool for thumbnail rendering (keeps Pillow work off the event loop)
+thumbnail_pool = get_thumbnail_pool()
+password_service = get_password_service()
+gallery_cache = get_gallery_cache()
+user_cache = get_user_cache()
+feature_config = get_feature_config()
+http_clients = get_http_clients()
 logger.info(f"Storage backend: {'Cloudflare R2' if storage.r2_enabled else 'Local Filesystem'}")
 
 UPLOAD_DIR = ROOT_DIR / 'uploads'
@@ -642,16 +694,19 @@ def _extract_gdrive_folder_id_deprecated(url: str) -> Optional[str]:
             return match.group(1)
     return None
 
-async def fetch_gdrive_folder_photos(folder_id: str) -> dict:
+async def fetch_gdrive_folder_photos(folder_id: str, modified_since: Optional[str] = None) -> dict:
     """
     Fetch photos from a public Google Drive folder using the Google Drive API.
     Requires GOOGLE_DRIVE_API_KEY environment variable.
+    With modified_since (RFC 3339, UTC) only files created or modified after it
+    are listed, and the result has 'incremental': True.
     """
     result = {
         'success': False,
         'folder_name': 'Google Drive Photos',
         'photos': [],
-        'error': None
+        'error': None,
+        'incremental': modified_since is not None
     }
     
     api_key = os.environ.get('GOOGLE_DRIVE_API_KEY', '')
@@ -661,7 +716,7 @@ async def fetch_gdrive_folder_photos(folder_id: str) -> dict:
         return result
     
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_clients.client('gdrive') as session:
             # First, get folder metadata to get the folder name
             folder_url = f"https://www.googleapis.com/drive/v3/files/{folder_id}"
             folder_params = {
@@ -687,11 +742,15 @@ async def fetch_gdrive_folder_photos(folder_id: str) -> dict:
             all_photos = []
             next_page_token = None
             
+            query = f"'{folder_id}' in parents and (mimeType contains 'image/') and trashed=false"
+            if modified_since:
+                query += f" and (modifiedTime > '{modified_since}' or createdTime > '{modified_since}')"
+            
             while True:
                 api_url = "https://www.googleapis.com/drive/v3/files"
                 params = {
-                    "q": f"'{folder_id}' in parents and (mimeType contains 'image/') and trashed=false",
-                    "fields": "nextPageToken,files(id,name,mimeType,size,imageMediaMetadata,thumbnailLink,createdTime)",
+                    "q": query,
+                    "fields": "nextPageToken,files(id,name,mimeType,size,imageMediaMetadata,thumbnailLink,createdTime,modifiedTime)",
                     "pageSize": 1000,
                     "orderBy": "createdTime desc",
                     "key": api_key
@@ -727,7 +786,8 @@ async def fetch_gdrive_folder_photos(folder_id: str) -> dict:
                                 'view_url': view_url,
                                 'width': file.get('imageMediaMetadata', {}).get('width'),
                                 'height': file.get('imageMediaMetadata', {}).get('height'),
-                                'created_time': file.get('createdTime')
+                                'created_time': file.get('createdTime'),
+                                'modified_time': file.get('modifiedTime')
                             }
                             all_photos.append(photo_data)
                         
@@ -757,6 +817,9 @@ async def fetch_gdrive_folder_photos(folder_id: str) -> dict:
     
     return result
 
+# Shared pacing of thumbnail HEAD checks for scraped Drive folders
+gdrive_verify_bucket = TokenBucket(GDRIVE_VERIFY_RATE, GDRIVE_VERIFY_BURST)
+
 async def scrape_gdrive_folder_html(folder_id: str) -> dict:
     """
     Scrape Google Drive folder HTML page for public folders.
@@ -793,7 +856,7 @@ async def scrape_gdrive_folder_html(folder_id: str) -> dict:
         }
         
         html = None
-        async with aiohttp.ClientSession() as session:
+        async with http_clients.client('gdrive') as session:
             for url in urls_to_try:
                 try:
                     async with session.get(url, headers=headers, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=30)) as response:
@@ -873,50 +936,55 @@ async def scrape_gdrive_folder_html(folder_id: str) -> dict:
                 result['error'] = "No photos found in folder. Make sure it contains images and is publicly shared with 'Anyone with the link'."
                 return result
             
-            # Verify files are images by checking thumbnails (with rate limiting)
-            verified_photos = []
-            check_limit = min(len(all_file_ids), 100)  # Limit checks to avoid rate limiting
+            # Verify candidates are images by checking thumbnails - concurrently under a
+            # shared rate limit, skipping ids already verified for this folder
+            candidates = sorted(all_file_ids)  # stable order across re-syncs
             
-            for i, file_id in enumerate(list(all_file_ids)[:check_limit]):
-                if i > 0 and i % 10 == 0:
-                    await asyncio.sleep(0.5)  # Rate limit
-                
+            async def check_thumbnail(file_id: str) -> Optional[bool]:
                 thumb_url = f"https://drive.google.com/thumbnail?id={file_id}&sz=w100"
                 try:
-                    async with session.head(thumb_url, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=5)) as thumb_resp:
+                    async with session.head(thumb_url, allow_redirects=True, retries=0,
+                                            timeout=aiohttp.ClientTimeout(total=5)) as thumb_resp:
                         if thumb_resp.status == 200:
-                            content_type = thumb_resp.headers.get('Content-Type', '')
-                            if 'image' in content_type.lower():
-                                photo_data = {
-                                    'file_id': file_id,
-                                    'name': f'Photo_{len(verified_photos)+1}.jpg',
-                                    'mime_type': 'image/jpeg',
-                                    'size': 0,
-                                    'thumbnail_url': f"https://drive.google.com/thumbnail?id={file_id}&sz=w800",
-                                    'view_url': f"https://drive.google.com/uc?export=view&id={file_id}",
-                                    'width': None,
-                                    'height': None,
-                                    'created_time': None
-                                }
-                                verified_photos.append(photo_data)
+                            return 'image' in thumb_resp.headers.get('Content-Type', '').lower()
+                        if thumb_resp.status == 404:
+                            return False
+                        return None  # rate limited / server error - ask again next sync
                 except asyncio.TimeoutError:
-                    continue
-                except Exception as e:
-                    logger.debug(f"Error verifying file {file_id}: {e}")
-                    continue
+                    return None
+            
+            verification = await verify_folder_candidates(db, folder_id, candidates, check_thumbnail, gdrive_verify_bucket)
+            verified_photos = [
+                {
+                    'file_id': file_id,
+                    'name': f'Photo_{i+1}.jpg',
+                    'mime_type': 'image/jpeg',
+                    'size': 0,
+                    'thumbnail_url': f"https://drive.google.com/thumbnail?id={file_id}&sz=w800",
+                    'view_url': f"https://drive.google.com/uc?export=view&id={file_id}",
+                    'width': None,
+                    'height': None,
+                    'created_time': None
+                }
+                for i, file_id in enumerate(verification['images'])
+            ]
             
-            logger.info(f"Verified {len(verified_photos)} images out of {check_limit} checked")
+            logger.info(
+                f"Verified {len(verified_photos)} images out of {len(candidates)} candidates "
+                f"({verification['checked']} checked, {verification['cached']} cached, "
+                f"{len(verification['unverified'])} inconclusive)"
+            )
             
             # If verification found images, use those
             if verified_photos:
                 result['photos'] = verified_photos
                 result['success'] = True
                 result['photo_count'] = len(verified_photos)
-            else:
-                # If verification failed (rate limiting), add all potential files
+            elif verification['unverified']:
+                # If verification failed (rate limiting), add the unchecked files
                 # and let the frontend handle broken images
-                logger.warning("Verification failed, adding all potential files without verification")
-                for i, file_id in enumerate(all_file_ids):
+                logger.warning("Verification failed, adding unverified files without verification")
+                for i, file_id in enumerate(verification['unverified']):
                     photo_data = {
                         'file_id': file_id,
                         'name': f'Photo_{i+1}.jpg',
@@ -935,6 +1003,8 @@ async def scrape_gdrive_folder_html(folder_id: str) -> dict:
                     result['photo_count'] = len(result['photos'])
                 else:
                     result['error'] = "No photos found in folder."
+            else:
+                result['error'] = "No photos found in folder."
                     
     except Exception as e:
         result['error'] = f"Error accessing Google Drive folder: {str(e)}"
@@ -942,17 +1012,19 @@ async def scrape_gdrive_folder_html(folder_id: str) -> dict:
     
     return result
 
-async def get_gdrive_photos(folder_id: str) -> dict:
+async def get_gdrive_photos(folder_id: str, modified_since: Optional[str] = None) -> dict:
     """
     Get photos from a Google Drive folder using the API.
     Falls back to HTML scraping only if API key is not configured.
+    modified_since is passed to the API listing; the scraper always returns
+    the full folder (its result has no 'incremental' flag set).
     """
     # Check if API key is available
     api_key = os.environ.get('GOOGLE_DRIVE_API_KEY', '')
     
     if api_key:
         # Use the proper API method
-        result = await fetch_gdrive_folder_photos(folder_id)
+        result = await fetch_gdrive_folder_photos(folder_id, modified_since)
         if result['success']:
             return result
         
@@ -1143,101 +1215,48 @@ JPEG_QUALITY = 85  # Balance between quality and size
 THUMBNAILS_DIR = UPLOAD_DIR / 'thumbnails'
 THUMBNAILS_DIR.mkdir(exist_ok=True)
 
+# On-disk cache for bytes proxied from pCloud / Google Drive
+PROXY_CACHE_DIR = Path(os.environ.get('PROXY_CACHE_DIR', str(UPLOAD_DIR / 'proxy_cache')))
+proxy_cache = ProxyCache(PROXY_CACHE_DIR)
+
 # Thumbnail generation retry settings
 THUMBNAIL_MAX_RETRIES = 3
 THUMBNAIL_RETRY_DELAY = 0.5  # seconds between retries
 
-def generate_thumbnail_single(source_path: Path, photo_id: str, size_name: str = 'medium') -> Optional[str]:
-    """Generate a single thumbnail (internal, no retry)"""
-    size = THUMBNAIL_SIZES.get(size_name, THUMBNAIL_SIZES['medium'])
-    thumb_filename = f"{photo_id}_{size_name}.jpg"
-    thumb_path = THUMBNAILS_DIR / thumb_filename
-    
-    try:
-        # Use context manager to ensure image is closed and memory freed
-        with Image.open(source_path) as img:
-            # Limit image size to prevent memory issues with very large images
-            max_pixels = 50_000_000  # 50MP max
-            if img.width * img.height > max_pixels:
-                # Calculate scale factor to fit within max_pixels
-                scale = (max_pixels / (img.width * img.height)) ** 0.5
-                new_size = (int(img.width * scale), int(img.height * scale))
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
-            
-            # Convert to RGB if necessary (handles PNG with transparency, HEIC, etc.)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Auto-rotate based on EXIF first (before resizing)
-            try:
-                from PIL import ExifTags
-                for orientation in ExifTags.TAGS.keys():
-                    if ExifTags.TAGS[orientation] == 'Orientation':
-                        break
-                exif = img._getexif()
-                if exif:
-                    orientation_value = exif.get(orientation)
-                    if orientation_value == 3:
-                        img = img.rotate(180, expand=True)
-                    elif orientation_value == 6:
-                        img = img.rotate(270, expand=True)
-                    elif orientation_value == 8:
-                        img = img.rotate(90, expand=True)
-            except (AttributeError, KeyError, IndexError, TypeError):
-                pass
-            
-            # Preserve aspect ratio and resize
-            img.thumbnail(size, Image.Resampling.LANCZOS)
-            
-            # Save optimized JPEG
-            img.save(thumb_path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
-        
-        # Verify the file was created
-        if thumb_path.exists() and thumb_path.stat().st_size > 0:
-            return f"/api/photos/thumb/{thumb_filename}"
-        else:
-            logger.error(f"Thumbnail file not created or empty: {thumb_filename}")
-            return None
-            
-    except Exception as e:
-        logger.error(f"Error generating thumbnail for {photo_id}: {e}")
-        # Clean up partial file if it exists
-        if thumb_path.exists():
-            try:
-                thumb_path.unlink()
-            except:
-                pass
-        return None
+# 'deferred': uploads store the original and queue thumbnails (tasks/thumbnail_jobs.py)
+# 'sync': thumbnails are generated before the upload request returns
+THUMBNAIL_MODE = os.environ.get('THUMBNAIL_MODE', 'deferred')
+DEFER_THUMBNAILS = THUMBNAIL_MODE == 'deferred'
 
-def generate_thumbnail(source_path: Path, photo_id: str, size_name: str = 'medium') -> Optional[str]:
-    """Generate optimized thumbnail with retry logic"""
-    import time
-    last_error = None
-    
+# Photo feed order: highlights first, then manual order, newest first; id makes it total for keyset pagination
+PHOTO_FEED_SORT = [("is_highlight", -1), ("order", 1), ("uploaded_at", -1), ("id", 1)]
+
+async def render_photo_thumbnails(source_path: Path, photo_id: str, size_names) -> dict:
+    """
+    Render the given thumbnail sizes in the thumbnail worker pool (one decode per attempt),
+    retrying the sizes that failed. Returns {size_name: url}; a size that still fails is absent.
+    """
+    urls = {}
     for attempt in range(THUMBNAIL_MAX_RETRIES):
-        try:
-            result = generate_thumbnail_single(source_path, photo_id, size_name)
-            # Verify the thumbnail was created successfully
-            thumb_filename = f"{photo_id}_{size_name}.jpg"
-            thumb_path = THUMBNAILS_DIR / thumb_filename
-            if thumb_path.exists() and thumb_path.stat().st_size > 0:
-                return result
-            else:
-                raise Exception("Thumbnail file not created or empty")
-        except Exception as e:
-            last_error = e
-            logger.warning(f"Thumbnail generation attempt {attempt + 1}/{THUMBNAIL_MAX_RETRIES} failed for {photo_id}: {e}")
-            if attempt < THUMBNAIL_MAX_RETRIES - 1:
-                time.sleep(THUMBNAIL_RETRY_DELAY)
-    
-    logger.error(f"All {THUMBNAIL_MAX_RETRIES} thumbnail generation attempts failed for {photo_id}: {last_error}")
-    return None
+        missing = {name: THUMBNAIL_SIZES[name] for name in size_names if not urls.get(name)}
+        filenames = await thumbnail_pool.render_files(source_path, photo_id, missing, THUMBNAILS_DIR, JPEG_QUALITY)
+        for size_name, thumb_filename in filenames.items():
+            if thumb_filename:
+                urls[size_name] = f"/api/photos/thumb/{thumb_filename}"
+        if len(urls) == len(size_names):
+            break
+        logger.warning(f"Thumbnail generation attempt {attempt + 1}/{THUMBNAIL_MAX_RETRIES} incomplete for {photo_id}")
+        if attempt < THUMBNAIL_MAX_RETRIES - 1:
+            await asyncio.sleep(THUMBNAIL_RETRY_DELAY)
+    return urls
+
+async def generate_photo_thumbnails(source_path: Path, photo_id: str) -> tuple:
+    """
+    Generate small and medium thumbnails in the thumbnail worker pool (one decode for both).
+    Returns (small_url, medium_url); a size that still fails after retries is None.
+    """
+    urls = await render_photo_thumbnails(source_path, photo_id, ('small', 'medium'))
+    return urls.get('small'), urls.get('medium')
 
 def validate_image_file(file_path: Path) -> dict:
     """Validate an image file - check if it exists, is readable, and can be opened by PIL"""
@@ -1292,6 +1311,7 @@ async def auto_flag_photo(photo_id: str, reason: str):
             "auto_flagged": True
         }}
     )
+    await record_photo_changes(db, [photo_id])
     logger.info(f"Auto-flagged photo {photo_id}: {reason}")
 
 async def validate_and_repair_photo_thumbnails(photo_id: str, force_regenerate: bool = False) -> dict:
@@ -1320,28 +1340,34 @@ async def validate_and_repair_photo_thumbnails(photo_id: str, force_regenerate:
         "regenerated": []
     }
     
-    # Check/repair each thumbnail size
+    # Check each thumbnail size, then re-render the broken ones in one pool job
+    # (ThumbnailPoolBusy propagates to the 503 handler)
+    to_regenerate = []
     for size_name in ['small', 'medium']:
         thumb_validation = validate_thumbnail(photo_id, size_name)
-        
         if not thumb_validation["valid"] or force_regenerate:
-            # Attempt to regenerate
-            thumb_url = generate_thumbnail(original_path, photo_id, size_name)
+            to_regenerate.append(size_name)
+        else:
+            results["thumbnails"][size_name] = {"status": "valid"}
+    
+    if to_regenerate:
+        urls = await render_photo_thumbnails(original_path, photo_id, to_regenerate)
+        update_data = {}
+        for size_name in to_regenerate:
+            thumb_url = urls.get(size_name)
             if thumb_url:
                 results["regenerated"].append(size_name)
                 results["thumbnails"][size_name] = {"status": "regenerated", "url": thumb_url}
-                
-                # Update photo record with new thumbnail URL
                 update_field = "thumbnail_url" if size_name == "small" else "thumbnail_medium_url"
-                await db.photos.update_one(
-                    {"id": photo_id},
-                    {"$set": {update_field: thumb_url}}
-                )
+                update_data[update_field] = thumb_url
             else:
                 results["thumbnails"][size_name] = {"status": "failed", "error": "Regeneration failed"}
                 results["success"] = False
-        else:
-            results["thumbnails"][size_name] = {"status": "valid"}
+        
+        # Update photo record with new thumbnail URLs
+        if update_data:
+            await db.photos.update_one({"id": photo_id}, {"$set": update_data})
+            await record_photo_changes(db, [photo_id])
     
     return results
 
@@ -1585,6 +1611,8 @@ async def create_database_indexes():
         await db.photos.create_index([("gallery_id", 1), ("uploaded_at", -1)])  # For sorted photo queries
         await db.photos.create_index([("gallery_id", 1), ("original_filename", 1)])  # For duplicate detection
         await db.photos.create_index([("gallery_id", 1), ("content_hash", 1)])  # For hash-based duplicate detection
+        await db.photos.create_index([("gallery_id", 1)] + PHOTO_FEED_SORT)  # Matches the photo feed sort for keyset pagination
+        await db.photos.create_index([("gallery_id", 1), ("uploaded_by", 1)])  # Covers per-uploader photo counts
         
         # Drive credentials and backups
         await db.drive_credentials.create_index("user_id", unique=True)
@@ -1609,6 +1637,9 @@ async def create_database_indexes():
         await db.analytics_events.create_index("photographer_id")
         await db.analytics_events.create_index([("photographer_id", 1), ("event_type", 1), ("created_at", -1)])
         
+        # Daily analytics rollups (one counter per photographer / event type / UTC day)
+        await db.analytics_daily.create_index([("photographer_id", 1), ("event_type", 1), ("day", 1)], unique=True)
+        
         # pCloud photos collection indexes
         await db.pcloud_photos.create_index("id", unique=True)
         await db.pcloud_photos.create_index("gallery_id")
@@ -1616,9 +1647,35 @@ async def create_database_indexes():
         await db.pcloud_photos.create_index([("gallery_id", 1), ("section_id", 1)])
         await db.pcloud_photos.create_index("fileid")
         
+        # Display change feed (per-gallery version log, pruned after 7 days)
+        await db.display_changes.create_index([("gallery_id", 1), ("version", 1)])
+        await db.display_changes.create_index("created_at", expireAfterSeconds=7 * 24 * 3600)
+        
+        # Thumbnail job queue indexes (claiming, one job per photo, expiry of finished jobs)
+        await db.thumbnail_jobs.create_index("photo_id", unique=True)
+        await db.thumbnail_jobs.create_index([("status", 1), ("available_at", 1)])
+        await db.thumbnail_jobs.create_index([("status", 1), ("lease_expires_at", 1)])
+        await db.thumbnail_jobs.create_index("completed_at", expireAfterSeconds=7 * 24 * 3600)
+        
+        # Drive scrape verification cache (one answer per folder/file, re-checked after 30 days)
+        await db.gdrive_verified_files.create_index([("folder_id", 1), ("file_id", 1)], unique=True)
+        await db.gdrive_verified_files.create_index("verified_at", expireAfterSeconds=GDRIVE_VERIFIED_TTL_DAYS * 24 * 3600)
+        
+        # Auto-sync run log (scheduler durations, pruned after 7 days)
+        await db.sync_runs.create_index([("provider", 1), ("created_at", -1)])
+        await db.sync_runs.create_index("created_at", expireAfterSeconds=7 * 24 * 3600)
+        
         logger.info("Database indexes created successfully")
     except Exception as e:
         logger.error(f"Error creating indexes (may already exist): {e}")
+    
+    # Unique source file per section (bulk sync upserts match on these). Kept
+    # separate so duplicates left by the old read-diff-insert sync only skip these
+    for collection, key_field in SOURCE_KEY_FIELDS.items():
+        try:
+            await db[collection].create_index([("section_id", 1), (key_field, 1)], unique=True)
+        except Exception as e:
+            logger.error(f"Could not create unique {collection} (section_id, {key_field}) index - remove duplicate photos first: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -1626,6 +1683,16 @@ async def lifespan(app: FastAPI):
     # Create database indexes for optimized performance
     await create_database_indexes()
     
+    # Open the pooled R2 client shared by all storage operations
+    await storage.start()
+    
+    # Open the outbound HTTP pools shared by scrapers, APIs and proxies
+    await http_clients.start()
+    
+    # Start thumbnail worker processes and bcrypt worker threads
+    thumbnail_pool.start()
+    password_service.start()
+    
     # Initialize background tasks module with dependencies
     init_tasks(
         db=db,
@@ -1646,16 +1713,59 @@ async def lifespan(app: FastAPI):
     asyncio.create_task(auto_sync_gdrive_sections())
     asyncio.create_task(auto_sync_pcloud_sections())
     asyncio.create_task(check_expiring_subscriptions())
+    asyncio.create_task(reconcile_gallery_counters())
+    
+    # Start the deferred thumbnail worker (also drains jobs queued before a restart)
+    init_thumbnail_jobs(
+        db=db,
+        storage=storage,
+        thumbnail_pool=thumbnail_pool,
+        logger=logger,
+        UPLOAD_DIR=UPLOAD_DIR,
+        THUMBNAILS_DIR=THUMBNAILS_DIR,
+        THUMBNAIL_SIZES=THUMBNAIL_SIZES,
+        JPEG_QUALITY=JPEG_QUALITY
+    )
+    asyncio.create_task(thumbnail_job_worker())
     
     yield
     
     # Stop all background tasks
     stop_tasks()
+    stop_thumbnail_jobs()
+    
+    # Release pooled R2 and outbound HTTP connections
+    await storage.close()
+    await http_clients.close()
+    
+    # Stop thumbnail worker processes and bcrypt worker threads
+    await thumbnail_pool.shutdown()
+    await password_service.shutdown()
 
 app = FastAPI(lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
 
+@app.exception_handler(ThumbnailPoolBusy)
+async def thumbnail_pool_busy_handler(request: Request, exc: ThumbnailPoolBusy):
+    """Backpressure: tell clients to retry when the thumbnail pool is saturated"""
+    logger.warning(f"Rejected upload, {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy processing uploads. Please retry shortly."},
+        headers={"Retry-After": "5"}
+    )
+
+@app.exception_handler(PasswordServiceBusy)
+async def password_service_busy_handler(request: Request, exc: PasswordServiceBusy):
+    """Backpressure: a login/password burst queues instead of starving other requests"""
+    logger.warning(f"Rejected password check, {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy. Please retry shortly."},
+        headers={"Retry-After": "2"}
+    )
+
 # Root-level health check for Kubernetes liveness/readiness probes
 @app.get("/health")
 async def health_check():
@@ -1672,7 +1782,7 @@ async def get_gallery_og_tags(share_link: str, request: Request):
     Serve HTML with Open Graph meta tags for social media link previews.
     This endpoint is called by social media crawlers (Facebook, Twitter, etc.)
     """
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+    gallery = await get_gallery_by_share_link(share_link)
     
     if not gallery:
         # Return basic HTML if gallery not found
@@ -1786,11 +1896,13 @@ async def get_gallery_og_tags(share_link: str, request: Request):
 # NOTE: CollagePreset models are now imported from models.collage
 # See: /app/backend/models/collage.py
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+async def hash_password(password: str) -> str:
+    """bcrypt hash on the bounded password pool (off the event loop)"""
+    return await password_service.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """bcrypt check on the bounded password pool (off the event loop)"""
+    return await password_service.verify(plain_password, hashed_password)
 
 # ============================================
 # AUTHORITY HIERARCHY HELPER FUNCTIONS
@@ -1798,10 +1910,13 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 async def get_global_feature_toggles():
     """
-    Get global feature toggles from database.
+    Get global feature toggles (cached process-wide, see utils/feature_config.py).
     ADMIN SETTINGS ALWAYS WIN - only returns what admin explicitly set.
     Missing features default to False/disabled for upselling control.
     """
+    return await feature_config.get_config("global_feature_toggles", _load_global_feature_toggles)
+
+async def _load_global_feature_toggles():
     toggles = await db.site_config.find_one({"type": "global_feature_toggles"}, {"_id": 0})
     if not toggles:
         # No admin settings yet - use defaults as initial state
@@ -1834,6 +1949,32 @@ async def get_global_feature_toggles():
         PLAN_PRO: toggles.get(PLAN_PRO, {})
     }
 
+# User fields read by resolve_user_features; together with the config version they key its memo
+USER_FEATURE_FIELDS = (
+    "override_mode", "override_expires", "plan", "payment_status", "subscription_expires",
+    "subscription_tokens", "event_credits", "addon_tokens", "extra_credits",
+    "addon_tokens_purchased_at", "extra_credits_purchased_at",
+)
+
+# Gallery fields read by resolve_gallery_features
+GALLERY_FEATURE_FIELDS = ("created_under_plan", "highest_plan_reached")
+
+def _next_feature_boundary(*timestamps) -> Optional[float]:
+    """Earliest future time among ISO timestamps (or datetimes), as time.time() seconds"""
+    now = datetime.now(timezone.utc)
+    upcoming = []
+    for value in timestamps:
+        if not value:
+            continue
+        try:
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            if value > now:
+                upcoming.append(value.timestamp())
+        except (ValueError, TypeError):
+            continue
+    return min(upcoming) if upcoming else None
+
 async def resolve_user_features(user: dict) -> dict:
     """
     Resolve user's effective features using AUTHORITY HIERARCHY:
@@ -1841,8 +1982,27 @@ async def resolve_user_features(user: dict) -> dict:
     2. Normal Payment/Subscription Plan
     3. Payment Status
     
+    Memoized per (config version, user feature fields) until an override,
+    subscription or add-on token expiry changes the answer.
     Returns dict with all feature flags and metadata
     """
+    key = ("user", feature_config.version) + tuple(user.get(field) for field in USER_FEATURE_FIELDS)
+    result = feature_config.memo_get(key)
+    if result is None:
+        result = await _resolve_user_features(user)
+        purchased_at = user.get("addon_tokens_purchased_at", user.get("extra_credits_purchased_at"))
+        addon_expiry = None
+        if isinstance(purchased_at, str):
+            try:
+                addon_expiry = datetime.fromisoformat(purchased_at.replace('Z', '+00:00')) + timedelta(days=365)
+            except ValueError:
+                pass
+        feature_config.memo_put(key, result, _next_feature_boundary(
+            user.get("override_expires"), user.get("subscription_expires"), addon_expiry
+        ))
+    return result
+
+async def _resolve_user_features(user: dict) -> dict:
     global_toggles = await get_global_feature_toggles()
     
     # Get user info
@@ -1881,7 +2041,7 @@ async def resolve_user_features(user: dict) -> dict:
     if override_mode and override_expires:
         try:
             expires_dt = datetime.fromisoformat(override_expires.replace('Z', '+00:00'))
-            logger.info(f"Checking override: mode={override_mode}, expires={expires_dt}, now={datetime.now(timezone.utc)}")
+            logger.debug(f"Checking override: mode={override_mode}, expires={expires_dt}, now={datetime.now(timezone.utc)}")
             if datetime.now(timezone.utc) < expires_dt:
                 # Override is active! Use override mode features
                 result["authority_source"] = "override_mode"
@@ -1899,7 +2059,7 @@ async def resolve_user_features(user: dict) -> dict:
                 # So stored_mode_features already includes all default features with stored overrides
                 mode_features = stored_mode_features.copy()
                 
-                logger.info(f"Mode features for {override_mode}: {mode_features}")
+                logger.debug(f"Mode features for {override_mode}: {mode_features}")
                 result["features"] = mode_features
                 
                 # Check unlimited credits from feature toggle
@@ -1917,7 +2077,7 @@ async def resolve_user_features(user: dict) -> dict:
                 elif override_mode == MODE_COMPED_STANDARD:
                     result["effective_plan"] = PLAN_STANDARD
                 
-                logger.info(f"Returning override result: {result}")
+                logger.debug(f"Returning override result: {result}")
                 return result
         except (ValueError, TypeError) as e:
             logger.error(f"Override check error: {e}")
@@ -2019,7 +2179,18 @@ async def resolve_gallery_features(user: dict, gallery: dict) -> dict:
     - effective_plan: str (the plan providing features)
     - grandfathered: bool (whether using grandfather plan)
     - authority_source: str ('override_mode', 'current_plan', 'grandfather')
+    
+    Memoized per (config version, user plan/override, gallery plan fields).
     """
+    key = (("gallery", feature_config.version, user.get("override_mode"), user.get("override_expires"), user.get("plan"))
+           + tuple(gallery.get(field) for field in GALLERY_FEATURE_FIELDS))
+    result = feature_config.memo_get(key)
+    if result is None:
+        result = await _resolve_gallery_features(user, gallery)
+        feature_config.memo_put(key, result, _next_feature_boundary(user.get("override_expires")))
+    return result
+
+async def _resolve_gallery_features(user: dict, gallery: dict) -> dict:
     global_toggles = await get_global_feature_toggles()
     
     # Get user info
@@ -2535,7 +2706,7 @@ def can_download(user: dict) -> bool:
     payment_status = user.get("payment_status", PAYMENT_NONE)
     return payment_status != PAYMENT_PENDING
 
-async def check_download_allowed(gallery: dict, is_owner: bool = False) -> dict:
+async def check_download_allowed(gallery: dict, is_owner: bool = False, photographer: Optional[dict] = None) -> dict:
     """
     Check if downloads are allowed for a gallery.
     Returns: {"allowed": bool, "reason": str or None}
@@ -2543,6 +2714,8 @@ async def check_download_allowed(gallery: dict, is_owner: bool = False) -> dict:
     Downloads are blocked if:
     1. Gallery has download_locked_until_payment = True
     2. Photographer has a pending payment transaction
+    
+    Pass `photographer` when the user document is already loaded to skip the lookup.
     """
     # Check gallery-level lock
     if gallery.get("download_locked_until_payment", False):
@@ -2552,7 +2725,8 @@ async def check_download_allowed(gallery: dict, is_owner: bool = False) -> dict:
         }
     
     # Check photographer's payment status
-    photographer = await db.users.find_one({"id": gallery["photographer_id"]}, {"_id": 0, "payment_status": 1})
+    if photographer is None:
+        photographer = await db.users.find_one({"id": gallery["photographer_id"]}, {"_id": 0, "payment_status": 1})
     if photographer and photographer.get("payment_status") == PAYMENT_PENDING:
         return {
             "allowed": False,
@@ -2561,6 +2735,37 @@ async def check_download_allowed(gallery: dict, is_owner: bool = False) -> dict:
     
     return {"allowed": True, "reason": None}
 
+async def fetch_photo_page(collection, query: dict, projection: dict, limit: Optional[int], cursor: Optional[str]) -> dict:
+    """One keyset page of photos in PHOTO_FEED_SORT order; bad cursors are a 400"""
+    try:
+        return await fetch_page(collection, query, PHOTO_FEED_SORT, projection, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _load_public_gallery_context(share_link: str) -> dict:
+    """Load a gallery by share_link with its photographer and grace-period status"""
+    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+    if not gallery:
+        return {"gallery": None, "photographer": None, "grace_periods": None}
+    photographer = await db.users.find_one({"id": gallery["photographer_id"]}, {"_id": 0})
+    grace_periods = await check_subscription_grace_periods(photographer, gallery) if photographer else None
+    return {"gallery": gallery, "photographer": photographer, "grace_periods": grace_periods}
+
+async def get_public_gallery_context(share_link: str) -> dict:
+    """
+    Cached (LRU + TTL) gallery, photographer and grace periods for a share link.
+    Returns {"gallery": dict or None, "photographer": dict or None, "grace_periods": dict or None}.
+    """
+    return await gallery_cache.get(share_link, _load_public_gallery_context)
+
+async def get_gallery_by_share_link(share_link: str) -> Optional[dict]:
+    """Cached equivalent of db.galleries.find_one({"share_link": share_link}, {"_id": 0})"""
+    return (await get_public_gallery_context(share_link))["gallery"]
+
+def invalidate_gallery_cache(gallery_id: str):
+    """Drop a gallery from the share_link cache after it was changed"""
+    gallery_cache.invalidate(gallery_id=gallery_id)
+
 def is_gallery_locked(gallery: dict) -> bool:
     """Check if gallery is past edit window (7 days)"""
     created_at = gallery.get("created_at")
@@ -2588,7 +2793,10 @@ def is_demo_expired(gallery: dict) -> bool:
         return False
 
 async def get_billing_settings() -> dict:
-    """Get current billing settings from database"""
+    """Get current billing settings (cached process-wide, see utils/feature_config.py)"""
+    return await feature_config.get_config("billing_settings", _load_billing_settings)
+
+async def _load_billing_settings() -> dict:
     default_payment_methods = {
         "gcash": {"enabled": True, "name": "GCash", "account_name": "Less Real Moments", "account_number": "09952568450", "qr_code_url": None},
         "maya": {"enabled": True, "name": "Maya", "account_name": "Less Real Moments", "account_number": "09952568450", "qr_code_url": None},
@@ -2776,6 +2984,7 @@ async def reset_user_credits_if_needed(user_id: str):
                 "subscription_tokens": initial_credits,
             }}
         )
+        invalidate_user_cache(user_id)
         logger.info(f"Initialized billing cycle: user={user_id}, plan={plan}, payment={payment_status}, credits={initial_credits}")
         return
     
@@ -2819,6 +3028,7 @@ async def reset_user_credits_if_needed(user_id: str):
                 update_data["subscription_expires"] = subscription_expires
             
             await db.users.update_one({"id": user_id}, {"$set": update_data})
+            invalidate_user_cache(user_id)
         
         # Check if extra credits have expired (12 months from purchase)
         addon_tokens_purchased = user.get("addon_tokens_purchased_at")
@@ -2830,6 +3040,7 @@ async def reset_user_credits_if_needed(user_id: str):
                         {"id": user_id},
                         {"$set": {"addon_tokens": 0, "addon_tokens_purchased_at": None}}
                     )
+                    invalidate_user_cache(user_id)
             except:
                 pass
                 
@@ -2872,6 +3083,7 @@ async def is_subscription_active(user: dict) -> bool:
                 {"id": user_id},
                 {"$set": {"subscription_expires": new_expires}}
             )
+            invalidate_user_cache(user_id)
             logger.info(f"Auto-fixed subscription_expires for user {user_id}")
         return True  # Allow access while fixing
     
@@ -2938,11 +3150,33 @@ def create_access_token(data: dict) -> str:
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+# Guest / download tokens: minted once a gallery password is verified, then
+# presented instead of the password so bcrypt runs once per visitor session
+# Signed per-gallery guest/download tokens (see utils/gallery_tokens.py)
+gallery_tokens = GalleryTokens(SECRET_KEY, ALGORITHM, verify_password)
+
 def generate_random_password(length: int = 12) -> str:
     """Generate a random password"""
     alphabet = string.ascii_letters + string.digits + "!@#$%"
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
+async def _load_user_record(user_id: str) -> Optional[dict]:
+    return await db.users.find_one({"id": user_id}, USER_CACHE_PROJECTION)
+
+async def get_user_record(user_id: str) -> Optional[dict]:
+    """
+    Projected user record (no password hash): from this request's memo, then
+    the user cache (LRU + TTL), then the database.
+    """
+    memo = request_memo()
+    if user_id not in memo:
+        memo[user_id] = await user_cache.get(user_id, _load_user_record)
+    return memo[user_id]
+
+def invalidate_user_cache(user_id: str):
+    """Drop a user from the user cache after their profile, plan, override, credits or status changed"""
+    user_cache.invalidate(user_id)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     try:
         token = credentials.credentials
@@ -2951,7 +3185,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid authentication")
         
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
+        user = await get_user_record(user_id)
         if user is None:
             raise HTTPException(status_code=401, detail="User not found")
         return user
@@ -2978,7 +3212,7 @@ async def register(user_data: UserRegister, background_tasks: BackgroundTasks):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user_id = str(uuid.uuid4())
-    hashed_pw = hash_password(user_data.password)
+    hashed_pw = await hash_password(user_data.password)
     created_at = datetime.now(timezone.utc).isoformat()
     
     user_doc = {
@@ -3023,7 +3257,7 @@ async def register(user_data: UserRegister, background_tasks: BackgroundTasks):
 @api_router.post("/auth/login", response_model=Token)
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user or not verify_password(credentials.password, user["password"]):
+    if not user or not await verify_password(credentials.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Check if user is suspended
@@ -3048,7 +3282,7 @@ async def login(credentials: UserLogin):
 @api_router.get("/auth/me", response_model=User)
 async def get_me(current_user: dict = Depends(get_current_user)):
     # Get full user data for effective quota calculation
-    user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
+    user = await get_user_record(current_user["id"])
     
     # Calculate effective storage quota from global toggles
     effective_storage = await get_effective_storage_quota(user)
@@ -3069,7 +3303,7 @@ async def get_me(current_user: dict = Depends(get_current_user)):
 @api_router.get("/auth/effective-settings")
 async def get_effective_settings(current_user: dict = Depends(get_current_user)):
     """Get the user's effective plan settings (storage, expiration) based on their plan/override mode"""
-    user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
+    user = await get_user_record(current_user["id"])
     
     # Get effective storage quota
     effective_storage = await get_effective_storage_quota(user)
@@ -3124,6 +3358,7 @@ async def update_profile(profile: UserProfile, current_user: dict = Depends(get_
     
     if update_data:
         await db.users.update_one({"id": current_user["id"]}, {"$set": update_data})
+        invalidate_user_cache(current_user["id"])
     
     updated_user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
     return User(
@@ -3139,8 +3374,9 @@ async def update_profile(profile: UserProfile, current_user: dict = Depends(get_
 @api_router.put("/auth/change-password")
 async def change_password(data: ChangePassword, current_user: dict = Depends(get_current_user)):
     """Change user password"""
-    # Verify current password
-    if not verify_password(data.current_password, current_user["password"]):
+    # Verify current password (the cached user record carries no password hash)
+    stored = await db.users.find_one({"id": current_user["id"]}, {"_id": 0, "password": 1})
+    if not stored or not await verify_password(data.current_password, stored["password"]):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Validate new password length
@@ -3148,11 +3384,12 @@ async def change_password(data: ChangePassword, current_user: dict = Depends(get
         raise HTTPException(status_code=400, detail="New password must be at least 6 characters")
     
     # Hash and save new password
-    hashed_pw = hash_password(data.new_password)
+    hashed_pw = await hash_password(data.new_password)
     await db.users.update_one(
         {"id": current_user["id"]},
         {"$set": {"password": hashed_pw}}
     )
+    invalidate_user_cache(current_user["id"])
     
     return {"message": "Password updated successfully"}
 
@@ -3166,10 +3403,11 @@ async def forgot_password(data: ForgotPassword):
     
     # Generate new password
     new_password = generate_random_password()
-    hashed_pw = hash_password(new_password)
+    hashed_pw = await hash_password(new_password)
     
     # Update password in database
     await db.users.update_one({"id": user["id"]}, {"$set": {"password": hashed_pw}})
+    invalidate_user_cache(user["id"])
     
     # Send email with new password
     if not RESEND_API_KEY:
@@ -3277,6 +3515,7 @@ async def update_gallery_limit(user_id: str, data: UpdateGalleryLimit, admin: di
         {"id": user_id},
         {"$set": {"max_galleries": data.max_galleries}}
     )
+    invalidate_user_cache(user_id)
     
     return {"message": f"Gallery limit updated to {data.max_galleries}"}
 
@@ -3291,6 +3530,7 @@ async def update_storage_quota(user_id: str, data: UpdateStorageQuota, admin: di
         {"id": user_id},
         {"$set": {"storage_quota": data.storage_quota}}
     )
+    invalidate_user_cache(user_id)
     
     # Convert bytes to human readable
     quota_mb = data.storage_quota / (1024 * 1024)
@@ -3311,6 +3551,7 @@ async def update_photographer_status(user_id: str, data: dict, admin: dict = Dep
         {"id": user_id},
         {"$set": {"status": status, "status_updated_at": datetime.now(timezone.utc).isoformat()}}
     )
+    invalidate_user_cache(user_id)
     
     # Log activity
     await db.activity_logs.insert_one({
@@ -3390,6 +3631,7 @@ async def delete_photographer(user_id: str, admin: dict = Depends(get_admin_user
     
     # Delete galleries
     await db.galleries.delete_many({"photographer_id": user_id})
+    gallery_cache.clear()
     
     # Delete drive credentials and backups
     await db.drive_credentials.delete_many({"user_id": user_id})
@@ -3397,6 +3639,7 @@ async def delete_photographer(user_id: str, admin: dict = Depends(get_admin_user
     
     # Delete user
     await db.users.delete_one({"id": user_id})
+    invalidate_user_cache(user_id)
     
     # Log activity
     await db.activity_logs.insert_one({
@@ -3729,6 +3972,7 @@ async def add_client_credits(user_id: str, data: dict, admin: dict = Depends(get
         update_data["addon_tokens_expires_at"] = (datetime.now(timezone.utc) + timedelta(days=365)).isoformat()
     
     await db.users.update_one({"id": user_id}, {"$set": update_data})
+    invalidate_user_cache(user_id)
     
     # Create transaction record
     await create_transaction(
@@ -3853,6 +4097,7 @@ async def fix_client_billing(user_id: str, data: dict, admin: dict = Depends(get
     
     if update_data:
         await db.users.update_one({"id": user_id}, {"$set": update_data})
+        invalidate_user_cache(user_id)
     
     # Log the fix
     await db.activity_logs.insert_one({
@@ -3911,6 +4156,7 @@ async def extend_client_subscription(user_id: str, data: dict, admin: dict = Dep
         {"id": user_id},
         {"$set": {"subscription_expires": new_expires}}
     )
+    invalidate_user_cache(user_id)
     
     # Log activity
     await db.activity_logs.insert_one({
@@ -3953,6 +4199,7 @@ async def change_client_plan(user_id: str, data: dict, admin: dict = Depends(get
         update_data["subscription_expires"] = (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
     
     await db.users.update_one({"id": user_id}, {"$set": update_data})
+    invalidate_user_cache(user_id)
     
     # Log activity
     await db.activity_logs.insert_one({
@@ -3980,12 +4227,13 @@ async def reset_client_password(user_id: str, data: dict, admin: dict = Depends(
     if not new_password or len(new_password) < 8:
         raise HTTPException(status_code=400, detail="Password must be at least 8 characters")
     
-    hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
+    hashed_password = await hash_password(new_password)
     
     await db.users.update_one(
         {"id": user_id},
-        {"$set": {"password": hashed_password.decode('utf-8')}}
+        {"$set": {"password": hashed_password}}
     )
+    invalidate_user_cache(user_id)
     
     # Log activity
     await db.activity_logs.insert_one({
@@ -4227,6 +4475,7 @@ async def update_admin_global_feature_toggles(data: GlobalFeatureToggles, admin:
         {"$set": toggle_doc},
         upsert=True
     )
+    feature_config.bump()
     
     return {"message": "Global feature toggles updated successfully", "toggles": toggle_doc}
 
@@ -4262,6 +4511,7 @@ async def update_single_mode_features(
         }},
         upsert=True
     )
+    feature_config.bump()
     
     return {"message": f"Features updated for {mode_or_plan}", "features": features}
 
@@ -4269,6 +4519,16 @@ async def update_single_mode_features(
 # Gallery Storage Migration Endpoint
 # ============================================
 
+@api_router.post("/admin/migrate/analytics-rollups")
+async def migrate_analytics_rollups(admin: dict = Depends(get_admin_user)):
+    """
+    Rebuild the daily analytics rollups from analytics_events.
+    Run once after deploying the rollups so earlier days show up on dashboards;
+    safe to re-run (counters are recomputed, not added to).
+    """
+    written = await rebuild_daily_rollups(db)
+    return {"message": "Analytics rollups rebuilt", "rollups_written": written}
+
 @api_router.post("/admin/migrate/gallery-storage")
 async def migrate_gallery_storage(admin: dict = Depends(get_admin_user)):
     """
@@ -4310,6 +4570,7 @@ async def migrate_gallery_storage(admin: dict = Depends(get_admin_user)):
                     "storage_quota": storage_quota
                 }}
             )
+            invalidate_gallery_cache(gallery_id)
             
             galleries_updated += 1
             total_storage_calculated += storage_used
@@ -4372,6 +4633,7 @@ async def update_user_feature_toggles(user_id: str, data: UserFeatureToggle, adm
         {"id": user_id},
         {"$set": {"feature_toggles": toggle_doc}}
     )
+    invalidate_user_cache(user_id)
     
     return {"message": "User features updated", "features": toggle_doc}
 
@@ -4384,7 +4646,7 @@ async def get_current_user_features(user: dict = Depends(get_current_user)):
     2. Normal Payment Plan
     3. Payment Status
     """
-    db_user = await db.users.find_one({"id": user["id"]}, {"_id": 0})
+    db_user = await get_user_record(user["id"])
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -4459,6 +4721,7 @@ async def admin_bulk_flag_photos(data: BulkFlagAction, admin: dict = Depends(get
             "flagged_reason": data.reason or "Flagged by admin"
         }}
     )
+    await record_photo_changes(db, data.photo_ids)
     
     # Log the action
     await db.activity_logs.insert_one({
@@ -4491,6 +4754,7 @@ async def admin_bulk_unflag_photos(data: BulkUnflagAction, admin: dict = Depends
             "flagged_reason": None
         }}
     )
+    await record_photo_changes(db, data.photo_ids)
     
     # Log the action
     await db.activity_logs.insert_one({
@@ -4734,6 +4998,7 @@ async def delete_collage_preset(preset_id: str, admin: dict = Depends(get_admin_
         {"collage_preset_id": preset_id},
         {"$set": {"collage_preset_id": None}}
     )
+    gallery_cache.clear()
     
     return {"success": True, "message": "Preset deleted"}
 
@@ -4867,6 +5132,7 @@ async def create_gallery(gallery_data: GalleryCreate, current_user: dict = Depen
                     {"id": current_user["id"]},
                     {"$inc": {"addon_tokens": -1, "extra_credits": -1}}
                 )
+                invalidate_user_cache(current_user["id"])
                 logger.info(f"Deducted 1 addon_token for gallery creation: user={current_user['id']}, remaining={addon_tokens - 1}")
             elif subscription_tokens > 0:
                 # Use subscription token only if available (prevent negative)
@@ -4874,6 +5140,7 @@ async def create_gallery(gallery_data: GalleryCreate, current_user: dict = Depen
                     {"id": current_user["id"]},
                     {"$inc": {"subscription_tokens": -1, "event_credits": -1}}
                 )
+                invalidate_user_cache(current_user["id"])
                 logger.info(f"Deducted 1 subscription_token for gallery creation: user={current_user['id']}, remaining={subscription_tokens - 1}")
             else:
                 # This shouldn't happen - credits_available check should have caught this
@@ -4964,7 +5231,7 @@ async def create_gallery(gallery_data: GalleryCreate, current_user: dict = Depen
         "photographer_id": current_user["id"],
         "title": gallery_data.title,
         "description": gallery_data.description,
-        "password": hash_password(gallery_data.password) if gallery_data.password else None,
+        "password": await hash_password(gallery_data.password) if gallery_data.password else None,
         "share_link": share_link,
         "cover_photo_url": None,
         "sections": [],
@@ -4975,7 +5242,7 @@ async def create_gallery(gallery_data: GalleryCreate, current_user: dict = Depen
         "share_link_expiration_days": gallery_data.share_link_expiration_days,
         "guest_upload_expiration_date": guest_upload_expiration_date,
         "guest_upload_enabled_days": gallery_data.guest_upload_enabled_days,
-        "download_all_password": hash_password(gallery_data.download_all_password) if gallery_data.download_all_password else None,
+        "download_all_password": await hash_password(gallery_data.download_all_password) if gallery_data.download_all_password else None,
         "theme": gallery_data.theme,
         "created_at": created_at.isoformat(),
         "auto_delete_date": auto_delete_date,
@@ -4985,6 +5252,8 @@ async def create_gallery(gallery_data: GalleryCreate, current_user: dict = Depen
         "demo_features_expire": demo_features_expire,
         "download_locked_until_payment": download_locked_until_payment,
         "view_count": 0,
+        # Denormalized media counters (utils/gallery_counters.py)
+        "media_counts": empty_gallery_counts(),
         # Per-gallery storage tracking
         "storage_used": 0,
         "storage_quota": gallery_storage_quota,  # -1 = unlimited
@@ -5084,20 +5353,8 @@ def get_edit_lock_info(created_at: str) -> dict:
 
 @api_router.get("/galleries", response_model=List[Gallery])
 async def get_galleries(current_user: dict = Depends(get_current_user)):
-    pipeline = [
-        {"$match": {"photographer_id": current_user["id"]}},
-        {"$lookup": {
-            "from": "photos",
-            "localField": "id",
-            "foreignField": "gallery_id",
-            "as": "photos"
-        }},
-        {"$addFields": {"photo_count": {"$size": "$photos"}}},
-        {"$project": {"_id": 0, "photos": 0}},
-        {"$limit": 500}
-    ]
-    
-    galleries = await db.galleries.aggregate(pipeline).to_list(None)
+    galleries = await db.galleries.find({"photographer_id": current_user["id"]}, {"_id": 0}).limit(500).to_list(None)
+    photo_counts = await photo_counts_by_uploader(db, [g["id"] for g in galleries])
     
     result = []
     for g in galleries:
@@ -5132,7 +5389,7 @@ async def get_galleries(current_user: dict = Depends(get_current_user)):
             display_interval=g.get("display_interval", 6),
             collage_preset_id=g.get("collage_preset_id"),
             created_at=datetime_to_str(g["created_at"]),
-            photo_count=g.get("photo_count", 0),
+            photo_count=photo_counts.get(g["id"], {}).get("total", 0),
             auto_delete_date=datetime_to_str(auto_delete_date),
             days_until_deletion=days_until_deletion,
             is_edit_locked=edit_info["is_locked"],
@@ -5225,7 +5482,7 @@ async def get_gallery_features(gallery_id: str, current_user: dict = Depends(get
         raise HTTPException(status_code=404, detail="Gallery not found")
     
     # Get full user data
-    user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
+    user = await get_user_record(current_user["id"])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -5251,7 +5508,7 @@ async def update_gallery(gallery_id: str, updates: GalleryUpdate, current_user:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
     # Get full user data to check override_mode (not in JWT token)
-    user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
+    user = await get_user_record(current_user["id"])
     is_founder = user.get("override_mode") == MODE_FOUNDERS_CIRCLE if user else False
     
     # Check if gallery is edit-locked (7 days after creation) - Founders are exempt
@@ -5276,7 +5533,7 @@ async def update_gallery(gallery_id: str, updates: GalleryUpdate, current_user:
     if updates.remove_password:
         update_data["password"] = None  # Remove password
     elif updates.password is not None:
-        update_data["password"] = hash_password(updates.password)
+        update_data["password"] = await hash_password(updates.password)
     if updates.event_title is not None:
         update_data["event_title"] = updates.event_title
     if updates.event_date is not None:
@@ -5372,7 +5629,7 @@ async def update_gallery(gallery_id: str, updates: GalleryUpdate, current_user:
     if updates.remove_download_password:
         update_data["download_all_password"] = None  # Remove download password
     elif updates.download_all_password is not None:
-        update_data["download_all_password"] = hash_password(updates.download_all_password)
+        update_data["download_all_password"] = await hash_password(updates.download_all_password)
     if updates.theme is not None:
         update_data["theme"] = updates.theme
     # Display settings
@@ -5395,6 +5652,7 @@ async def update_gallery(gallery_id: str, updates: GalleryUpdate, current_user:
     
     if update_data:
         await db.galleries.update_one({"id": gallery_id}, {"$set": update_data})
+        invalidate_gallery_cache(gallery_id)
     
     updated_gallery = await db.galleries.find_one({"id": gallery_id}, {"_id": 0})
     photo_count = await db.photos.count_documents({"gallery_id": gallery_id})
@@ -5499,6 +5757,7 @@ async def delete_gallery(gallery_id: str, current_user: dict = Depends(get_curre
     await db.pcloud_photos.delete_many({"gallery_id": gallery_id})
     await db.drive_backups.delete_many({"gallery_id": gallery_id})
     await db.galleries.delete_one({"id": gallery_id})
+    invalidate_gallery_cache(gallery_id)
     
     # Update user's storage used
     if total_storage_freed > 0:
@@ -5580,6 +5839,7 @@ async def upload_cover_photo(gallery_id: str, file: UploadFile = File(...), curr
         update_data["cover_photo_medium_url"] = cover_medium_url
     
     await db.galleries.update_one({"id": gallery_id}, {"$set": update_data})
+    invalidate_gallery_cache(gallery_id)
     
     return {
         "cover_photo_url": cover_url,
@@ -5603,6 +5863,7 @@ async def update_cover_photo_position(gallery_id: str, position: CoverPhotoPosit
         {"id": gallery_id},
         {"$set": {"cover_photo_position": position.model_dump()}}
     )
+    invalidate_gallery_cache(gallery_id)
     
     return {"message": "Cover photo position updated", "position": position.model_dump()}
 
@@ -5630,7 +5891,7 @@ async def create_section(
         raise HTTPException(status_code=404, detail="Gallery not found")
     
     # Get full user data for feature resolution
-    user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
+    user = await get_user_record(current_user["id"])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -5653,6 +5914,7 @@ async def create_section(
     sections.append(new_section)
     
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery_id)
     
     return Section(**new_section)
 
@@ -5695,6 +5957,7 @@ async def reorder_sections(gallery_id: str, data: dict = Body(...), current_user
     reordered_sections.sort(key=lambda s: s.get("order", 0))
     
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": reordered_sections}})
+    invalidate_gallery_cache(gallery_id)
     
     return {"message": "Sections reordered", "sections": reordered_sections}
 
@@ -5709,10 +5972,11 @@ async def delete_section(gallery_id: str, section_id: str, current_user: dict =
     sections = [s for s in sections if s["id"] != section_id]
     
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery_id)
     
     # Delete associated content based on section type
     if section_to_delete and section_to_delete.get("type") == "video":
-        await db.gallery_videos.delete_many({"gallery_id": gallery_id, "section_id": section_id})
+        await delete_counted(db, 'gallery_videos', {"gallery_id": gallery_id, "section_id": section_id})
     else:
         await db.photos.update_many({"gallery_id": gallery_id, "section_id": section_id}, {"$set": {"section_id": None}})
     
@@ -5742,6 +6006,7 @@ async def rename_section(gallery_id: str, section_id: str, data: dict = Body(...
         raise HTTPException(status_code=404, detail="Section not found")
     
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery_id)
     
     return {"message": "Section renamed", "name": new_name.strip()}
 
@@ -5760,7 +6025,7 @@ async def create_fotoshare_section(
         raise HTTPException(status_code=404, detail="Gallery not found")
     
     # Check section creation permission with grandfathering
-    user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
+    user = await get_user_record(current_user["id"])
     if user:
         can_create, reason = await can_create_section_in_gallery(user, gallery)
         if not can_create:
@@ -5793,6 +6058,8 @@ async def create_fotoshare_section(
     }
     sections.append(new_section)
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery_id)
+    prioritize_fotoshare_section(gallery_id, section_id)
     
     # Store the scraped videos (360° booth)
     fotoshare_videos = []
@@ -5815,7 +6082,7 @@ async def create_fotoshare_section(
         fotoshare_videos.append(video_entry)
     
     if fotoshare_videos:
-        await db.fotoshare_videos.insert_many(fotoshare_videos)
+        await insert_counted(db, 'fotoshare_videos', fotoshare_videos)
     
     # Store the scraped photos (Photobooth)
     fotoshare_photos = []
@@ -5880,15 +6147,18 @@ async def refresh_fotoshare_section(
     now = datetime.now(timezone.utc).isoformat()
     content_type = scrape_result.get('content_type', section.get('fotoshare_content_type', '360_booth'))
     
-    # Update section status
-    for s in sections:
-        if s["id"] == section_id:
-            s["fotoshare_last_sync"] = now
-            s["fotoshare_expired"] = scrape_result.get('expired', False)
-            s["fotoshare_content_type"] = content_type
-            break
-    
-    await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    # Update section status (positional, so concurrent edits of other sections survive)
+    await db.galleries.update_one(
+        {"id": gallery_id, "sections.id": section_id},
+        {"$set": {
+            "sections.$.fotoshare_last_sync": now,
+            "sections.$.fotoshare_expired": scrape_result.get('expired', False),
+            "sections.$.fotoshare_content_type": content_type
+        }}
+    )
+    invalidate_gallery_cache(gallery_id)
+    # Re-queue the auto-refresh from this sync (and back in if it was expired)
+    prioritize_fotoshare_section(gallery_id, section_id)
     
     if not scrape_result['success']:
         return {
@@ -5935,7 +6205,7 @@ async def refresh_fotoshare_section(
             new_videos.append(video_entry)
     
     if new_videos:
-        await db.fotoshare_videos.insert_many(new_videos)
+        await insert_counted(db, 'fotoshare_videos', new_videos)
     
     # Add new photos
     new_photos = []
@@ -5964,6 +6234,12 @@ async def refresh_fotoshare_section(
     if new_photos:
         await db.fotoshare_photos.insert_many(new_photos)
     
+    if new_videos or new_photos:
+        await db.galleries.update_one(
+            {"id": gallery_id, "sections.id": section_id},
+            {"$set": {"sections.$.fotoshare_last_new_at": now}}
+        )
+    
     return {
         "success": True,
         "expired": False,
@@ -6061,9 +6337,10 @@ async def delete_fotoshare_section(
     # Remove section
     sections = [s for s in sections if s["id"] != section_id]
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery_id)
     
     # Delete associated videos and photos
-    await db.fotoshare_videos.delete_many({"gallery_id": gallery_id, "section_id": section_id})
+    await delete_counted(db, 'fotoshare_videos', {"gallery_id": gallery_id, "section_id": section_id})
     await db.fotoshare_photos.delete_many({"gallery_id": gallery_id, "section_id": section_id})
     
     return {"message": "Fotoshare section deleted"}
@@ -6101,8 +6378,7 @@ async def scrape_fotoshare_photobooth(url: str) -> dict:
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
         }
         
-        timeout = aiohttp.ClientTimeout(total=30)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with http_clients.client('fotoshare') as session:
             async with session.get(url, headers=headers, allow_redirects=True) as response:
                 if response.status == 404:
                     result['error'] = 'Event not found or link has expired'
@@ -6217,7 +6493,7 @@ async def create_photobooth_section(
         raise HTTPException(status_code=404, detail="Gallery not found")
     
     # Check section creation permission with grandfathering
-    user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
+    user = await get_user_record(current_user["id"])
     if user:
         can_create, reason = await can_create_section_in_gallery(user, gallery)
         if not can_create:
@@ -6283,6 +6559,7 @@ async def create_photobooth_section(
     
     sections.append(new_section)
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery_id)
     
     return {
         "section": Section(**new_section),
@@ -6349,6 +6626,7 @@ async def refresh_photobooth_section(
             break
     
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery_id)
     
     if not scrape_result['success']:
         return {
@@ -6411,6 +6689,7 @@ async def delete_photobooth_section(
     
     sections = [s for s in sections if s["id"] != section_id]
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery_id)
     
     await db.photobooth_sessions.delete_many({"gallery_id": gallery_id, "section_id": section_id})
     
@@ -6432,7 +6711,7 @@ async def create_pcloud_section(
         raise HTTPException(status_code=404, detail="Gallery not found")
     
     # Check section creation permission with grandfathering
-    user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
+    user = await get_user_record(current_user["id"])
     if user:
         can_create, reason = await can_create_section_in_gallery(user, gallery)
         if not can_create:
@@ -6468,6 +6747,7 @@ async def create_pcloud_section(
         
         sections.append(new_section)
         await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+        invalidate_gallery_cache(gallery_id)
         
         # Store photos in database
         sync_time = datetime.now(timezone.utc).isoformat()
@@ -6492,7 +6772,7 @@ async def create_pcloud_section(
             })
         
         if pcloud_photos:
-            await db.pcloud_photos.insert_many(pcloud_photos)
+            await insert_counted(db, 'pcloud_photos', pcloud_photos)
         
         return {
             "section": new_section,
@@ -6521,6 +6801,7 @@ async def create_pcloud_section(
         
         sections.append(new_section)
         await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+        invalidate_gallery_cache(gallery_id)
         
         return {
             "section": new_section,
@@ -6550,58 +6831,40 @@ async def refresh_pcloud_section(
     
     # Fetch fresh data from pCloud
     pcloud_data = await fetch_pcloud_folder(code)
-    
-    # Update section status
-    for s in sections:
-        if s["id"] == section_id:
-            s["pcloud_last_sync"] = datetime.now(timezone.utc).isoformat()
-            s["pcloud_error"] = pcloud_data['error'] if not pcloud_data['success'] else None
-            break
-    
-    await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    sync_time = datetime.now(timezone.utc).isoformat()
     
     if not pcloud_data['success']:
+        await db.galleries.update_one(
+            {"id": gallery_id, "sections.id": section_id},
+            {"$set": {"sections.$.pcloud_last_sync": sync_time, "sections.$.pcloud_error": pcloud_data['error']}}
+        )
+        invalidate_gallery_cache(gallery_id)
         return {"success": False, "error": pcloud_data['error'], "photos_added": 0}
     
-    # Get existing photo fileids
-    existing = await db.pcloud_photos.find(
-        {"gallery_id": gallery_id, "section_id": section_id},
-        {"_id": 0, "fileid": 1}
-    ).to_list(10000)
-    existing_fileids = {p["fileid"] for p in existing}
-    
-    # Add new photos
-    sync_time = datetime.now(timezone.utc).isoformat()
-    existing_count = len(existing_fileids)
-    new_photos = []
-    
-    for photo in pcloud_data['photos']:
-        fileid_str = str(photo['fileid'])
-        if fileid_str not in existing_fileids:
-            new_photos.append({
-                "id": str(uuid.uuid4()),
-                "gallery_id": gallery_id,
-                "section_id": section_id,
-                "pcloud_code": code,
-                "fileid": fileid_str,  # Store as string
-                "name": photo['name'],
-                "size": photo.get('size', 0),
-                "width": photo.get('width'),
-                "height": photo.get('height'),
-                "contenttype": photo.get('contenttype', 'image/jpeg'),
-                "supplier_name": photo.get('supplier_name'),
-                "hash": str(photo.get('hash', '')) if photo.get('hash') else None,
-                "created_at_source": photo.get('created'),
-                "order": existing_count + len(new_photos),
-                "synced_at": sync_time
-            })
+    # Upsert new photos unless the listing is unchanged since the last sync
+    photos_added = 0
+    fingerprint = pcloud_fingerprint(pcloud_data['photos'])
+    if fingerprint != section.get("pcloud_fingerprint"):
+        base_order = await db.pcloud_photos.count_documents({"section_id": section_id})
+        docs = [
+            pcloud_photo_doc(gallery_id, section_id, code, photo, base_order + idx, sync_time)
+            for idx, photo in enumerate(pcloud_data['photos'])
+        ]
+        photos_added = await upsert_section_photos(db, 'pcloud_photos', gallery_id, section_id, docs)
     
-    if new_photos:
-        await db.pcloud_photos.insert_many(new_photos)
+    await db.galleries.update_one(
+        {"id": gallery_id, "sections.id": section_id},
+        {"$set": {
+            "sections.$.pcloud_last_sync": sync_time,
+            "sections.$.pcloud_error": None,
+            "sections.$.pcloud_fingerprint": fingerprint
+        }}
+    )
+    invalidate_gallery_cache(gallery_id)
     
     return {
         "success": True,
-        "photos_added": len(new_photos),
+        "photos_added": photos_added,
         "total_photos": len(pcloud_data['photos']),
         "subfolders": pcloud_data['subfolders']
     }
@@ -6644,98 +6907,118 @@ async def delete_pcloud_section(
     # Remove section
     sections = [s for s in sections if s["id"] != section_id]
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery_id)
     
     # Delete associated photos
-    await db.pcloud_photos.delete_many({"gallery_id": gallery_id, "section_id": section_id})
+    await delete_counted(db, 'pcloud_photos', {"gallery_id": gallery_id, "section_id": section_id})
     
     return {"message": "pCloud section deleted"}
 
+async def open_pcloud_upstream(code: str, fileid: str, range_header: Optional[str] = None):
+    """
+    Start streaming a pCloud original, walking the link's hosts in failover order.
+    The link is re-resolved once if every host rejects it (expired/revoked).
+    Returns the upstream response (200 or 206) - the caller must stream or release it.
+    """
+    status = 502
+    # Second round only if every host rejected the cached link
+    for _ in range(2):
+        # Get download URL from pCloud (fileid needs to be int for API)
+        download_info = await get_pcloud_download_url(code, int(fileid))
+        if not download_info:
+            raise HTTPException(status_code=404, detail="Could not get pCloud download URL")
+        
+        for url in download_info['urls']:
+            try:
+                response = await open_upstream(url, range_header)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"pCloud host failed for {code}/{fileid}: {e}")
+                pcloud_links.mark_host_failed(code, fileid, url)
+                status = 502
+                continue
+            if response.status in (200, 206):
+                return response
+            status = response.status
+            response.release()
+            if status == 416:
+                raise HTTPException(status_code=416, detail="Requested range not satisfiable")
+            pcloud_links.mark_host_failed(code, fileid, url)
+            if status < 500:
+                # Link rejected (expired/revoked) - other hosts will say the same
+                break
+        pcloud_links.invalidate(code, fileid)
+    raise HTTPException(status_code=status, detail="Failed to fetch from pCloud")
+
+async def stream_pcloud_original(request: Request, code: str, fileid: str, default_type: str,
+                                 headers: dict, download_filename: Optional[str] = None,
+                                 as_attachment: bool = False):
+    """
+    Stream a pCloud original to the client, honouring Range.
+    Disk cache hits skip pCloud entirely; a full (non-range) miss is written
+    to the cache while it streams, so the next request is a hit.
+    """
+    range_header = request.headers.get("range")
+    key = ("pcloud", code, fileid, "original")
+    
+    def response_headers(content_type: str, meta: dict) -> dict:
+        if not as_attachment:
+            return headers
+        # Determine filename
+        name = download_filename or meta.get("filename")
+        if not name:
+            # Default filename with extension based on content type
+            ext = 'jpg' if 'image' in content_type else 'bin'
+            name = f"pcloud_{fileid}.{ext}"
+        return {**headers, "Content-Disposition": f'attachment; filename="{name}"'}
+    
+    cached = await proxy_cache.open(key)
+    if cached:
+        handle, size, meta = cached
+        content_type = meta.get("content_type") or default_type
+        return stream_open_file(handle, size, content_type, range_header, response_headers(content_type, meta))
+    
+    response = await open_pcloud_upstream(code, fileid, range_header)
+    meta = {"content_type": response.headers.get('Content-Type', '')}
+    # Keep pCloud's filename for downloads
+    cd = response.headers.get('Content-Disposition', '')
+    if 'filename=' in cd:
+        meta["filename"] = cd.split('filename=')[1].strip('"\'')
+    content_type = meta["content_type"] or default_type
+    fill = proxy_cache.begin_fill(key, meta) if response.status == 200 else None
+    return stream_upstream_response(response, content_type, response_headers(content_type, meta), fill)
+
 @api_router.get("/pcloud/serve/{code}/{fileid}")
-async def serve_pcloud_image(code: str, fileid: str):
+async def serve_pcloud_image(request: Request, code: str, fileid: str):
     """
     Proxy a pCloud image through our server.
     This bypasses ISP blocking (e.g., Smart in Philippines blocks pCloud).
+    Bytes are streamed as they arrive; Range requests are supported.
+    """
+    return await stream_pcloud_original(
+        request, code, fileid,
+        default_type='image/jpeg',
+        headers={"Cache-Control": "public, max-age=3600"}  # Cache for 1 hour
+    )
+
+@api_router.get("/pcloud/download/{code}/{fileid}")
+async def download_pcloud_file(request: Request, code: str, fileid: str, filename: Optional[str] = None):
     """
-    # Get download URL from pCloud (fileid needs to be int for API)
-    download_info = await get_pcloud_download_url(code, int(fileid))
-    if not download_info:
-        raise HTTPException(status_code=404, detail="Could not get pCloud download URL")
-    
-    # Fetch the image
-    import aiohttp
-    try:
-        timeout = aiohttp.ClientTimeout(total=60)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(download_info['url']) as response:
-                if response.status != 200:
-                    raise HTTPException(status_code=response.status, detail="Failed to fetch from pCloud")
-                
-                content = await response.read()
-                content_type = response.headers.get('Content-Type', 'image/jpeg')
-                
-                return StreamingResponse(
-                    io.BytesIO(content),
-                    media_type=content_type,
-                    headers={
-                        "Cache-Control": "public, max-age=3600",  # Cache for 1 hour
-                        "Content-Length": str(len(content))
-                    }
-                )
-    except aiohttp.ClientError as e:
-        logger.error(f"Error proxying pCloud image: {e}")
-        raise HTTPException(status_code=502, detail="Failed to fetch image from pCloud")
-
-@api_router.get("/pcloud/download/{code}/{fileid}")
-async def download_pcloud_file(code: str, fileid: str, filename: Optional[str] = None):
-    """
-    Proxy a pCloud file download through our server.
-    This bypasses ISP blocking for downloads (some ISPs block e.pcloud.link).
+    Proxy a pCloud file download through our server.
+    This bypasses ISP blocking for downloads (some ISPs block e.pcloud.link).
+    Large originals are streamed, and Range requests allow resuming.
     
     Parameters:
     - code: pCloud folder code
     - fileid: File ID within the folder
     - filename: Optional filename for Content-Disposition header
     """
-    # Get download URL from pCloud
-    download_info = await get_pcloud_download_url(code, int(fileid))
-    if not download_info:
-        raise HTTPException(status_code=404, detail="Could not get pCloud download URL")
-    
-    import aiohttp
-    try:
-        timeout = aiohttp.ClientTimeout(total=300)  # 5 minute timeout for large files
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(download_info['url']) as response:
-                if response.status != 200:
-                    raise HTTPException(status_code=response.status, detail="Failed to fetch from pCloud")
-                
-                content = await response.read()
-                content_type = response.headers.get('Content-Type', 'application/octet-stream')
-                
-                # Determine filename
-                download_filename = filename
-                if not download_filename:
-                    # Try to get from Content-Disposition header
-                    cd = response.headers.get('Content-Disposition', '')
-                    if 'filename=' in cd:
-                        download_filename = cd.split('filename=')[1].strip('"\'')
-                    else:
-                        # Default filename with extension based on content type
-                        ext = 'jpg' if 'image' in content_type else 'bin'
-                        download_filename = f"pcloud_{fileid}.{ext}"
-                
-                return StreamingResponse(
-                    io.BytesIO(content),
-                    media_type=content_type,
-                    headers={
-                        "Content-Disposition": f'attachment; filename="{download_filename}"',
-                        "Content-Length": str(len(content)),
-                        "Cache-Control": "private, no-cache"
-                    }
-                )
-    except aiohttp.ClientError as e:
-        logger.error(f"Error proxying pCloud download: {e}")
-        raise HTTPException(status_code=502, detail="Failed to download from pCloud")
+    return await stream_pcloud_original(
+        request, code, fileid,
+        default_type='application/octet-stream',
+        headers={"Cache-Control": "private, no-cache"},
+        download_filename=filename,
+        as_attachment=True
+    )
 
 @api_router.get("/pcloud/thumb/{code}/{fileid}")
 async def serve_pcloud_thumbnail(code: str, fileid: str, size: str = "400x400"):
@@ -6746,39 +7029,41 @@ async def serve_pcloud_thumbnail(code: str, fileid: str, size: str = "400x400"):
     Size format: WIDTHxHEIGHT (e.g., 400x400, 200x200)
     Valid sizes: dimensions divisible by 4 or 5, between 16-2048 (max 1024 height)
     """
-    import aiohttp
-    
-    try:
+    async def fetch():
         # Use pCloud's getpubthumb API
         api_url = f"https://api.pcloud.com/getpubthumb?code={code}&fileid={fileid}&size={size}"
         
         timeout = aiohttp.ClientTimeout(total=30)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(api_url) as response:
-                if response.status != 200:
-                    # Fall back to serving full image if thumbnail fails
-                    logger.warning(f"pCloud thumbnail failed, status: {response.status}")
-                    raise HTTPException(status_code=response.status, detail="Thumbnail not available")
-                
-                content = await response.read()
-                content_type = response.headers.get('Content-Type', 'image/jpeg')
-                
-                return StreamingResponse(
-                    io.BytesIO(content),
-                    media_type=content_type,
-                    headers={
-                        "Cache-Control": "public, max-age=86400",  # Cache thumbnails for 24 hours
-                        "Content-Length": str(len(content))
-                    }
-                )
+        async with http_clients.client('pcloud').get(api_url, timeout=timeout) as response:
+            if response.status != 200:
+                logger.warning(f"pCloud thumbnail failed, status: {response.status}")
+                raise HTTPException(status_code=response.status, detail="Thumbnail not available")
+            content = await response.read()
+            return content, {"content_type": response.headers.get('Content-Type', 'image/jpeg')}
+    
+    try:
+        content, meta = await proxy_cache.get(("pcloud", code, fileid, size), fetch)
     except aiohttp.ClientError as e:
         logger.error(f"Error fetching pCloud thumbnail: {e}")
         raise HTTPException(status_code=502, detail="Failed to fetch thumbnail from pCloud")
+    
+    return StreamingResponse(
+        io.BytesIO(content),
+        media_type=meta["content_type"],
+        headers={
+            "Cache-Control": "public, max-age=86400",  # Cache thumbnails for 24 hours
+            "Content-Length": str(len(content))
+        }
+    )
 
 @api_router.get("/public/gallery/{share_link}/pcloud-photos")
-async def get_public_pcloud_photos(share_link: str, section_id: Optional[str] = None):
-    """Get pCloud photos for public gallery view"""
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+async def get_public_pcloud_photos(share_link: str, background_tasks: BackgroundTasks, section_id: Optional[str] = None):
+    """
+    Get pCloud photos for public gallery view.
+    Download links for the first photos are resolved in the background so
+    opening them in the lightbox skips the getpublinkdownload round-trip.
+    """
+    gallery = await get_gallery_by_share_link(share_link)
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
@@ -6797,6 +7082,12 @@ async def get_public_pcloud_photos(share_link: str, section_id: Optional[str] =
         photo["thumbnail_url"] = f"/pcloud/thumb/{code}/{fileid}?size=800x800"
         photo["download_url"] = f"/pcloud/download/{code}/{fileid}"  # Proxy download URL
     
+    fileids_by_code = {}
+    for photo in photos[:PCLOUD_LINK_PREWARM_LIMIT]:
+        fileids_by_code.setdefault(photo['pcloud_code'], []).append(photo['fileid'])
+    for code, fileids in fileids_by_code.items():
+        background_tasks.add_task(pcloud_links.resolve_many, code, fileids)
+    
     return photos
 
 # ============ Google Drive Section Endpoints ============
@@ -6847,6 +7138,7 @@ async def create_gdrive_section(
         
         sections.append(new_section)
         await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+        invalidate_gallery_cache(gallery_id)
         
         # Store photos in database
         sync_time = datetime.now(timezone.utc).isoformat()
@@ -6872,7 +7164,7 @@ async def create_gdrive_section(
             })
         
         if gdrive_photos:
-            await db.gdrive_photos.insert_many(gdrive_photos)
+            await insert_counted(db, 'gdrive_photos', gdrive_photos)
         
         return {
             "section": new_section,
@@ -6896,6 +7188,7 @@ async def create_gdrive_section(
         
         sections.append(new_section)
         await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+        invalidate_gallery_cache(gallery_id)
         
         return {
             "section": new_section,
@@ -6933,6 +7226,7 @@ async def refresh_gdrive_section(
                 "sections.$.gdrive_last_sync": datetime.now(timezone.utc).isoformat()
             }}
         )
+        invalidate_gallery_cache(gallery_id)
         raise HTTPException(status_code=400, detail=f"Failed to refresh: {gdrive_data['error']}")
     
     # Get existing photos to preserve highlight status
@@ -6943,43 +7237,31 @@ async def refresh_gdrive_section(
     existing_highlights = {p['file_id']: p.get('is_highlight', False) for p in existing_photos}
     
     # Delete old photos
-    await db.gdrive_photos.delete_many({"gallery_id": gallery_id, "section_id": section_id})
+    await delete_counted(db, 'gdrive_photos', {"gallery_id": gallery_id, "section_id": section_id})
     
     # Insert new photos
     sync_time = datetime.now(timezone.utc).isoformat()
-    gdrive_photos = []
-    for idx, photo in enumerate(gdrive_data['photos']):
-        file_id = photo['file_id']
-        gdrive_photos.append({
-            "id": str(uuid.uuid4()),
-            "gallery_id": gallery_id,
-            "section_id": section_id,
-            "gdrive_folder_id": folder_id,
-            "file_id": file_id,
-            "name": photo['name'],
-            "mime_type": photo.get('mime_type', 'image/jpeg'),
-            "size": photo.get('size', 0),
-            "width": photo.get('width'),
-            "height": photo.get('height'),
-            "thumbnail_url": photo['thumbnail_url'],
-            "view_url": photo['view_url'],
-            "created_time": photo.get('created_time'),
-            "order": idx,
-            "is_highlight": existing_highlights.get(file_id, False),  # Preserve highlight
-            "synced_at": sync_time
-        })
+    gdrive_photos = [
+        gdrive_photo_doc(gallery_id, section_id, folder_id, photo, idx, sync_time,
+                         is_highlight=existing_highlights.get(photo['file_id'], False))  # Preserve highlight
+        for idx, photo in enumerate(gdrive_data['photos'])
+    ]
     
     if gdrive_photos:
-        await db.gdrive_photos.insert_many(gdrive_photos)
+        await insert_counted(db, 'gdrive_photos', gdrive_photos)
     
-    # Update section
+    # Update section; the full listing is the new baseline for incremental syncs
     await db.galleries.update_one(
         {"id": gallery_id, "sections.id": section_id},
         {"$set": {
             "sections.$.gdrive_last_sync": sync_time,
-            "sections.$.gdrive_error": None
+            "sections.$.gdrive_error": None,
+            "sections.$.gdrive_fingerprint": gdrive_fingerprint(gdrive_data['photos']),
+            "sections.$.gdrive_watermark": gdrive_watermark(gdrive_data['photos']),
+            "sections.$.gdrive_full_sync_at": sync_time
         }}
     )
+    invalidate_gallery_cache(gallery_id)
     
     return {
         "message": "Google Drive section refreshed",
@@ -7000,9 +7282,10 @@ async def delete_gdrive_section(
     # Remove section from gallery
     sections = [s for s in gallery.get("sections", []) if s["id"] != section_id]
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery_id)
     
     # Delete photos from database
-    await db.gdrive_photos.delete_many({"gallery_id": gallery_id, "section_id": section_id})
+    await delete_counted(db, 'gdrive_photos', {"gallery_id": gallery_id, "section_id": section_id})
     
     return {"message": "Google Drive section deleted"}
 
@@ -7049,36 +7332,60 @@ async def get_public_gdrive_photos(share_link: str, section_id: Optional[str] =
     return photos
 
 @api_router.get("/gdrive/proxy/{file_id}")
-async def proxy_gdrive_image(file_id: str, thumb: bool = False):
-    """Proxy Google Drive images to avoid CORS issues"""
-    try:
-        if thumb:
-            url = f"https://drive.google.com/thumbnail?id={file_id}&sz=w800"
-        else:
-            url = f"https://drive.google.com/uc?export=view&id={file_id}"
+async def proxy_gdrive_image(request: Request, file_id: str, thumb: bool = False):
+    """
+    Proxy Google Drive images to avoid CORS issues.
+    Thumbnails are buffered through the disk cache; full images are streamed
+    (with Range support) and cached as they stream.
+    """
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+    response_headers = {
+        "Cache-Control": "public, max-age=86400",
+        "Access-Control-Allow-Origin": "*"
+    }
+    
+    if thumb:
+        url = f"https://drive.google.com/thumbnail?id={file_id}&sz=w800"
         
-        async with aiohttp.ClientSession() as session:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            async with session.get(url, headers=headers, allow_redirects=True) as response:
-                if response.status == 200:
-                    content = await response.read()
-                    content_type = response.headers.get('Content-Type', 'image/jpeg')
-                    
-                    return Response(
-                        content=content,
-                        media_type=content_type,
-                        headers={
-                            "Cache-Control": "public, max-age=86400",
-                            "Access-Control-Allow-Origin": "*"
-                        }
-                    )
-                else:
+        async def fetch():
+            async with http_clients.client('gdrive').get(url, headers=headers, allow_redirects=True) as response:
+                if response.status != 200:
                     raise HTTPException(status_code=response.status, detail="Failed to fetch image")
-    except Exception as e:
+                content = await response.read()
+                return content, {"content_type": response.headers.get('Content-Type', 'image/jpeg')}
+        
+        try:
+            content, meta = await proxy_cache.get(("gdrive", file_id, "thumb"), fetch)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error proxying Google Drive image: {e}")
+            raise HTTPException(status_code=500, detail="Failed to proxy image")
+        
+        return Response(content=content, media_type=meta["content_type"], headers=response_headers)
+    
+    range_header = request.headers.get("range")
+    key = ("gdrive", file_id, "full")
+    cached = await proxy_cache.open(key)
+    if cached:
+        handle, size, meta = cached
+        return stream_open_file(handle, size, meta["content_type"], range_header, response_headers)
+    
+    url = f"https://drive.google.com/uc?export=view&id={file_id}"
+    try:
+        response = await open_upstream(url, range_header, headers)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         logger.error(f"Error proxying Google Drive image: {e}")
         raise HTTPException(status_code=500, detail="Failed to proxy image")
+    if response.status not in (200, 206):
+        response.release()
+        raise HTTPException(status_code=response.status, detail="Failed to fetch image")
+    
+    meta = {"content_type": response.headers.get('Content-Type', 'image/jpeg')}
+    fill = proxy_cache.begin_fill(key, meta) if response.status == 200 else None
+    return stream_upstream_response(response, meta["content_type"], response_headers, fill)
 
 # ============ Gallery Videos Endpoints ============
 
@@ -7148,7 +7455,7 @@ async def create_video(
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
-    await db.gallery_videos.insert_one(video_doc)
+    await insert_counted(db, 'gallery_videos', video_doc)
     video_doc.pop("_id", None)
     
     return video_doc
@@ -7203,6 +7510,7 @@ async def update_video(
     
     if update_data:
         await db.gallery_videos.update_one({"id": video_id}, {"$set": update_data})
+        await record_display_changes(db, gallery_id, 'gallery_videos', [video_id])
     
     updated_video = await db.gallery_videos.find_one({"id": video_id}, {"_id": 0})
     return updated_video
@@ -7214,8 +7522,8 @@ async def delete_video(gallery_id: str, video_id: str, current_user: dict = Depe
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
-    result = await db.gallery_videos.delete_one({"id": video_id, "gallery_id": gallery_id})
-    if result.deleted_count == 0:
+    deleted_count = await delete_counted(db, 'gallery_videos', {"id": video_id, "gallery_id": gallery_id})
+    if deleted_count == 0:
         raise HTTPException(status_code=404, detail="Video not found")
     
     return {"message": "Video deleted"}
@@ -7239,6 +7547,7 @@ async def set_featured_video(gallery_id: str, video_id: str, current_user: dict
     
     # Set this video as featured
     await db.gallery_videos.update_one({"id": video_id}, {"$set": {"is_featured": True}})
+    await record_display_changes(db, gallery_id, 'gallery_videos', [video_id])
     
     return {"message": "Video set as featured", "video_id": video_id}
 
@@ -7346,6 +7655,7 @@ async def generate_contributor_link(gallery_id: str, section_id: str, current_us
     sections[section_idx]["contributor_enabled"] = True
     
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery_id)
     
     return {
         "contributor_link": contributor_link,
@@ -7371,6 +7681,7 @@ async def revoke_contributor_link(gallery_id: str, section_id: str, current_user
     # Note: We keep contributor_name to preserve attribution on existing photos
     
     await db.galleries.update_one({"id": gallery_id}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery_id)
     
     return {"message": "Contributor link revoked"}
 
@@ -7391,6 +7702,7 @@ async def generate_coordinator_link(gallery_id: str, current_user: dict = Depend
             {"id": gallery_id}, 
             {"$set": {"coordinator_hub_link": coordinator_hub_link}}
         )
+        invalidate_gallery_cache(gallery_id)
     
     return {
         "coordinator_hub_link": coordinator_hub_link,
@@ -7409,6 +7721,7 @@ async def revoke_coordinator_link(gallery_id: str, current_user: dict = Depends(
         {"id": gallery_id}, 
         {"$unset": {"coordinator_hub_link": ""}}
     )
+    invalidate_gallery_cache(gallery_id)
     
     return {"message": "Coordinator link revoked"}
 
@@ -7435,6 +7748,7 @@ async def update_coordinator_settings(gallery_id: str, data: dict = Body(...), c
     
     if update_data:
         await db.galleries.update_one({"id": gallery_id}, {"$set": update_data})
+        invalidate_gallery_cache(gallery_id)
     
     return {
         "message": "Coordinator settings updated",
@@ -7717,6 +8031,7 @@ async def create_section_from_hub(hub_link: str, data: dict = Body(...)):
         {"coordinator_hub_link": hub_link}, 
         {"$set": {"sections": sections}}
     )
+    invalidate_gallery_cache(gallery["id"])
     
     logger.info(f"Supplier created section '{section_name}' in gallery {gallery['id']} via Coordinator Hub")
     
@@ -7796,6 +8111,7 @@ async def reorder_sections_from_hub(hub_link: str, data: dict = Body(...)):
         {"coordinator_hub_link": hub_link},
         {"$set": {"sections": sections}}
     )
+    invalidate_gallery_cache(gallery["id"])
     
     return {"message": "Sections reordered", "sections": sections}
 
@@ -7840,6 +8156,7 @@ async def update_section_from_hub(hub_link: str, section_id: str, data: dict = B
         {"coordinator_hub_link": hub_link},
         {"$set": {"sections": sections}}
     )
+    invalidate_gallery_cache(gallery["id"])
     
     return {"message": "Section updated", "section": sections[section_idx]}
 
@@ -7881,15 +8198,16 @@ async def delete_section_from_hub(hub_link: str, section_id: str, data: dict = B
         {"coordinator_hub_link": hub_link},
         {"$set": {"sections": sections}}
     )
+    invalidate_gallery_cache(gallery["id"])
     
     # Also delete related content (photos, videos, etc.)
     gallery_id = gallery["id"]
-    await db.photos.delete_many({"gallery_id": gallery_id, "section_id": section_id})
-    await db.gallery_videos.delete_many({"gallery_id": gallery_id, "section_id": section_id})
-    await db.fotoshare_videos.delete_many({"gallery_id": gallery_id, "section_id": section_id})
+    await delete_counted(db, 'photos', {"gallery_id": gallery_id, "section_id": section_id})
+    await delete_counted(db, 'gallery_videos', {"gallery_id": gallery_id, "section_id": section_id})
+    await delete_counted(db, 'fotoshare_videos', {"gallery_id": gallery_id, "section_id": section_id})
     await db.photobooth_sessions.delete_many({"gallery_id": gallery_id, "section_id": section_id})
-    await db.gdrive_photos.delete_many({"gallery_id": gallery_id, "section_id": section_id})
-    await db.pcloud_photos.delete_many({"gallery_id": gallery_id, "section_id": section_id})
+    await delete_counted(db, 'gdrive_photos', {"gallery_id": gallery_id, "section_id": section_id})
+    await delete_counted(db, 'pcloud_photos', {"gallery_id": gallery_id, "section_id": section_id})
     
     logger.info(f"Section {section_id} deleted from gallery {gallery_id} via Coordinator Hub")
     
@@ -7926,6 +8244,7 @@ async def reset_section_password(hub_link: str, section_id: str, data: dict = Bo
         {"coordinator_hub_link": hub_link},
         {"$set": {"sections": sections}}
     )
+    invalidate_gallery_cache(gallery["id"])
     
     return {"message": "Section password reset successfully"}
 
@@ -8113,6 +8432,7 @@ async def set_contributor_name(contributor_link: str, data: dict = Body(...)):
         sections[section_idx]["contributor_role"] = contributor_role
     
     await db.galleries.update_one({"id": gallery["id"]}, {"$set": {"sections": sections}})
+    invalidate_gallery_cache(gallery["id"])
     
     return {"success": True, "company_name": company_name, "contributor_role": contributor_role}
 
@@ -8169,6 +8489,8 @@ async def submit_contributor_fotoshare(contributor_link: str, data: dict = Body(
         sections[section_idx]["contributor_name"] = company_name
         
         await db.galleries.update_one({"id": gallery["id"]}, {"$set": {"sections": sections}})
+        invalidate_gallery_cache(gallery["id"])
+        prioritize_fotoshare_section(gallery["id"], sections[section_idx]["id"])
     
     # Get existing video hashes to avoid duplicates
     existing_videos = await db.fotoshare_videos.find(
@@ -8200,7 +8522,7 @@ async def submit_contributor_fotoshare(contributor_link: str, data: dict = Body(
             new_videos.append(video_entry)
     
     if new_videos:
-        await db.fotoshare_videos.insert_many(new_videos)
+        await insert_counted(db, 'fotoshare_videos', new_videos)
     
     return {
         "success": True,
@@ -8258,6 +8580,7 @@ async def submit_contributor_photobooth(contributor_link: str, data: dict = Body
         sections[section_idx]["fotoshare_event_title"] = scrape_result.get('event_title')
         
         await db.galleries.update_one({"id": gallery["id"]}, {"$set": {"sections": sections}})
+        invalidate_gallery_cache(gallery["id"])
     
     # Get existing session hashes to avoid duplicates
     existing_sessions = await db.photobooth_sessions.find(
@@ -8325,6 +8648,7 @@ async def refresh_contributor_photobooth(contributor_link: str):
         sections[section_idx]["fotoshare_last_sync"] = now
         sections[section_idx]["fotoshare_expired"] = scrape_result.get('expired', False)
         await db.galleries.update_one({"id": gallery["id"]}, {"$set": {"sections": sections}})
+        invalidate_gallery_cache(gallery["id"])
     
     if not scrape_result['success']:
         return {
@@ -8425,9 +8749,10 @@ async def submit_contributor_gdrive(contributor_link: str, data: dict = Body(...
         sections[section_idx]["contributor_role"] = contributor_role
         
         await db.galleries.update_one({"id": gallery["id"]}, {"$set": {"sections": sections}})
+        invalidate_gallery_cache(gallery["id"])
     
     # Delete any existing photos for this section (in case of re-submission)
-    await db.gdrive_photos.delete_many({"gallery_id": gallery["id"], "section_id": section["id"]})
+    await delete_counted(db, 'gdrive_photos', {"gallery_id": gallery["id"], "section_id": section["id"]})
     
     # Store the photos
     gdrive_photos = []
@@ -8452,7 +8777,7 @@ async def submit_contributor_gdrive(contributor_link: str, data: dict = Body(...
         })
     
     if gdrive_photos:
-        await db.gdrive_photos.insert_many(gdrive_photos)
+        await insert_counted(db, 'gdrive_photos', gdrive_photos)
     
     return {
         "success": True,
@@ -8515,9 +8840,10 @@ async def submit_contributor_pcloud(contributor_link: str, data: dict = Body(...
         sections[section_idx]["contributor_role"] = contributor_role
         
         await db.galleries.update_one({"id": gallery["id"]}, {"$set": {"sections": sections}})
+        invalidate_gallery_cache(gallery["id"])
     
     # Delete any existing photos for this section (in case of re-submission)
-    await db.pcloud_photos.delete_many({"gallery_id": gallery["id"], "section_id": section["id"]})
+    await delete_counted(db, 'pcloud_photos', {"gallery_id": gallery["id"], "section_id": section["id"]})
     
     # Store the photos
     pcloud_photos = []
@@ -8541,7 +8867,7 @@ async def submit_contributor_pcloud(contributor_link: str, data: dict = Body(...
         })
     
     if pcloud_photos:
-        await db.pcloud_photos.insert_many(pcloud_photos)
+        await insert_counted(db, 'pcloud_photos', pcloud_photos)
     
     return {
         "success": True,
@@ -8643,7 +8969,8 @@ async def upload_contributor_photo(
             photo_id=photo_id,
             content=file_content,
             file_ext=file_ext,
-            content_type=file.content_type or 'image/jpeg'
+            content_type=file.content_type or 'image/jpeg',
+            defer_thumbnails=DEFER_THUMBNAILS
         )
         
         if not upload_result['success']:
@@ -8661,8 +8988,9 @@ async def upload_contributor_photo(
             f.write(file_content)
         photo_url = f"/api/photos/serve/{filename}"
         storage_key = filename
-        thumb_small = generate_thumbnail(file_path, photo_id, 'small')
-        thumb_medium = generate_thumbnail(file_path, photo_id, 'medium')
+        thumb_small = thumb_medium = None
+        if not DEFER_THUMBNAILS:
+            thumb_small, thumb_medium = await generate_photo_thumbnails(file_path, photo_id)
     
     photo = {
         "id": photo_id,
@@ -8680,7 +9008,8 @@ async def upload_contributor_photo(
         "is_highlight": False,
         "is_hidden": False,
         "is_flagged": False,
-        "auto_flagged": False
+        "auto_flagged": False,
+        "thumbnail_status": "pending" if DEFER_THUMBNAILS else ("ready" if thumb_small and thumb_medium else "failed")
     }
     
     # Add thumbnails if available
@@ -8689,7 +9018,10 @@ async def upload_contributor_photo(
     if thumb_medium:
         photo["thumbnail_medium_url"] = thumb_medium
     
-    await db.photos.insert_one(photo)
+    await insert_counted(db, 'photos', photo)
+    
+    if DEFER_THUMBNAILS:
+        await enqueue_thumbnail_job(photo)
     
     # Update gallery storage used
     await db.galleries.update_one(
@@ -8710,6 +9042,7 @@ async def upload_contributor_photo(
         if section_idx is not None:
             sections[section_idx]["contributor_name"] = company_name.strip()
             await db.galleries.update_one({"id": gallery["id"]}, {"$set": {"sections": sections}})
+            invalidate_gallery_cache(gallery["id"])
     
     # Update gallery photo count
     await db.galleries.update_one(
@@ -8720,7 +9053,8 @@ async def upload_contributor_photo(
     return {
         "id": photo_id,
         "url": photo["url"],
-        "thumbnail_url": photo["thumbnail_url"],
+        "thumbnail_url": photo.get("thumbnail_url"),
+        "thumbnail_status": photo["thumbnail_status"],
         "filename": file.filename
     }
 
@@ -8777,6 +9111,7 @@ async def upload_contributor_video(
     if section_idx is not None and not sections[section_idx].get("contributor_name"):
         sections[section_idx]["contributor_name"] = company_name.strip()
         await db.galleries.update_one({"id": gallery["id"]}, {"$set": {"sections": sections}})
+        invalidate_gallery_cache(gallery["id"])
     
     # Get existing videos count for order
     existing_count = await db.gallery_videos.count_documents({
@@ -8805,7 +9140,7 @@ async def upload_contributor_video(
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
-    await db.gallery_videos.insert_one(video_doc)
+    await insert_counted(db, 'gallery_videos', video_doc)
     
     return {
         "success": True,
@@ -8846,7 +9181,7 @@ async def delete_contributor_video(contributor_link: str, video_id: str, company
     if not video:
         raise HTTPException(status_code=404, detail="Video not found or you don't have permission to delete it")
     
-    await db.gallery_videos.delete_one({"id": video_id})
+    await delete_counted(db, 'gallery_videos', {"id": video_id}, gallery_id=gallery["id"])
     
     return {"success": True, "message": "Video deleted"}
 
@@ -8916,7 +9251,8 @@ async def upload_photo(gallery_id: str, file: UploadFile = File(...), section_id
                 photo_id=photo_id,
                 content=file_content,
                 file_ext=file_ext,
-                content_type=file.content_type or 'image/jpeg'
+                content_type=file.content_type or 'image/jpeg',
+                defer_thumbnails=DEFER_THUMBNAILS
             )
             
             if not upload_result['success']:
@@ -8948,9 +9284,10 @@ async def upload_photo(gallery_id: str, file: UploadFile = File(...), section_id
             photo_url = f"/api/photos/serve/{filename}"
             storage_key = filename  # For local, just use filename
             
-            # Generate thumbnails locally
-            thumb_small = generate_thumbnail(file_path, photo_id, 'small')
-            thumb_medium = generate_thumbnail(file_path, photo_id, 'medium')
+            # Generate thumbnails locally (or leave them to the job queue)
+            thumb_small = thumb_medium = None
+            if not DEFER_THUMBNAILS:
+                thumb_small, thumb_medium = await generate_photo_thumbnails(file_path, photo_id)
     
     # Update gallery storage used (per-gallery tracking)
     await db.galleries.update_one(
@@ -8977,33 +9314,37 @@ async def upload_photo(gallery_id: str, file: UploadFile = File(...), section_id
         "uploaded_at": datetime.now(timezone.utc).isoformat(),
         "is_flagged": False,
         "is_hidden": False,
-        "auto_flagged": False
+        "auto_flagged": False,
+        "thumbnail_status": "pending" if DEFER_THUMBNAILS else "ready"
     }
     
-    # Add thumbnail URLs if available
-    thumbnail_failed = False
-    if thumb_small:
-        photo_doc["thumbnail_url"] = thumb_small
-    else:
-        thumbnail_failed = True
-        logger.warning(f"Small thumbnail generation failed for {photo_id}")
-        
-    if thumb_medium:
-        photo_doc["thumbnail_medium_url"] = thumb_medium
-    else:
-        thumbnail_failed = True
-        logger.warning(f"Medium thumbnail generation failed for {photo_id}")
-    
-    # Auto-flag photo if thumbnails failed - it will be hidden from public gallery
-    if thumbnail_failed:
-        photo_doc["is_flagged"] = True
-        photo_doc["auto_flagged"] = True
-        photo_doc["flagged_at"] = datetime.now(timezone.utc).isoformat()
-        photo_doc["flagged_reason"] = "auto:thumbnail_generation_failed"
-        logger.info(f"Auto-flagged photo {photo_id} due to thumbnail generation failure")
+    # Add thumbnail URLs if available. Deferred uploads get them from the job queue,
+    # which also auto-flags the photo once its retries are exhausted.
+    if not DEFER_THUMBNAILS:
+        thumbnail_failed = False
+        if thumb_small:
+            photo_doc["thumbnail_url"] = thumb_small
+        else:
+            thumbnail_failed = True
+            logger.warning(f"Small thumbnail generation failed for {photo_id}")
+            
+        if thumb_medium:
+            photo_doc["thumbnail_medium_url"] = thumb_medium
+        else:
+            thumbnail_failed = True
+            logger.warning(f"Medium thumbnail generation failed for {photo_id}")
+        
+        # Auto-flag photo if thumbnails failed - it will be hidden from public gallery
+        if thumbnail_failed:
+            photo_doc["thumbnail_status"] = "failed"
+            photo_doc["is_flagged"] = True
+            photo_doc["auto_flagged"] = True
+            photo_doc["flagged_at"] = datetime.now(timezone.utc).isoformat()
+            photo_doc["flagged_reason"] = "auto:thumbnail_generation_failed"
+            logger.info(f"Auto-flagged photo {photo_id} due to thumbnail generation failure")
     
     try:
-        await db.photos.insert_one(photo_doc)
+        await insert_counted(db, 'photos', photo_doc)
     except Exception as e:
         logger.error(f"Error saving photo to database: {e}")
         # Clean up file if DB insert fails
@@ -9023,19 +9364,35 @@ async def upload_photo(gallery_id: str, file: UploadFile = File(...), section_id
         )
         raise HTTPException(status_code=500, detail="Failed to save photo record. Please try again.")
     
+    if DEFER_THUMBNAILS:
+        await enqueue_thumbnail_job(photo_doc)
+    
     return Photo(**{k: v for k, v in photo_doc.items() if k != '_id'})
 
-@api_router.get("/galleries/{gallery_id}/photos", response_model=List[Photo])
-async def get_gallery_photos(gallery_id: str, current_user: dict = Depends(get_current_user)):
+@api_router.get("/galleries/{gallery_id}/photos", response_model=Union[List[Photo], PhotoPage])
+async def get_gallery_photos(
+    gallery_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    List a gallery's photos. Without limit/cursor returns every photo (compatibility mode);
+    with either, returns one keyset page plus next_cursor.
+    """
     gallery = await db.galleries.find_one({"id": gallery_id, "photographer_id": current_user["id"]}, {"_id": 0})
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
+    if limit is not None or cursor:
+        page = await fetch_photo_page(db.photos, {"gallery_id": gallery_id}, {"_id": 0}, limit, cursor)
+        return PhotoPage(photos=[Photo(**p) for p in page["items"]], next_cursor=page["next_cursor"], has_more=page["has_more"])
+    
     # Get ALL photos - no limit, frontend handles progressive loading
     photos = await db.photos.find(
         {"gallery_id": gallery_id}, 
         {"_id": 0}
-    ).sort([("is_highlight", -1), ("order", 1), ("uploaded_at", -1)]).to_list(None)
+    ).sort(PHOTO_FEED_SORT).to_list(None)
     return [Photo(**p) for p in photos]
 
 @api_router.delete("/photos/{photo_id}")
@@ -9080,7 +9437,7 @@ async def delete_photo(photo_id: str, current_user: dict = Depends(get_current_u
             {"$inc": {"storage_used": -file_size}}
         )
     
-    await db.photos.delete_one({"id": photo_id})
+    await delete_counted(db, 'photos', {"id": photo_id}, gallery_id=photo["gallery_id"])
     
     return {"message": "Photo deleted"}
 
@@ -9176,9 +9533,11 @@ async def repair_gallery_thumbnails(gallery_id: str, data: ThumbnailRepairReques
                             "is_flagged": False,
                             "auto_flagged": False,
                             "flagged_at": None,
-                            "flagged_reason": None
+                            "flagged_reason": None,
+                            "thumbnail_status": "ready"
                         }}
                     )
+                    await record_photo_changes(db, [photo["id"]])
                     results["unflagged"] += 1
             else:
                 results["already_valid"] += 1
@@ -9212,9 +9571,11 @@ async def repair_single_photo_thumbnail(photo_id: str, data: ThumbnailRepairRequ
                 "is_flagged": False,
                 "auto_flagged": False,
                 "flagged_at": None,
-                "flagged_reason": None
+                "flagged_reason": None,
+                "thumbnail_status": "ready"
             }}
         )
+        await record_photo_changes(db, [photo_id])
         result["unflagged"] = True
     
     return result
@@ -9240,6 +9601,8 @@ async def unflag_photo(photo_id: str, current_user: dict = Depends(get_current_u
         }}
     )
     
+    await record_display_changes(db, photo["gallery_id"], 'photos', [photo_id])
+    
     return {"message": "Photo unflagged successfully", "photo_id": photo_id}
 
 @api_router.post("/photos/{photo_id}/flag")
@@ -9263,6 +9626,8 @@ async def flag_photo(photo_id: str, reason: str = "manual", current_user: dict =
         }}
     )
     
+    await record_display_changes(db, photo["gallery_id"], 'photos', [photo_id])
+    
     return {"message": "Photo flagged successfully", "photo_id": photo_id}
 
 @api_router.get("/galleries/{gallery_id}/flagged-photos")
@@ -9296,6 +9661,7 @@ async def reorder_photos(gallery_id: str, data: PhotoReorder, current_user: dict
             {"id": item["id"], "gallery_id": gallery_id},
             {"$set": {"order": item["order"]}}
         )
+    await record_display_changes(db, gallery_id, 'photos', [item["id"] for item in data.photo_orders])
     
     return {"message": "Photos reordered successfully"}
 
@@ -9349,7 +9715,7 @@ async def bulk_photo_action(gallery_id: str, data: BulkPhotoAction, current_user
                         {"id": current_user["id"]},
                         {"$inc": {"storage_used": -file_size}}
                     )
-                await db.photos.delete_one({"id": photo_id})
+                await delete_counted(db, 'photos', {"id": photo_id, "gallery_id": gallery_id})
                 affected_count += 1
     
     elif data.action == "move_section":
@@ -9390,6 +9756,8 @@ async def bulk_photo_action(gallery_id: str, data: BulkPhotoAction, current_user
     else:
         raise HTTPException(status_code=400, detail=f"Unknown action: {data.action}")
     
+    await record_display_changes(db, gallery_id, 'photos', data.photo_ids)
+    
     return {"message": f"Action '{data.action}' applied to {affected_count} photos", "affected_count": affected_count}
 
 @api_router.get("/og/gallery/{share_link}", response_class=HTMLResponse)
@@ -9398,7 +9766,7 @@ async def get_gallery_opengraph(share_link: str, request: Request):
     Serve Open Graph meta tags for social media preview.
     Social crawlers (Facebook, Twitter, WhatsApp, etc.) will fetch this to show rich previews.
     """
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+    gallery = await get_gallery_by_share_link(share_link)
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
@@ -9484,7 +9852,7 @@ async def get_gallery_opengraph(share_link: str, request: Request):
 @api_router.get("/og/gallery/{share_link}")
 async def get_gallery_og_meta(share_link: str, request: Request):
     """Get Open Graph meta tags for a gallery (for Facebook/social media sharing)"""
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+    gallery = await get_gallery_by_share_link(share_link)
     
     # Default values
     site_name = "EventsGallery"
@@ -9555,14 +9923,15 @@ async def get_gallery_og_meta(share_link: str, request: Request):
 
 @api_router.get("/public/gallery/{share_link}", response_model=PublicGallery)
 async def get_public_gallery(share_link: str):
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+    context = await get_public_gallery_context(share_link)
+    gallery = context["gallery"]
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
     # Check subscription grace period for gallery viewing
-    photographer = await db.users.find_one({"id": gallery["photographer_id"]}, {"_id": 0})
-    if photographer:
-        grace_periods = await check_subscription_grace_periods(photographer, gallery)
+    photographer = context["photographer"]
+    grace_periods = context["grace_periods"]
+    if grace_periods:
         if grace_periods["subscription_expired"] and not grace_periods["viewing_allowed"]:
             raise HTTPException(
                 status_code=403,
@@ -9592,34 +9961,16 @@ async def get_public_gallery(share_link: str):
             pass
     
     # Also disable guest uploads if subscription grace period expired
-    if photographer:
-        grace_periods = await check_subscription_grace_periods(photographer, gallery)
-        if grace_periods["subscription_expired"] and not grace_periods["uploads_allowed"]:
-            guest_upload_enabled = False
+    if grace_periods and grace_periods["subscription_expired"] and not grace_periods["uploads_allowed"]:
+        guest_upload_enabled = False
     
-    photographer = await db.users.find_one({"id": gallery["photographer_id"]}, {"_id": 0})
     sections = gallery.get("sections", [])
     
-    # Count photos from R2 storage
-    r2_photo_count = await db.photos.count_documents({"gallery_id": gallery["id"]})
-    
-    # Count photos from Google Drive sections
-    gdrive_photo_count = await db.gdrive_photos.count_documents({"gallery_id": gallery["id"]})
-    
-    # Count photos from pCloud sections
-    pcloud_photo_count = await db.pcloud_photos.count_documents({"gallery_id": gallery["id"]})
-    
-    # Total photo count (all sources)
-    total_photo_count = r2_photo_count + gdrive_photo_count + pcloud_photo_count
-    
-    # Count videos from Fotoshare/360Glam
-    fotoshare_video_count = await db.fotoshare_videos.count_documents({"gallery_id": gallery["id"]})
-    
-    # Count videos from YouTube (gallery_videos collection)
-    youtube_video_count = await db.gallery_videos.count_documents({"gallery_id": gallery["id"]})
-    
-    # Total video count
-    total_video_count = fotoshare_video_count + youtube_video_count
+    # Photo/video totals come from the gallery's denormalized counters
+    # (R2 photos + Google Drive + pCloud; Fotoshare + YouTube videos)
+    media_counts = await get_gallery_counts(db, gallery)
+    total_photo_count = gallery_photo_total(media_counts)
+    total_video_count = gallery_video_total(media_counts)
     
     # Use business_name if available, otherwise use personal name
     display_name = photographer.get("business_name") or photographer.get("name", "Unknown") if photographer else "Unknown"
@@ -9661,7 +10012,7 @@ async def get_public_gallery(share_link: str):
                 seen_entries.add(entry_key)
     
     # Check download lock status
-    download_check = await check_download_allowed(gallery)
+    download_check = await check_download_allowed(gallery, photographer=photographer or {})
     downloads_locked = not download_check["allowed"]
     downloads_locked_reason = download_check["reason"]
     
@@ -9691,31 +10042,37 @@ async def get_public_gallery(share_link: str):
 
 @api_router.post("/public/gallery/{share_link}/verify-password")
 async def verify_gallery_password(share_link: str, password_data: PasswordVerify):
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+    gallery = await get_gallery_by_share_link(share_link)
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
     if not gallery.get("password"):
         return {"valid": True}
     
-    if verify_password(password_data.password, gallery["password"]):
-        token = create_access_token({"gallery_id": gallery["id"], "type": "guest"})
-        return {"valid": True, "token": token}
+    if await verify_password(password_data.password, gallery["password"]):
+        return {"valid": True, "token": gallery_tokens.create(gallery, "guest")}
     else:
         raise HTTPException(status_code=401, detail="Invalid password")
 
 @api_router.get("/public/gallery/{share_link}/photos")
-async def get_public_gallery_photos(share_link: str, password: Optional[str] = None):
-    """Get photos for a public gallery - optimized with projection for fast loading"""
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+async def get_public_gallery_photos(
+    share_link: str,
+    password: Optional[str] = None,
+    token: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    """
+    Get photos for a public gallery - optimized with projection for fast loading.
+    Without limit/cursor returns every photo as a list (compatibility mode); with
+    either, returns {"photos", "next_cursor", "has_more"} for one keyset page.
+    Protected galleries take the guest token from verify-password (or the password).
+    """
+    gallery = await get_gallery_by_share_link(share_link)
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
-    if gallery.get("password") and not password:
-        raise HTTPException(status_code=401, detail="Password required")
-    
-    if gallery.get("password") and not verify_password(password, gallery["password"]):
-        raise HTTPException(status_code=401, detail="Invalid password")
+    await gallery_tokens.require_access(gallery, "guest", password, token, "Password required", "Invalid password")
     
     # Optimized projection - only fetch fields needed for gallery grid display
     # This significantly reduces payload size for large galleries (2000+ photos)
@@ -9737,29 +10094,28 @@ async def get_public_gallery_photos(share_link: str, password: Optional[str] = N
     }
     
     # Get photos excluding hidden AND flagged ones
-    photos = await db.photos.find(
-        {
-            "gallery_id": gallery["id"], 
-            "is_hidden": {"$ne": True},
-            "is_flagged": {"$ne": True}
-        }, 
-        projection
-    ).sort([("is_highlight", -1), ("order", 1), ("uploaded_at", -1)]).to_list(None)
+    query = {
+        "gallery_id": gallery["id"], 
+        "is_hidden": {"$ne": True},
+        "is_flagged": {"$ne": True}
+    }
+    
+    if limit is not None or cursor:
+        page = await fetch_photo_page(db.photos, query, projection, limit, cursor)
+        return {"photos": page["items"], "next_cursor": page["next_cursor"], "has_more": page["has_more"]}
+    
+    photos = await db.photos.find(query, projection).sort(PHOTO_FEED_SORT).to_list(None)
     
     return photos
 
 @api_router.get("/public/gallery/{share_link}/videos")
-async def get_public_gallery_videos(share_link: str, password: Optional[str] = None):
+async def get_public_gallery_videos(share_link: str, password: Optional[str] = None, token: Optional[str] = None):
     """Get videos for a public gallery"""
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+    gallery = await get_gallery_by_share_link(share_link)
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
-    if gallery.get("password") and not password:
-        raise HTTPException(status_code=401, detail="Password required")
-    
-    if gallery.get("password") and not verify_password(password, gallery["password"]):
-        raise HTTPException(status_code=401, detail="Invalid password")
+    await gallery_tokens.require_access(gallery, "guest", password, token, "Password required", "Invalid password")
     
     # Get videos sorted by featured first, then order
     videos = await db.gallery_videos.find(
@@ -9769,81 +10125,154 @@ async def get_public_gallery_videos(share_link: str, password: Optional[str] = N
     
     return videos
 
+DISPLAY_PHOTO_PROJECTION = {"_id": 0, "id": 1, "url": 1, "thumbnail_url": 1, "thumbnail_medium_url": 1, "is_highlight": 1, "uploaded_at": 1}
+
+def _display_upload_photo(photo: dict) -> dict:
+    """Mark a regular photo with its source and pick the display URL"""
+    photo["source"] = "upload"
+    # Prefer medium thumbnail (typically 1200px) for display - sharp but fast
+    if photo.get("thumbnail_medium_url"):
+        photo["display_url"] = photo["thumbnail_medium_url"]
+    else:
+        photo["display_url"] = photo.get("url", "")
+    return photo
+
+def _display_pcloud_photo(p: dict) -> dict:
+    """pCloud photo in display format, via the 1600x1600 thumbnail API (sharp but compressed)"""
+    pcloud_code = p.get('pcloud_code')
+    fileid = p.get('fileid')
+    optimized_url = f"/api/pcloud/thumb/{pcloud_code}/{fileid}?size=1600x1600"
+    return {
+        "id": p.get("id"),
+        "url": optimized_url,
+        "thumbnail_url": optimized_url,
+        "thumbnail_medium_url": optimized_url,
+        "display_url": optimized_url,  # Explicit display-optimized URL
+        "is_highlight": False,
+        "uploaded_at": p.get("created_at", ""),
+        "source": "pcloud",
+        "supplier_name": p.get("supplier_name")
+    }
+
+def _display_gdrive_photo(g: dict) -> dict:
+    """Google Drive photo in display format, w1600 thumbnail (max supported is w2000)"""
+    file_id = g.get('file_id')
+    optimized_url = f"https://drive.google.com/thumbnail?id={file_id}&sz=w1600"
+    return {
+        "id": g.get("id"),
+        "url": optimized_url,
+        "thumbnail_url": optimized_url,
+        "thumbnail_medium_url": optimized_url,
+        "display_url": optimized_url,  # Explicit display-optimized URL
+        "is_highlight": False,
+        "uploaded_at": g.get("created_at", ""),
+        "source": "gdrive",
+        "file_id": file_id
+    }
+
+async def get_display_videos(gallery_id: str) -> list:
+    """Videos shown on display screens (featured first, at most 50)"""
+    return await db.gallery_videos.find(
+        {"gallery_id": gallery_id},
+        {"_id": 0}
+    ).sort([("is_featured", -1), ("order", 1)]).to_list(50)
+
+async def fetch_display_photo_page(gallery_id: str, limit: Optional[int], cursor: Optional[str]) -> dict:
+    """
+    One page of the display feed: uploads (feed order), then pCloud, then Google Drive.
+    The cursor records which source it is in and the keyset position inside it.
+    """
+    visible_uploads = {"gallery_id": gallery_id, "is_hidden": {"$ne": True}, "is_flagged": {"$ne": True}}
+    sources = [
+        ("upload", db.photos, visible_uploads, PHOTO_FEED_SORT, DISPLAY_PHOTO_PROJECTION, _display_upload_photo),
+        ("pcloud", db.pcloud_photos, {"gallery_id": gallery_id}, [("id", 1)], {"_id": 0}, _display_pcloud_photo),
+        ("gdrive", db.gdrive_photos, {"gallery_id": gallery_id}, [("id", 1)], {"_id": 0}, _display_gdrive_photo),
+    ]
+    names = [source[0] for source in sources]
+    start, inner_cursor = 0, None
+    if cursor:
+        try:
+            source_name, inner_cursor = decode_cursor(cursor, 2)
+            start = names.index(source_name)
+        except (InvalidCursor, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    remaining = clamp_page_size(limit)
+    photos = []
+    for index in range(start, len(sources)):
+        name, collection, query, sort, projection, to_display = sources[index]
+        try:
+            page = await fetch_page(collection, query, sort, projection, remaining, inner_cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        inner_cursor = None
+        photos.extend(to_display(item) for item in page["items"])
+        remaining -= len(page["items"])
+        if page["has_more"]:
+            return {"photos": photos, "next_cursor": encode_cursor([name, page["next_cursor"]]), "has_more": True}
+        if remaining <= 0:
+            # Page is full exactly at the end of this source; continue with the next one
+            if index + 1 < len(sources):
+                return {"photos": photos, "next_cursor": encode_cursor([names[index + 1], None]), "has_more": True}
+            break
+    return {"photos": photos, "next_cursor": None, "has_more": False}
+
 @api_router.get("/display/{share_link}")
-async def get_display_data(share_link: str):
-    """Get gallery data optimized for display/slideshow mode - no password required"""
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+async def get_display_data(request: Request, share_link: str, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """
+    Get gallery data optimized for display/slideshow mode - no password required.
+    With limit/cursor, "photos" holds one page and next_cursor/has_more are added;
+    without them every photo is returned (compatibility mode).
+    
+    The response carries "version" and an ETag; unchanged polls get 304 Not Modified.
+    Screens can then follow /display/{share_link}/changes?since=<version>.
+    """
+    gallery = await get_gallery_by_share_link(share_link)
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
-    # Get all visible photos for display (no limit - frontend handles pagination)
-    # Use thumbnail_medium_url for display - optimized size for large screens
-    photos = await db.photos.find(
-        {
-            "gallery_id": gallery["id"],
-            "is_hidden": {"$ne": True},
-            "is_flagged": {"$ne": True}
-        },
-        {"_id": 0, "id": 1, "url": 1, "thumbnail_url": 1, "thumbnail_medium_url": 1, "is_highlight": 1, "uploaded_at": 1}
-    ).sort([("is_highlight", -1), ("order", 1), ("uploaded_at", -1)]).to_list(None)
-    
-    # Mark regular photos with source type and optimize URL for display
-    for photo in photos:
-        photo["source"] = "upload"
-        # Prefer medium thumbnail (typically 1200px) for display - sharp but fast
-        if photo.get("thumbnail_medium_url"):
-            photo["display_url"] = photo["thumbnail_medium_url"]
-        else:
-            photo["display_url"] = photo.get("url", "")
-    
-    # Get pCloud photos and format them for display
-    # Use pCloud's thumbnail API for faster loading on large screens (1600px wide, sharp but compressed)
-    pcloud_photos_raw = await db.pcloud_photos.find(
-        {"gallery_id": gallery["id"]},
-        {"_id": 0}
-    ).to_list(None)
-    
-    # Convert pCloud photos to display format with optimized thumbnail sizes
-    for p in pcloud_photos_raw:
-        pcloud_code = p.get('pcloud_code')
-        fileid = p.get('fileid')
-        # Use 1600x1600 thumbnail for display - sharp but fast loading
-        optimized_url = f"/api/pcloud/thumb/{pcloud_code}/{fileid}?size=1600x1600"
-        photos.append({
-            "id": p.get("id"),
-            "url": optimized_url,
-            "thumbnail_url": optimized_url,
-            "thumbnail_medium_url": optimized_url,
-            "display_url": optimized_url,  # Explicit display-optimized URL
-            "is_highlight": False,
-            "uploaded_at": p.get("created_at", ""),
-            "source": "pcloud",
-            "supplier_name": p.get("supplier_name")
-        })
-    
-    # Get Google Drive photos and format them for display
-    gdrive_photos_raw = await db.gdrive_photos.find(
-        {"gallery_id": gallery["id"]},
-        {"_id": 0}
-    ).to_list(None)
-    
-    # Convert Google Drive photos to display format
-    # Use w1600 for sharp display on large screens (max supported is w2000)
-    for g in gdrive_photos_raw:
-        file_id = g.get('file_id')
-        # Use 1600px wide thumbnail - sharp for large screens, faster than full image
-        optimized_url = f"https://drive.google.com/thumbnail?id={file_id}&sz=w1600"
-        photos.append({
-            "id": g.get("id"),
-            "url": optimized_url,
-            "thumbnail_url": optimized_url,
-            "thumbnail_medium_url": optimized_url,
-            "display_url": optimized_url,  # Explicit display-optimized URL
-            "is_highlight": False,
-            "uploaded_at": g.get("created_at", ""),
-            "source": "gdrive",
-            "file_id": file_id
-        })
+    # Version is read before the photos so the snapshot contains everything up to it
+    state = await get_display_state(db, gallery["id"])
+    if state is None:
+        raise HTTPException(status_code=404, detail="Gallery not found")
+    if display_meta_hash(gallery) != state["meta_hash"]:
+        # Cached gallery is behind the database - don't serve old settings under a new ETag
+        invalidate_gallery_cache(gallery["id"])
+        gallery = await get_gallery_by_share_link(share_link) or gallery
+    etag = display_etag(gallery["id"], state)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    
+    page = None
+    if limit is not None or cursor:
+        page = await fetch_display_photo_page(gallery["id"], limit, cursor)
+        photos = page["photos"]
+    else:
+        # Get all visible photos for display
+        # Use thumbnail_medium_url for display - optimized size for large screens
+        photos = await db.photos.find(
+            {
+                "gallery_id": gallery["id"],
+                "is_hidden": {"$ne": True},
+                "is_flagged": {"$ne": True}
+            },
+            DISPLAY_PHOTO_PROJECTION
+        ).sort(PHOTO_FEED_SORT).to_list(None)
+        photos = [_display_upload_photo(photo) for photo in photos]
+        
+        # Get pCloud photos and format them for display
+        pcloud_photos_raw = await db.pcloud_photos.find(
+            {"gallery_id": gallery["id"]},
+            {"_id": 0}
+        ).to_list(None)
+        photos.extend(_display_pcloud_photo(p) for p in pcloud_photos_raw)
+        
+        # Get Google Drive photos and format them for display
+        gdrive_photos_raw = await db.gdrive_photos.find(
+            {"gallery_id": gallery["id"]},
+            {"_id": 0}
+        ).to_list(None)
+        photos.extend(_display_gdrive_photo(g) for g in gdrive_photos_raw)
     
     # Get photographer info for branding
     photographer = await db.users.find_one({"id": gallery["photographer_id"]}, {"_id": 0, "business_name": 1, "name": 1})
@@ -9859,10 +10288,7 @@ async def get_display_data(share_link: str):
         collage_preset = await db.collage_presets.find_one({"is_default": True}, {"_id": 0})
     
     # Get videos for video sections
-    videos = await db.gallery_videos.find(
-        {"gallery_id": gallery["id"]},
-        {"_id": 0}
-    ).sort([("is_featured", -1), ("order", 1)]).to_list(50)
+    videos = await get_display_videos(gallery["id"])
     
     # Count photos by source
     upload_count = len([p for p in photos if p.get("source") == "upload"])
@@ -9871,8 +10297,10 @@ async def get_display_data(share_link: str):
     
     logger.info(f"Display data for {share_link}: {upload_count} uploads, {pcloud_count} pCloud, {gdrive_count} GDrive photos")
     
-    return {
+    content = {
         "gallery_id": gallery["id"],
+        "version": state["version"],
+        "meta_hash": state["meta_hash"],
         "title": gallery.get("title", ""),
         "event_title": gallery.get("event_title", ""),
         "event_date": gallery.get("event_date", ""),
@@ -9890,13 +10318,72 @@ async def get_display_data(share_link: str):
         },
         "videos": videos,
         "sections": gallery.get("sections", []),
-        "last_updated": max([p.get("uploaded_at", "") for p in photos if p.get("uploaded_at")]) if photos else ""
+        "last_updated": max([p.get("uploaded_at", "") for p in photos if p.get("uploaded_at")]) if photos else "",
+        **({"next_cursor": page["next_cursor"], "has_more": page["has_more"]} if page else {})
     }
+    return JSONResponse(content=jsonable_encoder(content), headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+@api_router.get("/display/{share_link}/changes")
+async def get_display_changes_since(request: Request, share_link: str, since: int = Query(..., ge=0)):
+    """
+    Incremental display feed: photos added/changed ("upserted") or removed since
+    display version `since`. Returns 304 when nothing changed. "videos" is the
+    full video list when any video changed, otherwise null. "resync": true means
+    the change log no longer covers `since` - refetch /display/{share_link}.
+    A changed "meta_hash" means gallery settings changed - refetch as well.
+    """
+    gallery = await get_gallery_by_share_link(share_link)
+    if not gallery:
+        raise HTTPException(status_code=404, detail="Gallery not found")
+    
+    gallery_id = gallery["id"]
+    state = await get_display_state(db, gallery_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Gallery not found")
+    etag = display_etag(gallery_id, state, f"-since-{since}")
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if since == state["version"] or request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    changes = await get_display_changes(db, gallery_id, since, state["version"])
+    if changes is None:
+        return JSONResponse(
+            content={"resync": True, "version": state["version"], "meta_hash": state["meta_hash"]},
+            headers=headers
+        )
+    
+    touched = changes["touched"]
+    upserted, removed = [], []
+    visible = {"gallery_id": gallery_id, "is_hidden": {"$ne": True}, "is_flagged": {"$ne": True}}
+    source_queries = [
+        ("upload", db.photos, visible, DISPLAY_PHOTO_PROJECTION, _display_upload_photo),
+        ("pcloud", db.pcloud_photos, {"gallery_id": gallery_id}, {"_id": 0}, _display_pcloud_photo),
+        ("gdrive", db.gdrive_photos, {"gallery_id": gallery_id}, {"_id": 0}, _display_gdrive_photo),
+    ]
+    for source, collection, query, projection, to_display in source_queries:
+        ids = touched.get(source)
+        if not ids:
+            continue
+        found = await collection.find({**query, "id": {"$in": list(ids)}}, projection).to_list(None)
+        upserted.extend(to_display(item) for item in found)
+        removed.extend(ids - {item["id"] for item in found})
+    
+    videos = await get_display_videos(gallery_id) if touched.get("video") else None
+    
+    return JSONResponse(content=jsonable_encoder({
+        "resync": False,
+        "since": since,
+        "version": changes["version"],
+        "meta_hash": state["meta_hash"],
+        "upserted": upserted,
+        "removed": sorted(removed),
+        "videos": videos
+    }), headers=headers)
 
 @api_router.post("/public/gallery/{share_link}/check-duplicates", response_model=DuplicateCheckResponse)
 async def check_duplicate_files(share_link: str, request: DuplicateCheckRequest):
     """Check for duplicates using content hash (preferred) or filename fallback"""
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+    gallery = await get_gallery_by_share_link(share_link)
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
@@ -9952,17 +10439,18 @@ async def upload_photo_guest(
     share_link: str, 
     file: UploadFile = File(...), 
     password: Optional[str] = Form(None),
+    token: Optional[str] = Form(None),  # guest token from verify-password
     content_hash: Optional[str] = Form(None)  # MD5 hash from frontend
 ):
     """Optimized guest photo upload with hash-based duplicate detection"""
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+    context = await get_public_gallery_context(share_link)
+    gallery = context["gallery"]
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
     # Check subscription grace period for guest uploads
-    photographer = await db.users.find_one({"id": gallery["photographer_id"]}, {"_id": 0})
-    if photographer:
-        grace_periods = await check_subscription_grace_periods(photographer, gallery)
+    grace_periods = context["grace_periods"]
+    if grace_periods:
         if grace_periods["subscription_expired"] and not grace_periods["uploads_allowed"]:
             raise HTTPException(
                 status_code=403,
@@ -10017,11 +10505,7 @@ async def upload_photo_guest(
         except (ValueError, AttributeError):
             pass
     
-    if gallery.get("password"):
-        if not password:
-            raise HTTPException(status_code=401, detail="Password required")
-        if not verify_password(password, gallery["password"]):
-            raise HTTPException(status_code=401, detail="Invalid password")
+    await gallery_tokens.require_access(gallery, "guest", password, token, "Password required", "Invalid password")
     
     # Validate file type more thoroughly
     allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/webp', 'image/heic', 'image/heif']
@@ -10062,15 +10546,17 @@ async def upload_photo_guest(
         logger.error(f"Error reading guest upload: {e}")
         raise HTTPException(status_code=400, detail="Failed to read uploaded file")
     
-    # Check per-gallery storage quota
-    gallery_storage_used = gallery.get("storage_used", 0)
+    # Check per-gallery storage quota (storage_used read fresh - the cached gallery may lag behind)
     gallery_storage_quota = gallery.get("storage_quota", -1)
     
-    if gallery_storage_quota != -1 and gallery_storage_used + file_size > gallery_storage_quota:
-        raise HTTPException(
-            status_code=403, 
-            detail="This gallery has reached its storage limit. Please contact the photographer."
-        )
+    if gallery_storage_quota != -1:
+        usage = await db.galleries.find_one({"id": gallery["id"]}, {"_id": 0, "storage_used": 1})
+        gallery_storage_used = (usage or {}).get("storage_used", 0)
+        if gallery_storage_used + file_size > gallery_storage_quota:
+            raise HTTPException(
+                status_code=403, 
+                detail="This gallery has reached its storage limit. Please contact the photographer."
+            )
     
     photo_id = str(uuid.uuid4())
     # Sanitize file extension
@@ -10087,7 +10573,8 @@ async def upload_photo_guest(
                 photo_id=photo_id,
                 content=file_content,
                 file_ext=file_ext,
-                content_type=file.content_type or 'image/jpeg'
+                content_type=file.content_type or 'image/jpeg',
+                defer_thumbnails=DEFER_THUMBNAILS
             )
             
             if not upload_result['success']:
@@ -10119,8 +10606,9 @@ async def upload_photo_guest(
             
             photo_url = f"/api/photos/serve/{filename}"
             storage_key = filename
-            thumb_small = generate_thumbnail(file_path, photo_id, 'small')
-            thumb_medium = generate_thumbnail(file_path, photo_id, 'medium')
+            thumb_small = thumb_medium = None
+            if not DEFER_THUMBNAILS:
+                thumb_small, thumb_medium = await generate_photo_thumbnails(file_path, photo_id)
     
     photo_doc = {
         "id": photo_id,
@@ -10136,7 +10624,8 @@ async def upload_photo_guest(
         "uploaded_at": datetime.now(timezone.utc).isoformat(),
         "is_flagged": False,
         "is_hidden": False,
-        "auto_flagged": False
+        "auto_flagged": False,
+        "thumbnail_status": "pending" if DEFER_THUMBNAILS else ("ready" if thumb_small and thumb_medium else "failed")
     }
     
     # Add thumbnails if available
@@ -10146,7 +10635,7 @@ async def upload_photo_guest(
         photo_doc["thumbnail_medium_url"] = thumb_medium
     
     try:
-        await db.photos.insert_one(photo_doc)
+        await insert_counted(db, 'photos', photo_doc)
         
         # Update gallery storage used
         await db.galleries.update_one(
@@ -10168,11 +10657,14 @@ async def upload_photo_guest(
                 pass
         raise HTTPException(status_code=500, detail="Failed to save photo record. Please try again.")
     
+    if DEFER_THUMBNAILS:
+        await enqueue_thumbnail_job(photo_doc)
+    
     return Photo(**{k: v for k, v in photo_doc.items() if k != '_id'})
 
 @api_router.post("/public/gallery/{share_link}/download-all")
 async def download_all_photos(share_link: str, password_data: PasswordVerify):
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+    gallery = await get_gallery_by_share_link(share_link)
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
@@ -10184,22 +10676,19 @@ async def download_all_photos(share_link: str, password_data: PasswordVerify):
     if not gallery.get("download_all_password"):
         raise HTTPException(status_code=403, detail="Download all is not enabled for this gallery")
     
-    if not verify_password(password_data.password, gallery["download_all_password"]):
+    if not await verify_password(password_data.password, gallery["download_all_password"]):
         raise HTTPException(status_code=401, detail="Invalid download password")
     
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Stream photos in batches to avoid memory issues
+    async def local_photo_entries():
+        # Stream photos from the cursor so only one file is held at a time
         cursor = db.photos.find({"gallery_id": gallery["id"]}, {"_id": 0}).limit(1000)
         async for photo in cursor:
             file_path = UPLOAD_DIR / photo["filename"]
             if file_path.exists():
-                zip_file.write(file_path, photo["filename"])
-    
-    zip_buffer.seek(0)
+                yield photo["filename"], iter_file_chunks(file_path)
     
     return StreamingResponse(
-        iter([zip_buffer.getvalue()]),
+        stream_zip(local_photo_entries()),
         media_type="application/zip",
         headers={
             "Content-Disposition": f"attachment; filename={gallery['title'].replace(' ', '_')}_photos.zip",
@@ -10210,6 +10699,65 @@ async def download_all_photos(share_link: str, password_data: PasswordVerify):
 
 # ============ PHOTOGRAPHER DOWNLOAD (NO PASSWORD) ============
 
+# Prefetch settings for ZIP downloads (CDN/R2 photos fetched ahead of the ZIP writer)
+DOWNLOAD_PREFETCH_CONCURRENCY = int(os.environ.get('DOWNLOAD_PREFETCH_CONCURRENCY', '8'))
+DOWNLOAD_PREFETCH_RETRIES = int(os.environ.get('DOWNLOAD_PREFETCH_RETRIES', '2'))
+DOWNLOAD_PREFETCH_BYTE_BUDGET = int(os.environ.get('DOWNLOAD_PREFETCH_BYTE_BUDGET_MB', '64')) * 1024 * 1024
+
+def _photo_size_hint(photo: dict) -> int:
+    """Best-known size of a photo for prefetch budgeting"""
+    return photo.get("file_size") or photo.get("size") or 0
+
+async def iter_photo_zip_entries(photos: list):
+    """
+    Yield (archive_name, data) pairs for stream_zip, in photo order.
+    Local files are streamed from disk in chunks. R2/CDN photos are prefetched
+    with bounded concurrency over one pooled HTTP client, and buffered data is
+    capped by DOWNLOAD_PREFETCH_BYTE_BUDGET. Failed fetches yield None and are skipped.
+    """
+    async with http_clients.client('cdn') as client:
+        async def fetch_photo(photo: dict):
+            # Try local file first - streamed lazily, nothing buffered
+            if photo.get("filename"):
+                file_path = UPLOAD_DIR / photo["filename"]
+                if file_path.exists():
+                    return iter_file_chunks(file_path)
+            
+            # R2 object by key avoids the public CDN round-trip
+            storage_key = photo.get("storage_key")
+            if storage.r2_enabled and storage_key and storage_key.startswith("photos/"):
+                data = await storage.get_file(storage_key)
+                if data is not None:
+                    return data
+            
+            # Fall back to fetching from CDN/URL
+            if not photo.get("url"):
+                return None
+            url = photo["url"]
+            if url.startswith("/"):
+                return None
+            async with client.get(url, allow_redirects=True) as response:
+                if response.status == 200:
+                    return await response.read()
+                if response.status in (403, 404, 410):
+                    return None
+                # Transient upstream error - raise so the prefetcher retries
+                response.raise_for_status()
+                raise aiohttp.ClientError(f"Unexpected status {response.status} for {url}")
+        
+        async for photo, photo_data in prefetch_ordered(
+            photos,
+            fetch_photo,
+            concurrency=DOWNLOAD_PREFETCH_CONCURRENCY,
+            retries=DOWNLOAD_PREFETCH_RETRIES,
+            byte_budget=DOWNLOAD_PREFETCH_BYTE_BUDGET,
+            size_hint=_photo_size_hint,
+        ):
+            archive_name = photo.get("original_filename", photo.get("filename", f"photo_{photo.get('id', 'unknown')}.jpg"))
+            if photo_data is None:
+                logger.warning(f"Skipping photo {photo.get('id')} in ZIP - could not fetch {photo.get('url')}")
+            yield archive_name, photo_data
+
 # Max size per zip chunk (200MB)
 MAX_ZIP_CHUNK_SIZE = 200 * 1024 * 1024
 
@@ -10337,35 +10885,6 @@ async def download_gallery_chunk(gallery_id: str, chunk_number: int, current_use
     # Get the requested chunk (1-indexed)
     chunk_photos = chunks[chunk_number - 1]
     
-    # Create zip file
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for photo in chunk_photos:
-            photo_data = None
-            archive_name = photo.get("original_filename", photo.get("filename", f"photo_{photo.get('id', 'unknown')}.jpg"))
-            
-            # Try local file first
-            if photo.get("filename"):
-                file_path = UPLOAD_DIR / photo["filename"]
-                if file_path.exists():
-                    zip_file.write(file_path, archive_name)
-                    continue
-            
-            # Try fetching from CDN/URL
-            if photo.get("url"):
-                try:
-                    async with httpx.AsyncClient(timeout=30.0) as client:
-                        response = await client.get(photo["url"])
-                        if response.status_code == 200:
-                            photo_data = response.content
-                except Exception as e:
-                    logger.warning(f"Failed to fetch photo from CDN: {photo.get('url')}: {e}")
-            
-            if photo_data:
-                zip_file.writestr(archive_name, photo_data)
-    
-    zip_buffer.seek(0)
-    
     # Create filename with chunk info
     safe_title = gallery['title'].replace(' ', '_').replace('/', '-')
     if len(chunks) > 1:
@@ -10374,7 +10893,7 @@ async def download_gallery_chunk(gallery_id: str, chunk_number: int, current_use
         filename = f"{safe_title}_photos.zip"
     
     return StreamingResponse(
-        iter([zip_buffer.getvalue()]),
+        stream_zip(iter_photo_zip_entries(chunk_photos)),
         media_type="application/zip",
         headers={
             "Content-Disposition": f"attachment; filename={filename}",
@@ -10393,7 +10912,7 @@ SECTION_ZIP_CHUNK_SIZE = 250 * 1024 * 1024
 @api_router.post("/public/gallery/{share_link}/download-info")
 async def get_public_download_info(share_link: str, request: SectionDownloadRequest):
     """Get download info for public gallery - sections, photo counts, and chunk info"""
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+    gallery = await get_gallery_by_share_link(share_link)
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
@@ -10402,10 +10921,9 @@ async def get_public_download_info(share_link: str, request: SectionDownloadRequ
     if not download_check["allowed"]:
         raise HTTPException(status_code=403, detail=download_check["reason"])
     
-    # Verify password if download requires it
-    if gallery.get("download_all_password"):
-        if not request.password or not verify_password(request.password, gallery["download_all_password"]):
-            raise HTTPException(status_code=401, detail="Invalid download password")
+    # Verify password (or a download token from an earlier call) if download requires it
+    await gallery_tokens.require_access(gallery, "download", request.password, request.token,
+                                        "Invalid download password", "Invalid download password")
     
     # Get all visible photos (not hidden, not flagged)
     photo_filter = {
@@ -10572,13 +11090,15 @@ async def get_public_download_info(share_link: str, request: SectionDownloadRequ
         "chunk_count": len(chunks),
         "chunks": chunks,
         "sections": section_info,
-        "integration_sources": integration_sources
+        "integration_sources": integration_sources,
+        # Pass back to download-section instead of the password
+        "download_token": gallery_tokens.create(gallery, "download") if gallery.get("download_all_password") else None
     }
 
 @api_router.post("/public/gallery/{share_link}/download-section")
 async def download_section(share_link: str, request: SectionDownloadRequest, chunk: int = 1):
     """Download photos from a specific section or all photos, with chunking support"""
-    gallery = await db.galleries.find_one({"share_link": share_link}, {"_id": 0})
+    gallery = await get_gallery_by_share_link(share_link)
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
@@ -10587,10 +11107,9 @@ async def download_section(share_link: str, request: SectionDownloadRequest, chu
     if not download_check["allowed"]:
         raise HTTPException(status_code=403, detail=download_check["reason"])
     
-    # Verify password if required
-    if gallery.get("download_all_password"):
-        if not request.password or not verify_password(request.password, gallery["download_all_password"]):
-            raise HTTPException(status_code=401, detail="Invalid download password")
+    # Verify download token (or password) if required
+    await gallery_tokens.require_access(gallery, "download", request.password, request.token,
+                                        "Invalid download password", "Invalid download password")
     
     # Build photo filter - only visible photos
     photo_filter = {
@@ -10655,35 +11174,6 @@ async def download_section(share_link: str, request: SectionDownloadRequest, chu
     # Get the requested chunk
     chunk_photos = chunks[chunk - 1]
     
-    # Create zip file
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for photo in chunk_photos:
-            photo_data = None
-            archive_name = photo.get("original_filename", photo.get("filename", f"photo_{photo.get('id', 'unknown')}.jpg"))
-            
-            # Try local file first
-            if photo.get("filename"):
-                file_path = UPLOAD_DIR / photo["filename"]
-                if file_path.exists():
-                    zip_file.write(file_path, archive_name)
-                    continue
-            
-            # Try fetching from CDN/URL
-            if photo.get("url"):
-                try:
-                    async with httpx.AsyncClient(timeout=30.0) as client:
-                        response = await client.get(photo["url"])
-                        if response.status_code == 200:
-                            photo_data = response.content
-                except Exception as e:
-                    logger.warning(f"Failed to fetch photo from CDN: {photo.get('url')}: {e}")
-            
-            if photo_data:
-                zip_file.writestr(archive_name, photo_data)
-    
-    zip_buffer.seek(0)
-    
     # Create filename
     safe_gallery = gallery.get('title', 'Gallery').replace(' ', '_').replace('/', '-')
     if len(chunks) > 1:
@@ -10692,7 +11182,7 @@ async def download_section(share_link: str, request: SectionDownloadRequest, chu
         filename = f"{safe_gallery}_{section_title}.zip"
     
     return StreamingResponse(
-        iter([zip_buffer.getvalue()]),
+        stream_zip(iter_photo_zip_entries(chunk_photos)),
         media_type="application/zip",
         headers={
             "Content-Disposition": f"attachment; filename={filename}",
@@ -10702,90 +11192,91 @@ async def download_section(share_link: str, request: SectionDownloadRequest, chu
     )
 
 import mimetypes
+from email.utils import formatdate, format_datetime
 
 # Initialize mimetypes
 mimetypes.init()
 
-@api_router.get("/photos/serve/{filename}")
-async def serve_photo(filename: str, download: bool = False):
+PHOTO_MEDIA_TYPES = {
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+    'heic': 'image/heic',
+    'heif': 'image/heif'
+}
+
+async def serve_stored_file(request: Request, key: str, local_path: Path, media_type: str, headers: dict):
     """
-    Serve photos - works with both R2 and local storage.
-    For R2, this endpoint serves as a fallback/proxy if direct R2 URL fails.
+    Serve an immutable stored file (photo or thumbnail) from local disk or R2.
+    - Strong ETag derived from the storage key; a matching If-None-Match gets
+      304 without touching the disk or R2
+    - Range requests are honoured (passed through to R2's get_object)
+    - R2 bodies are streamed, never buffered
+    Returns None when the file exists in neither place.
     """
-    # First try local filesystem
-    file_path = UPLOAD_DIR / filename
+    etag = key_etag(key)
+    headers = {**headers, "ETag": etag}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={name: value for name, value in headers.items()
+                                                   if name in ("ETag", "Cache-Control", "Access-Control-Allow-Origin")})
+    range_header = request.headers.get("range")
     
-    if file_path.exists():
-        # Serve from local filesystem
-        ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'jpg'
-        media_types = {
-            'jpg': 'image/jpeg',
-            'jpeg': 'image/jpeg',
-            'png': 'image/png',
-            'gif': 'image/gif',
-            'webp': 'image/webp',
-            'heic': 'image/heic',
-            'heif': 'image/heif'
-        }
-        media_type = media_types.get(ext, 'image/jpeg')
-        file_size = file_path.stat().st_size
-        disposition = "attachment" if download else "inline"
-        
-        return FileResponse(
-            file_path,
-            media_type=media_type,
-            headers={
-                "Content-Disposition": f"{disposition}; filename={filename}",
-                "Content-Length": str(file_size),
-                "Cache-Control": "public, max-age=31536000, immutable",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Expose-Headers": "Content-Disposition, Content-Length"
-            }
-        )
+    if local_path.exists():
+        last_modified = formatdate(local_path.stat().st_mtime, usegmt=True)
+        return stream_file(local_path, media_type, range_header, {**headers, "Last-Modified": last_modified})
     
-    # If R2 is enabled, try to fetch from R2
     if storage.r2_enabled:
-        # Extract photo_id from filename to construct R2 key
-        photo_id = filename.rsplit('.', 1)[0] if '.' in filename else filename
-        ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'jpg'
-        r2_key = f"photos/{photo_id}.{ext}"
-        
-        content = await storage.get_file(r2_key)
-        if content:
-            media_types = {
-                'jpg': 'image/jpeg',
-                'jpeg': 'image/jpeg',
-                'png': 'image/png',
-                'gif': 'image/gif',
-                'webp': 'image/webp',
-                'heic': 'image/heic',
-                'heif': 'image/heif'
-            }
-            media_type = media_types.get(ext, 'image/jpeg')
-            disposition = "attachment" if download else "inline"
-            
-            return Response(
-                content=content,
-                media_type=media_type,
-                headers={
-                    "Content-Disposition": f"{disposition}; filename={filename}",
-                    "Content-Length": str(len(content)),
-                    "Cache-Control": "public, max-age=31536000, immutable",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Expose-Headers": "Content-Disposition, Content-Length"
-                }
-            )
+        obj = await storage.open_r2_stream(key, range_header)
+        if obj and obj["status"] == 416:
+            raise HTTPException(status_code=416, detail="Requested range not satisfiable")
+        if obj:
+            headers["Accept-Ranges"] = "bytes"
+            if obj["content_length"] is not None:
+                headers["Content-Length"] = str(obj["content_length"])
+            if obj["content_range"]:
+                headers["Content-Range"] = obj["content_range"]
+            if obj["last_modified"]:
+                headers["Last-Modified"] = format_datetime(obj["last_modified"], usegmt=True)
+            return stream_storage_body(obj["body"], obj["status"], media_type, headers)
     
-    raise HTTPException(status_code=404, detail="Photo not found")
+    return None
+
+@api_router.get("/photos/serve/{filename}")
+async def serve_photo(request: Request, filename: str, download: bool = False):
+    """
+    Serve photos - works with both R2 and local storage.
+    For R2, this endpoint serves as a fallback/proxy if direct R2 URL fails.
+    Supports Range requests and conditional GETs (ETag / If-None-Match).
+    """
+    # Extract photo_id from filename to construct the storage key
+    photo_id = filename.rsplit('.', 1)[0] if '.' in filename else filename
+    ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'jpg'
+    disposition = "attachment" if download else "inline"
+    
+    response = await serve_stored_file(
+        request,
+        key=f"photos/{photo_id}.{ext}",
+        local_path=UPLOAD_DIR / filename,
+        media_type=PHOTO_MEDIA_TYPES.get(ext, 'image/jpeg'),
+        headers={
+            "Content-Disposition": f"{disposition}; filename={filename}",
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Expose-Headers": "Content-Disposition, Content-Length, Content-Range, ETag"
+        }
+    )
+    if response is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    return response
 
 @api_router.get("/photos/download")
-async def proxy_download_photo(url: str, filename: str = "photo.jpg"):
+async def proxy_download_photo(request: Request, url: str, filename: str = "photo.jpg"):
     """
-    Proxy download for CDN photos - fetches from CDN and returns with proper Content-Disposition header.
+    Proxy download for CDN photos - streams from CDN with proper Content-Disposition header.
     This is needed because CDN URLs don't support the download attribute due to cross-origin restrictions.
     """
-    import httpx
-    
     # Validate URL is from our CDN
     if not url.startswith("photos/") and not url.startswith("https://cdn."):
         raise HTTPException(status_code=400, detail="Invalid URL")
@@ -10797,77 +11288,58 @@ async def proxy_download_photo(url: str, filename: str = "photo.jpg"):
         else:
             # Fall back to local serve
             filename_only = url.split("/")[-1]
-            return await serve_photo(filename_only, download=True)
+            return await serve_photo(request, filename_only, download=True)
     else:
         full_url = url
     
+    # Sanitize filename
+    safe_filename = "".join(c for c in filename if c.isalnum() or c in "._- ").strip()
+    if not safe_filename:
+        safe_filename = "photo.jpg"
+    
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(full_url)
-            response.raise_for_status()
-            
-            # Determine content type
-            content_type = response.headers.get("content-type", "image/jpeg")
-            
-            # Sanitize filename
-            safe_filename = "".join(c for c in filename if c.isalnum() or c in "._- ").strip()
-            if not safe_filename:
-                safe_filename = "photo.jpg"
-            
-            return Response(
-                content=response.content,
-                media_type=content_type,
-                headers={
-                    "Content-Disposition": f'attachment; filename="{safe_filename}"',
-                    "Content-Length": str(len(response.content)),
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Expose-Headers": "Content-Disposition, Content-Length"
-                }
-            )
-    except httpx.HTTPError as e:
+        response = await open_upstream(full_url, request.headers.get("range"))
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         logger.error(f"Failed to proxy download from {full_url}: {e}")
         raise HTTPException(status_code=502, detail="Failed to fetch photo from CDN")
+    if response.status not in (200, 206):
+        logger.error(f"Failed to proxy download from {full_url}: HTTP {response.status}")
+        response.release()
+        raise HTTPException(status_code=502, detail="Failed to fetch photo from CDN")
+    
+    # Stream straight through - the body is never held in memory
+    return stream_upstream_response(
+        response,
+        response.headers.get("content-type", "image/jpeg"),
+        headers={
+            "Content-Disposition": f'attachment; filename="{safe_filename}"',
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Expose-Headers": "Content-Disposition, Content-Length, Content-Range"
+        }
+    )
 
 @api_router.get("/photos/thumb/{filename}")
-async def serve_thumbnail(filename: str):
+async def serve_thumbnail(request: Request, filename: str):
     """
     Serve optimized thumbnail images with validation and fallback.
     Works with both R2 and local storage.
+    Supports Range requests and conditional GETs (ETag / If-None-Match).
     """
     # First try local filesystem
     file_path = THUMBNAILS_DIR / filename
+    thumb_headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Access-Control-Allow-Origin": "*"
+    }
     
     # Check if thumbnail exists locally and is valid
-    if file_path.exists():
-        file_size = file_path.stat().st_size
-        if file_size == 0:
-            logger.warning(f"Empty thumbnail found: {filename}")
-            file_path.unlink()
-        else:
-            return FileResponse(
-                file_path,
-                media_type="image/jpeg",
-                headers={
-                    "Content-Length": str(file_size),
-                    "Cache-Control": "public, max-age=31536000, immutable",
-                    "Access-Control-Allow-Origin": "*"
-                }
-            )
+    if file_path.exists() and file_path.stat().st_size == 0:
+        logger.warning(f"Empty thumbnail found: {filename}")
+        file_path.unlink()
     
-    # If R2 is enabled, try to fetch from R2
-    if storage.r2_enabled:
-        r2_key = f"thumbnails/{filename}"
-        content = await storage.get_file(r2_key)
-        if content:
-            return Response(
-                content=content,
-                media_type="image/jpeg",
-                headers={
-                    "Content-Length": str(len(content)),
-                    "Cache-Control": "public, max-age=31536000, immutable",
-                    "Access-Control-Allow-Origin": "*"
-                }
-            )
+    response = await serve_stored_file(request, f"thumbnails/{filename}", file_path, "image/jpeg", thumb_headers)
+    if response is not None:
+        return response
     
     # Try to generate thumbnail on-the-fly if original exists locally
     if not file_path.exists():
@@ -10878,19 +11350,12 @@ async def serve_thumbnail(filename: str):
             for ext in ['jpg', 'jpeg', 'png', 'gif', 'webp', 'heic', 'heif']:
                 original = UPLOAD_DIR / f"{photo_id}.{ext}"
                 if original.exists():
-                    thumb_url = generate_thumbnail(original, photo_id, size_name)
-                    if thumb_url and file_path.exists():
+                    size = THUMBNAIL_SIZES.get(size_name, THUMBNAIL_SIZES['medium'])
+                    rendered = await thumbnail_pool.render_files(original, photo_id, {size_name: size}, THUMBNAILS_DIR, JPEG_QUALITY)
+                    if rendered.get(size_name) and file_path.exists():
                         logger.info(f"Regenerated missing thumbnail: {filename}")
-                        file_size = file_path.stat().st_size
-                        return FileResponse(
-                            file_path,
-                            media_type="image/jpeg",
-                            headers={
-                                "Content-Length": str(file_size),
-                                "Cache-Control": "public, max-age=31536000, immutable",
-                                "Access-Control-Allow-Origin": "*"
-                            }
-                        )
+                        return stream_file(file_path, "image/jpeg", request.headers.get("range"),
+                                           {**thumb_headers, "ETag": key_etag(f"thumbnails/{filename}")})
                     break
     
     raise HTTPException(status_code=404, detail="Thumbnail not found")
@@ -11039,6 +11504,7 @@ async def google_drive_callback(request: Request, code: str = Query(...), state:
                 "google_connected_at": datetime.now(timezone.utc).isoformat()
             }}
         )
+        invalidate_user_cache(user_id)
         
         # Redirect back to gallery using the same base URL
         return RedirectResponse(
@@ -11106,6 +11572,7 @@ async def disconnect_google_drive(current_user: dict = Depends(get_current_user)
             "google_connected_at": ""
         }}
     )
+    invalidate_user_cache(current_user["id"])
     return {"success": True}
 
 @api_router.post("/galleries/{gallery_id}/backup-to-drive")
@@ -11224,38 +11691,13 @@ async def get_photographer_analytics(current_user: dict = Depends(get_current_us
     """Get analytics for the current photographer"""
     user_id = current_user["id"]
     
-    # Get all galleries with photo counts
-    pipeline = [
-        {"$match": {"photographer_id": user_id}},
-        {"$lookup": {
-            "from": "photos",
-            "localField": "id",
-            "foreignField": "gallery_id",
-            "as": "all_photos"
-        }},
-        {"$addFields": {
-            "total_photos": {"$size": "$all_photos"},
-            "photographer_photos": {
-                "$size": {
-                    "$filter": {
-                        "input": "$all_photos",
-                        "cond": {"$eq": ["$$this.uploaded_by", "photographer"]}
-                    }
-                }
-            },
-            "guest_photos": {
-                "$size": {
-                    "$filter": {
-                        "input": "$all_photos",
-                        "cond": {"$eq": ["$$this.uploaded_by", "guest"]}
-                    }
-                }
-            }
-        }},
-        {"$project": {"_id": 0, "all_photos": 0, "password": 0, "download_all_password": 0}}
-    ]
-    
-    galleries = await db.galleries.aggregate(pipeline).to_list(None)
+    # Get all galleries with photo counts (one $group over photos, no per-photo documents)
+    galleries = await db.galleries.find(
+        {"photographer_id": user_id},
+        {"_id": 0, "id": 1, "title": 1, "view_count": 1, "created_at": 1, "auto_delete_date": 1,
+         "qr_scan_count": 1, "download_count": 1}
+    ).to_list(None)
+    photo_counts = await photo_counts_by_uploader(db, [g["id"] for g in galleries])
     
     gallery_analytics = []
     total_photos = 0
@@ -11264,6 +11706,7 @@ async def get_photographer_analytics(current_user: dict = Depends(get_current_us
     total_downloads = 0
     
     for g in galleries:
+        counts = photo_counts.get(g["id"], {})
         days_remaining = calculate_days_until_deletion(g.get("auto_delete_date"))
         # Convert datetime to ISO string for Pydantic model
         created_at_value = g.get("created_at")
@@ -11275,15 +11718,15 @@ async def get_photographer_analytics(current_user: dict = Depends(get_current_us
             gallery_id=g["id"],
             gallery_title=g["title"],
             view_count=g.get("view_count", 0),
-            total_photos=g.get("total_photos", 0),
-            photographer_photos=g.get("photographer_photos", 0),
-            guest_photos=g.get("guest_photos", 0),
+            total_photos=counts.get("total", 0),
+            photographer_photos=counts.get("photographer", 0),
+            guest_photos=counts.get("guest", 0),
             created_at=created_at_str,
             days_until_deletion=days_remaining,
             qr_scans=g.get("qr_scan_count", 0),
             download_count=g.get("download_count", 0)
         ))
-        total_photos += g.get("total_photos", 0)
+        total_photos += counts.get("total", 0)
         total_views += g.get("view_count", 0)
         total_qr_scans += g.get("qr_scan_count", 0)
         total_downloads += g.get("download_count", 0)
@@ -11291,32 +11734,19 @@ async def get_photographer_analytics(current_user: dict = Depends(get_current_us
     # Sort galleries by views (most popular first)
     gallery_analytics.sort(key=lambda x: x.view_count, reverse=True)
     
-    # Get time-based view stats from analytics_events collection
+    # Get time-based view stats from the daily rollups (one read covers today, week and month)
     now = datetime.now(timezone.utc)
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     week_start = today_start - timedelta(days=today_start.weekday())
     month_start = today_start.replace(day=1)
     
-    views_today = await db.analytics_events.count_documents({
-        "photographer_id": user_id,
-        "event_type": "view",
-        "created_at": {"$gte": today_start.isoformat()}
-    })
-    
-    views_this_week = await db.analytics_events.count_documents({
-        "photographer_id": user_id,
-        "event_type": "view",
-        "created_at": {"$gte": week_start.isoformat()}
-    })
-    
-    views_this_month = await db.analytics_events.count_documents({
-        "photographer_id": user_id,
-        "event_type": "view",
-        "created_at": {"$gte": month_start.isoformat()}
-    })
+    daily_views = await daily_counts(db, user_id, "view", min(week_start, month_start))
+    views_today = total_since(daily_views, today_start)
+    views_this_week = total_since(daily_views, week_start)
+    views_this_month = total_since(daily_views, month_start)
     
     # Get effective storage quota from global toggles
-    user = await db.users.find_one({"id": user_id}, {"_id": 0})
+    user = await get_user_record(user_id)
     effective_storage = await get_effective_storage_quota(user)
     
     return PhotographerAnalytics(
@@ -11426,6 +11856,7 @@ async def update_billing_settings(data: BillingSettings, admin: dict = Depends(g
         {"$set": update_data},
         upsert=True
     )
+    feature_config.bump()
     return {"message": "Billing settings updated", "settings": data.model_dump()}
 
 # ============================================
@@ -11445,8 +11876,8 @@ async def track_qr_scan(gallery_id: str):
         {"$inc": {"qr_scan_count": 1}}
     )
     
-    # Log analytics event
-    await db.analytics_events.insert_one({
+    # Log analytics event (and its daily rollup)
+    await insert_analytics_event(db, {
         "id": str(uuid.uuid4()),
         "gallery_id": gallery_id,
         "photographer_id": gallery.get("photographer_id"),
@@ -11469,8 +11900,8 @@ async def track_download(gallery_id: str, photo_id: Optional[str] = None):
         {"$inc": {"download_count": 1}}
     )
     
-    # Log analytics event
-    await db.analytics_events.insert_one({
+    # Log analytics event (and its daily rollup)
+    await insert_analytics_event(db, {
         "id": str(uuid.uuid4()),
         "gallery_id": gallery_id,
         "photographer_id": gallery.get("photographer_id"),
@@ -11494,8 +11925,8 @@ async def track_gallery_view_by_id(gallery_id: str):
         {"$inc": {"view_count": 1}}
     )
     
-    # Log analytics event
-    await db.analytics_events.insert_one({
+    # Log analytics event (and its daily rollup)
+    await insert_analytics_event(db, {
         "id": str(uuid.uuid4()),
         "gallery_id": gallery_id,
         "photographer_id": gallery.get("photographer_id"),
@@ -11606,15 +12037,15 @@ async def get_public_pricing():
 @api_router.get("/user/subscription")
 async def get_user_subscription(user: dict = Depends(get_current_user)):
     """Get current user's subscription info"""
-    db_user = await db.users.find_one({"id": user["id"]}, {"_id": 0})
+    db_user = await get_user_record(user["id"])
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Check and reset credits if billing cycle passed
     await reset_user_credits_if_needed(user["id"])
     
-    # Refresh user data
-    db_user = await db.users.find_one({"id": user["id"]}, {"_id": 0})
+    # Refresh user data (reset_user_credits_if_needed invalidates it if it changed anything)
+    db_user = await get_user_record(user["id"])
     
     # Use authority hierarchy to resolve features
     resolved = await resolve_user_features(db_user)
@@ -11701,6 +12132,7 @@ async def submit_payment_proof(data: PaymentProofSubmit, user: dict = Depends(ge
             "payment_submitted_at": datetime.now(timezone.utc).isoformat()
         }}
     )
+    invalidate_user_cache(user["id"])
     return {"message": "Payment proof submitted. Awaiting admin approval."}
 
 # NOTE: UpgradeRequest model is now imported from models/billing.py
@@ -11805,6 +12237,7 @@ async def submit_upgrade_request(data: UpgradeRequest, background_tasks: Backgro
         {"id": user["id"]},
         {"$set": update_data}
     )
+    invalidate_user_cache(user["id"])
     
     return {"message": message, "needs_payment_proof": data.proof_url is None}
 
@@ -11839,6 +12272,7 @@ async def submit_addon_tokens_request(data: ExtraCreditRequest, background_tasks
             "requested_addon_tokens": data.quantity
         }}
     )
+    invalidate_user_cache(user["id"])
     
     settings = await get_billing_settings()
     total_cost = data.quantity * settings.get("pricing", {}).get("extra_credit", 500)
@@ -11979,6 +12413,7 @@ async def approve_payment(data: ApprovePayment, background_tasks: BackgroundTask
         {"id": data.user_id},
         {"$set": update_data}
     )
+    invalidate_user_cache(data.user_id)
     
     # GRANDFATHERING: Update highest_plan_reached for galleries where event hasn't passed yet
     # This allows Standard->Pro upgrades to grant Pro features as legacy
@@ -12010,6 +12445,7 @@ async def approve_payment(data: ApprovePayment, background_tasks: BackgroundTask
                     {"id": gallery["id"]},
                     {"$set": {"highest_plan_reached": new_plan}}
                 )
+                invalidate_gallery_cache(gallery["id"])
                 upgraded_count += 1
         
         if upgraded_count > 0:
@@ -12021,6 +12457,7 @@ async def approve_payment(data: ApprovePayment, background_tasks: BackgroundTask
         {"photographer_id": data.user_id, "download_locked_until_payment": True},
         {"$set": {"download_locked_until_payment": False}}
     )
+    gallery_cache.clear()
     if result.modified_count > 0:
         message_parts.append(f"{result.modified_count} gallery downloads unlocked")
         notification_msg_parts.append(f"Downloads on {result.modified_count} gallery(ies) have been unlocked.")
@@ -12221,6 +12658,7 @@ async def reject_payment(data: RejectPayment, background_tasks: BackgroundTasks,
             # Don't clear payment_proof_url so they can reference it in dispute
         }}
     )
+    invalidate_user_cache(data.user_id)
     
     # Create notification for user
     dispute_msg = " You have 1 attempt to dispute and resubmit." if can_dispute else " Please contact customer service for assistance."
@@ -12355,6 +12793,7 @@ async def assign_override_mode(data: AssignOverrideMode, admin: dict = Depends(g
             "feature_toggles": feature_toggles
         }}
     )
+    invalidate_user_cache(data.user_id)
     return {"message": f"Override mode '{data.mode}' assigned until {expires.date()}"}
 
 @api_router.post("/admin/remove-override")
@@ -12378,6 +12817,7 @@ async def remove_override_mode(data: RemoveOverrideMode, admin: dict = Depends(g
             "subscription_tokens": credits
         }}
     )
+    invalidate_user_cache(data.user_id)
     return {"message": "Override mode removed"}
 
 @api_router.get("/admin/users/{user_id}/subscription")
@@ -12425,6 +12865,7 @@ async def update_user_plan(user_id: str, plan: str = Body(..., embed=True), admi
             "billing_cycle_start": datetime.now(timezone.utc).isoformat()
         }}
     )
+    invalidate_user_cache(user_id)
     return {"message": f"User plan updated to {plan}"}
 
 # ============================================
@@ -12501,13 +12942,14 @@ async def submit_payment_dispute(data: PaymentDispute, user: dict = Depends(get_
         },
         "$inc": {"payment_dispute_count": 1}}
     )
+    invalidate_user_cache(user["id"])
     
     return {"message": "Dispute submitted successfully. Your payment will be reviewed again."}
 
 @api_router.get("/user/payment-status")
 async def get_payment_status(user: dict = Depends(get_current_user)):
     """Get detailed payment status including rejection info"""
-    db_user = await db.users.find_one({"id": user["id"]}, {"_id": 0})
+    db_user = await get_user_record(user["id"])
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -12610,9 +13052,8 @@ async def repair_all_thumbnails(
             continue
         
         try:
-            # Generate both thumbnail sizes
-            thumb_small = generate_thumbnail(file_path, photo_id, 'small')
-            thumb_medium = generate_thumbnail(file_path, photo_id, 'medium')
+            # Generate both thumbnail sizes from one decode
+            thumb_small, thumb_medium = await generate_photo_thumbnails(file_path, photo_id)
             
             update = {}
             if thumb_small:
@@ -12625,6 +13066,7 @@ async def repair_all_thumbnails(
                     {"id": photo_id},
                     {"$set": update}
                 )
+                await record_photo_changes(db, [photo_id])
                 repaired += 1
             else:
                 failed += 1
@@ -12641,6 +13083,42 @@ async def repair_all_thumbnails(
         "errors": errors[:20]  # Return first 20 errors only
     }
 
+@api_router.get("/admin/cache-stats")
+async def get_cache_stats(admin: dict = Depends(get_admin_user)):
+    """Hit/miss metrics for in-process caches"""
+    return {
+        "gallery_cache": gallery_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "feature_config": feature_config.stats(),
+        "proxy_cache": proxy_cache.stats(),
+        "pcloud_links": pcloud_links.stats()
+    }
+
+@api_router.get("/admin/http-stats")
+async def get_http_stats(admin: dict = Depends(get_admin_user)):
+    """Outbound HTTP pools per integration, with per-host latency and error metrics"""
+    return http_clients.stats()
+
+@api_router.get("/admin/sync-stats")
+async def get_sync_scheduler_stats(admin: dict = Depends(get_admin_user)):
+    """Auto-sync scheduler limits, run counts and durations per provider, plus recent failures"""
+    recent_failures = await db.sync_runs.find(
+        {"ok": False}, {"_id": 0}
+    ).sort("created_at", -1).to_list(20)
+    return {**get_sync_stats(), "recent_failures": recent_failures}
+
+@api_router.get("/admin/password-stats")
+async def get_password_stats(admin: dict = Depends(get_admin_user)):
+    """bcrypt worker pool load: running/waiting checks, rejections, average duration"""
+    return password_service.stats()
+
+@api_router.post("/admin/reconcile-gallery-counters")
+async def admin_reconcile_gallery_counters(admin: dict = Depends(get_admin_user), gallery_id: Optional[str] = None):
+    """Recompute denormalized media counters for one gallery, or all galleries"""
+    result = await reconcile_all_gallery_counts(db, [gallery_id] if gallery_id else None)
+    logger.info(f"Reconciled gallery counters: {result}")
+    return result
+
 @api_router.get("/admin/thumbnail-status")
 async def get_thumbnail_status(admin: dict = Depends(get_admin_user)):
     """Get status of thumbnails in the system"""
@@ -12651,7 +13129,10 @@ async def get_thumbnail_status(admin: dict = Depends(get_admin_user)):
         "total_photos": total,
         "missing_thumbnails": missing,
         "has_thumbnails": total - missing,
-        "percentage_missing": round(missing / total * 100, 1) if total > 0 else 0
+        "percentage_missing": round(missing / total * 100, 1) if total > 0 else 0,
+        "worker_pool": thumbnail_pool.stats(),
+        "job_queue": await get_thumbnail_job_stats(),
+        "thumbnail_mode": THUMBNAIL_MODE
     }
 
 @api_router.get("/admin/storage-status")
@@ -12875,14 +13356,14 @@ async def cleanup_orphaned_db_photos(
     dry_run: bool = True
 ):
     """Delete database records for photos whose files don't exist on disk"""
-    db_photos = await db.photos.find({}, {"_id": 0, "id": 1, "filename": 1}).to_list(100000)
+    db_photos = await db.photos.find({}, {"_id": 0, "id": 1, "filename": 1, "gallery_id": 1}).to_list(100000)
     
     deleted = []
     for photo in db_photos:
         file_path = UPLOAD_DIR / photo.get("filename", "")
         if not file_path.exists():
             if not dry_run:
-                await db.photos.delete_one({"id": photo["id"]})
+                await delete_counted(db, 'photos', {"id": photo["id"]}, gallery_id=photo["gallery_id"])
                 logger.info(f"Deleted orphaned DB record: {photo['id']}")
             deleted.append(photo["id"])
     
@@ -1,20 +1,22 @@
 """
 Authentication services
 """
-import bcrypt
 import secrets
 import string
 from datetime import datetime, timezone, timedelta
 from jose import jwt
 from core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from utils.passwords import get_password_service
 
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+async def hash_password(password: str) -> str:
+    """bcrypt hash on the bounded password pool (off the event loop)"""
+    return await get_password_service().hash(password)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """bcrypt check on the bounded password pool (off the event loop)"""
+    return await get_password_service().verify(plain_password, hashed_password)
 
 
 def create_access_token(data: dict) -> str:
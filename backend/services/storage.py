@@ -5,13 +5,15 @@ Supports both R2 (production) and local filesystem (fallback).
 """
 
 import aioboto3
+import asyncio
 import logging
 import os
-from typing import Optional, Tuple, BinaryIO
-from io import BytesIO
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import List, Optional, Tuple, BinaryIO
+from aiobotocore.config import AioConfig
 from pathlib import Path
-from PIL import Image
 from dotenv import load_dotenv
+from utils.thumbnails import get_thumbnail_pool, render_thumbnails
 
 # Load environment variables
 load_dotenv()
@@ -28,6 +30,16 @@ R2_BUCKET_NAME = os.environ.get('R2_BUCKET_NAME', 'eventsgallery-photos')
 # Check if R2 is configured
 R2_ENABLED = bool(R2_ACCESS_KEY_ID and R2_SECRET_ACCESS_KEY and R2_ENDPOINT_URL)
 
+# Persistent S3 client connection pool settings
+R2_MAX_POOL_CONNECTIONS = int(os.environ.get('R2_MAX_POOL_CONNECTIONS', '50'))
+R2_KEEPALIVE_TIMEOUT = int(os.environ.get('R2_KEEPALIVE_TIMEOUT', '60'))  # seconds an idle connection is kept
+R2_CONNECT_TIMEOUT = int(os.environ.get('R2_CONNECT_TIMEOUT', '10'))
+R2_READ_TIMEOUT = int(os.environ.get('R2_READ_TIMEOUT', '60'))
+
+# Batch deletes: DeleteObjects takes at most 1000 keys per call
+R2_DELETE_BATCH_SIZE = 1000
+R2_DELETE_CONCURRENCY = 4
+
 # Thumbnail settings
 THUMBNAIL_SIZES = {
     'small': (300, 300),
@@ -44,16 +56,66 @@ class StorageService:
     
     def __init__(self):
         self.r2_enabled = R2_ENABLED
+        self._s3_client = None
+        self._client_stack = None
+        self._client_lock = asyncio.Lock()
         if self.r2_enabled:
             self.session = aioboto3.Session(
                 aws_access_key_id=R2_ACCESS_KEY_ID,
                 aws_secret_access_key=R2_SECRET_ACCESS_KEY,
             )
+            self.client_config = AioConfig(
+                max_pool_connections=R2_MAX_POOL_CONNECTIONS,
+                connect_timeout=R2_CONNECT_TIMEOUT,
+                read_timeout=R2_READ_TIMEOUT,
+                tcp_keepalive=True,
+                connector_args={'keepalive_timeout': R2_KEEPALIVE_TIMEOUT},
+            )
             logger.info(f"R2 Storage initialized - Bucket: {R2_BUCKET_NAME}")
         else:
             self.session = None
+            self.client_config = None
             logger.warning("R2 not configured - using local filesystem")
     
+    async def start(self):
+        """
+        Open the long-lived S3 client (called from the app lifespan).
+        The client keeps a pool of keep-alive connections, so object calls
+        skip client construction and TLS handshakes.
+        """
+        if not self.r2_enabled:
+            return
+        async with self._client_lock:
+            if self._s3_client is not None:
+                return
+            stack = AsyncExitStack()
+            self._s3_client = await stack.enter_async_context(
+                self.session.client(
+                    "s3",
+                    endpoint_url=R2_ENDPOINT_URL,
+                    region_name="auto",
+                    config=self.client_config,
+                )
+            )
+            self._client_stack = stack
+            logger.info(f"R2 client pool opened (max {R2_MAX_POOL_CONNECTIONS} connections)")
+    
+    async def close(self):
+        """Close the long-lived S3 client (called on app shutdown)"""
+        async with self._client_lock:
+            if self._client_stack is not None:
+                await self._client_stack.aclose()
+                logger.info("R2 client pool closed")
+            self._client_stack = None
+            self._s3_client = None
+    
+    @asynccontextmanager
+    async def _r2_client(self):
+        """Yield the shared S3 client, opening it on first use outside the lifespan"""
+        if self._s3_client is None:
+            await self.start()
+        yield self._s3_client
+    
     def get_public_url(self, key: str) -> str:
         """Get the public URL for a file"""
         if self.r2_enabled and R2_PUBLIC_URL:
@@ -93,11 +155,7 @@ class StorageService:
     ) -> Tuple[bool, str]:
         """Upload file to Cloudflare R2"""
         try:
-            async with self.session.client(
-                "s3",
-                endpoint_url=R2_ENDPOINT_URL,
-                region_name="auto"
-            ) as s3_client:
+            async with self._r2_client() as s3_client:
                 await s3_client.put_object(
                     Bucket=R2_BUCKET_NAME,
                     Key=key,
@@ -158,11 +216,7 @@ class StorageService:
     async def _delete_from_r2(self, key: str) -> bool:
         """Delete file from R2"""
         try:
-            async with self.session.client(
-                "s3",
-                endpoint_url=R2_ENDPOINT_URL,
-                region_name="auto"
-            ) as s3_client:
+            async with self._r2_client() as s3_client:
                 await s3_client.delete_object(
                     Bucket=R2_BUCKET_NAME,
                     Key=key
@@ -173,6 +227,46 @@ class StorageService:
             logger.error(f"R2 delete failed for {key}: {e}")
             return False
     
+    async def delete_files(self, keys: List[str], concurrency: int = R2_DELETE_CONCURRENCY) -> List[str]:
+        """
+        Delete many files. On R2 keys go out in DeleteObjects batches of up to
+        1000, with `concurrency` batches in flight. Returns the keys that could
+        not be deleted (a missing key counts as deleted).
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return []
+        if not self.r2_enabled:
+            failed = []
+            for key in keys:
+                if not await self._delete_from_local(key):
+                    failed.append(key)
+            return failed
+        
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def delete_batch(batch: List[str]) -> List[str]:
+            async with semaphore:
+                try:
+                    async with self._r2_client() as s3_client:
+                        response = await s3_client.delete_objects(
+                            Bucket=R2_BUCKET_NAME,
+                            Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+                        )
+                except Exception as e:
+                    logger.error(f"R2 batch delete of {len(batch)} keys failed: {e}")
+                    return batch
+            errors = response.get("Errors", [])
+            for error in errors[:5]:
+                logger.warning(f"R2 delete failed for {error.get('Key')}: {error.get('Code')} {error.get('Message')}")
+            return [error["Key"] for error in errors if error.get("Key")]
+        
+        batches = [keys[i:i + R2_DELETE_BATCH_SIZE] for i in range(0, len(keys), R2_DELETE_BATCH_SIZE)]
+        results = await asyncio.gather(*[delete_batch(batch) for batch in batches])
+        failed = [key for batch_failed in results for key in batch_failed]
+        logger.info(f"Batch deleted {len(keys) - len(failed)}/{len(keys)} objects from R2")
+        return failed
+    
     async def _delete_from_local(self, key: str) -> bool:
         """Delete file from local filesystem"""
         try:
@@ -205,11 +299,7 @@ class StorageService:
     async def _exists_in_r2(self, key: str) -> bool:
         """Check if file exists in R2"""
         try:
-            async with self.session.client(
-                "s3",
-                endpoint_url=R2_ENDPOINT_URL,
-                region_name="auto"
-            ) as s3_client:
+            async with self._r2_client() as s3_client:
                 await s3_client.head_object(
                     Bucket=R2_BUCKET_NAME,
                     Key=key
@@ -243,11 +333,7 @@ class StorageService:
     async def _get_from_r2(self, key: str) -> Optional[bytes]:
         """Get file from R2"""
         try:
-            async with self.session.client(
-                "s3",
-                endpoint_url=R2_ENDPOINT_URL,
-                region_name="auto"
-            ) as s3_client:
+            async with self._r2_client() as s3_client:
                 response = await s3_client.get_object(
                     Bucket=R2_BUCKET_NAME,
                     Key=key
@@ -258,6 +344,37 @@ class StorageService:
             logger.error(f"R2 get failed for {key}: {e}")
             return None
     
+    async def open_r2_stream(self, key: str, range_header: Optional[str] = None) -> Optional[dict]:
+        """
+        Start a streaming GET from R2, passing `range_header` through to get_object.
+        Returns None if the object doesn't exist, {"status": 416} for an
+        unsatisfiable range, otherwise a dict with "status" (200/206), "body"
+        (the streaming body - the caller must consume or close it) and the
+        length/range/validator headers of the object.
+        """
+        params = {"Bucket": R2_BUCKET_NAME, "Key": key}
+        if range_header:
+            params["Range"] = range_header
+        try:
+            async with self._r2_client() as s3_client:
+                response = await s3_client.get_object(**params)
+        except Exception as e:
+            code = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if code == "InvalidRange":
+                return {"status": 416}
+            if code not in ("NoSuchKey", "404"):
+                logger.error(f"R2 stream failed for {key}: {e}")
+            return None
+        return {
+            "status": 206 if response.get("ContentRange") else 200,
+            "body": response["Body"],
+            "content_length": response.get("ContentLength"),
+            "content_range": response.get("ContentRange"),
+            "content_type": response.get("ContentType"),
+            "etag": response.get("ETag"),
+            "last_modified": response.get("LastModified"),
+        }
+
     async def _get_from_local(self, key: str) -> Optional[bytes]:
         """Get file from local filesystem"""
         try:
@@ -290,66 +407,21 @@ class StorageService:
         Returns thumbnail bytes or None if failed.
         """
         size = THUMBNAIL_SIZES.get(size_name, THUMBNAIL_SIZES['medium'])
-        
-        try:
-            with Image.open(BytesIO(image_content)) as img:
-                # Limit image size to prevent memory issues
-                max_pixels = 50_000_000  # 50MP max
-                if img.width * img.height > max_pixels:
-                    scale = (max_pixels / (img.width * img.height)) ** 0.5
-                    new_size = (int(img.width * scale), int(img.height * scale))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                
-                # Convert to RGB
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                    img = background
-                elif img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Auto-rotate based on EXIF
-                try:
-                    from PIL import ExifTags
-                    for orientation in ExifTags.TAGS.keys():
-                        if ExifTags.TAGS[orientation] == 'Orientation':
-                            break
-                    exif = img._getexif()
-                    if exif:
-                        orientation_value = exif.get(orientation)
-                        if orientation_value == 3:
-                            img = img.rotate(180, expand=True)
-                        elif orientation_value == 6:
-                            img = img.rotate(270, expand=True)
-                        elif orientation_value == 8:
-                            img = img.rotate(90, expand=True)
-                except (AttributeError, KeyError, IndexError, TypeError):
-                    pass
-                
-                # Resize
-                img.thumbnail(size, Image.Resampling.LANCZOS)
-                
-                # Save to bytes
-                thumb_buffer = BytesIO()
-                img.save(thumb_buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True)
-                return thumb_buffer.getvalue()
-                
-        except Exception as e:
-            logger.error(f"Thumbnail generation failed: {e}")
-            return None
+        return render_thumbnails(image_content, {size_name: size}, JPEG_QUALITY)[size_name]
     
     async def upload_with_thumbnails(
         self,
         photo_id: str,
         content: bytes,
         file_ext: str,
-        content_type: str = 'image/jpeg'
+        content_type: str = 'image/jpeg',
+        defer_thumbnails: bool = False
     ) -> dict:
         """
         Upload a photo with automatic thumbnail generation.
         Returns dict with urls for original and thumbnails.
+        With defer_thumbnails only the original is uploaded; thumbnails are
+        left to the thumbnail job queue and their urls stay None.
         """
         result = {
             'success': False,
@@ -360,6 +432,17 @@ class StorageService:
             'error': None
         }
         
+        # Render both thumbnails from a single decode, off the event loop.
+        # Done before any upload so a saturated pool (ThumbnailPoolBusy) leaves nothing behind.
+        thumbnail_fields = {} if defer_thumbnails else {'small': 'thumbnail_url', 'medium': 'thumbnail_medium_url'}
+        rendered = {}
+        if thumbnail_fields:
+            rendered = await get_thumbnail_pool().render(
+                content,
+                {size_name: THUMBNAIL_SIZES[size_name] for size_name in thumbnail_fields},
+                JPEG_QUALITY
+            )
+        
         # Upload original
         original_key = f"photos/{photo_id}.{file_ext}"
         success, url_or_error = await self.upload_file(original_key, content, content_type)
@@ -371,9 +454,9 @@ class StorageService:
         result['original_key'] = original_key
         result['original_url'] = url_or_error
         
-        # Generate and upload thumbnails
-        for size_name, url_field in [('small', 'thumbnail_url'), ('medium', 'thumbnail_medium_url')]:
-            thumb_bytes = self.generate_thumbnail_bytes(content, size_name)
+        # Upload thumbnails
+        for size_name, url_field in thumbnail_fields.items():
+            thumb_bytes = rendered.get(size_name)
             if thumb_bytes:
                 thumb_key = f"thumbnails/{photo_id}_{size_name}.jpg"
                 thumb_success, thumb_url = await self.upload_file(thumb_key, thumb_bytes, 'image/jpeg')
@@ -387,6 +470,14 @@ class StorageService:
         result['success'] = True
         return result
     
+    @staticmethod
+    def photo_keys(filename: str) -> List[str]:
+        """Storage keys of a photo's original and all its thumbnails"""
+        photo_id = filename.rsplit('.', 1)[0]
+        return [f"photos/{filename}"] + [
+            f"thumbnails/{photo_id}_{size_name}.jpg" for size_name in ['small', 'medium', 'large']
+        ]
+    
     async def delete_photo_with_thumbnails(self, photo_id: str, file_ext: str) -> bool:
         """Delete a photo and all its thumbnails"""
         original_key = f"photos/{photo_id}.{file_ext}"
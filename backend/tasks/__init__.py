@@ -12,6 +12,16 @@ from .background import (
     auto_sync_drive_backup_task,
     auto_delete_expired_galleries,
     check_expiring_subscriptions,
+    reconcile_gallery_counters,
+    get_sync_stats,
+    prioritize_fotoshare_section,
+)
+from .thumbnail_jobs import (
+    init_thumbnail_jobs,
+    stop_thumbnail_jobs,
+    enqueue_thumbnail_job,
+    get_thumbnail_job_stats,
+    thumbnail_job_worker,
 )
 
 __all__ = [
@@ -23,4 +33,12 @@ __all__ = [
     'auto_sync_drive_backup_task',
     'auto_delete_expired_galleries',
     'check_expiring_subscriptions',
+    'reconcile_gallery_counters',
+    'get_sync_stats',
+    'prioritize_fotoshare_section',
+    'init_thumbnail_jobs',
+    'stop_thumbnail_jobs',
+    'enqueue_thumbnail_job',
+    'get_thumbnail_job_stats',
+    'thumbnail_job_worker',
 ]
@@ -10,11 +10,23 @@ Dependencies (injected at startup):
 - logger: Logging instance
 """
 import asyncio
+import time
 import uuid
 from datetime import datetime, timezone, timedelta
-from typing import Any
+from functools import partial
+from typing import Any, Optional
 import logging
 
+from utils.gallery_counters import insert_counted, delete_counted, reconcile_all_gallery_counts
+from utils.gallery_cache import get_gallery_cache
+from utils.user_cache import get_user_cache
+from utils.source_sync import (
+    gdrive_fingerprint, gdrive_modified_since, gdrive_photo_doc, gdrive_watermark,
+    pcloud_fingerprint, pcloud_photo_doc, upsert_section_photos,
+)
+from utils.sync_scheduler import SyncScheduler
+from utils.refresh_queue import RefreshQueue, tiered_interval
+
 # Module-level references to dependencies (set by init_tasks)
 _db = None
 _storage = None
@@ -69,217 +81,321 @@ def stop_tasks():
     _sync_task_running = False
 
 
+# Auto-sync cadence and limits for external sections (fotoshare / Google Drive / pCloud)
+# Fotoshare refresh interval by time since the event (or the section's last new
+# content, whichever is later): (max age in days, minutes between refreshes)
+FOTOSHARE_REFRESH_TIERS = (
+    (1, 10),
+    (2, 60),
+    (30, 24 * 60),
+    (None, 30 * 24 * 60),
+)
+FOTOSHARE_PRE_EVENT_MINUTES = 60  # more than a day before the event
+FOTOSHARE_RETRY_MINUTES = 10  # after a failed refresh
+FOTOSHARE_RELOAD_MINUTES = 30  # re-read all sections into the queue (catches sections added elsewhere)
+GDRIVE_SYNC_MINUTES = 30
+PCLOUD_SYNC_MINUTES = 30
+SYNC_MAX_SECTIONS_PER_CYCLE = 500
+SYNC_GLOBAL_CONCURRENCY = 8
+SYNC_PROVIDER_LIMITS = {
+    'fotoshare': {'concurrency': 4, 'rate': 2.0, 'burst': 4},
+    'gdrive': {'concurrency': 4, 'rate': 5.0, 'burst': 5},
+    'pcloud': {'concurrency': 4, 'rate': 5.0, 'burst': 5},
+}
+
+
+async def _record_sync_run(provider: str, target: str, duration: float, ok: bool, error: Optional[str]):
+    """Persist one section sync run (expired by a TTL index)"""
+    gallery_id, _, section_id = target.partition(':')
+    await _db.sync_runs.insert_one({
+        "provider": provider,
+        "gallery_id": gallery_id,
+        "section_id": section_id,
+        "duration_ms": round(duration * 1000),
+        "ok": ok,
+        "error": error,
+        "created_at": datetime.now(timezone.utc)
+    })
+
+
+_sync_scheduler = SyncScheduler(SYNC_GLOBAL_CONCURRENCY, SYNC_PROVIDER_LIMITS, recorder=_record_sync_run)
+_fotoshare_queue = RefreshQueue()  # (gallery_id, section_id) by next due time
+
+
+def get_sync_stats() -> dict:
+    """Per-provider run counts and durations of the auto-sync scheduler"""
+    return {**_sync_scheduler.stats(), "fotoshare_queue": _fotoshare_queue.stats()}
+
+
+def prioritize_fotoshare_section(gallery_id: str, section_id: str):
+    """
+    Have the fotoshare refresh task look at a section right away (after it was
+    created, refreshed manually or had its URL changed). The section is
+    re-read and refreshed only if it is actually due, otherwise it is
+    re-queued at its correct next due time.
+    """
+    _fotoshare_queue.schedule_now((gallery_id, section_id))
+
+
+async def _find_due_sections(section_type: str, source_field: str, last_sync_field: str,
+                             interval_minutes: int, extra_match: Optional[dict] = None) -> list:
+    """
+    Sections of `section_type` whose last sync is missing or older than the
+    interval, stalest first, selected in MongoDB rather than by walking every
+    gallery's sections in Python. Sync timestamps are ISO strings in UTC, so
+    they compare correctly as strings.
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(minutes=interval_minutes)).isoformat()
+    last_sync = f"sections.{last_sync_field}"
+    pipeline = [
+        {"$match": {"sections.type": section_type}},
+        {"$project": {"_id": 0, "id": 1, "sections": 1}},
+        {"$unwind": "$sections"},
+        {"$match": {
+            "sections.type": section_type,
+            f"sections.{source_field}": {"$nin": [None, ""]},
+            "$or": [{last_sync: None}, {last_sync: {"$lte": cutoff}}],
+            **(extra_match or {})
+        }},
+        {"$sort": {last_sync: 1}},
+        {"$limit": SYNC_MAX_SECTIONS_PER_CYCLE},
+        {"$project": {"gallery_id": "$id", "section": "$sections"}},
+    ]
+    return await _db.galleries.aggregate(pipeline).to_list(None)
+
+
+async def _refresh_fotoshare_section(gallery_id: str, section: dict):
+    fotoshare_url = section["fotoshare_url"]
+    scrape_result = await _scrape_fotoshare_videos(fotoshare_url)
+    sync_time = datetime.now(timezone.utc).isoformat()
+    updated = {
+        "fotoshare_last_sync": sync_time,
+        "fotoshare_expired": scrape_result.get("expired", False)
+    }
+    
+    if scrape_result.get("success"):
+        existing = await _db.fotoshare_videos.find(
+            {"gallery_id": gallery_id, "section_id": section["id"]},
+            {"_id": 0, "hash": 1}
+        ).to_list(1000)
+        existing_hashes = {v["hash"] for v in existing}
+        
+        new_videos = []
+        for video_data in scrape_result.get("videos", []):
+            if video_data["hash"] not in existing_hashes:
+                new_videos.append({
+                    "id": str(uuid.uuid4()),
+                    "gallery_id": gallery_id,
+                    "section_id": section["id"],
+                    "hash": video_data["hash"],
+                    "source_url": video_data["source_url"],
+                    "thumbnail_url": video_data["thumbnail_url"],
+                    "width": video_data.get("width", 1080),
+                    "height": video_data.get("height", 1920),
+                    "file_type": video_data.get("file_type", "mp4"),
+                    "file_source": video_data.get("file_source", "lumabooth"),
+                    "created_at_source": video_data.get("created_at_source"),
+                    "order": video_data.get("order", 0),
+                    "synced_at": sync_time
+                })
+        
+        if new_videos:
+            await insert_counted(_db, 'fotoshare_videos', new_videos)
+            updated["fotoshare_last_new_at"] = sync_time
+            _logger.info(f"Auto-refresh: Added {len(new_videos)} new videos to section {section['id']}")
+    
+    # Positional update - concurrent syncs of sibling sections must not overwrite each other
+    await _db.galleries.update_one(
+        {"id": gallery_id, "sections.id": section["id"]},
+        {"$set": {f"sections.$.{field}": value for field, value in updated.items()}}
+    )
+    return updated
+
+
+def _parse_time(value) -> Optional[datetime]:
+    """ISO timestamp or plain date (event_date) as an aware UTC datetime"""
+    if not value:
+        return None
+    try:
+        if isinstance(value, datetime):
+            parsed = value
+        elif 'T' in value:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        else:
+            parsed = datetime.fromisoformat(value + 'T00:00:00+00:00')
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def fotoshare_next_due(item: dict, now: Optional[datetime] = None) -> float:
+    """
+    Epoch seconds at which a fotoshare section is next due. `item` holds the
+    section plus its gallery's event_date / created_at. The interval tier is
+    picked from the time since the event (gallery creation if no event date)
+    or since the section last produced new videos, whichever is more recent.
+    """
+    now = now or datetime.now(timezone.utc)
+    section = item["section"]
+    last_sync = _parse_time(section.get("fotoshare_last_sync"))
+    if last_sync is None:
+        return now.timestamp()
+    
+    event_time = _parse_time(item.get("event_date")) or _parse_time(item.get("gallery_created_at"))
+    activity = [t for t in (event_time, _parse_time(section.get("fotoshare_last_new_at"))) if t]
+    if not activity:
+        interval_minutes = FOTOSHARE_REFRESH_TIERS[0][1]
+    else:
+        age_days = (now - max(activity)).total_seconds() / 86400
+        if age_days < -1:
+            interval_minutes = FOTOSHARE_PRE_EVENT_MINUTES
+        else:
+            interval_minutes = tiered_interval(age_days, FOTOSHARE_REFRESH_TIERS)
+    return last_sync.timestamp() + interval_minutes * 60
+
+
+def _fotoshare_active(section: Optional[dict]) -> bool:
+    return bool(section and section.get("type") == "fotoshare"
+                and section.get("fotoshare_url") and not section.get("fotoshare_expired"))
+
+
+async def _load_fotoshare_sections(gallery_ids: Optional[list] = None) -> dict:
+    """(gallery_id, section_id) -> {"section", "event_date", "gallery_created_at"} for fotoshare sections"""
+    query = {"sections.type": "fotoshare"}
+    if gallery_ids is not None:
+        query["id"] = {"$in": gallery_ids}
+    galleries = await _db.galleries.find(
+        query, {"_id": 0, "id": 1, "event_date": 1, "created_at": 1, "sections": 1}
+    ).to_list(None)
+    items = {}
+    for gallery in galleries:
+        for section in gallery.get("sections", []):
+            if section.get("type") == "fotoshare":
+                items[(gallery["id"], section["id"])] = {
+                    "section": section,
+                    "event_date": gallery.get("event_date"),
+                    "gallery_created_at": gallery.get("created_at"),
+                }
+    return items
+
+
+async def _refresh_queued_fotoshare_section(key: tuple, item: dict):
+    """Refresh one section and put it back in the queue at its next due time"""
+    gallery_id, section_id = key
+    retry_at = time.time() + FOTOSHARE_RETRY_MINUTES * 60
+    try:
+        updated = await _refresh_fotoshare_section(gallery_id, item["section"])
+    except BaseException:
+        _fotoshare_queue.schedule(key, retry_at)
+        raise
+    section = {**item["section"], **updated}
+    if _fotoshare_active(section):
+        _fotoshare_queue.schedule(key, fotoshare_next_due({**item, "section": section}))
+
+
 async def auto_refresh_fotoshare_sections():
     """
-    Background task to auto-refresh fotoshare sections based on age:
-    - Day 1 (0-24h): Every 10 minutes
-    - Day 2 (24-48h): Every hour
-    - Day 3-30 (48h - 30 days): Every 24 hours
-    - After 30 days: Every 30 days
+    Background task to auto-refresh fotoshare sections.
+    Sections wait in a priority queue keyed on their next due time (see
+    fotoshare_next_due for the age tiers); the task sleeps until the earliest
+    one is due or prioritize_fotoshare_section() moves one forward. Due
+    sections are refreshed concurrently under the sync scheduler's limits.
     """
     _logger.info("Fotoshare auto-refresh task started")
+    next_reload = 0.0
     
     while _sync_task_running:
         try:
-            now = datetime.now(timezone.utc)
-            
-            # Find all galleries with fotoshare sections
-            galleries = await _db.galleries.find(
-                {"sections.type": "fotoshare"},
-                {"_id": 0, "id": 1, "sections": 1}
-            ).to_list(None)
-            
-            refreshed_count = 0
+            if time.monotonic() >= next_reload:
+                items = await _load_fotoshare_sections()
+                for key, item in items.items():
+                    if key not in _fotoshare_queue and _fotoshare_active(item["section"]):
+                        _fotoshare_queue.schedule(key, fotoshare_next_due(item))
+                next_reload = time.monotonic() + FOTOSHARE_RELOAD_MINUTES * 60
             
-            for gallery in galleries:
-                for section in gallery.get("sections", []):
-                    if section.get("type") != "fotoshare":
+            keys = _fotoshare_queue.pop_due(limit=SYNC_MAX_SECTIONS_PER_CYCLE)
+            if keys:
+                # Re-read the popped sections: they may have been deleted, expired
+                # or refreshed manually since they were queued
+                items = await _load_fotoshare_sections(list({gallery_id for gallery_id, _ in keys}))
+                jobs = []
+                for key in keys:
+                    item = items.get(key)
+                    if item is None or not _fotoshare_active(item["section"]):
                         continue
-                    
-                    # Skip expired sections
-                    if section.get("fotoshare_expired"):
-                        continue
-                    
-                    fotoshare_url = section.get("fotoshare_url")
-                    if not fotoshare_url:
+                    due = fotoshare_next_due(item)
+                    if due > time.time():
+                        _fotoshare_queue.schedule(key, due)
                         continue
-                    
-                    last_sync_str = section.get("fotoshare_last_sync")
-                    if not last_sync_str:
-                        should_refresh = True
-                    else:
-                        try:
-                            last_sync = datetime.fromisoformat(last_sync_str.replace('Z', '+00:00'))
-                            age = now - last_sync
-                            age_hours = age.total_seconds() / 3600
-                            age_days = age_hours / 24
-                            
-                            section_age_days = age_days
-                            
-                            if section_age_days < 1:
-                                refresh_interval_minutes = 10
-                            elif section_age_days < 2:
-                                refresh_interval_minutes = 60
-                            elif section_age_days < 30:
-                                refresh_interval_minutes = 24 * 60
-                            else:
-                                refresh_interval_minutes = 30 * 24 * 60
-                            
-                            minutes_since_sync = age.total_seconds() / 60
-                            should_refresh = minutes_since_sync >= refresh_interval_minutes
-                            
-                        except Exception as e:
-                            _logger.warning(f"Error parsing last_sync date: {e}")
-                            should_refresh = True
-                    
-                    if should_refresh:
-                        try:
-                            scrape_result = await _scrape_fotoshare_videos(fotoshare_url)
-                            sync_time = datetime.now(timezone.utc).isoformat()
-                            
-                            sections = gallery.get("sections", [])
-                            for s in sections:
-                                if s.get("id") == section.get("id"):
-                                    s["fotoshare_last_sync"] = sync_time
-                                    s["fotoshare_expired"] = scrape_result.get("expired", False)
-                                    break
-                            
-                            await _db.galleries.update_one(
-                                {"id": gallery["id"]},
-                                {"$set": {"sections": sections}}
-                            )
-                            
-                            if scrape_result.get("success"):
-                                existing = await _db.fotoshare_videos.find(
-                                    {"gallery_id": gallery["id"], "section_id": section["id"]},
-                                    {"_id": 0, "hash": 1}
-                                ).to_list(1000)
-                                existing_hashes = {v["hash"] for v in existing}
-                                
-                                new_videos = []
-                                for video_data in scrape_result.get("videos", []):
-                                    if video_data["hash"] not in existing_hashes:
-                                        new_videos.append({
-                                            "id": str(uuid.uuid4()),
-                                            "gallery_id": gallery["id"],
-                                            "section_id": section["id"],
-                                            "hash": video_data["hash"],
-                                            "source_url": video_data["source_url"],
-                                            "thumbnail_url": video_data["thumbnail_url"],
-                                            "width": video_data.get("width", 1080),
-                                            "height": video_data.get("height", 1920),
-                                            "file_type": video_data.get("file_type", "mp4"),
-                                            "file_source": video_data.get("file_source", "lumabooth"),
-                                            "created_at_source": video_data.get("created_at_source"),
-                                            "order": video_data.get("order", 0),
-                                            "synced_at": sync_time
-                                        })
-                                
-                                if new_videos:
-                                    await _db.fotoshare_videos.insert_many(new_videos)
-                                    _logger.info(f"Auto-refresh: Added {len(new_videos)} new videos to section {section['id']}")
-                            
-                            refreshed_count += 1
-                            
-                        except Exception as e:
-                            _logger.error(f"Auto-refresh error for section {section.get('id')}: {e}")
-            
-            if refreshed_count > 0:
-                _logger.info(f"Fotoshare auto-refresh: Refreshed {refreshed_count} sections")
+                    jobs.append((f"{key[0]}:{key[1]}", partial(_refresh_queued_fotoshare_section, key, item)))
+                
+                if jobs:
+                    summary = await _sync_scheduler.run('fotoshare', jobs)
+                    _logger.info(f"Fotoshare auto-refresh: Refreshed {summary['succeeded']}/{summary['ran']} sections in {summary['seconds']}s")
                 
         except Exception as e:
             _logger.error(f"Fotoshare auto-refresh task error: {e}")
+            await asyncio.sleep(60)
         
-        await asyncio.sleep(300)  # Check every 5 minutes
+        await _fotoshare_queue.wait(max(1.0, next_reload - time.monotonic()))
+
+
+async def _sync_gdrive_section(gallery_id: str, section: dict):
+    folder_id = section["gdrive_folder_id"]
+    now = datetime.now(timezone.utc)
+    gdrive_data = await _get_gdrive_photos(folder_id, gdrive_modified_since(section, now))
+    if not gdrive_data['success']:
+        return
+    
+    sync_time = now.isoformat()
+    photos = gdrive_data['photos']
+    section_update = {"sections.$.gdrive_last_sync": sync_time, "sections.$.gdrive_error": None}
+    
+    if gdrive_data.get('incremental'):
+        changed = bool(photos)
+        section_update["sections.$.gdrive_watermark"] = gdrive_watermark(photos, section.get("gdrive_watermark"))
+    else:
+        # Full listing (first sync, periodic full pass or the HTML scraper)
+        fingerprint = gdrive_fingerprint(photos)
+        changed = fingerprint != section.get("gdrive_fingerprint")
+        section_update["sections.$.gdrive_fingerprint"] = fingerprint
+        section_update["sections.$.gdrive_watermark"] = gdrive_watermark(photos)
+        section_update["sections.$.gdrive_full_sync_at"] = sync_time
+    
+    if changed:
+        base_order = await _db.gdrive_photos.count_documents({"section_id": section["id"]})
+        docs = [
+            gdrive_photo_doc(gallery_id, section["id"], folder_id, photo, base_order + idx, sync_time)
+            for idx, photo in enumerate(photos)
+        ]
+        added = await upsert_section_photos(_db, 'gdrive_photos', gallery_id, section["id"], docs)
+        if added:
+            _logger.info(f"Synced {added} new photos for gallery {gallery_id}")
+    
+    await _db.galleries.update_one(
+        {"id": gallery_id, "sections.id": section["id"]},
+        {"$set": section_update}
+    )
 
 
 async def auto_sync_gdrive_sections():
     """
     Background task to auto-sync Google Drive sections.
     Refresh interval: Every 30 minutes for sections with data.
+    Due sections are synced concurrently under the sync scheduler's limits.
     """
     _logger.info("Google Drive auto-sync task started")
     
     while _sync_task_running:
         try:
-            now = datetime.now(timezone.utc)
-            
-            galleries = await _db.galleries.find(
-                {"sections.type": "gdrive", "sections.gdrive_folder_id": {"$ne": None}},
-                {"_id": 0, "id": 1, "sections": 1}
-            ).to_list(None)
-            
-            synced_count = 0
-            
-            for gallery in galleries:
-                for section in gallery.get("sections", []):
-                    if section.get("type") != "gdrive" or not section.get("gdrive_folder_id"):
-                        continue
-                    
-                    folder_id = section.get("gdrive_folder_id")
-                    last_sync_str = section.get("gdrive_last_sync")
-                    
-                    should_sync = False
-                    if not last_sync_str:
-                        should_sync = True
-                    else:
-                        try:
-                            last_sync = datetime.fromisoformat(last_sync_str.replace('Z', '+00:00'))
-                            minutes_since_sync = (now - last_sync).total_seconds() / 60
-                            should_sync = minutes_since_sync >= 30
-                        except:
-                            should_sync = True
-                    
-                    if should_sync:
-                        try:
-                            gdrive_data = await _get_gdrive_photos(folder_id)
-                            
-                            if gdrive_data['success']:
-                                existing = await _db.gdrive_photos.find(
-                                    {"gallery_id": gallery["id"], "section_id": section["id"]},
-                                    {"_id": 0, "file_id": 1}
-                                ).to_list(10000)
-                                existing_file_ids = {p["file_id"] for p in existing}
-                                
-                                sync_time = now.isoformat()
-                                new_photos = []
-                                
-                                for idx, photo in enumerate(gdrive_data['photos']):
-                                    if photo['file_id'] not in existing_file_ids:
-                                        new_photos.append({
-                                            "id": str(uuid.uuid4()),
-                                            "gallery_id": gallery["id"],
-                                            "section_id": section["id"],
-                                            "gdrive_folder_id": folder_id,
-                                            "file_id": photo['file_id'],
-                                            "name": photo['name'],
-                                            "mime_type": photo.get('mime_type', 'image/jpeg'),
-                                            "size": photo.get('size', 0),
-                                            "width": photo.get('width'),
-                                            "height": photo.get('height'),
-                                            "thumbnail_url": photo['thumbnail_url'],
-                                            "view_url": photo['view_url'],
-                                            "created_time": photo.get('created_time'),
-                                            "order": len(existing_file_ids) + idx,
-                                            "is_highlight": False,
-                                            "synced_at": sync_time
-                                        })
-                                
-                                if new_photos:
-                                    await _db.gdrive_photos.insert_many(new_photos)
-                                    _logger.info(f"Synced {len(new_photos)} new photos for gallery {gallery['id']}")
-                                
-                                await _db.galleries.update_one(
-                                    {"id": gallery["id"], "sections.id": section["id"]},
-                                    {"$set": {"sections.$.gdrive_last_sync": sync_time, "sections.$.gdrive_error": None}}
-                                )
-                                
-                                synced_count += 1
-                        except Exception as e:
-                            _logger.error(f"Auto-sync error for gdrive section {section.get('id')}: {e}")
-            
-            if synced_count > 0:
-                _logger.info(f"Google Drive auto-sync: Synced {synced_count} sections")
+            due = await _find_due_sections("gdrive", "gdrive_folder_id", "gdrive_last_sync", GDRIVE_SYNC_MINUTES)
+            if due:
+                summary = await _sync_scheduler.run('gdrive', [
+                    (f"{item['gallery_id']}:{item['section']['id']}",
+                     partial(_sync_gdrive_section, item['gallery_id'], item['section']))
+                    for item in due
+                ])
+                _logger.info(f"Google Drive auto-sync: Synced {summary['succeeded']}/{summary['ran']} sections in {summary['seconds']}s")
                 
         except Exception as e:
             _logger.error(f"Google Drive auto-sync task error: {e}")
@@ -287,93 +403,53 @@ async def auto_sync_gdrive_sections():
         await asyncio.sleep(900)  # Check every 15 minutes
 
 
+async def _sync_pcloud_section(gallery_id: str, section: dict):
+    code = section["pcloud_code"]
+    pcloud_data = await _fetch_pcloud_folder(code)
+    if not pcloud_data['success']:
+        return
+    
+    sync_time = datetime.now(timezone.utc).isoformat()
+    fingerprint = pcloud_fingerprint(pcloud_data['photos'])
+    
+    if fingerprint != section.get("pcloud_fingerprint"):
+        base_order = await _db.pcloud_photos.count_documents({"section_id": section["id"]})
+        docs = [
+            pcloud_photo_doc(gallery_id, section["id"], code, photo, base_order + idx, sync_time)
+            for idx, photo in enumerate(pcloud_data['photos'])
+        ]
+        added = await upsert_section_photos(_db, 'pcloud_photos', gallery_id, section["id"], docs)
+        if added:
+            _logger.info(f"Synced {added} new pCloud photos for gallery {gallery_id}")
+    
+    await _db.galleries.update_one(
+        {"id": gallery_id, "sections.id": section["id"]},
+        {"$set": {
+            "sections.$.pcloud_last_sync": sync_time,
+            "sections.$.pcloud_error": None,
+            "sections.$.pcloud_fingerprint": fingerprint
+        }}
+    )
+
+
 async def auto_sync_pcloud_sections():
     """
     Background task to auto-sync pCloud sections.
     Refresh interval: Every 30 minutes for sections with data.
+    Due sections are synced concurrently under the sync scheduler's limits.
     """
     _logger.info("pCloud auto-sync task started")
     
     while _sync_task_running:
         try:
-            now = datetime.now(timezone.utc)
-            
-            galleries = await _db.galleries.find(
-                {"sections.type": "pcloud", "sections.pcloud_code": {"$ne": None}},
-                {"_id": 0, "id": 1, "sections": 1}
-            ).to_list(None)
-            
-            synced_count = 0
-            
-            for gallery in galleries:
-                for section in gallery.get("sections", []):
-                    if section.get("type") != "pcloud" or not section.get("pcloud_code"):
-                        continue
-                    
-                    code = section.get("pcloud_code")
-                    last_sync_str = section.get("pcloud_last_sync")
-                    
-                    should_sync = False
-                    if not last_sync_str:
-                        should_sync = True
-                    else:
-                        try:
-                            last_sync = datetime.fromisoformat(last_sync_str.replace('Z', '+00:00'))
-                            minutes_since_sync = (now - last_sync).total_seconds() / 60
-                            should_sync = minutes_since_sync >= 30
-                        except:
-                            should_sync = True
-                    
-                    if should_sync:
-                        try:
-                            pcloud_data = await _fetch_pcloud_folder(code)
-                            
-                            if pcloud_data['success']:
-                                existing = await _db.pcloud_photos.find(
-                                    {"gallery_id": gallery["id"], "section_id": section["id"]},
-                                    {"_id": 0, "fileid": 1}
-                                ).to_list(10000)
-                                existing_fileids = {p["fileid"] for p in existing}
-                                
-                                sync_time = now.isoformat()
-                                new_photos = []
-                                
-                                for photo in pcloud_data['photos']:
-                                    fileid_str = str(photo['fileid'])
-                                    if fileid_str not in existing_fileids:
-                                        new_photos.append({
-                                            "id": str(uuid.uuid4()),
-                                            "gallery_id": gallery["id"],
-                                            "section_id": section["id"],
-                                            "pcloud_code": code,
-                                            "fileid": fileid_str,
-                                            "name": photo['name'],
-                                            "size": photo.get('size', 0),
-                                            "width": photo.get('width'),
-                                            "height": photo.get('height'),
-                                            "contenttype": photo.get('contenttype', 'image/jpeg'),
-                                            "supplier_name": photo.get('supplier_name'),
-                                            "hash": str(photo.get('hash', '')) if photo.get('hash') else None,
-                                            "created_at_source": photo.get('created'),
-                                            "order": len(existing_fileids) + len(new_photos),
-                                            "synced_at": sync_time
-                                        })
-                                
-                                if new_photos:
-                                    await _db.pcloud_photos.insert_many(new_photos)
-                                    _logger.info(f"Synced {len(new_photos)} new pCloud photos for gallery {gallery['id']}")
-                                
-                                await _db.galleries.update_one(
-                                    {"id": gallery["id"], "sections.id": section["id"]},
-                                    {"$set": {"sections.$.pcloud_last_sync": sync_time, "sections.$.pcloud_error": None}}
-                                )
-                                
-                                synced_count += 1
-                        except Exception as e:
-                            _logger.error(f"Auto-sync error for pcloud section {section.get('id')}: {e}")
-            
-            if synced_count > 0:
-                _logger.info(f"pCloud auto-sync: Synced {synced_count} sections")
+            due = await _find_due_sections("pcloud", "pcloud_code", "pcloud_last_sync", PCLOUD_SYNC_MINUTES)
+            if due:
+                summary = await _sync_scheduler.run('pcloud', [
+                    (f"{item['gallery_id']}:{item['section']['id']}",
+                     partial(_sync_pcloud_section, item['gallery_id'], item['section']))
+                    for item in due
+                ])
+                _logger.info(f"pCloud auto-sync: Synced {summary['succeeded']}/{summary['ran']} sections in {summary['seconds']}s")
                 
         except Exception as e:
             _logger.error(f"pCloud auto-sync task error: {e}")
@@ -434,74 +510,116 @@ async def _sync_gallery_to_drive(user_id: str, gallery_id: str):
         _logger.error(f"Error syncing gallery {gallery_id} to drive: {e}")
 
 
+# Expired gallery purge: photos are handled in batches of PURGE_PHOTO_BATCH
+# (4 storage keys each), deleted from storage with batched DeleteObjects calls
+PURGE_PHOTO_BATCH = 1000
+
+
+async def _purge_photo_batch(gallery: dict, photos: list) -> int:
+    """
+    Delete a batch of photos from storage, then their documents, then credit
+    the freed bytes. Photos whose objects could not be deleted are kept for
+    the next run. The photo documents are the checkpoint: a crash anywhere
+    only repeats (idempotent) storage deletes for photos still in the DB.
+    Returns the number of photos purged.
+    """
+    keys_by_photo = {photo["id"]: _storage.photo_keys(photo["filename"]) if photo.get("filename") else []
+                     for photo in photos}
+    failed = set(await _storage.delete_files([key for keys in keys_by_photo.values() for key in keys]))
+    done = [photo for photo in photos if not failed.intersection(keys_by_photo[photo["id"]])]
+    if not done:
+        return 0
+    
+    # Counted delete keeps media_counts and the display feed right if the purge stops part-way
+    deleted = await delete_counted(_db, 'photos', {"id": {"$in": [photo["id"] for photo in done]}}, gallery_id=gallery["id"])
+    freed = sum(photo.get("file_size") or 0 for photo in done)
+    if freed:
+        await _db.users.update_one({"id": gallery["photographer_id"]}, {"$inc": {"storage_used": -freed}})
+    await _db.galleries.update_one(
+        {"id": gallery["id"]},
+        {"$inc": {"purge_photos_deleted": deleted, "purge_bytes_freed": freed}}
+    )
+    return len(done)
+
+
+async def _purge_gallery(gallery: dict) -> bool:
+    """Delete an expired gallery and its media. Returns False if some photos remain to retry."""
+    gallery_id = gallery["id"]
+    if gallery.get("purge_started_at"):
+        _logger.info(f"Resuming purge of gallery {gallery_id} ({gallery.get('purge_photos_deleted', 0)} photos already deleted)")
+    else:
+        await _db.galleries.update_one(
+            {"id": gallery_id},
+            {"$set": {"purge_started_at": datetime.now(timezone.utc).isoformat()}}
+        )
+    
+    remaining = 0
+    batch = []
+    cursor = _db.photos.find(
+        {"gallery_id": gallery_id},
+        {"_id": 0, "id": 1, "filename": 1, "file_size": 1}
+    ).batch_size(PURGE_PHOTO_BATCH)
+    async for photo in cursor:
+        batch.append(photo)
+        if len(batch) >= PURGE_PHOTO_BATCH:
+            remaining += len(batch) - await _purge_photo_batch(gallery, batch)
+            batch = []
+    if batch:
+        remaining += len(batch) - await _purge_photo_batch(gallery, batch)
+    
+    if remaining:
+        _logger.warning(f"Gallery {gallery_id}: {remaining} photos could not be deleted from storage, will retry")
+        return False
+    
+    if gallery.get("cover_photo_url"):
+        cover_filename = gallery["cover_photo_url"].split("/")[-1]
+        if await _storage.delete_files([f"photos/{cover_filename}"]):
+            _logger.warning(f"Failed to delete cover photo {cover_filename}")
+    
+    await _db.gallery_videos.delete_many({"gallery_id": gallery_id})
+    await _db.fotoshare_videos.delete_many({"gallery_id": gallery_id})
+    await _db.gdrive_photos.delete_many({"gallery_id": gallery_id})
+    await _db.pcloud_photos.delete_many({"gallery_id": gallery_id})
+    await _db.drive_backups.delete_many({"gallery_id": gallery_id})
+    await _db.galleries.delete_one({"id": gallery_id})
+    get_gallery_cache().invalidate(gallery_id=gallery_id)
+    return True
+
+
 async def auto_delete_expired_galleries():
-    """Background task to delete galleries past their auto_delete_date (6 months default)"""
+    """
+    Background task to delete galleries past their auto_delete_date (6 months default).
+    Expired galleries are streamed from a cursor and purged one at a time;
+    each gallery's photos go in batches (see _purge_photo_batch), so an
+    interrupted purge resumes where it stopped on the next run.
+    """
     _logger.info("Auto-delete expired galleries task started")
     
     while _sync_task_running:
         try:
             now = datetime.now(timezone.utc)
+            purged = 0
             
-            expired_galleries = await _db.galleries.find({
-                "auto_delete_date": {"$lt": now.isoformat()}
-            }, {"_id": 0}).to_list(None)
-            
-            for gallery in expired_galleries:
+            cursor = _db.galleries.find(
+                {"auto_delete_date": {"$lt": now.isoformat()}},
+                {"_id": 0, "id": 1, "photographer_id": 1, "title": 1, "cover_photo_url": 1,
+                 "purge_started_at": 1, "purge_photos_deleted": 1}
+            )
+            async for gallery in cursor:
                 gallery_id = gallery["id"]
-                photographer_id = gallery["photographer_id"]
                 gallery_title = gallery.get("title", "Unknown")
                 
                 _logger.info(f"Auto-deleting expired gallery: {gallery_title} ({gallery_id})")
                 
                 try:
-                    photos = await _db.photos.find({"gallery_id": gallery_id}, {"_id": 0}).to_list(None)
-                    total_size_freed = 0
-                    
-                    for photo in photos:
-                        try:
-                            filename = photo.get("filename", "")
-                            if filename:
-                                await _storage.delete_file(f"photos/{filename}")
-                                
-                                photo_id = filename.rsplit('.', 1)[0]
-                                file_ext = filename.rsplit('.', 1)[-1] if '.' in filename else 'jpg'
-                                await _storage.delete_photo_with_thumbnails(photo_id, file_ext)
-                                
-                                if not _storage.r2_enabled:
-                                    file_path = _UPLOAD_DIR / filename
-                                    if file_path.exists():
-                                        total_size_freed += file_path.stat().st_size
-                        except Exception as e:
-                            _logger.error(f"Failed to delete photo file {photo.get('filename')}: {e}")
-                    
-                    if gallery.get("cover_photo_url"):
-                        cover_filename = gallery["cover_photo_url"].split("/")[-1]
-                        try:
-                            await _storage.delete_file(f"photos/{cover_filename}")
-                        except Exception as e:
-                            _logger.warning(f"Failed to delete cover photo {cover_filename}: {e}")
-                    
-                    await _db.photos.delete_many({"gallery_id": gallery_id})
-                    await _db.gallery_videos.delete_many({"gallery_id": gallery_id})
-                    await _db.fotoshare_videos.delete_many({"gallery_id": gallery_id})
-                    await _db.gdrive_photos.delete_many({"gallery_id": gallery_id})
-                    await _db.pcloud_photos.delete_many({"gallery_id": gallery_id})
-                    await _db.drive_backups.delete_many({"gallery_id": gallery_id})
-                    await _db.galleries.delete_one({"id": gallery_id})
-                    
-                    if total_size_freed > 0:
-                        await _db.users.update_one(
-                            {"id": photographer_id},
-                            {"$inc": {"storage_used": -total_size_freed}}
-                        )
-                    
-                    _logger.info(f"Successfully auto-deleted gallery: {gallery_title} ({gallery_id})")
-                    
+                    if await _purge_gallery(gallery):
+                        purged += 1
+                        _logger.info(f"Successfully auto-deleted gallery: {gallery_title} ({gallery_id})")
                 except Exception as e:
                     _logger.error(f"Failed to auto-delete gallery {gallery_id}: {e}")
             
-            if expired_galleries:
-                _logger.info(f"Auto-delete task completed: {len(expired_galleries)} galleries removed")
+            if purged:
+                _logger.info(f"Auto-delete task completed: {purged} galleries removed")
         
         except Exception as e:
             _logger.error(f"Auto-delete task error: {e}")
@@ -574,9 +692,33 @@ async def check_expiring_subscriptions():
                         {"id": user["id"]},
                         {"$set": {"override_mode": None, "override_expires": None}}
                     )
+                    get_user_cache().invalidate(user["id"])
                     _logger.info(f"Cleared expired override for user {user.get('email')}")
         
         except Exception as e:
             _logger.error(f"Subscription expiry check error: {e}")
         
         await asyncio.sleep(24 * 60 * 60)  # Check daily
+
+
+async def reconcile_gallery_counters():
+    """
+    Background task to repair drift in the denormalized per-gallery media
+    counters (see utils/gallery_counters.py). Runs shortly after startup so
+    existing galleries are backfilled, then daily.
+    """
+    _logger.info("Gallery counter reconciliation task started")
+    
+    await asyncio.sleep(60)  # Let startup traffic settle first
+    
+    while _sync_task_running:
+        try:
+            result = await reconcile_all_gallery_counts(_db)
+            if result["repaired"]:
+                _logger.warning(f"Gallery counters: repaired {result['repaired']} of {result['checked']} galleries")
+            else:
+                _logger.info(f"Gallery counters: {result['checked']} galleries consistent")
+        except Exception as e:
+            _logger.error(f"Gallery counter reconciliation error: {e}")
+        
+        await asyncio.sleep(24 * 60 * 60)  # Check daily
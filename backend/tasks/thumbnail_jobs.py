@@ -0,0 +1,319 @@
+"""
+Durable thumbnail job queue for EventsGallery
+
+In deferred mode an upload only stores the original, inserts the photo with
+thumbnail_status "pending" and enqueues a job here. Worker loops claim jobs
+from the `thumbnail_jobs` collection, render thumbnails in the thumbnail
+process pool, upload them and update the photo.
+
+Reliability:
+- Claiming a job sets a lease (visibility timeout). If the worker crashes or
+  hangs, the job becomes claimable again once the lease expires.
+- Failures are retried with exponential backoff up to THUMBNAIL_JOB_MAX_ATTEMPTS.
+  After the last attempt the photo is auto-flagged, which replaces the old
+  synchronous auto-flag on upload.
+- Completion is fenced by the lease id, so a worker whose lease expired
+  cannot overwrite the result of the worker that re-claimed the job.
+
+Dependencies (injected at startup via init_thumbnail_jobs):
+- db, storage, thumbnail_pool, logger, upload/thumbnail directories
+"""
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timezone, timedelta
+
+from pymongo import ReturnDocument
+
+from utils.display_feed import record_display_changes
+from utils.thumbnails import ThumbnailPoolBusy
+
+THUMBNAIL_JOB_CONCURRENCY = int(os.environ.get('THUMBNAIL_JOB_CONCURRENCY', '0')) or (os.cpu_count() or 2)
+THUMBNAIL_JOB_MAX_ATTEMPTS = int(os.environ.get('THUMBNAIL_JOB_MAX_ATTEMPTS', '5'))
+THUMBNAIL_JOB_VISIBILITY_TIMEOUT = int(os.environ.get('THUMBNAIL_JOB_VISIBILITY_TIMEOUT', '120'))  # seconds
+THUMBNAIL_JOB_RETRY_BASE_DELAY = 5  # seconds, doubled per attempt
+THUMBNAIL_JOB_POLL_INTERVAL = 2  # seconds between polls when the queue is empty
+
+# Sizes generated for every photo, mapped to the photo field that stores the URL
+THUMBNAIL_FIELDS = {'small': 'thumbnail_url', 'medium': 'thumbnail_medium_url'}
+
+# Module-level references to dependencies (set by init_thumbnail_jobs)
+_db = None
+_storage = None
+_thumbnail_pool = None
+_logger = None
+_UPLOAD_DIR = None
+_THUMBNAILS_DIR = None
+_THUMBNAIL_SIZES = None
+_JPEG_QUALITY = 85
+_worker_running = True
+_wake_event = None
+
+
+def init_thumbnail_jobs(
+    db,
+    storage,
+    thumbnail_pool,
+    logger,
+    UPLOAD_DIR,
+    THUMBNAILS_DIR,
+    THUMBNAIL_SIZES,
+    JPEG_QUALITY=85
+):
+    """
+    Initialize the thumbnail job module with required dependencies.
+    Must be called before enqueueing jobs or starting the worker.
+    """
+    global _db, _storage, _thumbnail_pool, _logger, _worker_running
+    global _UPLOAD_DIR, _THUMBNAILS_DIR, _THUMBNAIL_SIZES, _JPEG_QUALITY
+
+    _db = db
+    _storage = storage
+    _thumbnail_pool = thumbnail_pool
+    _logger = logger
+    _UPLOAD_DIR = UPLOAD_DIR
+    _THUMBNAILS_DIR = THUMBNAILS_DIR
+    _THUMBNAIL_SIZES = THUMBNAIL_SIZES
+    _JPEG_QUALITY = JPEG_QUALITY
+    _worker_running = True
+
+    _logger.info("Thumbnail job queue initialized")
+
+
+def stop_thumbnail_jobs():
+    """Signal the worker loops to stop"""
+    global _worker_running
+    _worker_running = False
+    if _wake_event is not None:
+        _wake_event.set()
+
+
+def _get_wake_event() -> asyncio.Event:
+    global _wake_event
+    if _wake_event is None:
+        _wake_event = asyncio.Event()
+    return _wake_event
+
+
+async def enqueue_thumbnail_job(photo: dict):
+    """
+    Queue thumbnail generation for a photo (idempotent per photo).
+    Re-enqueueing a finished or failed photo resets its job.
+    """
+    now = datetime.now(timezone.utc)
+    await _db.thumbnail_jobs.update_one(
+        {"photo_id": photo["id"]},
+        {
+            "$set": {
+                "gallery_id": photo.get("gallery_id"),
+                "storage_key": photo.get("storage_key"),
+                "filename": photo.get("filename"),
+                "status": "pending",
+                "attempts": 0,
+                "available_at": now,
+                "lease_id": None,
+                "lease_expires_at": None,
+                "last_error": None,
+                "completed_at": None,
+                "updated_at": now,
+            },
+            "$setOnInsert": {"id": str(uuid.uuid4()), "created_at": now},
+        },
+        upsert=True
+    )
+    _get_wake_event().set()
+
+
+async def claim_thumbnail_job(worker_id: str):
+    """
+    Atomically claim the next due job, or a processing job whose lease expired.
+    Returns the claimed job document or None.
+    """
+    now = datetime.now(timezone.utc)
+    return await _db.thumbnail_jobs.find_one_and_update(
+        {"$or": [
+            {"status": "pending", "available_at": {"$lte": now}},
+            {"status": "processing", "lease_expires_at": {"$lte": now}},
+        ]},
+        {
+            "$set": {
+                "status": "processing",
+                "lease_id": str(uuid.uuid4()),
+                "lease_expires_at": now + timedelta(seconds=THUMBNAIL_JOB_VISIBILITY_TIMEOUT),
+                "worker_id": worker_id,
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("available_at", 1)],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def _render_thumbnails(job: dict) -> dict:
+    """Render and store all thumbnail sizes for a job. Returns {photo_field: url}."""
+    photo_id = job["photo_id"]
+    sizes = {size_name: _THUMBNAIL_SIZES[size_name] for size_name in THUMBNAIL_FIELDS}
+    storage_key = job.get("storage_key") or ""
+    urls = {}
+
+    if _storage.r2_enabled and storage_key.startswith("photos/"):
+        content = await _storage.get_file(storage_key)
+        if not content:
+            raise RuntimeError(f"Original not found in storage: {storage_key}")
+        rendered = await _thumbnail_pool.render(content, sizes, _JPEG_QUALITY)
+        del content
+        for size_name, field in THUMBNAIL_FIELDS.items():
+            thumb_bytes = rendered.get(size_name)
+            if not thumb_bytes:
+                raise RuntimeError(f"Failed to generate {size_name} thumbnail")
+            success, url_or_error = await _storage.upload_file(
+                f"thumbnails/{photo_id}_{size_name}.jpg", thumb_bytes, 'image/jpeg'
+            )
+            if not success:
+                raise RuntimeError(f"Failed to upload {size_name} thumbnail: {url_or_error}")
+            urls[field] = url_or_error
+    else:
+        source_path = _UPLOAD_DIR / (job.get("filename") or storage_key)
+        if not source_path.exists():
+            raise RuntimeError(f"Original not found on disk: {source_path.name}")
+        filenames = await _thumbnail_pool.render_files(source_path, photo_id, sizes, _THUMBNAILS_DIR, _JPEG_QUALITY)
+        for size_name, field in THUMBNAIL_FIELDS.items():
+            if not filenames.get(size_name):
+                raise RuntimeError(f"Failed to generate {size_name} thumbnail")
+            urls[field] = f"/api/photos/thumb/{filenames[size_name]}"
+
+    return urls
+
+
+async def _fail_job(job: dict, error: str):
+    """Schedule a retry, or give up and auto-flag the photo after the last attempt"""
+    now = datetime.now(timezone.utc)
+    fence = {"id": job["id"], "lease_id": job["lease_id"]}
+
+    if job["attempts"] >= THUMBNAIL_JOB_MAX_ATTEMPTS:
+        result = await _db.thumbnail_jobs.update_one(
+            fence,
+            {"$set": {"status": "failed", "last_error": error, "lease_id": None, "updated_at": now}}
+        )
+        if result.modified_count:
+            await _db.photos.update_one(
+                {"id": job["photo_id"]},
+                {"$set": {
+                    "thumbnail_status": "failed",
+                    "is_flagged": True,
+                    "auto_flagged": True,
+                    "flagged_at": now.isoformat(),
+                    "flagged_reason": "auto:thumbnail_generation_failed",
+                }}
+            )
+            await record_display_changes(_db, job.get("gallery_id"), 'photos', [job["photo_id"]])
+            _logger.warning(f"Auto-flagged photo {job['photo_id']} after {job['attempts']} thumbnail attempts: {error}")
+        return
+
+    delay = THUMBNAIL_JOB_RETRY_BASE_DELAY * (2 ** (job["attempts"] - 1))
+    await _db.thumbnail_jobs.update_one(
+        fence,
+        {"$set": {
+            "status": "pending",
+            "available_at": now + timedelta(seconds=delay),
+            "last_error": error,
+            "lease_id": None,
+            "lease_expires_at": None,
+            "updated_at": now,
+        }}
+    )
+    _logger.warning(f"Thumbnail job for {job['photo_id']} failed (attempt {job['attempts']}), retrying in {delay}s: {error}")
+
+
+async def process_thumbnail_job(job: dict):
+    """Run one claimed job to completion, retry or failure"""
+    now = datetime.now(timezone.utc)
+    fence = {"id": job["id"], "lease_id": job["lease_id"]}
+
+    photo = await _db.photos.find_one({"id": job["photo_id"]}, {"_id": 0, "id": 1})
+    if not photo:
+        # Photo was deleted before its thumbnails were generated
+        await _db.thumbnail_jobs.update_one(fence, {"$set": {"status": "done", "completed_at": now, "lease_id": None}})
+        return
+
+    try:
+        urls = await _render_thumbnails(job)
+    except ThumbnailPoolBusy:
+        # Pool saturated - put the job back without spending an attempt
+        await _db.thumbnail_jobs.update_one(
+            fence,
+            {"$set": {"status": "pending", "available_at": now + timedelta(seconds=THUMBNAIL_JOB_POLL_INTERVAL),
+                      "lease_id": None, "lease_expires_at": None},
+             "$inc": {"attempts": -1}}
+        )
+        return
+    except Exception as e:
+        await _fail_job(job, str(e))
+        return
+
+    result = await _db.thumbnail_jobs.update_one(
+        fence,
+        {"$set": {"status": "done", "completed_at": datetime.now(timezone.utc), "lease_id": None, "last_error": None}}
+    )
+    if not result.modified_count:
+        _logger.info(f"Thumbnail job for {job['photo_id']} lost its lease; result discarded")
+        return
+
+    await _db.photos.update_one(
+        {"id": job["photo_id"]},
+        {"$set": {**urls, "thumbnail_status": "ready"}}
+    )
+    await record_display_changes(_db, job.get("gallery_id"), 'photos', [job["photo_id"]])
+
+
+async def get_thumbnail_job_stats() -> dict:
+    """Job counts by status plus the age of the oldest due job"""
+    counts = {"pending": 0, "processing": 0, "done": 0, "failed": 0}
+    async for row in _db.thumbnail_jobs.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+        counts[row["_id"]] = row["count"]
+
+    oldest = await _db.thumbnail_jobs.find_one(
+        {"status": "pending"}, {"_id": 0, "available_at": 1}, sort=[("available_at", 1)]
+    )
+    oldest_age = 0
+    if oldest and oldest.get("available_at"):
+        available_at = oldest["available_at"]
+        if available_at.tzinfo is None:
+            available_at = available_at.replace(tzinfo=timezone.utc)
+        oldest_age = max(0, int((datetime.now(timezone.utc) - available_at).total_seconds()))
+
+    return {**counts, "oldest_pending_seconds": oldest_age, "workers": THUMBNAIL_JOB_CONCURRENCY}
+
+
+async def _worker_loop(worker_id: str):
+    wake_event = _get_wake_event()
+    while _worker_running:
+        try:
+            job = await claim_thumbnail_job(worker_id)
+            if job is None:
+                wake_event.clear()
+                try:
+                    await asyncio.wait_for(wake_event.wait(), timeout=THUMBNAIL_JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await process_thumbnail_job(job)
+        except Exception as e:
+            _logger.error(f"Thumbnail worker {worker_id} error: {e}")
+            await asyncio.sleep(THUMBNAIL_JOB_POLL_INTERVAL)
+
+
+async def thumbnail_job_worker():
+    """
+    Background task running THUMBNAIL_JOB_CONCURRENCY worker loops.
+    Jobs left in "processing" by a crashed instance are picked up again
+    once their lease expires.
+    """
+    _logger.info(f"Thumbnail job worker started ({THUMBNAIL_JOB_CONCURRENCY} loops)")
+    host = f"{socket.gethostname()}:{os.getpid()}"
+    await asyncio.gather(*[
+        _worker_loop(f"{host}:{slot}") for slot in range(THUMBNAIL_JOB_CONCURRENCY)
+    ])
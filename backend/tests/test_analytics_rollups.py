@@ -0,0 +1,138 @@
+"""
+Test suite for dashboard analytics without per-photo aggregation
+- Tracked events bump one rollup counter per photographer / event type / day
+- Today / week / month totals come from the daily counters
+- Photo counts by uploader come from grouped rows
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.analytics_rollups import daily_counts, insert_analytics_event, total_since
+from utils.gallery_counters import photo_counts_by_uploader
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return list(self.docs)
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeRollups:
+    def __init__(self):
+        self.counts = {}
+
+    async def update_one(self, query, update, upsert=False):
+        key = (query["photographer_id"], query["event_type"], query["day"])
+        self.counts[key] = self.counts.get(key, 0) + update["$inc"]["count"]
+
+    def find(self, query, projection=None):
+        return FakeCursor([
+            {"day": day, "count": count}
+            for (photographer_id, event_type, day), count in self.counts.items()
+            if photographer_id == query["photographer_id"] and event_type == query["event_type"]
+            and day >= query["day"]["$gte"]
+        ])
+
+
+class FakeEvents:
+    def __init__(self):
+        self.docs = []
+
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+
+
+class FakePhotos:
+    def __init__(self, rows):
+        self.rows = rows
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor(self.rows)
+
+
+class FakeDb:
+    def __init__(self, photo_rows=()):
+        self.analytics_events = FakeEvents()
+        self.analytics_daily = FakeRollups()
+        self.photos = FakePhotos(list(photo_rows))
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+def event(day, event_type="view", photographer_id="u1"):
+    return {"id": f"{day}-{event_type}", "gallery_id": "g1", "photographer_id": photographer_id,
+            "event_type": event_type, "created_at": f"{day}T10:00:00+00:00"}
+
+
+class TestDailyRollups:
+    """Tests for utils.analytics_rollups"""
+
+    def test_events_bump_rollups(self):
+        db = FakeDb()
+
+        async def run():
+            for e in (event("2024-06-10"), event("2024-06-10"), event("2024-06-10", "download"),
+                      event("2024-06-09"), event("2024-06-10", photographer_id=None)):
+                await insert_analytics_event(db, e)
+
+        asyncio.run(run())
+        assert len(db.analytics_events.docs) == 5
+        assert db.analytics_daily.counts == {
+            ("u1", "view", "2024-06-10"): 2,
+            ("u1", "download", "2024-06-10"): 1,
+            ("u1", "view", "2024-06-09"): 1,
+        }
+        print("✓ Each event logged and counted in its day's rollup")
+
+    def test_period_totals(self):
+        db = FakeDb()
+
+        async def run():
+            for day in ("2024-05-31", "2024-06-01", "2024-06-03", "2024-06-05", "2024-06-05"):
+                await insert_analytics_event(db, event(day))
+            return await daily_counts(db, "u1", "view", datetime(2024, 5, 27, tzinfo=timezone.utc))
+
+        counts = asyncio.run(run())
+        assert total_since(counts, datetime(2024, 6, 5, tzinfo=timezone.utc)) == 2  # today
+        assert total_since(counts, datetime(2024, 6, 3, tzinfo=timezone.utc)) == 3  # week from Monday
+        assert total_since(counts, datetime(2024, 6, 1, tzinfo=timezone.utc)) == 4  # month
+        assert total_since(counts, datetime(2024, 5, 27, tzinfo=timezone.utc)) == 5
+        print("✓ Today/week/month totals summed from one rollup read")
+
+
+class TestPhotoCountsByUploader:
+    """Tests for utils.gallery_counters.photo_counts_by_uploader"""
+
+    def test_grouped_counts(self):
+        db = FakeDb([
+            {"_id": {"gallery_id": "g1", "uploaded_by": "photographer"}, "count": 30},
+            {"_id": {"gallery_id": "g1", "uploaded_by": "guest"}, "count": 5},
+            {"_id": {"gallery_id": "g1", "uploaded_by": "contributor"}, "count": 2},
+            {"_id": {"gallery_id": "g2", "uploaded_by": "guest"}, "count": 1},
+        ])
+        counts = asyncio.run(photo_counts_by_uploader(db, ["g1", "g2", "g3"]))
+        assert counts["g1"] == {"total": 37, "photographer": 30, "guest": 5}
+        assert counts["g2"] == {"total": 1, "photographer": 0, "guest": 1}
+        assert "g3" not in counts
+        assert "$lookup" not in str(db.photos.pipelines)
+        assert asyncio.run(photo_counts_by_uploader(db, [])) == {}
+        print("✓ Per-uploader counts from grouped rows")
@@ -0,0 +1,95 @@
+"""
+Test suite for the display change feed
+- Change log replay since a version, grouped by source
+- Gaps and pruned history force a resync
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.display_feed import display_etag, display_meta_hash, get_display_changes
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction=1):
+        self.docs = sorted(self.docs, key=lambda d: d[field], reverse=direction == -1)
+        return self
+
+    async def to_list(self, length):
+        return [dict(d) for d in self.docs]
+
+
+class FakeChanges:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def find(self, query, projection=None):
+        version = query["version"]
+        return FakeCursor([
+            r for r in self.rows
+            if r["gallery_id"] == query["gallery_id"] and version["$gt"] < r["version"] <= version["$lte"]
+        ])
+
+
+class FakeDb:
+    def __init__(self, rows):
+        self.display_changes = FakeChanges(rows)
+
+
+def row(version, source, item_id, gallery_id="g1"):
+    return {"gallery_id": gallery_id, "version": version, "source": source, "item_id": item_id}
+
+
+class TestDisplayChanges:
+    """Tests for utils.display_feed.get_display_changes"""
+
+    def test_replay_groups_by_source(self):
+        db = FakeDb([
+            row(1, "upload", "a"), row(2, "upload", "b"), row(2, "upload", "c"),
+            row(3, "video", "v1"), row(4, "upload", "a"), row(4, "pcloud", "x", gallery_id="g2"),
+        ])
+        changes = asyncio.run(get_display_changes(db, "g1", 1, 4))
+        assert changes["version"] == 4
+        assert changes["touched"] == {"upload": {"a", "b", "c"}, "video": {"v1"}}
+        print("✓ Changes since v1 grouped per source")
+
+    def test_up_to_date(self):
+        changes = asyncio.run(get_display_changes(FakeDb([]), "g1", 5, 5))
+        assert changes == {"version": 5, "touched": {}}
+        print("✓ No changes at current version")
+
+    def test_pruned_history_requires_resync(self):
+        db = FakeDb([row(8, "upload", "a"), row(9, "upload", "b")])
+        assert asyncio.run(get_display_changes(db, "g1", 3, 9)) is None
+        assert asyncio.run(get_display_changes(db, "g1", 10, 9)) is None
+        print("✓ Pruned or future versions force resync")
+
+    def test_stops_at_unlogged_version(self):
+        """A version bumped but not yet logged caps the reply below it"""
+        db = FakeDb([row(2, "upload", "a"), row(4, "upload", "b")])
+        changes = asyncio.run(get_display_changes(db, "g1", 1, 4))
+        assert changes["version"] == 2
+        assert changes["touched"] == {"upload": {"a"}}
+        print("✓ Reply stops before the gap")
+
+
+class TestDisplayEtag:
+    """Tests for display meta hash and ETag"""
+
+    def test_meta_hash_tracks_display_fields(self):
+        gallery = {"title": "Wedding", "display_interval": 6, "view_count": 10}
+        base = display_meta_hash(gallery)
+        assert display_meta_hash({**gallery, "view_count": 11}) == base
+        assert display_meta_hash({**gallery, "display_interval": 8}) != base
+        print("✓ Meta hash ignores non-display fields")
+
+    def test_etag_changes_with_version(self):
+        state = {"version": 3, "meta_hash": "abc"}
+        assert display_etag("g1", state) != display_etag("g1", {**state, "version": 4})
+        assert display_etag("g1", state).startswith('W/"')
+        print("✓ ETag follows version")
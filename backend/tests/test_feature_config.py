@@ -0,0 +1,80 @@
+"""
+Test suite for the feature resolution cache
+- site_config values are loaded once until the TTL passes or bump() is called
+- A bump during a load keeps the loaded value out of the cache
+- Memoized results expire at valid_until and are cleared by bump()
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.feature_config import FeatureConfigCache
+
+
+def make_loader(calls, value=None, during=None):
+    async def loader():
+        calls.append(1)
+        if during:
+            during()
+        return value if value is not None else {"pro": {"coordinator_hub": True}}
+    return loader
+
+
+class TestFeatureConfigCache:
+    """Tests for utils.feature_config.FeatureConfigCache"""
+
+    def test_config_cached_until_bump(self):
+        cache = FeatureConfigCache(ttl=60)
+        calls = []
+
+        async def run():
+            first = await cache.get_config("toggles", make_loader(calls))
+            first["pro"]["coordinator_hub"] = False
+            second = await cache.get_config("toggles", make_loader(calls))
+            cache.bump()
+            await cache.get_config("toggles", make_loader(calls))
+            return second
+
+        second = asyncio.run(run())
+        assert second["pro"]["coordinator_hub"] is True
+        assert len(calls) == 2
+        print("✓ Config read once per version, callers get copies")
+
+    def test_bump_during_load_not_cached(self):
+        cache = FeatureConfigCache(ttl=60)
+        calls = []
+
+        async def run():
+            await cache.get_config("toggles", make_loader(calls, during=cache.bump))
+            await cache.get_config("toggles", make_loader(calls))
+
+        asyncio.run(run())
+        assert len(calls) == 2
+        print("✓ Value loaded across a bump is not cached")
+
+    def test_memo_valid_until_and_bump(self):
+        cache = FeatureConfigCache(ttl=60)
+        cache.memo_put(("a", cache.version), {"features": {"qr_code": True}})
+        cache.memo_put(("b", cache.version), {"features": {}}, valid_until=time.time() + 0.01)
+        cache.memo_put(("c", cache.version), {"features": {}}, valid_until=time.time() - 1)
+
+        assert cache.memo_get(("a", 0)) == {"features": {"qr_code": True}}
+        time.sleep(0.02)
+        assert cache.memo_get(("b", 0)) is None
+        assert cache.memo_get(("c", 0)) is None
+
+        cache.bump()
+        assert cache.memo_get(("a", 0)) is None
+        assert cache.stats()["version"] == 1
+        print("✓ Memo honours valid_until and is cleared by bump")
+
+    def test_memo_bounded(self):
+        cache = FeatureConfigCache(ttl=60, max_memo_entries=2)
+        for i in range(3):
+            cache.memo_put(i, {"i": i})
+        assert cache.memo_get(0) is None
+        assert cache.memo_get(2) == {"i": 2}
+        print("✓ Memo evicts least recently used results")
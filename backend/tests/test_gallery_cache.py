@@ -0,0 +1,135 @@
+"""
+Test suite for the public gallery share_link cache
+- Hits/misses and TTL expiry
+- LRU eviction and invalidation by gallery id
+- Single-flight loading and copy-on-read
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.gallery_cache import GalleryCache
+
+
+def make_loader(calls, delay=0):
+    async def loader(share_link):
+        calls.append(share_link)
+        if delay:
+            await asyncio.sleep(delay)
+        return {"gallery": {"id": f"id-{share_link}", "share_link": share_link, "sections": []}}
+    return loader
+
+
+class TestGalleryCache:
+    """Tests for utils.gallery_cache.GalleryCache"""
+
+    def test_hit_after_miss(self):
+        """Second lookup is served from the cache"""
+        cache = GalleryCache(max_entries=10, ttl=60)
+        calls = []
+
+        async def run():
+            await cache.get("abc", make_loader(calls))
+            return await cache.get("abc", make_loader(calls))
+
+        value = asyncio.run(run())
+        assert value["gallery"]["id"] == "id-abc"
+        assert calls == ["abc"]
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+        print("✓ Cached lookup avoids the loader")
+
+    def test_ttl_expiry(self):
+        """Entries reload once the TTL has passed"""
+        cache = GalleryCache(max_entries=10, ttl=0.01)
+        calls = []
+
+        async def run():
+            await cache.get("abc", make_loader(calls))
+            time.sleep(0.02)
+            await cache.get("abc", make_loader(calls))
+
+        asyncio.run(run())
+        assert calls == ["abc", "abc"]
+        print("✓ Expired entry reloaded")
+
+    def test_lru_eviction(self):
+        """Least recently used entry is evicted at capacity"""
+        cache = GalleryCache(max_entries=2, ttl=60)
+        calls = []
+
+        async def run():
+            loader = make_loader(calls)
+            await cache.get("a", loader)
+            await cache.get("b", loader)
+            await cache.get("a", loader)  # a becomes most recent
+            await cache.get("c", loader)  # evicts b
+            await cache.get("a", loader)
+            await cache.get("b", loader)
+
+        asyncio.run(run())
+        assert calls == ["a", "b", "c", "b"]
+        assert cache.stats()["evictions"] == 2
+        print("✓ LRU eviction order correct")
+
+    def test_invalidate_by_gallery_id(self):
+        """Invalidation by gallery id drops the share_link entry"""
+        cache = GalleryCache(max_entries=10, ttl=60)
+        calls = []
+
+        async def run():
+            loader = make_loader(calls)
+            await cache.get("abc", loader)
+            cache.invalidate(gallery_id="id-abc")
+            await cache.get("abc", loader)
+
+        asyncio.run(run())
+        assert calls == ["abc", "abc"]
+        print("✓ Invalidation forces reload")
+
+    def test_single_flight(self):
+        """Concurrent misses for one share_link share a single load"""
+        cache = GalleryCache(max_entries=10, ttl=60)
+        calls = []
+
+        async def run():
+            loader = make_loader(calls, delay=0.01)
+            return await asyncio.gather(*[cache.get("abc", loader) for _ in range(20)])
+
+        values = asyncio.run(run())
+        assert calls == ["abc"]
+        assert all(v["gallery"]["id"] == "id-abc" for v in values)
+        print("✓ 20 concurrent misses -> 1 load")
+
+    def test_returns_copies(self):
+        """Mutating a returned gallery does not change the cached entry"""
+        cache = GalleryCache(max_entries=10, ttl=60)
+
+        async def run():
+            loader = make_loader([])
+            first = await cache.get("abc", loader)
+            first["gallery"]["sections"].append({"id": "s1"})
+            return await cache.get("abc", loader)
+
+        assert asyncio.run(run())["gallery"]["sections"] == []
+        print("✓ Cached value isolated from caller mutation")
+
+    def test_invalidation_during_load_not_cached(self):
+        """A value loaded across an invalidation is not stored"""
+        cache = GalleryCache(max_entries=10, ttl=60)
+        calls = []
+
+        async def run():
+            loader = make_loader(calls, delay=0.01)
+            task = asyncio.ensure_future(cache.get("abc", loader))
+            await asyncio.sleep(0)
+            cache.invalidate(gallery_id="id-abc")
+            await task
+            await cache.get("abc", loader)
+
+        asyncio.run(run())
+        assert calls == ["abc", "abc"]
+        print("✓ Stale in-flight load discarded")
+
@@ -0,0 +1,172 @@
+"""
+Test suite for denormalized gallery media counters
+- Inserts and deletes adjust the counter by the documents actually written
+- A delete that matches nothing leaves the counter alone
+- Reconcile repairs a skewed counter, and retries when a concurrent $inc
+  changes the counter between its read and its write
+- get_gallery_counts backfills galleries that predate counters
+"""
+import asyncio
+import copy
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.gallery_counters import (
+    COUNTED_COLLECTIONS,
+    delete_counted,
+    empty_gallery_counts,
+    get_gallery_counts,
+    insert_counted,
+    reconcile_gallery_counts,
+)
+
+
+def matches(doc, query):
+    for key, value in query.items():
+        if isinstance(value, dict) and "$in" in value:
+            if doc.get(key) not in value["$in"]:
+                return False
+        elif doc.get(key) != value:
+            return False
+    return True
+
+
+class FakeMedia:
+    def __init__(self, docs=()):
+        self.docs = [dict(d) for d in docs]
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    async def insert_many(self, docs):
+        self.docs.extend(dict(d) for d in docs)
+
+    async def delete_many(self, query):
+        keep = [d for d in self.docs if not matches(d, query)]
+        deleted = len(self.docs) - len(keep)
+        self.docs = keep
+        return SimpleNamespace(deleted_count=deleted)
+
+    async def distinct(self, field, query):
+        return [d.get(field) for d in self.docs if matches(d, query)]
+
+    async def count_documents(self, query):
+        return len([d for d in self.docs if matches(d, query)])
+
+
+class FakeGalleries:
+    def __init__(self, gallery):
+        self.gallery = gallery
+        self.before_update = None  # hook run before the next update_one
+
+    async def find_one(self, query, projection=None):
+        return copy.deepcopy(self.gallery) if self.gallery["id"] == query["id"] else None
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        self.gallery["display_version"] = self.gallery.get("display_version", 0) + 1
+        return {"display_version": self.gallery["display_version"]}
+
+    async def update_one(self, query, update):
+        hook, self.before_update = self.before_update, None
+        if hook:
+            await hook()
+        if "media_counts" in query and self.gallery.get("media_counts") != query["media_counts"]:
+            return SimpleNamespace(matched_count=0)
+        for field, delta in update.get("$inc", {}).items():
+            counts = self.gallery.setdefault("media_counts", {})
+            name = field.split(".", 1)[1]
+            counts[name] = counts.get(name, 0) + delta
+        self.gallery.update(copy.deepcopy(update.get("$set", {})))
+        return SimpleNamespace(matched_count=1)
+
+
+class FakeChanges:
+    def __init__(self):
+        self.docs = []
+
+    async def insert_many(self, docs):
+        self.docs.extend(docs)
+
+
+class FakeDb:
+    def __init__(self, gallery, photos=()):
+        self.galleries = FakeGalleries(gallery)
+        self.display_changes = FakeChanges()
+        for collection in COUNTED_COLLECTIONS:
+            setattr(self, collection, FakeMedia())
+        self.photos.docs = [dict(p) for p in photos]
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+def photo(i, gallery_id="g1"):
+    return {"id": f"p{i}", "gallery_id": gallery_id}
+
+
+class TestInsertDeleteCounted:
+    """Tests for insert_counted / delete_counted"""
+
+    def test_insert_and_delete_adjust_counter(self):
+        db = FakeDb({"id": "g1", "media_counts": empty_gallery_counts()})
+
+        async def run():
+            await insert_counted(db, "photos", photo(1))
+            await insert_counted(db, "photos", [photo(2), photo(3), photo(4)])
+            return await delete_counted(db, "photos", {"gallery_id": "g1", "id": {"$in": ["p1", "p2", "missing"]}})
+
+        deleted = asyncio.run(run())
+        assert deleted == 2
+        assert db.galleries.gallery["media_counts"]["photos"] == 2
+        assert sorted(c["item_id"] for c in db.display_changes.docs) == ["p1", "p1", "p2", "p2", "p3", "p4"]
+        print("✓ Counter follows the documents actually inserted and deleted")
+
+    def test_delete_matching_nothing(self):
+        db = FakeDb({"id": "g1", "media_counts": dict(empty_gallery_counts(), photos=1)}, [photo(1)])
+
+        deleted = asyncio.run(delete_counted(db, "photos", {"gallery_id": "g1", "id": "nope"}))
+        assert deleted == 0
+        assert db.galleries.gallery["media_counts"]["photos"] == 1
+        assert db.display_changes.docs == []
+        print("✓ Empty delete leaves the counter unchanged")
+
+
+class TestReconcile:
+    """Tests for reconcile_gallery_counts / get_gallery_counts"""
+
+    def test_repairs_skewed_counter(self):
+        db = FakeDb({"id": "g1", "media_counts": dict(empty_gallery_counts(), photos=7)}, [photo(1), photo(2)])
+
+        counts = asyncio.run(reconcile_gallery_counts(db, "g1"))
+        assert counts["photos"] == 2
+        assert db.galleries.gallery["media_counts"]["photos"] == 2
+        assert "media_counts_reconciled_at" in db.galleries.gallery
+        print("✓ Reconcile overwrites a drifted counter")
+
+    def test_retries_after_concurrent_increment(self):
+        db = FakeDb({"id": "g1", "media_counts": dict(empty_gallery_counts(), photos=1)}, [photo(1)])
+
+        async def concurrent_insert():
+            # Lands between reconcile's count and its write
+            await insert_counted(db, "photos", photo(2))
+
+        db.galleries.before_update = concurrent_insert
+        counts = asyncio.run(reconcile_gallery_counts(db, "g1"))
+        assert counts["photos"] == 2
+        assert db.galleries.gallery["media_counts"]["photos"] == 2
+        print("✓ Concurrent $inc makes reconcile recount instead of double counting")
+
+    def test_get_gallery_counts_backfills(self):
+        gallery = {"id": "g1"}
+        db = FakeDb(dict(gallery), [photo(1), photo(2), photo(3, gallery_id="g2")])
+
+        counts = asyncio.run(get_gallery_counts(db, gallery))
+        assert counts == dict(empty_gallery_counts(), photos=2)
+        assert db.galleries.gallery["media_counts"] == counts
+
+        db.photos.docs = []
+        assert asyncio.run(get_gallery_counts(db, db.galleries.gallery)) == counts  # stored counters used as-is
+        print("✓ Gallery without counters backfilled on first access")
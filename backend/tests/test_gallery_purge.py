@@ -0,0 +1,142 @@
+"""
+Test suite for the expired gallery purge
+- Photos are deleted from storage in batches, then from the DB, and the
+  freed bytes are credited back to the photographer
+- Photos whose objects fail to delete are kept and the gallery survives
+  for a retry, with counters and display feed matching the photos left
+"""
+import asyncio
+import logging
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import tasks.background as background
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(list(self.docs))
+        return self
+
+    async def __anext__(self):
+        try:
+            return dict(next(self._iter))
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+        self.updates = []
+
+    def find(self, query, projection=None):
+        return FakeCursor([d for d in self.docs if all(d.get(k) == v for k, v in query.items())])
+
+    async def delete_many(self, query):
+        if isinstance(query.get("id"), dict):
+            ids = set(query["id"]["$in"])
+            keep = [d for d in self.docs if d["id"] not in ids]
+        else:
+            keep = [d for d in self.docs if any(d.get(k) != v for k, v in query.items())]
+        deleted = len(self.docs) - len(keep)
+        self.docs = keep
+        return SimpleNamespace(deleted_count=deleted)
+
+    async def delete_one(self, query):
+        return await self.delete_many(query)
+
+    async def distinct(self, field, query):
+        ids = set(query["id"]["$in"])
+        return [d[field] for d in self.docs if d["id"] in ids]
+
+    async def find_one_and_update(self, query, update, **kwargs):
+        self.updates.append((query, update))
+        return {"display_version": len(self.updates)}
+
+    async def insert_many(self, docs):
+        self.docs.extend(docs)
+
+    async def update_one(self, query, update):
+        self.updates.append((query, update))
+
+
+class FakeDb:
+    def __init__(self, photos, gallery):
+        self.photos = FakeCollection(photos)
+        self.galleries = FakeCollection([gallery])
+        self.users = FakeCollection()
+        for name in ("display_changes", "gallery_videos", "fotoshare_videos", "gdrive_photos", "pcloud_photos", "drive_backups"):
+            setattr(self, name, FakeCollection())
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+class FakeStorage:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    @staticmethod
+    def photo_keys(filename):
+        photo_id = filename.rsplit('.', 1)[0]
+        return [f"photos/{filename}", f"thumbnails/{photo_id}_small.jpg"]
+
+    async def delete_files(self, keys):
+        self.calls.append(list(keys))
+        return [key for key in keys if key in self.failing]
+
+
+def setup(photos, failing=()):
+    gallery = {"id": "g1", "photographer_id": "u1"}
+    background._db = FakeDb(photos, gallery)
+    background._storage = FakeStorage(failing)
+    background._logger = logging.getLogger("test")
+    return gallery
+
+
+def photo(i, size=100):
+    return {"id": f"p{i}", "gallery_id": "g1", "filename": f"p{i}.jpg", "file_size": size}
+
+
+class TestPurgeGallery:
+    """Tests for tasks.background._purge_gallery"""
+
+    def test_batches_and_storage_credit(self, monkeypatch):
+        monkeypatch.setattr(background, "PURGE_PHOTO_BATCH", 2)
+        gallery = setup([photo(i) for i in range(5)])
+
+        assert asyncio.run(background._purge_gallery(gallery)) is True
+
+        assert len(background._storage.calls) == 3  # batches of 2, 2, 1 photos
+        assert background._db.photos.docs == []
+        assert background._db.galleries.docs == []
+        credits = [u["$inc"]["storage_used"] for _, u in background._db.users.updates]
+        assert sum(credits) == -500
+        print("✓ Photos purged in batches and storage_used decremented")
+
+    def test_failed_objects_are_retried(self):
+        gallery = setup([photo(1), photo(2, size=50)], failing={"photos/p1.jpg"})
+
+        assert asyncio.run(background._purge_gallery(gallery)) is False
+
+        assert [d["id"] for d in background._db.photos.docs] == ["p1"]
+        assert len(background._db.galleries.docs) == 1
+        credits = [u["$inc"]["storage_used"] for _, u in background._db.users.updates]
+        assert credits == [-50]
+        # The purged photo is taken off the gallery counter and display feed right away
+        counter = [u["$inc"]["media_counts.photos"] for _, u in background._db.galleries.updates
+                   if "media_counts.photos" in u.get("$inc", {})]
+        assert counter == [-1]
+        assert [c["item_id"] for c in background._db.display_changes.docs] == ["p2"]
+        print("✓ Undeleted photos and the gallery kept for the next run")
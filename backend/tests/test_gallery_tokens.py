@@ -0,0 +1,109 @@
+"""
+Test suite for signed gallery access tokens
+- Tokens are bound to one gallery and one scope (guest / download)
+- Changing the password or letting the token expire invalidates it
+- Galleries without a password need neither token nor password
+- Without a valid token, access falls back to the password check
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.gallery_tokens import GalleryTokens
+
+
+async def fake_verify(plain_password, hashed_password):
+    return hashed_password == f"hash:{plain_password}"
+
+
+def make_tokens(expire_minutes=60):
+    return GalleryTokens("test-secret", "HS256", fake_verify, expire_minutes=expire_minutes)
+
+
+def gallery(gallery_id="A", password="secret", download_password="dl"):
+    return {
+        "id": gallery_id,
+        "password": f"hash:{password}" if password else None,
+        "download_all_password": f"hash:{download_password}" if download_password else None,
+    }
+
+
+def require(tokens, g, scope, password=None, token=None):
+    asyncio.run(tokens.require_access(g, scope, password, token, "missing", "invalid"))
+
+
+class TestGalleryTokenValidity:
+    """Tests for GalleryTokens.create / is_valid"""
+
+    def test_bound_to_gallery(self):
+        tokens = make_tokens()
+        token = tokens.create(gallery("A"), "guest")
+        assert tokens.is_valid(token, gallery("A"), "guest")
+        assert not tokens.is_valid(token, gallery("B"), "guest")
+        print("✓ Token for gallery A rejected on gallery B")
+
+    def test_bound_to_scope(self):
+        tokens = make_tokens()
+        g = gallery()
+        guest = tokens.create(g, "guest")
+        download = tokens.create(g, "download")
+        assert not tokens.is_valid(guest, g, "download")
+        assert not tokens.is_valid(download, g, "guest")
+        print("✓ Guest and download tokens not interchangeable")
+
+    def test_password_change_invalidates(self):
+        tokens = make_tokens()
+        token = tokens.create(gallery(password="old"), "guest")
+        assert not tokens.is_valid(token, gallery(password="new"), "guest")
+        print("✓ Token minted before a password change rejected")
+
+    def test_expired(self):
+        tokens = make_tokens(expire_minutes=-1)
+        token = tokens.create(gallery(), "guest")
+        assert not tokens.is_valid(token, gallery(), "guest")
+        print("✓ Expired token rejected")
+
+    def test_other_secret_and_garbage(self):
+        token = GalleryTokens("other-secret", "HS256", fake_verify).create(gallery(), "guest")
+        assert not make_tokens().is_valid(token, gallery(), "guest")
+        assert not make_tokens().is_valid("not-a-jwt", gallery(), "guest")
+        print("✓ Forged and malformed tokens rejected")
+
+
+class TestRequireAccess:
+    """Tests for GalleryTokens.require_access"""
+
+    def test_no_password_needs_nothing(self):
+        require(make_tokens(), gallery(password=None), "guest")
+        require(make_tokens(), gallery(download_password=None), "download")
+        print("✓ Unprotected gallery needs neither token nor password")
+
+    def test_valid_token_skips_password(self):
+        tokens = make_tokens()
+        g = gallery()
+        require(tokens, g, "guest", token=tokens.create(g, "guest"))
+        require(tokens, g, "download", token=tokens.create(g, "download"))
+        print("✓ Valid token grants access without a password")
+
+    def test_falls_back_to_password(self):
+        tokens = make_tokens()
+        g = gallery()
+        wrong_scope = tokens.create(g, "download")
+
+        require(tokens, g, "guest", password="secret")
+        require(tokens, g, "guest", password="secret", token=wrong_scope)
+        require(tokens, g, "guest", password="secret", token="garbage")
+
+        with pytest.raises(HTTPException) as missing:
+            require(tokens, g, "guest", token="garbage")
+        assert missing.value.status_code == 401 and missing.value.detail == "missing"
+
+        with pytest.raises(HTTPException) as invalid:
+            require(tokens, g, "guest", password="wrong", token=wrong_scope)
+        assert invalid.value.status_code == 401 and invalid.value.detail == "invalid"
+        print("✓ Missing or invalid token falls back to the password check")
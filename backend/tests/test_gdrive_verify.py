@@ -0,0 +1,93 @@
+"""
+Test suite for Google Drive scrape verification
+- Checks run concurrently, bounded by the concurrency limit
+- Cached answers are not re-checked; inconclusive answers are not cached
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.gdrive_verify import check_file_ids, verify_folder_candidates
+from utils.sync_scheduler import TokenBucket
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return list(self.docs)
+
+
+class FakeVerified:
+    def __init__(self, rows):
+        self.rows = {(r["folder_id"], r["file_id"]): r["is_image"] for r in rows}
+
+    def find(self, query, projection=None):
+        return FakeCursor([
+            {"file_id": file_id, "is_image": is_image}
+            for (folder_id, file_id), is_image in self.rows.items() if folder_id == query["folder_id"]
+        ])
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            key = (request._filter["folder_id"], request._filter["file_id"])
+            self.rows[key] = request._doc["$set"]["is_image"]
+
+
+class FakeDb:
+    def __init__(self, rows=()):
+        self.gdrive_verified_files = FakeVerified(rows)
+
+
+class TestCheckFileIds:
+    """Tests for utils.gdrive_verify.check_file_ids"""
+
+    def test_bounded_concurrency(self):
+        state = {"running": 0, "peak": 0}
+
+        async def check(file_id):
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            await asyncio.sleep(0.01)
+            state["running"] -= 1
+            return True
+
+        answers = asyncio.run(check_file_ids([f"f{i}" for i in range(20)], check, TokenBucket(1000, 1000), concurrency=4))
+        assert len(answers) == 20
+        assert 1 < state["peak"] <= 4
+        print("✓ Checks run in parallel up to the limit")
+
+    def test_errors_are_inconclusive(self):
+        async def check(file_id):
+            raise RuntimeError("boom")
+
+        answers = asyncio.run(check_file_ids(["a"], check, TokenBucket(1000, 1000)))
+        assert answers == {"a": None}
+        print("✓ Failing check counts as inconclusive")
+
+
+class TestVerifyFolderCandidates:
+    """Tests for utils.gdrive_verify.verify_folder_candidates"""
+
+    def test_only_new_candidates_checked(self):
+        db = FakeDb([
+            {"folder_id": "F", "file_id": "a", "is_image": True},
+            {"folder_id": "F", "file_id": "b", "is_image": False},
+        ])
+        checked = []
+
+        async def check(file_id):
+            checked.append(file_id)
+            return {"c": True, "d": False, "e": None}[file_id]
+
+        result = asyncio.run(verify_folder_candidates(db, "F", ["a", "b", "c", "d", "e"], check, TokenBucket(1000, 1000)))
+        assert sorted(checked) == ["c", "d", "e"]
+        assert result["images"] == ["a", "c"]
+        assert result["unverified"] == ["e"]
+        assert result["cached"] == 2 and result["checked"] == 3
+        assert ("F", "e") not in db.gdrive_verified_files.rows
+        assert db.gdrive_verified_files.rows[("F", "d")] is False
+        print("✓ Cached ids skipped, conclusive answers cached")
@@ -0,0 +1,95 @@
+"""
+Test suite for the shared outbound HTTP client registry
+- Retries on 5xx/connection errors per integration policy
+- Per-host request/error metrics
+- Pools are shared between calls and closed once
+"""
+import asyncio
+import os
+import sys
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils import http_clients as http_clients_module
+from utils.http_clients import HttpClientRegistry
+
+
+async def start_server(handler):
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def fast_policies(monkeypatch):
+    policies = {name: {**policy, 'backoff': 0.001} for name, policy in http_clients_module.INTEGRATION_POLICIES.items()}
+    monkeypatch.setattr(http_clients_module, "INTEGRATION_POLICIES", policies)
+
+
+class TestHttpClientRegistry:
+    """Tests for utils.http_clients.HttpClientRegistry"""
+
+    def test_retries_server_errors(self, monkeypatch):
+        fast_policies(monkeypatch)
+        hits = []
+
+        async def handler(request):
+            hits.append(1)
+            return web.Response(status=503 if len(hits) < 3 else 200, text="ok")
+
+        async def run():
+            runner, base = await start_server(handler)
+            registry = HttpClientRegistry()
+            try:
+                async with registry.client('pcloud') as session:
+                    async with session.get(f"{base}/api") as response:
+                        return response.status, await response.text(), registry.stats()
+            finally:
+                await registry.close()
+                await runner.cleanup()
+
+        status, body, stats = asyncio.run(run())
+        assert status == 200 and body == "ok" and len(hits) == 3
+        host = stats["hosts"]["127.0.0.1"]
+        assert host["requests"] == 3 and host["server_errors"] == 2
+        print("✓ Two 503s retried, third attempt succeeds")
+
+    def test_no_retry_policy_returns_error_status(self, monkeypatch):
+        fast_policies(monkeypatch)
+        hits = []
+
+        async def handler(request):
+            hits.append(1)
+            return web.Response(status=502)
+
+        async def run():
+            runner, base = await start_server(handler)
+            registry = HttpClientRegistry()
+            try:
+                async with registry.client('cdn').get(f"{base}/photo.jpg") as response:
+                    return response.status
+            finally:
+                await registry.close()
+                await runner.cleanup()
+
+        assert asyncio.run(run()) == 502 and len(hits) == 1
+        print("✓ cdn policy does not retry")
+
+    def test_session_shared_between_calls(self):
+        async def run():
+            registry = HttpClientRegistry()
+            first = registry.session('gdrive')
+            second = registry.session('gdrive')
+            other = registry.session('pcloud')
+            await registry.close()
+            return first is second, first is other, first.closed
+
+        shared, same_as_other, closed = asyncio.run(run())
+        assert shared and not same_as_other and closed
+        print("✓ One pool per integration, closed on shutdown")
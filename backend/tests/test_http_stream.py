@@ -0,0 +1,83 @@
+"""
+Test suite for proxy byte-streaming helpers
+- Range header parsing (explicit, open-ended, suffix, unsatisfiable)
+- Local file streaming with 200/206 responses
+- Key-derived ETags and If-None-Match matching
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.http_stream import etag_matches, key_etag, parse_range, stream_file
+
+
+def collect(response):
+    async def run():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(run())
+
+
+class TestParseRange:
+    """Tests for utils.http_stream.parse_range"""
+
+    def test_ranges(self):
+        assert parse_range(None, 100) is None
+        assert parse_range("bytes=0-9", 100) == (0, 9)
+        assert parse_range("bytes=90-", 100) == (90, 99)
+        assert parse_range("bytes=-10", 100) == (90, 99)
+        assert parse_range("bytes=50-500", 100) == (50, 99)
+        print("✓ Single ranges parsed")
+
+    def test_unsupported_ranges_serve_whole_file(self):
+        assert parse_range("bytes=0-1,5-9", 100) is None
+        assert parse_range("items=0-9", 100) is None
+        print("✓ Multi-range / other units ignored")
+
+    def test_unsatisfiable(self):
+        with pytest.raises(HTTPException) as exc:
+            parse_range("bytes=100-", 100)
+        assert exc.value.status_code == 416
+        assert exc.value.headers["Content-Range"] == "bytes */100"
+        print("✓ Out-of-bounds range -> 416")
+
+
+class TestStreamFile:
+    """Tests for utils.http_stream.stream_file"""
+
+    def test_full_and_partial(self, tmp_path):
+        path = tmp_path / "photo.jpg"
+        path.write_bytes(bytes(range(256)) * 1000)
+
+        full = stream_file(path, "image/jpeg")
+        assert full.status_code == 200 and full.headers["content-length"] == "256000"
+        assert collect(full) == path.read_bytes()
+
+        partial = stream_file(path, "image/jpeg", "bytes=1000-1999")
+        assert partial.status_code == 206
+        assert partial.headers["content-range"] == "bytes 1000-1999/256000"
+        assert collect(partial) == path.read_bytes()[1000:2000]
+        print("✓ 200 and 206 bodies match the file")
+
+
+class TestConditionalGet:
+    """Tests for key-derived ETags"""
+
+    def test_key_etag_is_strong_and_stable(self):
+        etag = key_etag("photos/abc.jpg")
+        assert etag == key_etag("photos/abc.jpg") and etag.startswith('"')
+        assert etag != key_etag("thumbnails/abc_medium.jpg")
+        print("✓ ETag stable per key")
+
+    def test_if_none_match(self):
+        etag = key_etag("photos/abc.jpg")
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
+        print("✓ If-None-Match lists, weak tags and * handled")
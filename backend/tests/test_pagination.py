@@ -0,0 +1,149 @@
+"""
+Test suite for keyset (cursor) pagination
+- Cursor encoding round-trip and validation
+- Paging through a compound sort with missing fields visits every document once
+"""
+import asyncio
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.pagination import (
+    InvalidCursor,
+    MAX_PAGE_SIZE,
+    clamp_page_size,
+    decode_cursor,
+    encode_cursor,
+    fetch_page,
+)
+
+FEED_SORT = [("is_highlight", -1), ("order", 1), ("uploaded_at", -1), ("id", 1)]
+
+
+# ============ Minimal in-memory collection with MongoDB null ordering ============
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(_matches(doc, sub) for sub in cond):
+                return False
+        elif key == "$and":
+            if not all(_matches(doc, sub) for sub in cond):
+                return False
+        else:
+            value = doc.get(key)
+            if isinstance(cond, dict):
+                for op, operand in cond.items():
+                    if op == "$ne" and value == operand:
+                        return False
+                    if op == "$gt" and (value is None or not value > operand):
+                        return False
+                    if op == "$lt" and (value is None or not value < operand):
+                        return False
+                    if op == "$exists" and (key in doc) != operand:
+                        return False
+            elif value != cond:
+                return False
+    return True
+
+
+def _sorted(docs, sort):
+    for field, direction in reversed(sort):
+        # MongoDB: null/missing sorts before any other value
+        docs = sorted(docs, key=lambda d: (d.get(field) is not None, d.get(field) if d.get(field) is not None else 0),
+                      reverse=direction == -1)
+    return docs
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.sort_spec = None
+        self.limit_n = None
+
+    def sort(self, spec):
+        self.sort_spec = spec
+        return self
+
+    def limit(self, n):
+        self.limit_n = n
+        return self
+
+    async def to_list(self, length):
+        docs = _sorted(self.docs, self.sort_spec)
+        return [dict(d) for d in docs[:self.limit_n]]
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return FakeCursor([d for d in self.docs if _matches(d, query)])
+
+
+def make_docs(n):
+    rng = random.Random(7)
+    docs = []
+    for i in range(n):
+        doc = {"id": f"p{i:04d}", "uploaded_at": f"2024-01-{rng.randint(1, 28):02d}T00:00:00"}
+        if rng.random() < 0.7:
+            doc["is_highlight"] = rng.random() < 0.1
+        if rng.random() < 0.6:
+            doc["order"] = rng.randint(0, 5)
+        docs.append(doc)
+    return docs
+
+
+class TestCursorEncoding:
+    """Tests for cursor encode/decode"""
+
+    def test_round_trip(self):
+        values = [True, 3, "2024-01-01T00:00:00", "abc"]
+        assert decode_cursor(encode_cursor(values), 4) == values
+        print("✓ Cursor round-trips")
+
+    def test_rejects_garbage(self):
+        with pytest.raises(InvalidCursor):
+            decode_cursor("not-a-cursor!!", 4)
+        with pytest.raises(InvalidCursor):
+            decode_cursor(encode_cursor([1, 2]), 4)
+        print("✓ Malformed cursors rejected")
+
+    def test_page_size_cap(self):
+        assert clamp_page_size(10_000) == MAX_PAGE_SIZE
+        assert clamp_page_size(0) > 0
+        print("✓ Page size capped")
+
+
+class TestFetchPage:
+    """Tests for utils.pagination.fetch_page"""
+
+    def test_pages_cover_everything_in_order(self):
+        """Walking all pages yields the full sorted listing with no gaps or repeats"""
+        docs = make_docs(237)
+        collection = FakeCollection(docs)
+        expected = [d["id"] for d in _sorted(docs, FEED_SORT)]
+
+        async def walk():
+            seen, cursor = [], None
+            while True:
+                page = await fetch_page(collection, {}, FEED_SORT, {"_id": 0}, 25, cursor)
+                seen.extend(item["id"] for item in page["items"])
+                if not page["has_more"]:
+                    return seen
+                cursor = page["next_cursor"]
+
+        assert asyncio.run(walk()) == expected
+        print("✓ 237 docs paged in 25s match full sort")
+
+    def test_last_page_has_no_cursor(self):
+        collection = FakeCollection(make_docs(10))
+        page = asyncio.run(fetch_page(collection, {}, FEED_SORT, None, 10))
+        assert len(page["items"]) == 10
+        assert page["has_more"] is False and page["next_cursor"] is None
+        print("✓ Exact final page has no next cursor")
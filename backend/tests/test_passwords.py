@@ -0,0 +1,77 @@
+"""
+Test suite for the bcrypt password pool
+- Hashes round-trip through verify
+- No more than max_workers operations run at once
+- Callers get PasswordServiceBusy once the queue stays full past the timeout
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.passwords import PasswordService, PasswordServiceBusy
+
+
+class TestPasswordService:
+    """Tests for utils.passwords.PasswordService"""
+
+    def test_hash_and_verify(self):
+        async def scenario():
+            service = PasswordService(max_workers=2)
+            try:
+                hashed = await service.hash("s3cret")
+                return hashed, await service.verify("s3cret", hashed), await service.verify("wrong", hashed)
+            finally:
+                await service.shutdown()
+
+        hashed, good, bad = asyncio.run(scenario())
+        assert hashed.startswith("$2")
+        assert good is True and bad is False
+        print("✓ Hash verifies with the right password only")
+
+    def test_workers_bound_concurrency(self):
+        state = {"running": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def work():
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.02)
+            with lock:
+                state["running"] -= 1
+
+        async def scenario():
+            service = PasswordService(max_workers=2, max_queue=20)
+            try:
+                await asyncio.gather(*[service.run(work) for _ in range(10)])
+                return service.stats()
+            finally:
+                await service.shutdown()
+
+        stats = asyncio.run(scenario())
+        assert state["peak"] == 2
+        assert stats["completed"] == 10 and stats["running"] == 0
+        print("✓ At most max_workers hashes run at once")
+
+    def test_saturated_queue_rejects(self):
+        async def scenario():
+            service = PasswordService(max_workers=1, max_queue=1, queue_timeout=0.05)
+            try:
+                slow = asyncio.create_task(service.run(time.sleep, 0.3))
+                await asyncio.sleep(0.01)
+                with pytest.raises(PasswordServiceBusy):
+                    await service.run(time.sleep, 0)
+                await slow
+                return service.stats()
+            finally:
+                await service.shutdown()
+
+        stats = asyncio.run(scenario())
+        assert stats["rejected"] == 1 and stats["completed"] == 1
+        print("✓ Busy raised when no slot frees up in time")
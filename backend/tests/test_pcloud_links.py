@@ -0,0 +1,103 @@
+"""
+Test suite for memoized pCloud download-link resolution
+- Links cached until shortly before `expires`
+- Host failover order and invalidation
+- Batch resolution de-duplicates and bounds API calls
+"""
+import asyncio
+import os
+import sys
+import time
+from email.utils import formatdate
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.pcloud_links import PcloudLinkResolver, parse_pcloud_expires
+
+
+def make_fetch(calls, expires_in=6 * 3600, delay=0):
+    async def fetch(code, fileid):
+        calls.append((code, fileid))
+        if delay:
+            await asyncio.sleep(delay)
+        return {
+            "hosts": ["c1.pcloud.com", "c2.pcloud.com"],
+            "path": f"/dl/{fileid}/photo.jpg",
+            "expires": formatdate(time.time() + expires_in, usegmt=True),
+        }
+    return fetch
+
+
+class TestPcloudLinkResolver:
+    """Tests for utils.pcloud_links.PcloudLinkResolver"""
+
+    def test_cached_until_expiry(self):
+        calls = []
+        resolver = PcloudLinkResolver(make_fetch(calls))
+
+        async def run():
+            first = await resolver.resolve("code", 1)
+            second = await resolver.resolve("code", "1")
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first["url"] == "https://c1.pcloud.com/dl/1/photo.jpg"
+        assert second == first and len(calls) == 1
+        print("✓ Second resolution served from cache")
+
+    def test_near_expiry_refetched(self):
+        calls = []
+        resolver = PcloudLinkResolver(make_fetch(calls, expires_in=60), expiry_margin=300)
+
+        async def run():
+            await resolver.resolve("code", 1)
+            await resolver.resolve("code", 1)
+
+        asyncio.run(run())
+        assert len(calls) == 2
+        print("✓ Link inside expiry margin is re-resolved")
+
+    def test_host_failover(self):
+        resolver = PcloudLinkResolver(make_fetch([]))
+
+        async def run():
+            info = await resolver.resolve("code", 1)
+            resolver.mark_host_failed("code", 1, info["url"])
+            return await resolver.resolve("code", 1)
+
+        info = asyncio.run(run())
+        assert info["url"].startswith("https://c2.pcloud.com/")
+        assert info["urls"][-1].startswith("https://c1.pcloud.com/")
+        print("✓ Failed host rotated to the back")
+
+    def test_invalidate(self):
+        calls = []
+        resolver = PcloudLinkResolver(make_fetch(calls))
+
+        async def run():
+            await resolver.resolve("code", 1)
+            resolver.invalidate("code", 1)
+            await resolver.resolve("code", 1)
+
+        asyncio.run(run())
+        assert len(calls) == 2
+        print("✓ Invalidated link re-resolved")
+
+    def test_resolve_many(self):
+        calls = []
+        resolver = PcloudLinkResolver(make_fetch(calls, delay=0.01))
+
+        async def run():
+            await resolver.resolve("code", 1)
+            return await resolver.resolve_many("code", [1, 2, 3, 3, "2"], concurrency=2)
+
+        results = asyncio.run(run())
+        assert sorted(results) == [1, 2, 3]
+        assert sorted(calls) == [("code", 1), ("code", 2), ("code", 3)]
+        print("✓ Batch resolution skips cached and duplicate files")
+
+    def test_unparseable_expires_uses_default(self):
+        now = 1_000_000.0
+        assert parse_pcloud_expires("not a date", now) > now
+        assert parse_pcloud_expires(None, now) > now
+        print("✓ Missing expires falls back to default TTL")
@@ -0,0 +1,92 @@
+"""
+Test suite for the ordered prefetch pipeline used while building ZIP downloads
+- Results delivered in input order
+- Bounded concurrency and byte budget
+- Per-item retry with backoff
+"""
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.prefetch import prefetch_ordered
+
+
+def collect(items, fetch, **kwargs):
+    async def run():
+        return [pair async for pair in prefetch_ordered(items, fetch, **kwargs)]
+    return asyncio.run(run())
+
+
+class TestPrefetchOrdered:
+    """Tests for utils.prefetch.prefetch_ordered"""
+
+    def test_results_in_input_order(self):
+        """Items finishing out of order are still yielded in order"""
+        async def fetch(i):
+            await asyncio.sleep(random.random() / 100)
+            return bytes([i])
+
+        results = collect(list(range(30)), fetch, concurrency=8, retry_delay=0)
+        assert [item for item, _ in results] == list(range(30))
+        assert all(data == bytes([item]) for item, data in results)
+        print("✓ Prefetch preserves input order")
+
+    def test_concurrency_is_bounded(self):
+        """No more than `concurrency` fetches run at once"""
+        state = {"active": 0, "peak": 0}
+
+        async def fetch(i):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.005)
+            state["active"] -= 1
+            return b"x"
+
+        collect(list(range(40)), fetch, concurrency=4)
+        assert 1 < state["peak"] <= 4
+        print(f"✓ Peak concurrency {state['peak']} within limit")
+
+    def test_byte_budget_limits_inflight(self):
+        """Budget smaller than two items forces one fetch at a time"""
+        state = {"active": 0, "peak": 0}
+
+        async def fetch(i):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.002)
+            state["active"] -= 1
+            return b"x" * 1000
+
+        results = collect(list(range(10)), fetch, concurrency=8, byte_budget=1500, size_hint=lambda _: 1000)
+        assert len(results) == 10
+        assert state["peak"] == 1
+        print("✓ Byte budget caps in-flight data")
+
+    def test_retry_then_success(self):
+        """Transient failures are retried"""
+        attempts = {}
+
+        async def fetch(i):
+            attempts[i] = attempts.get(i, 0) + 1
+            if attempts[i] < 3:
+                raise ConnectionError("transient")
+            return b"ok"
+
+        results = collect([1, 2], fetch, retries=2, retry_delay=0)
+        assert [data for _, data in results] == [b"ok", b"ok"]
+        assert attempts == {1: 3, 2: 3}
+        print("✓ Transient failures retried")
+
+    def test_exhausted_retries_yield_none(self):
+        """Items failing every attempt yield None without aborting the stream"""
+        async def fetch(i):
+            if i == 1:
+                raise ConnectionError("down")
+            return b"ok"
+
+        results = collect([0, 1, 2], fetch, retries=1, retry_delay=0)
+        assert results == [(0, b"ok"), (1, None), (2, b"ok")]
+        print("✓ Permanently failed item skipped")
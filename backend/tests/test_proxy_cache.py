@@ -0,0 +1,143 @@
+"""
+Test suite for the disk-backed pCloud / Google Drive proxy cache
+- Hits served from disk with metadata, counters updated
+- LRU eviction by total bytes and oversize items not stored
+- Single-flight misses and index rebuild after restart
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.proxy_cache import ProxyCache
+
+
+def make_fetch(calls, content=b"x" * 100, delay=0):
+    async def fetch():
+        calls.append(1)
+        if delay:
+            await asyncio.sleep(delay)
+        return content, {"content_type": "image/jpeg"}
+    return fetch
+
+
+class TestProxyCache:
+    """Tests for utils.proxy_cache.ProxyCache"""
+
+    def test_hit_after_miss(self, tmp_path):
+        cache = ProxyCache(tmp_path, max_bytes=10_000)
+        calls = []
+
+        async def run():
+            await cache.get(("pcloud", "code", "1", "400x400"), make_fetch(calls))
+            return await cache.get(("pcloud", "code", "1", "400x400"), make_fetch(calls))
+
+        content, meta = asyncio.run(run())
+        assert content == b"x" * 100 and meta["content_type"] == "image/jpeg"
+        assert len(calls) == 1
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["bytes_saved"] == 100
+        print("✓ Second request served from disk")
+
+    def test_lru_eviction_by_bytes(self, tmp_path):
+        cache = ProxyCache(tmp_path, max_bytes=250)
+        calls = []
+
+        async def run():
+            await cache.get(("a",), make_fetch(calls))
+            await cache.get(("b",), make_fetch(calls))
+            await cache.get(("a",), make_fetch(calls))  # a becomes most recent
+            await cache.get(("c",), make_fetch(calls))  # 300 bytes > 250: evicts b
+            await cache.get(("a",), make_fetch(calls))
+            await cache.get(("b",), make_fetch(calls))
+
+        asyncio.run(run())
+        assert len(calls) == 4
+        assert cache.stats()["total_bytes"] <= 250
+        print("✓ Least recently used entry evicted by size")
+
+    def test_oversize_not_stored(self, tmp_path):
+        cache = ProxyCache(tmp_path, max_bytes=10_000, max_item_bytes=50)
+        calls = []
+
+        async def run():
+            await cache.get(("big",), make_fetch(calls))
+            await cache.get(("big",), make_fetch(calls))
+
+        asyncio.run(run())
+        assert len(calls) == 2 and cache.stats()["entries"] == 0
+        print("✓ Oversize item served but not cached")
+
+    def test_single_flight(self, tmp_path):
+        cache = ProxyCache(tmp_path, max_bytes=10_000)
+        calls = []
+
+        async def run():
+            fetch = make_fetch(calls, delay=0.01)
+            return await asyncio.gather(*[cache.get(("k",), fetch) for _ in range(20)])
+
+        results = asyncio.run(run())
+        assert len(calls) == 1 and all(content == b"x" * 100 for content, _ in results)
+        print("✓ 20 concurrent misses -> 1 upstream fetch")
+
+    def test_failed_fetch_not_cached(self, tmp_path):
+        cache = ProxyCache(tmp_path, max_bytes=10_000)
+
+        async def failing():
+            raise RuntimeError("upstream down")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(cache.get(("k",), failing))
+        assert cache.stats()["entries"] == 0
+        print("✓ Upstream failure not cached")
+
+    def test_index_rebuilt_on_restart(self, tmp_path):
+        calls = []
+        asyncio.run(ProxyCache(tmp_path, max_bytes=10_000).get(("k",), make_fetch(calls)))
+
+        restarted = ProxyCache(tmp_path, max_bytes=10_000)
+        content, meta = asyncio.run(restarted.get(("k",), make_fetch(calls)))
+        assert len(calls) == 1 and meta["content_type"] == "image/jpeg"
+        print("✓ Entries survive a restart")
+
+
+class TestProxyCacheFill:
+    """Tests for streamed fills (open / begin_fill)"""
+
+    def test_commit_then_open(self, tmp_path):
+        cache = ProxyCache(tmp_path, max_bytes=10_000)
+
+        async def run():
+            assert await cache.open(("orig",)) is None
+            fill = cache.begin_fill(("orig",), {"content_type": "image/jpeg"})
+            assert cache.begin_fill(("orig",), {}) is None  # one fill per key
+            for _ in range(3):
+                await fill.write(b"y" * 100)
+            await fill.commit()
+            handle, size, meta = await cache.open(("orig",))
+            with handle:
+                return handle.read(), size, meta
+
+        content, size, meta = asyncio.run(run())
+        assert content == b"y" * 300 and size == 300 and meta["content_type"] == "image/jpeg"
+        print("✓ Streamed fill committed and readable")
+
+    def test_abort_and_oversize_leave_nothing(self, tmp_path):
+        cache = ProxyCache(tmp_path, max_bytes=10_000, max_item_bytes=150)
+
+        async def run():
+            fill = cache.begin_fill(("a",), {"content_type": "image/jpeg"})
+            await fill.write(b"y" * 100)
+            await fill.abort()
+            fill = cache.begin_fill(("b",), {"content_type": "image/jpeg"})
+            await fill.write(b"y" * 100)
+            await fill.write(b"y" * 100)  # exceeds max_item_bytes
+            await fill.commit()
+            return await cache.open(("a",)), await cache.open(("b",))
+
+        assert asyncio.run(run()) == (None, None)
+        assert list(tmp_path.iterdir()) == []
+        print("✓ Aborted and oversize fills discarded")
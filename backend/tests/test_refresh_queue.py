@@ -0,0 +1,105 @@
+"""
+Test suite for the due-time refresh queue and fotoshare refresh tiers
+- Keys come out earliest first; rescheduling replaces the old due time
+- Moving a key ahead wakes a waiting task immediately
+- Fotoshare next-due time follows the event-age tiers
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.refresh_queue import RefreshQueue, tiered_interval
+from tasks.background import FOTOSHARE_REFRESH_TIERS, fotoshare_next_due
+
+
+class TestRefreshQueue:
+    """Tests for utils.refresh_queue.RefreshQueue"""
+
+    def test_pop_due_in_order(self):
+        queue = RefreshQueue()
+        queue.schedule("b", 20)
+        queue.schedule("a", 10)
+        queue.schedule("c", 30)
+        assert queue.pop_due(now=25) == ["a", "b"]
+        assert len(queue) == 1 and "c" in queue
+        print("✓ Due keys popped earliest first")
+
+    def test_reschedule_replaces(self):
+        queue = RefreshQueue()
+        queue.schedule("a", 10)
+        queue.schedule("a", 50)
+        assert queue.pop_due(now=20) == []
+        assert queue.next_due() == 50
+        queue.discard("a")
+        assert queue.next_due() is None
+        print("✓ Rescheduling and discarding supersede old entries")
+
+    def test_limit(self):
+        queue = RefreshQueue()
+        for i in range(5):
+            queue.schedule(i, i)
+        assert queue.pop_due(now=10, limit=2) == [0, 1]
+        assert len(queue) == 3
+        print("✓ pop_due honours the limit")
+
+    def test_schedule_now_wakes_waiter(self):
+        async def scenario():
+            queue = RefreshQueue()
+            queue.schedule("later", time.time() + 60)
+            waiter = asyncio.create_task(queue.wait(60))
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            queue.schedule_now("manual")
+            await asyncio.wait_for(waiter, 1)
+            return time.monotonic() - started, queue.pop_due()
+
+        waited, popped = asyncio.run(scenario())
+        assert waited < 0.5
+        assert popped == ["manual"]
+        print("✓ Prioritized key wakes the waiting task")
+
+
+class TestFotoshareTiers:
+    """Tests for the fotoshare refresh schedule"""
+
+    now = datetime(2024, 6, 10, 12, 0, tzinfo=timezone.utc)
+
+    def item(self, last_sync_minutes_ago=0, event_days_ago=None, last_new_days_ago=None):
+        section = {"fotoshare_last_sync": (self.now - timedelta(minutes=last_sync_minutes_ago)).isoformat()}
+        if last_new_days_ago is not None:
+            section["fotoshare_last_new_at"] = (self.now - timedelta(days=last_new_days_ago)).isoformat()
+        event_date = None
+        if event_days_ago is not None:
+            event_date = (self.now - timedelta(days=event_days_ago)).isoformat()
+        return {"section": section, "event_date": event_date, "gallery_created_at": None}
+
+    def interval_minutes(self, item):
+        last_sync = datetime.fromisoformat(item["section"]["fotoshare_last_sync"])
+        return round((fotoshare_next_due(item, self.now) - last_sync.timestamp()) / 60)
+
+    def test_tiers(self):
+        assert tiered_interval(0.5, FOTOSHARE_REFRESH_TIERS) == 10
+        assert tiered_interval(1.5, FOTOSHARE_REFRESH_TIERS) == 60
+        assert tiered_interval(10, FOTOSHARE_REFRESH_TIERS) == 24 * 60
+        assert tiered_interval(90, FOTOSHARE_REFRESH_TIERS) == 30 * 24 * 60
+        print("✓ Tier table lookup")
+
+    def test_event_age_picks_interval(self):
+        assert self.interval_minutes(self.item(event_days_ago=0.2)) == 10
+        assert self.interval_minutes(self.item(event_days_ago=1.5)) == 60
+        assert self.interval_minutes(self.item(event_days_ago=5)) == 24 * 60
+        assert self.interval_minutes(self.item(event_days_ago=-10)) == 60
+        print("✓ Interval follows time since the event")
+
+    def test_new_content_keeps_section_hot(self):
+        assert self.interval_minutes(self.item(event_days_ago=5, last_new_days_ago=0.1)) == 10
+        print("✓ Recent new videos use the shortest interval")
+
+    def test_never_synced_is_due_now(self):
+        item = {"section": {}, "event_date": None, "gallery_created_at": None}
+        assert fotoshare_next_due(item, self.now) == self.now.timestamp()
+        print("✓ Never-synced section is due immediately")
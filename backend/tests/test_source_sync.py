@@ -0,0 +1,127 @@
+"""
+Test suite for incremental pCloud / Google Drive section sync
+- Listing fingerprints ignore order and change with file versions
+- Drive watermark and full-listing schedule
+- Bulk upserts insert only unseen files and count what was inserted
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.source_sync import (
+    gdrive_modified_since, gdrive_watermark, pcloud_fingerprint, pcloud_photo_doc, upsert_section_photos,
+)
+
+
+class FakePhotos:
+    """bulk_write of UpdateOne($setOnInsert, upsert=True) against an in-memory list"""
+
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+
+    async def bulk_write(self, requests, ordered=True):
+        upserted = []
+        for index, request in enumerate(requests):
+            query, update = request._filter, request._doc
+            if any(all(doc.get(k) == v for k, v in query.items()) for doc in self.docs):
+                continue
+            self.docs.append(dict(update["$setOnInsert"]))
+            upserted.append({"index": index, "_id": index})
+        return SimpleNamespace(bulk_api_result={"upserted": upserted})
+
+
+class FakeGalleries:
+    def __init__(self):
+        self.increments = []
+        self.version = 0
+
+    async def update_one(self, query, update):
+        self.increments.append(update["$inc"])
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        self.version += 1
+        return {"display_version": self.version}
+
+
+class FakeChanges:
+    def __init__(self):
+        self.rows = []
+
+    async def insert_many(self, rows):
+        self.rows.extend(rows)
+
+
+class FakeDb:
+    def __init__(self, photos):
+        self.pcloud_photos = FakePhotos(photos)
+        self.galleries = FakeGalleries()
+        self.display_changes = FakeChanges()
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+def pcloud(fileid, modified="Mon, 01 Jan 2024 10:00:00 +0000", hash_=1):
+    return {"fileid": fileid, "name": f"{fileid}.jpg", "modified": modified, "hash": hash_, "size": 10}
+
+
+class TestFingerprints:
+    """Tests for listing fingerprints and the Drive watermark"""
+
+    def test_fingerprint_ignores_order(self):
+        assert pcloud_fingerprint([pcloud(1), pcloud(2)]) == pcloud_fingerprint([pcloud(2), pcloud(1)])
+        print("✓ Fingerprint is order independent")
+
+    def test_fingerprint_changes(self):
+        base = pcloud_fingerprint([pcloud(1), pcloud(2)])
+        assert pcloud_fingerprint([pcloud(1), pcloud(2), pcloud(3)]) != base
+        assert pcloud_fingerprint([pcloud(1), pcloud(2, hash_=7)]) != base
+        assert pcloud_fingerprint([pcloud(1)]) != base
+        print("✓ Added, changed and removed files change the fingerprint")
+
+    def test_watermark(self):
+        photos = [
+            {"created_time": "2024-05-01T10:00:00.000Z", "modified_time": "2024-05-03T10:00:00.000Z"},
+            {"created_time": "2024-05-02T10:00:00.000Z", "modified_time": None},
+        ]
+        assert gdrive_watermark(photos) == "2024-05-03T10:00:00.000Z"
+        assert gdrive_watermark([], "2024-01-01T00:00:00.000Z") == "2024-01-01T00:00:00.000Z"
+        print("✓ Watermark is the newest Drive timestamp")
+
+    def test_modified_since(self):
+        now = datetime(2024, 5, 3, 12, 0, tzinfo=timezone.utc)
+        section = {"gdrive_watermark": "2024-05-03T10:00:00.000Z", "gdrive_full_sync_at": now.isoformat()}
+        assert gdrive_modified_since(section, now) == "2024-05-03T09:55:00"
+        stale = dict(section, gdrive_full_sync_at=(now - timedelta(hours=25)).isoformat())
+        assert gdrive_modified_since(stale, now) is None
+        assert gdrive_modified_since({}, now) is None
+        print("✓ Incremental bound with overlap; full listing when due")
+
+
+class TestUpsertSectionPhotos:
+    """Tests for utils.source_sync.upsert_section_photos"""
+
+    def test_inserts_only_new_files(self):
+        existing = pcloud_photo_doc("g1", "s1", "code", pcloud(1), 0, "t0")
+        db = FakeDb([existing])
+        docs = [pcloud_photo_doc("g1", "s1", "code", pcloud(fileid), idx, "t1") for idx, fileid in enumerate([1, 2, 3])]
+
+        added = asyncio.run(upsert_section_photos(db, 'pcloud_photos', "g1", "s1", docs))
+
+        assert added == 2
+        assert [doc["fileid"] for doc in db.pcloud_photos.docs] == ["1", "2", "3"]
+        assert db.pcloud_photos.docs[0]["id"] == existing["id"]
+        assert db.galleries.increments == [{"media_counts.pcloud_photos": 2}]
+        assert {row["item_id"] for row in db.display_changes.rows} == {docs[1]["id"], docs[2]["id"]}
+        print("✓ Existing photos untouched, new ones counted and recorded")
+
+    def test_nothing_new(self):
+        db = FakeDb([pcloud_photo_doc("g1", "s1", "code", pcloud(1), 0, "t0")])
+        docs = [pcloud_photo_doc("g1", "s1", "code", pcloud(1), 0, "t1")]
+        assert asyncio.run(upsert_section_photos(db, 'pcloud_photos', "g1", "s1", docs)) == 0
+        assert db.galleries.increments == []
+        print("✓ No writes recorded when nothing is new")
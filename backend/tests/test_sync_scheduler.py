@@ -0,0 +1,93 @@
+"""
+Test suite for the external-source sync scheduler
+- Jobs run concurrently up to the global and per-provider caps
+- Token bucket spaces out runs beyond the burst
+- Failures are isolated, counted and recorded
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.sync_scheduler import SyncScheduler, TokenBucket
+
+
+class TestSyncScheduler:
+    """Tests for utils.sync_scheduler.SyncScheduler"""
+
+    def test_concurrency_capped_per_provider(self):
+        scheduler = SyncScheduler(10, {"pcloud": {"concurrency": 3, "rate": 1000, "burst": 1000}})
+        active, peak = [0], [0]
+
+        async def job():
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.01)
+            active[0] -= 1
+
+        summary = asyncio.run(scheduler.run("pcloud", [(f"g:{i}", job) for i in range(12)]))
+        assert summary["ran"] == 12 and summary["succeeded"] == 12
+        assert peak[0] == 3
+        print("✓ 12 jobs ran with at most 3 in flight")
+
+    def test_global_cap_applies_across_providers(self):
+        providers = {name: {"concurrency": 5, "rate": 1000, "burst": 1000} for name in ("gdrive", "pcloud")}
+        scheduler = SyncScheduler(4, providers)
+        active, peak = [0], [0]
+
+        async def job():
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.01)
+            active[0] -= 1
+
+        async def run():
+            await asyncio.gather(
+                scheduler.run("gdrive", [(f"g:{i}", job) for i in range(8)]),
+                scheduler.run("pcloud", [(f"p:{i}", job) for i in range(8)]),
+            )
+
+        asyncio.run(run())
+        assert peak[0] == 4
+        print("✓ Global cap of 4 holds across providers")
+
+    def test_failures_isolated_and_recorded(self):
+        recorded = []
+
+        async def recorder(provider, target, duration, ok, error):
+            recorded.append((provider, target, ok, error))
+
+        scheduler = SyncScheduler(4, {"fotoshare": {"concurrency": 2, "rate": 1000, "burst": 1000}}, recorder=recorder)
+
+        async def ok():
+            pass
+
+        async def broken():
+            raise RuntimeError("scrape failed")
+
+        summary = asyncio.run(scheduler.run("fotoshare", [("g:1", ok), ("g:2", broken), ("g:3", ok)]))
+        assert summary["succeeded"] == 2 and summary["failed"] == 1
+        assert ("fotoshare", "g:2", False, "scrape failed") in recorded and len(recorded) == 3
+        stats = scheduler.stats()["providers"]["fotoshare"]
+        assert stats["runs"] == 3 and stats["failures"] == 1 and stats["cycles"] == 1
+        print("✓ One failure doesn't stop the cycle and is recorded")
+
+
+class TestTokenBucket:
+    """Tests for utils.sync_scheduler.TokenBucket"""
+
+    def test_rate_limits_after_burst(self):
+        bucket = TokenBucket(rate=50, capacity=2)
+
+        async def run():
+            started = time.monotonic()
+            for _ in range(6):
+                await bucket.acquire()
+            return time.monotonic() - started
+
+        elapsed = asyncio.run(run())
+        # 2 immediate, 4 more at 50/s -> ~0.08s
+        assert 0.06 <= elapsed < 0.5
+        print(f"✓ 6 acquisitions at 50/s with burst 2 took {elapsed:.3f}s")
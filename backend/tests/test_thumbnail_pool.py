@@ -0,0 +1,73 @@
+"""
+Test suite for the thumbnail worker pool
+- All sizes rendered from a single decode
+- Backpressure when the pool is saturated
+- Queue-depth / throughput metrics
+"""
+import asyncio
+import os
+import sys
+from io import BytesIO
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.thumbnails import ThumbnailPool, ThumbnailPoolBusy, render_thumbnails
+
+SIZES = {'small': (300, 300), 'medium': (800, 800)}
+
+
+def make_jpeg(width=2400, height=1600, color='blue') -> bytes:
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color=color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class TestRenderThumbnails:
+    """Tests for utils.thumbnails.render_thumbnails"""
+
+    def test_all_sizes_from_one_call(self):
+        """Every requested size is produced and fits its bounding box"""
+        rendered = render_thumbnails(make_jpeg(), SIZES)
+        assert set(rendered) == set(SIZES)
+        for size_name, content in rendered.items():
+            with Image.open(BytesIO(content)) as thumb:
+                assert thumb.format == 'JPEG'
+                assert thumb.width <= SIZES[size_name][0]
+                assert thumb.height <= SIZES[size_name][1]
+        print("✓ Small and medium rendered from one decode")
+
+    def test_invalid_image_returns_none(self):
+        """Corrupt input yields None for every size instead of raising"""
+        rendered = render_thumbnails(b"not an image", SIZES)
+        assert rendered == {'small': None, 'medium': None}
+        print("✓ Corrupt input handled")
+
+
+class TestThumbnailPool:
+    """Tests for utils.thumbnails.ThumbnailPool"""
+
+    def test_render_in_worker_and_backpressure(self):
+        """Jobs run in worker processes; excess jobs are rejected after the queue timeout"""
+        async def run():
+            pool = ThumbnailPool(max_workers=1, max_queue=1, queue_timeout=0.01)
+            try:
+                first = await pool.render(make_jpeg(), SIZES)
+                assert first['small'] and first['medium']
+
+                results = await asyncio.gather(
+                    *[pool.render(make_jpeg(4000, 3000), SIZES) for _ in range(4)],
+                    return_exceptions=True
+                )
+                return pool.stats(), results
+            finally:
+                await pool.shutdown()
+
+        stats, results = asyncio.run(run())
+        rejected = [r for r in results if isinstance(r, ThumbnailPoolBusy)]
+        assert rejected, "Expected saturated pool to reject some jobs"
+        assert stats["rejected"] == len(rejected)
+        assert stats["completed"] == 1 + len(results) - len(rejected)
+        assert stats["queue_depth"] == 0
+        print(f"✓ Pool stats: {stats}")
@@ -0,0 +1,91 @@
+"""
+Test suite for the authenticated user cache
+- Hits/misses, TTL expiry and invalidation by user id
+- Single-flight loading; missing users are not cached
+- Invalidation also clears the current request's memo
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.user_cache import UserCache, request_memo
+
+
+def make_loader(calls, delay=0, missing=()):
+    async def loader(user_id):
+        calls.append(user_id)
+        if delay:
+            await asyncio.sleep(delay)
+        if user_id in missing:
+            return None
+        return {"id": user_id, "plan": "pro"}
+    return loader
+
+
+class TestUserCache:
+    """Tests for utils.user_cache.UserCache"""
+
+    def test_hit_after_miss(self):
+        cache = UserCache(max_entries=10, ttl=60)
+        calls = []
+
+        async def run():
+            first = await cache.get("u1", make_loader(calls))
+            first["plan"] = "mutated"
+            return await cache.get("u1", make_loader(calls))
+
+        user = asyncio.run(run())
+        assert user == {"id": "u1", "plan": "pro"}
+        assert calls == ["u1"]
+        print("✓ Cached lookup avoids the loader and returns copies")
+
+    def test_ttl_and_invalidate(self):
+        cache = UserCache(max_entries=10, ttl=0.01)
+        calls = []
+
+        async def run():
+            await cache.get("u1", make_loader(calls))
+            time.sleep(0.02)
+            await cache.get("u1", make_loader(calls))
+            cache.ttl = 60
+            cache.invalidate("u1")
+            await cache.get("u1", make_loader(calls))
+
+        asyncio.run(run())
+        assert calls == ["u1", "u1", "u1"]
+        print("✓ Expired and invalidated users reloaded")
+
+    def test_single_flight_and_missing(self):
+        cache = UserCache(max_entries=10, ttl=60)
+        calls = []
+
+        async def run():
+            loader = make_loader(calls, delay=0.01, missing={"ghost"})
+            users = await asyncio.gather(*[cache.get("u1", loader) for _ in range(5)])
+            await cache.get("ghost", loader)
+            await cache.get("ghost", loader)
+            return users
+
+        users = asyncio.run(run())
+        assert all(u["id"] == "u1" for u in users)
+        assert calls == ["u1", "ghost", "ghost"]
+        print("✓ Concurrent misses share one load; missing users not cached")
+
+    def test_invalidate_clears_request_memo(self):
+        cache = UserCache(max_entries=10, ttl=60)
+
+        async def request():
+            memo = request_memo()
+            memo["u1"] = {"id": "u1"}
+            cache.invalidate("u1")
+            return "u1" in request_memo()
+
+        async def other_request():
+            return request_memo()
+
+        assert asyncio.run(request()) is False
+        assert asyncio.run(other_request()) == {}
+        print("✓ Memo is per request and cleared on invalidation")
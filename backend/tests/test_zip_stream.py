@@ -0,0 +1,98 @@
+"""
+Test suite for the streaming ZIP writer used by gallery/section downloads
+- STORED entries for already-compressed formats, DEFLATED otherwise
+- Data descriptors (sizes unknown up front)
+- Chunked async sources and skipped (None) entries
+"""
+import asyncio
+import io
+import os
+import sys
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.zip_stream import stream_zip, iter_file_chunks, ZipStreamWriter
+
+
+def build_zip(entries) -> bytes:
+    """Run stream_zip over a list of (name, data) pairs and collect the output"""
+    async def source():
+        for entry in entries:
+            yield entry
+
+    async def collect():
+        return b''.join([part async for part in stream_zip(source())])
+
+    return asyncio.run(collect())
+
+
+class TestStreamZip:
+    """Tests for utils.zip_stream.stream_zip"""
+
+    def test_archive_readable_by_zipfile(self):
+        """Archive produced by the stream is valid and round-trips content"""
+        photo = os.urandom(50_000)
+        notes = b"hello gallery " * 1000
+        data = build_zip([("IMG_0001.jpg", photo), ("notes.txt", notes)])
+
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.testzip() is None
+            assert zf.namelist() == ["IMG_0001.jpg", "notes.txt"]
+            assert zf.read("IMG_0001.jpg") == photo
+            assert zf.read("notes.txt") == notes
+        print("✓ Streamed archive round-trips through zipfile")
+
+    def test_compression_method_by_extension(self):
+        """JPEG/HEIC are stored, other files are deflated"""
+        data = build_zip([
+            ("a.JPG", b"x" * 4096),
+            ("b.heic", b"y" * 4096),
+            ("c.txt", b"z" * 4096),
+        ])
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.getinfo("a.JPG").compress_type == zipfile.ZIP_STORED
+            assert zf.getinfo("b.heic").compress_type == zipfile.ZIP_STORED
+            assert zf.getinfo("c.txt").compress_type == zipfile.ZIP_DEFLATED
+        print("✓ Compression method chosen by extension")
+
+    def test_async_chunks_and_skipped_entries(self):
+        """Chunked async sources are concatenated and None entries are skipped"""
+        async def chunks():
+            for i in range(5):
+                yield bytes([i]) * 1000
+
+        data = build_zip([("missing.jpg", None), ("parts.jpg", chunks())])
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.namelist() == ["parts.jpg"]
+            assert zf.read("parts.jpg") == b"".join(bytes([i]) * 1000 for i in range(5))
+        print("✓ Chunked sources streamed, failed entries skipped")
+
+    def test_local_file_streaming(self, tmp_path):
+        """iter_file_chunks streams a file from disk into the archive"""
+        content = os.urandom(600_000)
+        file_path = tmp_path / "photo.jpg"
+        file_path.write_bytes(content)
+
+        data = build_zip([("photo.jpg", iter_file_chunks(file_path, chunk_size=100_000))])
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.read("photo.jpg") == content
+        print("✓ Local file streamed in chunks")
+
+    def test_empty_archive(self):
+        """An archive with no entries is still a valid ZIP"""
+        data = build_zip([])
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.namelist() == []
+        print("✓ Empty archive is valid")
+
+    def test_writer_rejects_nested_entries(self):
+        """Starting an entry before finishing the previous one is an error"""
+        writer = ZipStreamWriter()
+        writer.start_entry("a.jpg")
+        try:
+            writer.start_entry("b.jpg")
+            assert False, "Expected RuntimeError"
+        except RuntimeError:
+            pass
+        print("✓ Writer enforces entry ordering")
@@ -0,0 +1,90 @@
+"""
+Daily analytics rollups for the photographer dashboard
+
+Every tracked event (view, QR scan, download) is logged in
+`analytics_events`, and the dashboard used to count those rows for today,
+this week and this month on every load. Events now also bump a per
+photographer / event type / UTC day counter in `analytics_daily`, so the
+dashboard reads at most ~40 small rollup documents instead of scanning a
+month of events.
+
+- The event insert and the $inc are separate writes; a crash between them
+  undercounts the rollup by that event. rebuild_daily_rollups recomputes
+  the counters from analytics_events (also used once after deploy to fill
+  in days that predate the rollups)
+- Days are UTC calendar days, the same boundaries the dashboard uses
+"""
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from pymongo import UpdateOne
+
+ROLLUP_COLLECTION = 'analytics_daily'
+
+
+def day_key(moment: datetime) -> str:
+    """UTC calendar day of a datetime, as YYYY-MM-DD"""
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%d')
+
+
+async def insert_analytics_event(db, event: dict):
+    """Log an analytics event and bump its daily rollup"""
+    await db.analytics_events.insert_one(event)
+    photographer_id = event.get("photographer_id")
+    if not photographer_id:
+        return
+    day = event["created_at"][:10] if isinstance(event.get("created_at"), str) else day_key(datetime.now(timezone.utc))
+    await db[ROLLUP_COLLECTION].update_one(
+        {"photographer_id": photographer_id, "event_type": event["event_type"], "day": day},
+        {"$inc": {"count": 1}},
+        upsert=True
+    )
+
+
+async def daily_counts(db, photographer_id: str, event_type: str, since: datetime) -> Dict[str, int]:
+    """Rollup counts per day (YYYY-MM-DD) from the day of `since` onwards"""
+    rows = await db[ROLLUP_COLLECTION].find(
+        {"photographer_id": photographer_id, "event_type": event_type, "day": {"$gte": day_key(since)}},
+        {"_id": 0, "day": 1, "count": 1}
+    ).to_list(None)
+    return {row["day"]: row.get("count", 0) for row in rows}
+
+
+def total_since(counts: Dict[str, int], since: datetime) -> int:
+    """Sum of daily counts from the day of `since` onwards"""
+    first_day = day_key(since)
+    return sum(count for day, count in counts.items() if day >= first_day)
+
+
+async def rebuild_daily_rollups(db, since: Optional[datetime] = None) -> int:
+    """
+    Recompute rollup counters from analytics_events (optionally only days
+    from `since` onwards). Returns the number of rollup documents written.
+    """
+    match = {"photographer_id": {"$ne": None}}
+    if since is not None:
+        match["created_at"] = {"$gte": since.astimezone(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0).isoformat()}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "photographer_id": "$photographer_id",
+                "event_type": "$event_type",
+                "day": {"$substrBytes": ["$created_at", 0, 10]},
+            },
+            "count": {"$sum": 1},
+        }},
+    ]
+    written = 0
+    batch = []
+    async for row in db.analytics_events.aggregate(pipeline):
+        batch.append(UpdateOne(dict(row["_id"]), {"$set": {"count": row["count"]}}, upsert=True))
+        if len(batch) >= 1000:
+            await db[ROLLUP_COLLECTION].bulk_write(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        await db[ROLLUP_COLLECTION].bulk_write(batch, ordered=False)
+        written += len(batch)
+    return written
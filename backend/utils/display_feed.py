@@ -0,0 +1,132 @@
+"""
+Versioned change feed for live display/slideshow screens
+
+Each gallery has a monotonically increasing `display_version`. Every write
+that can change what a display screen shows (media added or deleted, photos
+hidden/flagged/unflagged, thumbnails or order changed) bumps the version and
+logs the touched item ids in `display_changes` under that version.
+
+A screen that knows version N asks for the changes since N. Touched ids are
+re-read, so the log only needs to say *what* changed: items that are still
+visible come back as upserts, everything else as removals. Logging happens
+after the media write, so a reader that sees version N also sees the data
+written for every version <= N.
+
+Log entries expire after DISPLAY_CHANGE_RETENTION_DAYS; a client whose
+version is older than the retained log is told to resync from the full
+display endpoint.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from pymongo import ReturnDocument
+
+DISPLAY_CHANGE_RETENTION_DAYS = 7
+
+# Media collection -> source name used in the display feed
+DISPLAY_SOURCES = {
+    'photos': 'upload',
+    'pcloud_photos': 'pcloud',
+    'gdrive_photos': 'gdrive',
+    'gallery_videos': 'video',
+}
+
+# Gallery fields that affect the display apart from its media
+DISPLAY_META_FIELDS = (
+    'title', 'event_title', 'event_date', 'display_mode', 'display_transition',
+    'display_interval', 'collage_preset_id', 'sections', 'photographer_id',
+)
+
+
+async def record_display_changes(db, gallery_id: str, collection: str, item_ids: Iterable[str]) -> Optional[int]:
+    """
+    Bump the gallery's display version and log the touched items.
+    No-op for collections that are not part of the display.
+    Returns the new version (None if nothing was recorded).
+    """
+    source = DISPLAY_SOURCES.get(collection)
+    item_ids = [item_id for item_id in item_ids if item_id]
+    if source is None or not item_ids or not gallery_id:
+        return None
+
+    gallery = await db.galleries.find_one_and_update(
+        {"id": gallery_id},
+        {"$inc": {"display_version": 1}},
+        projection={"_id": 0, "display_version": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not gallery:
+        return None
+
+    version = gallery["display_version"]
+    now = datetime.now(timezone.utc)
+    await db.display_changes.insert_many([
+        {"gallery_id": gallery_id, "version": version, "source": source, "item_id": item_id, "created_at": now}
+        for item_id in item_ids
+    ])
+    return version
+
+
+async def record_photo_changes(db, photo_ids: Iterable[str]):
+    """Record changes to uploaded photos that may span several galleries"""
+    photo_ids = list(photo_ids)
+    if not photo_ids:
+        return
+    by_gallery = {}
+    async for photo in db.photos.find({"id": {"$in": photo_ids}}, {"_id": 0, "id": 1, "gallery_id": 1}):
+        by_gallery.setdefault(photo["gallery_id"], []).append(photo["id"])
+    for gallery_id, ids in by_gallery.items():
+        await record_display_changes(db, gallery_id, 'photos', ids)
+
+
+def display_meta_hash(gallery: dict) -> str:
+    """Short hash of the non-media gallery fields a display renders"""
+    meta = {field: gallery.get(field) for field in DISPLAY_META_FIELDS}
+    return hashlib.md5(json.dumps(meta, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:12]
+
+
+async def get_display_state(db, gallery_id: str) -> Optional[dict]:
+    """Fresh (uncached) display version and meta hash for a gallery"""
+    projection = {"_id": 0, "display_version": 1, **{field: 1 for field in DISPLAY_META_FIELDS}}
+    gallery = await db.galleries.find_one({"id": gallery_id}, projection)
+    if not gallery:
+        return None
+    return {"version": gallery.get("display_version", 0), "meta_hash": display_meta_hash(gallery)}
+
+
+def display_etag(gallery_id: str, state: dict, variant: str = "") -> str:
+    return f'W/"{gallery_id}-{state["version"]}-{state["meta_hash"]}{variant}"'
+
+
+async def get_display_changes(db, gallery_id: str, since: int, current_version: int) -> Optional[dict]:
+    """
+    Collect touched item ids per source for versions (since, current_version].
+
+    Returns {"version": v, "touched": {source: set(ids)}} where v is the highest
+    version up to which the log is contiguous, or None when the log no longer
+    reaches back to `since` and the client must resync.
+    """
+    if since > current_version or since < 0:
+        return None
+    if since == current_version:
+        return {"version": since, "touched": {}}
+
+    rows = await db.display_changes.find(
+        {"gallery_id": gallery_id, "version": {"$gt": since, "$lte": current_version}},
+        {"_id": 0, "version": 1, "source": 1, "item_id": 1}
+    ).sort("version", 1).to_list(None)
+
+    touched = {}
+    version = since
+    for row in rows:
+        if row["version"] > version + 1:
+            # Gap: either pruned (first row) or a writer hasn't logged yet
+            break
+        version = row["version"]
+        touched.setdefault(row["source"], set()).add(row["item_id"])
+
+    if version == since:
+        return None
+    return {"version": version, "touched": touched}
@@ -0,0 +1,111 @@
+"""
+Process-wide cache for feature resolution
+
+Feature resolution (resolve_user_features / resolve_gallery_features) reads
+the global feature toggles and the billing settings from `site_config` on
+every call, and one coordinator-hub or section request resolves several
+times. This cache keeps:
+
+- The site_config documents (already shaped by their loaders) for `ttl`
+  seconds, under a version stamp. Admin writes call `bump()`, which drops
+  every cached document and memoized result at once
+- Memoized resolution results keyed by the caller (the config version plus
+  the user / gallery fields the resolution reads). A result is kept until
+  the TTL or until its `valid_until` time (e.g. an override expiry),
+  whichever comes first, so time-dependent answers flip on schedule
+
+The TTL bounds staleness for writes made by another process. Callers get
+deep copies, so mutating a returned dict never corrupts the cache.
+"""
+import copy
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+FEATURE_CONFIG_TTL = float(os.environ.get('FEATURE_CONFIG_TTL', '60'))  # seconds
+FEATURE_MEMO_MAX_ENTRIES = int(os.environ.get('FEATURE_MEMO_MAX_ENTRIES', '2000'))
+
+
+class FeatureConfigCache:
+    """Versioned TTL cache of site_config documents plus a bounded memo of resolution results"""
+
+    def __init__(self, ttl: float = FEATURE_CONFIG_TTL, max_memo_entries: int = FEATURE_MEMO_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_memo_entries = max(1, max_memo_entries)
+        self.version = 0
+        self._configs = {}  # config key -> (expires_at, value)
+        self._memo = OrderedDict()  # memo key -> (expires_at, value)
+        self.config_hits = 0
+        self.config_misses = 0
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    async def get_config(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a copy of a cached site_config value, loading it on a miss"""
+        entry = self._configs.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.config_hits += 1
+            return copy.deepcopy(entry[1])
+
+        self.config_misses += 1
+        version = self.version
+        value = await loader()
+        # Don't cache a value loaded across a bump - it may predate the write
+        if version == self.version:
+            self._configs[key] = (time.monotonic() + self.ttl, value)
+        return copy.deepcopy(value)
+
+    def memo_get(self, key: Hashable) -> Optional[Any]:
+        """Copy of a memoized result, or None"""
+        entry = self._memo.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._memo.move_to_end(key)
+                self.memo_hits += 1
+                return copy.deepcopy(entry[1])
+            del self._memo[key]
+        self.memo_misses += 1
+        return None
+
+    def memo_put(self, key: Hashable, value: Any, valid_until: Optional[float] = None):
+        """
+        Memoize a result for at most `ttl` seconds, and not past `valid_until`
+        (a time.time() timestamp). Keys should include `version`.
+        """
+        lifetime = self.ttl
+        if valid_until is not None:
+            lifetime = min(lifetime, valid_until - time.time())
+        if lifetime <= 0:
+            return
+        self._memo[key] = (time.monotonic() + lifetime, copy.deepcopy(value))
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.max_memo_entries:
+            self._memo.popitem(last=False)
+
+    def bump(self):
+        """Invalidate everything after an admin changed toggles or billing settings"""
+        self.version += 1
+        self._configs.clear()
+        self._memo.clear()
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "ttl_seconds": self.ttl,
+            "configs": len(self._configs),
+            "config_hits": self.config_hits,
+            "config_misses": self.config_misses,
+            "memo_size": len(self._memo),
+            "memo_hits": self.memo_hits,
+            "memo_misses": self.memo_misses,
+        }
+
+
+# Global cache instance
+feature_config = FeatureConfigCache()
+
+
+def get_feature_config() -> FeatureConfigCache:
+    """Get the feature config cache instance"""
+    return feature_config
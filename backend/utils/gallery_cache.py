@@ -0,0 +1,54 @@
+"""
+In-process cache for public gallery lookups
+
+Every guest request resolves its gallery by share_link, and a QR-code scan
+storm at an event sends thousands of identical lookups at once. This cache
+keeps the gallery document and the resolved photographer / grace-period
+status per share_link (LRU + TTL, single-flight; see utils/ttl_cache.py).
+
+Writes know the gallery id rather than its share_link, so the cache keeps a
+gallery id -> share_link index to invalidate by either. Missing galleries
+are cached too, so scans of a dead link don't reach the database either.
+"""
+import os
+from typing import Optional
+
+from utils.ttl_cache import TTLCache
+
+GALLERY_CACHE_MAX_ENTRIES = int(os.environ.get('GALLERY_CACHE_MAX_ENTRIES', '1000'))
+GALLERY_CACHE_TTL = float(os.environ.get('GALLERY_CACHE_TTL', '30'))  # seconds
+
+
+class GalleryCache(TTLCache):
+    """
+    Cache of share_link -> loaded value. The loader returns a dict containing
+    at least "gallery" (None when the share link does not exist).
+    """
+
+    def __init__(self, max_entries: int = GALLERY_CACHE_MAX_ENTRIES, ttl: float = GALLERY_CACHE_TTL):
+        super().__init__(max_entries, ttl)
+        self._share_links_by_gallery = {}  # gallery id -> share_link
+
+    def _stored(self, share_link: str, value: dict):
+        gallery = value.get("gallery")
+        if gallery:
+            self._share_links_by_gallery[gallery["id"]] = share_link
+
+    def _forgotten(self, share_link: str, value: dict):
+        gallery = value.get("gallery")
+        if gallery and self._share_links_by_gallery.get(gallery["id"]) == share_link:
+            del self._share_links_by_gallery[gallery["id"]]
+
+    def invalidate(self, gallery_id: Optional[str] = None, share_link: Optional[str] = None):
+        """Drop the entry for a gallery (by id and/or share_link)"""
+        linked = self._share_links_by_gallery.get(gallery_id) if gallery_id is not None else None
+        super().invalidate(*[key for key in (linked, share_link) if key is not None])
+
+
+# Global cache instance
+gallery_cache = GalleryCache()
+
+
+def get_gallery_cache() -> GalleryCache:
+    """Get the gallery cache instance"""
+    return gallery_cache
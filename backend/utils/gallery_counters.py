@@ -0,0 +1,194 @@
+"""
+Denormalized per-gallery media counters
+
+Each gallery document carries a `media_counts` subdocument with one counter per
+media collection, so public pages can show photo/video totals from the gallery
+read alone instead of running count_documents against five collections.
+
+Counters are changed with $inc next to every insert/delete of gallery media.
+The insert/delete and the $inc are separate writes, so a crash between them
+can leave a counter off by the affected documents; reconcile_gallery_counts
+recomputes the exact values and the background reconciliation task repairs
+any drift periodically.
+
+The same helpers also record display feed changes (utils/display_feed.py)
+for collections shown on display screens.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from utils.display_feed import DISPLAY_SOURCES, record_display_changes
+
+logger = logging.getLogger(__name__)
+
+# Media collection -> counter field inside gallery["media_counts"]
+COUNTED_COLLECTIONS = (
+    'photos',
+    'gdrive_photos',
+    'pcloud_photos',
+    'fotoshare_videos',
+    'gallery_videos',
+)
+
+PHOTO_COLLECTIONS = ('photos', 'gdrive_photos', 'pcloud_photos')
+VIDEO_COLLECTIONS = ('fotoshare_videos', 'gallery_videos')
+
+# Reconcile passes before giving up on a gallery whose counters keep changing
+RECONCILE_ATTEMPTS = 5
+
+
+def empty_gallery_counts() -> dict:
+    """Initial media_counts for a new gallery"""
+    return {collection: 0 for collection in COUNTED_COLLECTIONS}
+
+
+def _counter_field(collection: str) -> str:
+    if collection not in COUNTED_COLLECTIONS:
+        raise ValueError(f"Not a counted gallery collection: {collection}")
+    return f"media_counts.{collection}"
+
+
+async def increment_gallery_count(db, gallery_id: str, collection: str, delta: int):
+    """Atomically adjust one gallery counter"""
+    if not delta:
+        return
+    await db.galleries.update_one(
+        {"id": gallery_id},
+        {"$inc": {_counter_field(collection): delta}}
+    )
+
+
+async def insert_counted(db, collection: str, docs):
+    """
+    insert_one/insert_many into a counted collection and bump the owning
+    galleries' counters. `docs` may be a single document or a list.
+    """
+    if isinstance(docs, dict):
+        await db[collection].insert_one(docs)
+        docs = [docs]
+    else:
+        docs = list(docs)
+        if not docs:
+            return
+        await db[collection].insert_many(docs)
+
+    per_gallery = {}
+    for doc in docs:
+        per_gallery.setdefault(doc["gallery_id"], []).append(doc.get("id"))
+    for gallery_id, ids in per_gallery.items():
+        await increment_gallery_count(db, gallery_id, collection, len(ids))
+        await record_display_changes(db, gallery_id, collection, ids)
+
+
+async def delete_counted(db, collection: str, query: dict, gallery_id: Optional[str] = None) -> int:
+    """
+    delete_many from a counted collection and decrement the gallery counter
+    by the number of documents actually removed. The gallery is taken from
+    query["gallery_id"] unless given explicitly.
+    Returns the deleted count.
+    """
+    gallery_id = gallery_id or query.get("gallery_id")
+    if not gallery_id:
+        raise ValueError("delete_counted needs a gallery_id")
+    deleted_ids = []
+    if collection in DISPLAY_SOURCES:
+        deleted_ids = await db[collection].distinct("id", query)
+    result = await db[collection].delete_many(query)
+    await increment_gallery_count(db, gallery_id, collection, -result.deleted_count)
+    await record_display_changes(db, gallery_id, collection, deleted_ids)
+    return result.deleted_count
+
+
+async def reconcile_gallery_counts(db, gallery_id: str) -> dict:
+    """
+    Recompute every counter for a gallery from the media collections.
+
+    The write only applies if media_counts is unchanged since it was read
+    before counting; a concurrent $inc in between means the counts may
+    already include (or miss) that change, so the pass is retried instead of
+    overwriting the counter with a value the $inc would then skew.
+    """
+    counts = {}
+    for _ in range(RECONCILE_ATTEMPTS):
+        gallery = await db.galleries.find_one({"id": gallery_id}, {"_id": 0, "media_counts": 1})
+        if gallery is None:
+            return counts
+        before = gallery.get("media_counts")
+        counts = {}
+        for collection in COUNTED_COLLECTIONS:
+            counts[collection] = await db[collection].count_documents({"gallery_id": gallery_id})
+        result = await db.galleries.update_one(
+            {"id": gallery_id, "media_counts": before},
+            {"$set": {
+                "media_counts": counts,
+                "media_counts_reconciled_at": datetime.now(timezone.utc).isoformat()
+            }}
+        )
+        if result.matched_count:
+            return counts
+    logger.warning(f"Gallery {gallery_id} counters kept changing, reconcile skipped after {RECONCILE_ATTEMPTS} attempts")
+    return counts
+
+
+async def get_gallery_counts(db, gallery: dict) -> dict:
+    """
+    Counters for a gallery document already in hand. Galleries created before
+    counters existed are backfilled on first access.
+    """
+    counts = gallery.get("media_counts")
+    if not counts or any(collection not in counts for collection in COUNTED_COLLECTIONS):
+        counts = await reconcile_gallery_counts(db, gallery["id"])
+    return counts
+
+
+def gallery_photo_total(counts: dict) -> int:
+    return sum(max(0, counts.get(collection, 0)) for collection in PHOTO_COLLECTIONS)
+
+
+def gallery_video_total(counts: dict) -> int:
+    return sum(max(0, counts.get(collection, 0)) for collection in VIDEO_COLLECTIONS)
+
+
+async def reconcile_all_gallery_counts(db, gallery_ids: Optional[Iterable[str]] = None) -> dict:
+    """
+    Reconcile counters for the given galleries (or all galleries).
+    Returns {"checked": n, "repaired": n}.
+    """
+    if gallery_ids is None:
+        cursor = db.galleries.find({}, {"_id": 0, "id": 1, "media_counts": 1})
+    else:
+        cursor = db.galleries.find({"id": {"$in": list(gallery_ids)}}, {"_id": 0, "id": 1, "media_counts": 1})
+
+    checked = repaired = 0
+    async for gallery in cursor:
+        checked += 1
+        before = gallery.get("media_counts") or {}
+        after = await reconcile_gallery_counts(db, gallery["id"])
+        if any(before.get(collection) != after.get(collection) for collection in COUNTED_COLLECTIONS):
+            repaired += 1
+    return {"checked": checked, "repaired": repaired}
+
+
+async def photo_counts_by_uploader(db, gallery_ids: Iterable[str]) -> dict:
+    """
+    Uploaded photo counts for many galleries in one $group over the
+    (gallery_id, uploaded_by) index, without loading the photos.
+    Returns gallery_id -> {"total", "photographer", "guest"}; galleries
+    without photos are absent.
+    """
+    gallery_ids = list(gallery_ids)
+    if not gallery_ids:
+        return {}
+    pipeline = [
+        {"$match": {"gallery_id": {"$in": gallery_ids}}},
+        {"$group": {"_id": {"gallery_id": "$gallery_id", "uploaded_by": "$uploaded_by"}, "count": {"$sum": 1}}},
+    ]
+    counts = {}
+    async for row in db.photos.aggregate(pipeline):
+        entry = counts.setdefault(row["_id"]["gallery_id"], {"total": 0, "photographer": 0, "guest": 0})
+        entry["total"] += row["count"]
+        uploaded_by = row["_id"].get("uploaded_by")
+        if uploaded_by in ("photographer", "guest"):
+            entry[uploaded_by] += row["count"]
+    return counts
@@ -0,0 +1,77 @@
+"""
+Signed gallery access tokens
+
+Password-protected galleries used to re-check the bcrypt password on every
+photo, video, upload and download request. After one successful check the
+guest gets a short-lived JWT scoped to that gallery instead:
+
+- "guest" tokens stand in for the gallery password, "download" tokens for
+  the download-all password; one scope is never accepted for the other
+- Tokens carry a short digest of the stored password hash (`pwv`), so
+  changing or removing a password invalidates every token issued before
+- A missing, expired or mismatched token falls back to the password check
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException
+from jose import JWTError, jwt
+
+GALLERY_TOKEN_EXPIRE_MINUTES = 60 * 12
+
+# Token scope -> gallery field holding the password hash it stands in for
+GALLERY_TOKEN_PASSWORD_FIELDS = {"guest": "password", "download": "download_all_password"}
+
+
+def password_tag(hashed_password: str) -> str:
+    """Short digest of a stored hash - changing the password invalidates old tokens"""
+    return hashlib.sha256(hashed_password.encode('utf-8')).hexdigest()[:16]
+
+
+class GalleryTokens:
+    """Issues and checks gallery tokens signed with the app's JWT secret"""
+
+    def __init__(
+        self,
+        secret_key: str,
+        algorithm: str,
+        verify_password: Callable[[str, str], Awaitable[bool]],
+        expire_minutes: int = GALLERY_TOKEN_EXPIRE_MINUTES,
+    ):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.verify_password = verify_password
+        self.expire_minutes = expire_minutes
+
+    def create(self, gallery: dict, scope: str) -> str:
+        """Signed token granting `scope` ("guest" or "download") on one gallery"""
+        hashed = gallery.get(GALLERY_TOKEN_PASSWORD_FIELDS[scope]) or ""
+        expire = datetime.now(timezone.utc) + timedelta(minutes=self.expire_minutes)
+        claims = {"gallery_id": gallery["id"], "type": scope, "pwv": password_tag(hashed), "exp": expire}
+        return jwt.encode(claims, self.secret_key, algorithm=self.algorithm)
+
+    def is_valid(self, token: Optional[str], gallery: dict, scope: str) -> bool:
+        if not token:
+            return False
+        try:
+            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except JWTError:
+            return False
+        hashed = gallery.get(GALLERY_TOKEN_PASSWORD_FIELDS[scope]) or ""
+        return (payload.get("type") == scope and payload.get("gallery_id") == gallery["id"]
+                and payload.get("pwv") == password_tag(hashed))
+
+    async def require_access(self, gallery: dict, scope: str, password: Optional[str], token: Optional[str],
+                             missing_detail: str, invalid_detail: str):
+        """
+        Allow the request if the gallery has no password for `scope`, a valid
+        token is presented, or the password checks out. Raises 401 otherwise.
+        """
+        hashed = gallery.get(GALLERY_TOKEN_PASSWORD_FIELDS[scope])
+        if not hashed or self.is_valid(token, gallery, scope):
+            return
+        if not password:
+            raise HTTPException(status_code=401, detail=missing_detail)
+        if not await self.verify_password(password, hashed):
+            raise HTTPException(status_code=401, detail=invalid_detail)
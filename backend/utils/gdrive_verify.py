@@ -0,0 +1,95 @@
+"""
+Verification of Google Drive file ids scraped from a folder page
+
+Without an API key the Drive folder HTML is scraped for anything that looks
+like a file id, and each candidate has to be checked (a HEAD on its
+thumbnail) to tell images from noise. That used to run one request at a
+time, sleep every 10 and stop at 100 candidates. Verification now:
+
+- Runs with bounded concurrency behind a shared token bucket, so large
+  folders finish quickly without tripping Drive's rate limiting
+- Remembers each folder's conclusive answers in `gdrive_verified_files`, so
+  a re-sync only checks candidates it has not seen before
+- Has no cap on the number of candidates
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from utils.sync_scheduler import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+GDRIVE_VERIFY_CONCURRENCY = 8
+GDRIVE_VERIFY_RATE = 10.0  # HEAD checks per second, shared by all folders
+GDRIVE_VERIFY_BURST = 10
+GDRIVE_VERIFIED_TTL_DAYS = 30  # cached answers are re-checked after this
+
+# (file_id) -> True (image), False (not an image) or None (inconclusive, not cached)
+FileCheck = Callable[[str], Awaitable[Optional[bool]]]
+
+
+async def load_verified(db, folder_id: str) -> Dict[str, bool]:
+    """Cached verification answers for a folder: file_id -> is_image"""
+    rows = await db.gdrive_verified_files.find(
+        {"folder_id": folder_id}, {"_id": 0, "file_id": 1, "is_image": 1}
+    ).to_list(None)
+    return {row["file_id"]: row["is_image"] for row in rows}
+
+
+async def save_verified(db, folder_id: str, answers: Dict[str, bool]):
+    if not answers:
+        return
+    now = datetime.now(timezone.utc)
+    await db.gdrive_verified_files.bulk_write([
+        UpdateOne(
+            {"folder_id": folder_id, "file_id": file_id},
+            {"$set": {"is_image": is_image, "verified_at": now}},
+            upsert=True
+        )
+        for file_id, is_image in answers.items()
+    ], ordered=False)
+
+
+async def check_file_ids(file_ids: Iterable[str], check: FileCheck, bucket: TokenBucket,
+                         concurrency: int = GDRIVE_VERIFY_CONCURRENCY) -> Dict[str, Optional[bool]]:
+    """Run `check` on every id with at most `concurrency` in flight, paced by `bucket`"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    answers = {}
+
+    async def check_one(file_id: str):
+        async with semaphore:
+            await bucket.acquire()
+            try:
+                answers[file_id] = await check(file_id)
+            except Exception as e:
+                logger.debug(f"Error verifying file {file_id}: {e}")
+                answers[file_id] = None
+
+    await asyncio.gather(*[check_one(file_id) for file_id in file_ids])
+    return answers
+
+
+async def verify_folder_candidates(db, folder_id: str, candidates: List[str], check: FileCheck,
+                                   bucket: TokenBucket) -> dict:
+    """
+    Image file ids among `candidates`, in candidate order. Only ids without a
+    cached answer are checked; conclusive new answers are cached.
+    Returns {"images", "unverified", "checked", "cached"}; "unverified" are
+    ids whose check was inconclusive (e.g. rate limited).
+    """
+    known = await load_verified(db, folder_id)
+    unknown = [file_id for file_id in candidates if file_id not in known]
+    answers = await check_file_ids(unknown, check, bucket) if unknown else {}
+    await save_verified(db, folder_id, {k: v for k, v in answers.items() if v is not None})
+
+    images = [file_id for file_id in candidates if known.get(file_id) or answers.get(file_id)]
+    return {
+        "images": images,
+        "checked": len(unknown),
+        "cached": len(candidates) - len(unknown),
+        "unverified": [file_id for file_id in unknown if answers.get(file_id) is None],
+    }
@@ -0,0 +1,259 @@
+"""
+Application-scoped outbound HTTP clients for external integrations
+
+Scrapers, API calls and proxies used to open a fresh aiohttp session (or
+httpx client) per call, so no connection, TLS session or DNS answer was ever
+reused. This registry keeps one pooled session per integration for the life
+of the app:
+
+- Per-integration connection limits (total and per host), keep-alive and a
+  DNS cache on each connector
+- Per-integration timeouts and retry/backoff policy; retries cover connection
+  errors, timeouts, 429 and 5xx, and honour a numeric Retry-After
+- Per-host latency and error metrics collected with aiohttp tracing
+
+Usage mirrors a plain session, but the pool is shared and not closed:
+
+    async with http_clients.client('pcloud') as session:
+        async with session.get(url) as response:
+            ...
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DNS_CACHE_TTL = 300  # seconds
+KEEPALIVE_TIMEOUT = 30  # seconds an idle connection is kept
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER = 30  # seconds; longer Retry-After values are not waited for
+LATENCY_SAMPLES = 200  # recent requests kept per host for percentiles
+
+# Per-integration policy: timeouts (seconds), retries, backoff and pool limits
+INTEGRATION_POLICIES = {
+    'fotoshare': {'total': 30, 'retries': 2, 'backoff': 1.0, 'limit': 20, 'limit_per_host': 10},
+    'pcloud': {'total': 30, 'retries': 2, 'backoff': 0.5, 'limit': 50, 'limit_per_host': 20},
+    'gdrive': {'total': 60, 'retries': 2, 'backoff': 1.0, 'limit': 50, 'limit_per_host': 20},
+    # ZIP builds fetch originals from the CDN; the prefetcher retries on its own
+    'cdn': {'total': 60, 'retries': 0, 'backoff': 0.5, 'limit': 64, 'limit_per_host': 32},
+    # Streaming proxies: no total timeout (large bodies), only between reads
+    'proxy': {'total': None, 'sock_read': 60, 'retries': 1, 'backoff': 0.5, 'limit': 100, 'limit_per_host': 20},
+}
+DEFAULT_POLICY = {'total': 30, 'retries': 1, 'backoff': 0.5, 'limit': 20, 'limit_per_host': 10}
+CONNECT_TIMEOUT = 10  # seconds
+
+
+class HostMetrics:
+    """Request count, errors and latency for one upstream host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.server_errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, latency: float, status: Optional[int] = None, error: bool = False):
+        self.requests += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.latencies.append(latency)
+        if error:
+            self.errors += 1
+        elif status is not None and status >= 500:
+            self.server_errors += 1
+
+    def stats(self) -> dict:
+        recent = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not recent:
+                return None
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 1)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "server_errors": self.server_errors,
+            "avg_ms": round(self.total_latency / self.requests * 1000, 1) if self.requests else None,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_latency * 1000, 1),
+        }
+
+
+def _retry_delay(policy: dict, attempt: int, response: Optional[aiohttp.ClientResponse] = None) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(int(retry_after), MAX_RETRY_AFTER)
+    return policy['backoff'] * (2 ** attempt)
+
+
+class _RetryingRequest:
+    """Async context manager for one request with the integration's retry policy"""
+
+    def __init__(self, client: "IntegrationClient", method: str, url: str, retries: Optional[int], kwargs: dict):
+        self.client = client
+        self.method = method
+        self.url = url
+        self.retries = client.policy['retries'] if retries is None else retries
+        self.kwargs = kwargs
+        self.response = None
+
+    async def _send(self) -> aiohttp.ClientResponse:
+        policy = self.client.policy
+        for attempt in range(self.retries + 1):
+            session = self.client.registry.session(self.client.name)
+            try:
+                response = await session.request(self.method, self.url, **self.kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.retries:
+                    raise
+                delay = _retry_delay(policy, attempt)
+                logger.info(f"{self.client.name}: {self.method} {self.url} failed ({e!r}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            if response.status in RETRY_STATUSES and attempt < self.retries:
+                delay = _retry_delay(policy, attempt, response)
+                response.release()
+                logger.info(f"{self.client.name}: {self.method} {self.url} returned {response.status}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            return response
+
+    def __await__(self):
+        # `response = await client.get(...)` - caller releases the response
+        return self._send().__await__()
+
+    async def __aenter__(self) -> aiohttp.ClientResponse:
+        self.response = await self._send()
+        return self.response
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.response is not None:
+            self.response.release()
+        return False
+
+
+class IntegrationClient:
+    """
+    Session-like handle on an integration's shared pool.
+    Entering it as a context manager does not open or close anything.
+    """
+
+    def __init__(self, registry: "HttpClientRegistry", name: str):
+        self.registry = registry
+        self.name = name
+        self.policy = INTEGRATION_POLICIES.get(name, DEFAULT_POLICY)
+
+    def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> _RetryingRequest:
+        return _RetryingRequest(self, method, url, retries, kwargs)
+
+    def get(self, url: str, **kwargs) -> _RetryingRequest:
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> _RetryingRequest:
+        return self.request("HEAD", url, **kwargs)
+
+    async def __aenter__(self) -> "IntegrationClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class HttpClientRegistry:
+    """One pooled aiohttp session per integration, plus per-host metrics"""
+
+    def __init__(self):
+        self._sessions = {}
+        self._metrics = {}  # host -> HostMetrics
+        self._trace_config = aiohttp.TraceConfig()
+        self._trace_config.on_request_start.append(self._on_request_start)
+        self._trace_config.on_request_end.append(self._on_request_end)
+        self._trace_config.on_request_exception.append(self._on_request_exception)
+
+    async def _on_request_start(self, session, ctx: SimpleNamespace, params):
+        ctx.started = time.monotonic()
+
+    def _host_metrics(self, url) -> HostMetrics:
+        host = url.host or "unknown"
+        metrics = self._metrics.get(host)
+        if metrics is None:
+            metrics = self._metrics[host] = HostMetrics()
+        return metrics
+
+    async def _on_request_end(self, session, ctx: SimpleNamespace, params):
+        self._host_metrics(params.url).record(time.monotonic() - ctx.started, status=params.response.status)
+
+    async def _on_request_exception(self, session, ctx: SimpleNamespace, params):
+        self._host_metrics(params.url).record(time.monotonic() - ctx.started, error=True)
+
+    def _create_session(self, name: str) -> aiohttp.ClientSession:
+        policy = INTEGRATION_POLICIES.get(name, DEFAULT_POLICY)
+        connector = aiohttp.TCPConnector(
+            limit=policy['limit'],
+            limit_per_host=policy['limit_per_host'],
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=policy['total'],
+            sock_connect=CONNECT_TIMEOUT,
+            sock_read=policy.get('sock_read'),
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=[self._trace_config])
+
+    async def start(self):
+        """Open every integration's pool (called from the app lifespan)"""
+        for name in INTEGRATION_POLICIES:
+            self.session(name)
+        logger.info(f"HTTP client pools opened: {', '.join(INTEGRATION_POLICIES)}")
+
+    async def close(self):
+        """Close all pools (called on app shutdown)"""
+        sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            if not session.closed:
+                await session.close()
+
+    def session(self, name: str) -> aiohttp.ClientSession:
+        """Raw shared session for an integration, opened on first use outside the lifespan"""
+        session = self._sessions.get(name)
+        if session is None or session.closed:
+            session = self._sessions[name] = self._create_session(name)
+        return session
+
+    def client(self, name: str) -> IntegrationClient:
+        return IntegrationClient(self, name)
+
+    def stats(self) -> dict:
+        return {
+            "integrations": {
+                name: {
+                    "open": name in self._sessions and not self._sessions[name].closed,
+                    "timeout_total": policy['total'],
+                    "retries": policy['retries'],
+                    "limit_per_host": policy['limit_per_host'],
+                }
+                for name, policy in INTEGRATION_POLICIES.items()
+            },
+            "hosts": {host: metrics.stats() for host, metrics in sorted(self._metrics.items())},
+        }
+
+
+# Global registry instance
+http_clients = HttpClientRegistry()
+
+
+def get_http_clients() -> HttpClientRegistry:
+    """Get the outbound HTTP client registry"""
+    return http_clients
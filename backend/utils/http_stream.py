@@ -0,0 +1,197 @@
+"""
+Byte-streaming helpers for proxied upstream responses and cached files
+
+Proxy endpoints used to read the whole upstream body into memory before
+answering, so time-to-first-byte equalled the full download time and RAM grew
+with every concurrent download. These helpers pass bytes through as they
+arrive instead:
+
+- Upstream requests go through the shared "proxy" pool of the HTTP client
+  registry (utils.http_clients) instead of a new session per request
+- Range requests are forwarded upstream and 206 responses passed through with
+  Content-Range / Content-Length
+- Local files (e.g. proxy cache hits) are served with single-range support
+- A streamed 200 body can be teed into a cache fill as it goes out
+- Immutable objects get a strong ETag derived from their storage key, so a
+  conditional GET is answered with 304 before any storage is touched
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from typing import AsyncIterator, Optional, Tuple
+
+import aiohttp
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from utils.http_clients import get_http_clients
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Headers copied from the upstream response to the client
+PASSTHROUGH_HEADERS = ("Content-Length", "Content-Range", "Accept-Ranges", "Last-Modified", "ETag")
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=start-end" range against a file of `size` bytes.
+    Returns inclusive (start, end), or None to serve the whole file (no header,
+    or a multi-range / malformed header we don't handle). Raises 416 when the
+    range lies outside the file.
+    """
+    if not range_header:
+        return None
+    match = _RANGE_RE.match(range_header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    start_s, end_s = match.groups()
+    if start_s:
+        start = int(start_s)
+        end = min(int(end_s), size - 1) if end_s else size - 1
+    else:
+        # Suffix range: last N bytes
+        start = max(size - int(end_s), 0)
+        end = size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+async def iter_open_file(handle, start: int, length: int, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yield `length` bytes from an open binary file starting at `start`, then close it"""
+    try:
+        await asyncio.to_thread(handle.seek, start)
+        remaining = length
+        while remaining > 0:
+            chunk = await asyncio.to_thread(handle.read, min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(handle.close)
+
+
+def stream_open_file(handle, size: int, media_type: str, range_header: Optional[str] = None,
+                     headers: Optional[dict] = None) -> StreamingResponse:
+    """
+    Stream an already-open file with Range support. Opening first (rather than
+    passing a path) means a concurrent unlink - e.g. cache eviction - can't
+    break a response that has started.
+    """
+    try:
+        byte_range = parse_range(range_header, size)
+    except HTTPException:
+        handle.close()
+        raise
+    response_headers = {**(headers or {}), "Accept-Ranges": "bytes"}
+    if byte_range is None:
+        start, length, status = 0, size, 200
+    else:
+        start, end = byte_range
+        length, status = end - start + 1, 206
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response_headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        iter_open_file(handle, start, length),
+        status_code=status,
+        media_type=media_type,
+        headers=response_headers,
+    )
+
+
+def stream_file(path, media_type: str, range_header: Optional[str] = None,
+                headers: Optional[dict] = None) -> StreamingResponse:
+    """Stream a local file with Range support"""
+    handle = open(path, "rb")
+    return stream_open_file(handle, os.fstat(handle.fileno()).st_size, media_type, range_header, headers)
+
+
+def key_etag(key: str) -> str:
+    """Strong ETag for an immutable object, derived from its storage key"""
+    return '"' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:24] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for this header)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+async def _iter_body(body, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Relay an object-storage streaming body (aiobotocore StreamingBody), closing it afterwards"""
+    async with body as stream:
+        async for chunk in stream.iter_chunks(chunk_size):
+            yield chunk
+
+
+def stream_storage_body(body, status: int, media_type: str, headers: dict) -> StreamingResponse:
+    """Stream an object-storage GET body with the given status and headers"""
+    return StreamingResponse(_iter_body(body), status_code=status, media_type=media_type, headers=headers)
+
+
+async def open_upstream(url: str, range_header: Optional[str] = None,
+                        headers: Optional[dict] = None) -> aiohttp.ClientResponse:
+    """
+    Start a GET on the shared proxy pool and return once headers arrive.
+    The caller owns the response: pass it to stream_upstream_response or
+    release() it.
+    """
+    request_headers = dict(headers or {})
+    if range_header:
+        request_headers["Range"] = range_header
+    return await get_http_clients().client('proxy').get(url, headers=request_headers, allow_redirects=True)
+
+
+async def _iter_upstream(response: aiohttp.ClientResponse, fill=None) -> AsyncIterator[bytes]:
+    completed = False
+    try:
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            if fill is not None:
+                await fill.write(chunk)
+            yield chunk
+        completed = True
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        # Headers are already sent - all we can do is cut the body short
+        logger.warning(f"Upstream stream from {response.url.host} ended early: {e}")
+    finally:
+        response.release()
+        if fill is not None:
+            if completed:
+                await fill.commit()
+            else:
+                await fill.abort()
+
+
+def stream_upstream_response(response: aiohttp.ClientResponse, media_type: str,
+                             headers: Optional[dict] = None, fill=None) -> StreamingResponse:
+    """
+    Relay an upstream 200/206 response chunk by chunk, preserving its status and
+    length/range headers. With `fill` (a ProxyCache fill) the body is also
+    written to the cache and committed only if it arrived completely.
+    """
+    response_headers = {name: response.headers[name] for name in PASSTHROUGH_HEADERS if name in response.headers}
+    response_headers.update(headers or {})
+    return StreamingResponse(
+        _iter_upstream(response, fill),
+        status_code=response.status,
+        media_type=media_type,
+        headers=response_headers,
+    )
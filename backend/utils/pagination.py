@@ -0,0 +1,108 @@
+"""
+Keyset (cursor) pagination for MongoDB queries
+
+Pages are fetched with a range condition on the sort key instead of skip(),
+so every page costs one index range scan regardless of how deep the client
+has paged. The position is handed to clients as an opaque cursor: the sort
+key values of the last returned document, JSON-encoded and base64url'd.
+
+The sort must end with a unique field (e.g. "id") so the order is total.
+Sort fields may be missing/None on some documents: MongoDB sorts null before
+every other value, and the range conditions below follow that rule.
+"""
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+SortSpec = Sequence[Tuple[str, int]]
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client-supplied cursor cannot be decoded"""
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, expected_length: int) -> List[Any]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}")
+    if not isinstance(values, list) or len(values) != expected_length:
+        raise InvalidCursor("Cursor does not match this listing")
+    return values
+
+
+def sort_key(doc: dict, sort: SortSpec) -> List[Any]:
+    return [doc.get(field) for field, _ in sort]
+
+
+def _after(field: str, direction: int, value: Any) -> Optional[dict]:
+    """Condition for documents strictly after `value` on one field (None = null/missing)"""
+    if direction == 1:
+        if value is None:
+            return {field: {"$ne": None}}
+        return {field: {"$gt": value}}
+    # Descending: nulls sort last
+    if value is None:
+        return None
+    return {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+
+def keyset_filter(sort: SortSpec, values: List[Any]) -> dict:
+    """
+    Build the "after this position" condition for a compound sort:
+    (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ...
+    """
+    branches = []
+    equal_prefix = []
+    for (field, direction), value in zip(sort, values):
+        after = _after(field, direction, value)
+        if after is not None:
+            branches.append({"$and": equal_prefix + [after]} if equal_prefix else after)
+        equal_prefix = equal_prefix + [{field: value}]
+    if not branches:
+        # Cursor points at the very last possible position
+        return {"_id": {"$exists": False}}
+    return {"$or": branches} if len(branches) > 1 else branches[0]
+
+
+async def fetch_page(
+    collection,
+    query: dict,
+    sort: SortSpec,
+    projection: Optional[dict] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> dict:
+    """
+    Fetch one page of `query` ordered by `sort`.
+    Returns {"items": [...], "next_cursor": str or None, "has_more": bool}.
+    Sort fields are added to the projection when a projection is given.
+    """
+    limit = clamp_page_size(limit)
+    if cursor:
+        values = decode_cursor(cursor, len(sort))
+        query = {"$and": [query, keyset_filter(sort, values)]}
+
+    if projection is not None:
+        projection = {**projection, **{field: 1 for field, _ in sort}}
+
+    items = await collection.find(query, projection).sort(list(sort)).limit(limit + 1).to_list(limit + 1)
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_cursor = encode_cursor(sort_key(items[-1], sort)) if has_more and items else None
+    return {"items": items, "next_cursor": next_cursor, "has_more": has_more}
@@ -0,0 +1,129 @@
+"""
+Bounded bcrypt worker pool for password hashing and verification
+
+bcrypt is deliberately slow (~100-300 ms of CPU per call). Called directly
+from async handlers it blocks the event loop, so a burst of logins stalls
+every other request, including gallery photo serving. Hashing and checks
+run here instead:
+
+- In a small thread pool (bcrypt releases the GIL while it works), so the
+  event loop stays free
+- With at most `max_workers` hashes running (leaving a core for the event
+  loop) and `max_queue` admitted at once; further callers wait and get
+  PasswordServiceBusy if no slot frees up in time, so a login flood queues
+  up instead of taking every CPU
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+# Leave at least one core for the event loop
+PASSWORD_WORKERS = int(os.environ.get('PASSWORD_WORKERS', '0')) or max(1, min(4, (os.cpu_count() or 2) - 1))
+PASSWORD_MAX_QUEUE = int(os.environ.get('PASSWORD_MAX_QUEUE', '0')) or PASSWORD_WORKERS * 16
+PASSWORD_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_QUEUE_TIMEOUT', '10'))  # seconds
+
+
+def hash_password_sync(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when password work stays saturated past the queue timeout"""
+
+
+class PasswordService:
+    """
+    Async front-end to a ThreadPoolExecutor for bcrypt.
+
+    At most `max_queue` operations may be waiting or running at once; further
+    callers wait (backpressure) and get PasswordServiceBusy if no slot frees
+    up within `queue_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = PASSWORD_WORKERS,
+        max_queue: int = PASSWORD_MAX_QUEUE,
+        queue_timeout: float = PASSWORD_QUEUE_TIMEOUT,
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max(max_queue, max_workers)
+        self.queue_timeout = queue_timeout
+        self._executor = None
+        self._slots = asyncio.Semaphore(self.max_queue)
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+
+    def start(self):
+        """Create the worker threads (idempotent)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bcrypt')
+            logger.info(f"Password pool started with {self.max_workers} workers (max queue {self.max_queue})")
+
+    async def shutdown(self):
+        """Stop the worker threads, waiting for in-flight work"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+            logger.info("Password pool stopped")
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "waiting": self._queued,
+            "running": self._running,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_ms": round(self._total_seconds / self._completed * 1000, 1) if self._completed else 0,
+        }
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on a worker thread, waiting for a free slot first"""
+        self.start()
+        self._queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise PasswordServiceBusy(f"Password pool saturated ({self._queued + self._running} queued)")
+        finally:
+            self._queued -= 1
+
+        self._running += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._total_seconds += time.perf_counter() - started
+            self._completed += 1
+            self._running -= 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password_sync, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password_sync, plain_password, hashed_password)
+
+
+# Global service instance
+password_service = PasswordService()
+
+
+def get_password_service() -> PasswordService:
+    """Get the password service instance"""
+    return password_service
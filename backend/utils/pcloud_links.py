@@ -0,0 +1,182 @@
+"""
+Memoized pCloud download-link resolution
+
+Every proxied pCloud original needs a direct download link from
+getpublinkdownload. The response carries an `expires` timestamp and a list of
+content hosts that all serve the same path, and stays valid for hours, so
+links are cached per (code, fileid) until shortly before they expire.
+
+- Concurrent lookups of the same file share one API call (single-flight)
+- A host that fails is rotated to the back, so the next caller tries the
+  next host from the same response before a new link is requested
+- resolve_many() resolves a whole section's links with bounded concurrency
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PCLOUD_LINK_MAX_ENTRIES = 20000
+PCLOUD_LINK_DEFAULT_TTL = 3600  # seconds, when the response has no usable `expires`
+PCLOUD_LINK_EXPIRY_MARGIN = 300  # stop handing out a link this long before it expires
+PCLOUD_LINK_BATCH_CONCURRENCY = 4
+
+# Raw API call: (code, fileid) -> getpublinkdownload response dict, or None
+LinkFetcher = Callable[[str, int], Awaitable[Optional[dict]]]
+
+
+def parse_pcloud_expires(expires, now: Optional[float] = None) -> float:
+    """Epoch seconds from pCloud's `expires` (RFC 2822 date string), with a default TTL fallback"""
+    now = time.time() if now is None else now
+    if expires:
+        try:
+            return parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError, IndexError):
+            logger.debug(f"Unparseable pCloud expires value: {expires!r}")
+    return now + PCLOUD_LINK_DEFAULT_TTL
+
+
+class PcloudLinkResolver:
+    """Cache of (code, fileid) -> download link info, honouring `expires`"""
+
+    def __init__(self, fetch_link: LinkFetcher, max_entries: int = PCLOUD_LINK_MAX_ENTRIES,
+                 expiry_margin: float = PCLOUD_LINK_EXPIRY_MARGIN):
+        self.fetch_link = fetch_link
+        self.max_entries = max(1, max_entries)
+        self.expiry_margin = expiry_margin
+        self._entries = OrderedDict()  # (code, fileid) -> {"hosts", "path", "expires", "expires_at"}
+        self._inflight = {}  # (code, fileid) -> Future
+        self.hits = 0
+        self.misses = 0
+        self.api_calls = 0
+        self.host_failovers = 0
+
+    @staticmethod
+    def _key(code: str, fileid) -> Tuple[str, int]:
+        return code, int(fileid)
+
+    @staticmethod
+    def _info(entry: dict) -> dict:
+        hosts = list(entry["hosts"])
+        return {
+            "url": f"https://{hosts[0]}{entry['path']}",
+            "urls": [f"https://{host}{entry['path']}" for host in hosts],
+            "expires": entry["expires"],
+            "hosts": hosts,
+            "path": entry["path"],
+        }
+
+    def _fresh(self, key) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires_at"] - self.expiry_margin <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def _load(self, key) -> Optional[dict]:
+        self.api_calls += 1
+        data = await self.fetch_link(*key)
+        if not data or not data.get("hosts") or not data.get("path"):
+            return None
+        entry = {
+            "hosts": list(data["hosts"]),
+            "path": data["path"],
+            "expires": data.get("expires"),
+            "expires_at": parse_pcloud_expires(data.get("expires")),
+        }
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    async def resolve(self, code: str, fileid) -> Optional[dict]:
+        """
+        Download link info for a file: {"url", "urls", "expires", "hosts", "path"}.
+        "url" uses the preferred host; "urls" lists every host in failover order.
+        Returns None when pCloud has no link for the file. Failures are not cached.
+        """
+        key = self._key(code, fileid)
+        entry = self._fresh(key)
+        if entry is not None:
+            self.hits += 1
+            return self._info(entry)
+
+        self.misses += 1
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            try:
+                entry = await self._load(key)
+            except BaseException as e:
+                future.set_exception(e)
+                # Mark retrieved so an unawaited failure isn't logged as never retrieved
+                future.exception()
+                raise
+            finally:
+                self._inflight.pop(key, None)
+            future.set_result(entry)
+        else:
+            entry = await asyncio.shield(future)
+        return self._info(entry) if entry else None
+
+    def mark_host_failed(self, code: str, fileid, url: str):
+        """Move the host behind `url` to the back of the failover order"""
+        entry = self._entries.get(self._key(code, fileid))
+        if entry is None:
+            return
+        hosts = entry["hosts"]
+        failed = next((host for host in hosts if url.startswith(f"https://{host}/")), None)
+        if failed is not None and len(hosts) > 1:
+            hosts.remove(failed)
+            hosts.append(failed)
+            self.host_failovers += 1
+
+    def invalidate(self, code: str, fileid):
+        """Forget a link (e.g. every host rejected it)"""
+        self._entries.pop(self._key(code, fileid), None)
+
+    async def resolve_many(self, code: str, fileids: Iterable,
+                           concurrency: int = PCLOUD_LINK_BATCH_CONCURRENCY) -> Dict[int, dict]:
+        """
+        Resolve links for many files of one share code at once.
+        Already-cached links cost nothing; the rest are fetched with at most
+        `concurrency` API calls in flight. Files without a link are omitted.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        results = {}
+
+        async def resolve_one(fileid: int):
+            async with semaphore:
+                try:
+                    info = await self.resolve(code, fileid)
+                except Exception as e:
+                    logger.warning(f"pCloud link resolution failed for {code}/{fileid}: {e}")
+                    return
+            if info:
+                results[fileid] = info
+
+        unique: List[int] = list(dict.fromkeys(int(fileid) for fileid in fileids))
+        await asyncio.gather(*[resolve_one(fileid) for fileid in unique])
+        return results
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "api_calls": self.api_calls,
+            "host_failovers": self.host_failovers,
+            "inflight": len(self._inflight),
+        }
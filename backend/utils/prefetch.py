@@ -0,0 +1,130 @@
+"""
+Ordered, bounded-concurrency prefetch pipeline
+
+Keeps up to N fetches in flight while the consumer (e.g. the streaming ZIP
+writer) receives results strictly in input order. A byte budget caps how much
+fetched-but-not-yet-consumed data may be buffered at once, so a download's
+memory stays bounded regardless of how fast the upstream responds.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_DELAY = 0.5  # seconds, doubled on each retry
+DEFAULT_BYTE_BUDGET = 64 * 1024 * 1024  # 64MB buffered per download
+DEFAULT_SIZE_HINT = 2 * 1024 * 1024  # 2MB estimate when an item's size is unknown
+
+
+async def fetch_with_retry(
+    fetch: Callable[[Any], Awaitable[Any]],
+    item: Any,
+    retries: int = DEFAULT_RETRIES,
+    retry_delay: float = DEFAULT_RETRY_DELAY,
+) -> Any:
+    """
+    Call fetch(item), retrying with exponential backoff when it raises.
+    A None result means "not available" and is returned without retrying.
+    Returns None once all attempts have failed.
+    """
+    delay = retry_delay
+    for attempt in range(retries + 1):
+        try:
+            return await fetch(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if attempt >= retries:
+                logger.warning(f"Prefetch failed after {attempt + 1} attempts: {e}")
+                return None
+            await asyncio.sleep(delay)
+            delay *= 2
+    return None
+
+
+def _result_size(result: Any) -> int:
+    if isinstance(result, (bytes, bytearray, memoryview)):
+        return len(result)
+    return 0
+
+
+async def prefetch_ordered(
+    items: Iterable[Any],
+    fetch: Callable[[Any], Awaitable[Any]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    retries: int = DEFAULT_RETRIES,
+    retry_delay: float = DEFAULT_RETRY_DELAY,
+    byte_budget: int = DEFAULT_BYTE_BUDGET,
+    size_hint: Optional[Callable[[Any], int]] = None,
+) -> AsyncIterator[Tuple[Any, Any]]:
+    """
+    Yield (item, result) pairs in input order while prefetching ahead.
+
+    - concurrency: max fetches in flight
+    - retries / retry_delay: per-item retry policy (see fetch_with_retry)
+    - byte_budget: max bytes reserved for in-flight + buffered results; the
+      head item is always allowed to start so a single oversized object
+      cannot stall the pipeline
+    - size_hint: item -> expected size in bytes, used to reserve budget before
+      the fetch starts (falls back to DEFAULT_SIZE_HINT)
+    """
+    concurrency = max(1, concurrency)
+    iterator = iter(items)
+    pending = deque()  # (item, task, reserved_bytes)
+    reserved = 0
+    exhausted = False
+
+    def estimate(item) -> int:
+        if size_hint is not None:
+            try:
+                hinted = size_hint(item)
+                if hinted and hinted > 0:
+                    return hinted
+            except Exception:
+                pass
+        return DEFAULT_SIZE_HINT
+
+    next_item = None
+    has_next = False
+
+    def fill():
+        nonlocal reserved, exhausted, next_item, has_next
+        while not exhausted and len(pending) < concurrency:
+            if not has_next:
+                try:
+                    next_item = next(iterator)
+                    has_next = True
+                except StopIteration:
+                    exhausted = True
+                    break
+            cost = estimate(next_item)
+            if pending and reserved + cost > byte_budget:
+                break
+            task = asyncio.ensure_future(fetch_with_retry(fetch, next_item, retries, retry_delay))
+            pending.append((next_item, task, cost))
+            reserved += cost
+            has_next = False
+            next_item = None
+
+    try:
+        fill()
+        while pending:
+            item, task, cost = pending[0]
+            result = await task
+            pending.popleft()
+            # Reserve the real size until the consumer has taken the result
+            actual = _result_size(result)
+            reserved += actual - cost
+            try:
+                yield item, result
+            finally:
+                reserved -= actual
+            del result
+            fill()
+    finally:
+        for _, task, _ in pending:
+            task.cancel()
@@ -0,0 +1,282 @@
+"""
+Disk-backed cache for proxied pCloud / Google Drive images
+
+The pCloud and Drive proxy endpoints fetch the same bytes from the upstream
+over and over (every slideshow screen pulls every photo at 1600px, every
+guest grid pulls the same 800px thumbnails). This cache keeps the fetched
+bytes on local disk, content-addressed by the request key, e.g.
+("pcloud", code, fileid, "1600x1600") or ("gdrive", file_id, "thumb").
+
+- Entries are evicted least-recently-used once the total size exceeds
+  `max_bytes`; items larger than `max_item_bytes` are served but not kept
+- Concurrent misses for the same key share one upstream fetch (single-flight)
+- Files are written to a temp name and renamed, so a crash never leaves a
+  truncated entry; the index is rebuilt from the directory on startup
+- Large originals use open()/begin_fill() instead of get(): hits are streamed
+  from an open file handle and misses are teed into the cache while they are
+  streamed to the client
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROXY_CACHE_MAX_BYTES = int(os.environ.get('PROXY_CACHE_MAX_BYTES', str(2 * 1024 * 1024 * 1024)))  # 2 GB
+PROXY_CACHE_MAX_ITEM_BYTES = int(os.environ.get('PROXY_CACHE_MAX_ITEM_BYTES', str(50 * 1024 * 1024)))  # 50 MB
+
+# A fetcher returns (content, meta) or raises; meta is a small JSON-able dict
+# such as {"content_type": "image/jpeg"} stored alongside the bytes
+Fetcher = Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]]
+
+
+def cache_key_digest(key: tuple) -> str:
+    return hashlib.sha256(json.dumps([str(part) for part in key]).encode('utf-8')).hexdigest()
+
+
+class ProxyCache:
+    """
+    LRU-by-bytes disk cache of key -> (content, meta).
+
+    Each entry is two files named after the key digest: the raw bytes and a
+    small ".meta" JSON file holding the meta dict (content type, filename).
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = PROXY_CACHE_MAX_BYTES,
+                 max_item_bytes: int = PROXY_CACHE_MAX_ITEM_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._entries = OrderedDict()  # digest -> (size, meta)
+        self._total_bytes = 0
+        self._inflight = {}  # digest -> Future
+        self._filling = set()  # digests with a streaming fill in progress
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_fetched = 0
+        self.evictions = 0
+        self._load_index()
+
+    def _data_path(self, digest: str) -> Path:
+        return self.directory / digest
+
+    def _meta_path(self, digest: str) -> Path:
+        return self.directory / f"{digest}.meta"
+
+    def _load_index(self):
+        """Rebuild the LRU index from disk, oldest files first"""
+        found = []
+        for meta_path in self.directory.glob("*.meta"):
+            digest = meta_path.stem
+            data_path = self._data_path(digest)
+            try:
+                stat = data_path.stat()
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                self._remove_files(digest)
+                continue
+            found.append((stat.st_mtime, digest, stat.st_size, meta))
+        for _, digest, size, meta in sorted(found, key=lambda item: item[:2]):
+            self._entries[digest] = (size, meta)
+            self._total_bytes += size
+        # Leftover temp files from an interrupted write
+        for tmp_path in self.directory.glob("*.tmp"):
+            tmp_path.unlink(missing_ok=True)
+        self._evict()
+
+    def _remove_files(self, digest: str):
+        self._data_path(digest).unlink(missing_ok=True)
+        self._meta_path(digest).unlink(missing_ok=True)
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            digest, (size, _) = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            self._remove_files(digest)
+
+    def _write(self, digest: str, content: bytes, meta: dict):
+        """Blocking write of one entry (run in a thread)"""
+        tmp_path = self.directory / f"{digest}.tmp"
+        tmp_path.write_bytes(content)
+        self._meta_path(digest).write_text(json.dumps(meta))
+        os.replace(tmp_path, self._data_path(digest))
+
+    async def _read(self, digest: str):
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        try:
+            content = await asyncio.to_thread(self._data_path(digest).read_bytes)
+        except OSError:
+            # Evicted or removed underneath us - treat as a miss
+            self._forget(digest)
+            return None
+        self._entries.move_to_end(digest)
+        return content, dict(entry[1])
+
+    def _forget(self, digest: str):
+        entry = self._entries.pop(digest, None)
+        if entry is not None:
+            self._total_bytes -= entry[0]
+
+    async def get(self, key: tuple, fetch: Fetcher) -> Tuple[bytes, dict]:
+        """Return (content, meta) for key, fetching and storing it on a miss"""
+        digest = cache_key_digest(key)
+        cached = await self._read(digest)
+        if cached is not None:
+            self.hits += 1
+            self.bytes_saved += len(cached[0])
+            return cached
+
+        self.misses += 1
+        future = self._inflight.get(digest)
+        if future is not None:
+            content, meta = await asyncio.shield(future)
+            return content, dict(meta)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[digest] = future
+        try:
+            content, meta = await fetch()
+            self.bytes_fetched += len(content)
+            if len(content) <= self.max_item_bytes and digest not in self._filling:
+                try:
+                    await asyncio.to_thread(self._write, digest, content, meta)
+                except OSError as e:
+                    logger.warning(f"Proxy cache write failed: {e}")
+                else:
+                    self._forget(digest)
+                    self._entries[digest] = (len(content), dict(meta))
+                    self._total_bytes += len(content)
+                    self._evict()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure isn't logged as never retrieved
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(digest, None)
+        future.set_result((content, meta))
+        return content, dict(meta)
+
+    async def open(self, key: tuple) -> Optional[Tuple[BinaryIO, int, dict]]:
+        """
+        Open a cached entry for streaming: (file handle, size, meta), or None on
+        a miss. The caller must close the handle.
+        """
+        digest = cache_key_digest(key)
+        entry = self._entries.get(digest)
+        if entry is not None:
+            try:
+                handle = await asyncio.to_thread(open, self._data_path(digest), "rb")
+            except OSError:
+                self._forget(digest)
+            else:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                self.bytes_saved += entry[0]
+                return handle, entry[0], dict(entry[1])
+        self.misses += 1
+        return None
+
+    def begin_fill(self, key: tuple, meta: dict) -> Optional["CacheFill"]:
+        """
+        Start writing an entry chunk by chunk. Returns None when another fill
+        for the same key is already running (that request will populate it).
+        """
+        digest = cache_key_digest(key)
+        if digest in self._filling or digest in self._inflight:
+            return None
+        self._filling.add(digest)
+        return CacheFill(self, digest, meta)
+
+    def _commit_fill(self, digest: str, size: int, meta: dict):
+        self._filling.discard(digest)
+        self.bytes_fetched += size
+        self._forget(digest)
+        self._entries[digest] = (size, dict(meta))
+        self._total_bytes += size
+        self._evict()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "bytes_saved": self.bytes_saved,
+            "bytes_fetched": self.bytes_fetched,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight) + len(self._filling),
+        }
+
+
+class CacheFill:
+    """Incremental write of one ProxyCache entry from a streamed body"""
+
+    def __init__(self, cache: ProxyCache, digest: str, meta: dict):
+        self.cache = cache
+        self.digest = digest
+        self.meta = meta
+        self.size = 0
+        self._tmp_path = cache.directory / f"{digest}.tmp"
+        self._handle = None
+        self._done = False
+
+    async def write(self, chunk: bytes):
+        if self._done:
+            return
+        self.size += len(chunk)
+        if self.size > self.cache.max_item_bytes:
+            # Too big to keep - stop writing, the stream itself continues
+            await self.abort()
+            return
+        try:
+            if self._handle is None:
+                self._handle = await asyncio.to_thread(open, self._tmp_path, "wb")
+            await asyncio.to_thread(self._handle.write, chunk)
+        except OSError as e:
+            logger.warning(f"Proxy cache write failed: {e}")
+            await self.abort()
+
+    def _finish(self):
+        """Blocking rename of the completed temp file into place (run in a thread)"""
+        self._handle.close()
+        self.cache._meta_path(self.digest).write_text(json.dumps(self.meta))
+        os.replace(self._tmp_path, self.cache._data_path(self.digest))
+
+    async def commit(self):
+        if self._done:
+            return
+        self._done = True
+        if self._handle is None:
+            self.cache._filling.discard(self.digest)
+            return
+        try:
+            await asyncio.to_thread(self._finish)
+        except OSError as e:
+            logger.warning(f"Proxy cache write failed: {e}")
+            self.cache._filling.discard(self.digest)
+            self._tmp_path.unlink(missing_ok=True)
+            return
+        self.cache._commit_fill(self.digest, self.size, self.meta)
+
+    async def abort(self):
+        if self._done:
+            return
+        self._done = True
+        self.cache._filling.discard(self.digest)
+        if self._handle is not None:
+            await asyncio.to_thread(self._handle.close)
+        await asyncio.to_thread(self._tmp_path.unlink, True)
@@ -0,0 +1,103 @@
+"""
+Due-time priority queue for periodic refresh work
+
+The fotoshare auto-refresh used to wake on a fixed interval and scan every
+gallery to find the few sections that were due. The queue instead keeps each
+section keyed by its next due time (a heap with lazy deletion), so the task
+sleeps exactly until the earliest one is due:
+
+- schedule() sets or moves a key's due time; moving one ahead of everything
+  else wakes the waiting task immediately (e.g. a manual refresh)
+- pop_due() hands out the keys that are due, earliest first
+- tiered_interval() maps an age to a refresh interval from a tier table
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+# Tier table: (max age in days or None for "older", interval in minutes)
+RefreshTiers = Sequence[Tuple[Optional[float], float]]
+
+
+def tiered_interval(age_days: float, tiers: RefreshTiers) -> float:
+    """Refresh interval in minutes for something `age_days` old"""
+    for max_age_days, interval_minutes in tiers:
+        if max_age_days is None or age_days < max_age_days:
+            return interval_minutes
+    return tiers[-1][1]
+
+
+class RefreshQueue:
+    """Keys ordered by due time (epoch seconds); each key is queued at most once"""
+
+    def __init__(self):
+        self._heap = []  # (due, seq, key); entries superseded in _entries are skipped
+        self._entries = {}  # key -> (due, seq)
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self.wakeups = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def _prune(self):
+        while self._heap and self._entries.get(self._heap[0][2]) != self._heap[0][:2]:
+            heapq.heappop(self._heap)
+
+    def next_due(self) -> Optional[float]:
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def schedule(self, key: Hashable, due: float):
+        """Queue `key` at `due`, replacing any earlier schedule for it"""
+        current = self.next_due()
+        entry = (due, next(self._seq))
+        self._entries[key] = entry
+        heapq.heappush(self._heap, (*entry, key))
+        if current is None or due < current:
+            self.wakeups += 1
+            self._wakeup.set()
+
+    def schedule_now(self, key: Hashable):
+        self.schedule(key, time.time())
+
+    def discard(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[Hashable]:
+        """Remove and return keys due at `now`, earliest first"""
+        now = time.time() if now is None else now
+        keys = []
+        while limit is None or len(keys) < limit:
+            due = self.next_due()
+            if due is None or due > now:
+                break
+            _, _, key = heapq.heappop(self._heap)
+            del self._entries[key]
+            keys.append(key)
+        return keys
+
+    async def wait(self, max_wait: float):
+        """Sleep until the earliest key is due, a key is moved ahead of it, or `max_wait` passes"""
+        self._wakeup.clear()
+        due = self.next_due()
+        timeout = max_wait if due is None else min(max_wait, due - time.time())
+        if timeout <= 0:
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def stats(self) -> dict:
+        due = self.next_due()
+        return {
+            "queued": len(self._entries),
+            "next_due_in_seconds": round(max(0.0, due - time.time()), 1) if due is not None else None,
+            "wakeups": self.wakeups,
+        }
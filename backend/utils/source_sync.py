@@ -0,0 +1,161 @@
+"""
+Incremental sync of pCloud / Google Drive folder listings into sections
+
+Each sync used to pull the whole folder listing, load every existing file id
+of the section and diff them in Python before inserting the new photos. The
+section now remembers what it last saw, so unchanged folders cost no writes:
+
+- pCloud: a fingerprint of the listing (file ids with hash/modified/size).
+  showpublink has no conditional form, so the listing is still fetched, but
+  an unchanged fingerprint skips all database work
+- Google Drive: a modifiedTime/createdTime watermark, so the API only lists
+  files added or changed since the last sync (with a periodic full listing
+  to pick up anything the watermark can miss, e.g. files moved in)
+- New photos are upserted in bulk on the unique (section_id, fileid/file_id)
+  index instead of read-diff-insert; existing documents are left untouched
+"""
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from utils.gallery_counters import increment_gallery_count
+from utils.display_feed import record_display_changes
+
+UPSERT_BATCH_SIZE = 1000
+GDRIVE_FULL_SYNC_HOURS = 24  # a full Drive listing at least this often
+GDRIVE_WATERMARK_OVERLAP = timedelta(minutes=5)  # re-list recent files in case the index lagged
+
+# Per-provider identity of a photo within a section
+SOURCE_KEY_FIELDS = {
+    'pcloud_photos': 'fileid',
+    'gdrive_photos': 'file_id',
+}
+
+
+def listing_fingerprint(photos: Iterable[dict], key_field: str, version_fields: tuple) -> str:
+    """Order-independent digest of a folder listing"""
+    entries = sorted(
+        "|".join([str(photo.get(key_field))] + [str(photo.get(field) or '') for field in version_fields])
+        for photo in photos
+    )
+    digest = hashlib.sha1()
+    for entry in entries:
+        digest.update(entry.encode('utf-8'))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def pcloud_fingerprint(photos: Iterable[dict]) -> str:
+    return listing_fingerprint(photos, 'fileid', ('hash', 'modified', 'size'))
+
+
+def gdrive_fingerprint(photos: Iterable[dict]) -> str:
+    return listing_fingerprint(photos, 'file_id', ('modified_time', 'created_time', 'size'))
+
+
+def gdrive_watermark(photos: Iterable[dict], previous: Optional[str] = None) -> Optional[str]:
+    """Newest modifiedTime/createdTime in a Drive listing (RFC 3339 strings compare in order)"""
+    watermark = previous
+    for photo in photos:
+        for field in ('modified_time', 'created_time'):
+            value = photo.get(field)
+            if value and (watermark is None or value > watermark):
+                watermark = value
+    return watermark
+
+
+def gdrive_modified_since(section: dict, now: datetime) -> Optional[str]:
+    """
+    Lower bound for the next Drive listing, or None when a full listing is due
+    (no watermark yet, or the last full listing is older than GDRIVE_FULL_SYNC_HOURS).
+    """
+    watermark = section.get("gdrive_watermark")
+    full_sync_at = section.get("gdrive_full_sync_at")
+    if not watermark or not full_sync_at:
+        return None
+    if full_sync_at <= (now - timedelta(hours=GDRIVE_FULL_SYNC_HOURS)).isoformat():
+        return None
+    try:
+        since = datetime.fromisoformat(watermark.replace('Z', '+00:00')) - GDRIVE_WATERMARK_OVERLAP
+    except ValueError:
+        return None
+    return since.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def pcloud_photo_doc(gallery_id: str, section_id: str, code: str, photo: dict,
+                     order: int, sync_time: str) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "gallery_id": gallery_id,
+        "section_id": section_id,
+        "pcloud_code": code,
+        "fileid": str(photo['fileid']),  # Store as string
+        "name": photo['name'],
+        "size": photo.get('size', 0),
+        "width": photo.get('width'),
+        "height": photo.get('height'),
+        "contenttype": photo.get('contenttype', 'image/jpeg'),
+        "supplier_name": photo.get('supplier_name'),
+        "hash": str(photo.get('hash', '')) if photo.get('hash') else None,
+        "created_at_source": photo.get('created'),
+        "order": order,
+        "synced_at": sync_time
+    }
+
+
+def gdrive_photo_doc(gallery_id: str, section_id: str, folder_id: str, photo: dict,
+                     order: int, sync_time: str, is_highlight: bool = False) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "gallery_id": gallery_id,
+        "section_id": section_id,
+        "gdrive_folder_id": folder_id,
+        "file_id": photo['file_id'],
+        "name": photo['name'],
+        "mime_type": photo.get('mime_type', 'image/jpeg'),
+        "size": photo.get('size', 0),
+        "width": photo.get('width'),
+        "height": photo.get('height'),
+        "thumbnail_url": photo['thumbnail_url'],
+        "view_url": photo['view_url'],
+        "created_time": photo.get('created_time'),
+        "order": order,
+        "is_highlight": is_highlight,
+        "synced_at": sync_time
+    }
+
+
+async def upsert_section_photos(db, collection: str, gallery_id: str, section_id: str, docs: list) -> int:
+    """
+    Insert the documents whose (section_id, key) is not in the collection yet,
+    with unordered bulk upserts ($setOnInsert, so existing photos keep their
+    id, order and highlight flag). Bumps the gallery counter and records
+    display changes for the inserted photos. Returns the number inserted.
+    """
+    key_field = SOURCE_KEY_FIELDS[collection]
+    inserted_ids = []
+    for start in range(0, len(docs), UPSERT_BATCH_SIZE):
+        batch = docs[start:start + UPSERT_BATCH_SIZE]
+        requests = [
+            UpdateOne({"section_id": section_id, key_field: doc[key_field]}, {"$setOnInsert": doc}, upsert=True)
+            for doc in batch
+        ]
+        try:
+            result = await db[collection].bulk_write(requests, ordered=False)
+            upserted = result.bulk_api_result.get("upserted", [])
+        except BulkWriteError as e:
+            # A concurrent sync inserted some of the same files first (duplicate
+            # key on the unique index); everything else in the batch still applied
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+            upserted = e.details.get("upserted", [])
+        inserted_ids.extend(batch[item["index"]]["id"] for item in upserted)
+
+    if inserted_ids:
+        await increment_gallery_count(db, gallery_id, collection, len(inserted_ids))
+        await record_display_changes(db, gallery_id, collection, inserted_ids)
+    return len(inserted_ids)
@@ -0,0 +1,165 @@
+"""
+Concurrent, rate-limited runner for external-source section syncs
+
+The fotoshare / Google Drive / pCloud auto-sync tasks used to scrape one
+section at a time, so with hundreds of active sections a cycle took longer
+than its own interval. The scheduler runs a cycle's due sections concurrently
+while keeping the upstreams safe:
+
+- A global concurrency cap across all providers
+- Per-provider concurrency caps and token-bucket rate limits (requests/sec)
+- Every run is timed; per-provider counts and durations are kept in memory
+  and each run is handed to an optional recorder (e.g. to persist it)
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DURATION_SAMPLES = 500  # recent run durations kept per provider for percentiles
+
+# Job: (label, factory returning the sync coroutine)
+SyncJob = Tuple[str, Callable[[], Awaitable]]
+# Recorder: (provider, label, duration_seconds, ok, error) -> awaitable
+RunRecorder = Callable[[str, str, float, bool, Optional[str]], Awaitable]
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        # The lock makes waiters queue in order instead of racing for each token
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class _ProviderStats:
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.cycles = 0
+        self.last_cycle_seconds = None
+        self.last_cycle_runs = 0
+        self.durations = deque(maxlen=DURATION_SAMPLES)
+
+    def stats(self) -> dict:
+        recent = sorted(self.durations)
+
+        def percentile(p: float) -> Optional[float]:
+            if not recent:
+                return None
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))], 3)
+
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "cycles": self.cycles,
+            "last_cycle_seconds": self.last_cycle_seconds,
+            "last_cycle_runs": self.last_cycle_runs,
+            "p50_seconds": percentile(0.5),
+            "p95_seconds": percentile(0.95),
+            "max_seconds": round(recent[-1], 3) if recent else None,
+        }
+
+
+class SyncScheduler:
+    """
+    Runs batches of sync jobs under global and per-provider limits.
+
+    providers: name -> {"concurrency": int, "rate": float (runs/sec), "burst": float}
+    """
+
+    def __init__(self, global_concurrency: int, providers: Dict[str, dict],
+                 recorder: Optional[RunRecorder] = None):
+        self._global = asyncio.Semaphore(max(1, global_concurrency))
+        self.global_concurrency = global_concurrency
+        self.providers = providers
+        self.recorder = recorder
+        self._semaphores = {}
+        self._buckets = {}
+        self._stats = {}
+        self._running = {}
+
+    def _limits(self, provider: str):
+        if provider not in self._semaphores:
+            config = self.providers.get(provider, {})
+            self._semaphores[provider] = asyncio.Semaphore(max(1, config.get("concurrency", 1)))
+            self._buckets[provider] = TokenBucket(config.get("rate", 1.0), config.get("burst"))
+            self._stats[provider] = _ProviderStats()
+            self._running[provider] = 0
+        return self._semaphores[provider], self._buckets[provider], self._stats[provider]
+
+    async def _run_one(self, provider: str, label: str, factory: Callable[[], Awaitable]) -> bool:
+        semaphore, bucket, stats = self._limits(provider)
+        async with semaphore:
+            await bucket.acquire()
+            async with self._global:
+                self._running[provider] += 1
+                started = time.monotonic()
+                error = None
+                try:
+                    await factory()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    error = str(e) or e.__class__.__name__
+                    logger.error(f"{provider} sync failed for {label}: {error}")
+                finally:
+                    self._running[provider] -= 1
+                duration = time.monotonic() - started
+
+        stats.runs += 1
+        stats.durations.append(duration)
+        if error is not None:
+            stats.failures += 1
+        if self.recorder is not None:
+            try:
+                await self.recorder(provider, label, duration, error is None, error)
+            except Exception as e:
+                logger.warning(f"Could not record {provider} sync run: {e}")
+        return error is None
+
+    async def run(self, provider: str, jobs: Iterable[SyncJob]) -> dict:
+        """Run one cycle of jobs for a provider; returns {"ran", "succeeded", "failed", "seconds"}"""
+        _, _, stats = self._limits(provider)
+        started = time.monotonic()
+        results = await asyncio.gather(*[self._run_one(provider, label, factory) for label, factory in jobs])
+        seconds = round(time.monotonic() - started, 3)
+        stats.cycles += 1
+        stats.last_cycle_seconds = seconds
+        stats.last_cycle_runs = len(results)
+        succeeded = sum(1 for ok in results if ok)
+        return {"ran": len(results), "succeeded": succeeded, "failed": len(results) - succeeded, "seconds": seconds}
+
+    def stats(self) -> dict:
+        return {
+            "global_concurrency": self.global_concurrency,
+            "providers": {
+                provider: {
+                    **self.providers.get(provider, {}),
+                    "running": self._running.get(provider, 0),
+                    **(self._stats[provider].stats() if provider in self._stats else _ProviderStats().stats()),
+                }
+                for provider in sorted(set(self.providers) | set(self._stats))
+            },
+        }
@@ -0,0 +1,269 @@
+"""
+Thumbnail rendering and the worker pool that runs it
+
+Pillow decode/resize/encode is CPU-bound and would block the asyncio event loop
+for hundreds of milliseconds on large originals. Rendering therefore happens in
+a ProcessPoolExecutor behind an async API. Each job decodes the source image
+once (at reduced scale for JPEGs, via draft mode) and cascades through the
+requested sizes from largest to smallest.
+
+The render functions are module-level so they can be pickled into worker
+processes; keep them free of server/database imports.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THUMBNAIL_SIZES = {
+    'small': (300, 300),
+    'medium': (800, 800),
+    'large': (1600, 1600),
+}
+DEFAULT_JPEG_QUALITY = 85
+MAX_SOURCE_PIXELS = 50_000_000  # 50MP max - larger sources are downscaled first
+DRAFT_REDUCING_GAP = 2  # JPEG draft decode keeps at least 2x the largest target size
+EXIF_ORIENTATION_TAG = 0x0112
+
+THUMBNAIL_POOL_WORKERS = int(os.environ.get('THUMBNAIL_POOL_WORKERS', '0')) or (os.cpu_count() or 2)
+THUMBNAIL_POOL_MAX_QUEUE = int(os.environ.get('THUMBNAIL_POOL_MAX_QUEUE', '0')) or THUMBNAIL_POOL_WORKERS * 4
+THUMBNAIL_POOL_QUEUE_TIMEOUT = float(os.environ.get('THUMBNAIL_POOL_QUEUE_TIMEOUT', '30'))  # seconds
+
+SizeMap = Dict[str, Tuple[int, int]]
+
+
+# ============ Rendering (runs inside worker processes) ============
+
+def _prepare_image(img: Image.Image, largest_box: Tuple[int, int]) -> Image.Image:
+    """
+    Decode the source once at the smallest scale that still covers the largest
+    requested box, apply EXIF orientation and flatten to RGB.
+    """
+    # JPEG can decode directly at 1/2, 1/4 or 1/8 scale. Ask for twice the
+    # fitted target (same reducing gap Image.thumbnail uses) to keep LANCZOS quality.
+    if img.format == 'JPEG':
+        width, height = img.size
+        box_width, box_height = largest_box
+        if img.getexif().get(EXIF_ORIENTATION_TAG) in (5, 6, 7, 8):
+            box_width, box_height = box_height, box_width
+        scale = min(box_width / width, box_height / height) * DRAFT_REDUCING_GAP
+        if scale < 1:
+            img.draft('RGB', (max(1, int(width * scale)), max(1, int(height * scale))))
+
+    # Auto-rotate based on EXIF (all 8 orientations, before any mode conversion drops the tag)
+    img = ImageOps.exif_transpose(img)
+
+    # Limit image size to prevent memory issues
+    if img.width * img.height > MAX_SOURCE_PIXELS:
+        scale = (MAX_SOURCE_PIXELS / (img.width * img.height)) ** 0.5
+        new_size = (int(img.width * scale), int(img.height * scale))
+        img = img.resize(new_size, Image.Resampling.LANCZOS)
+
+    # Convert to RGB (handles PNG with transparency, HEIC, etc.)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    return img
+
+
+def _render_from_image(img: Image.Image, sizes: SizeMap, quality: int) -> Dict[str, Optional[bytes]]:
+    """
+    Cascade largest -> smallest: each size is resized from the previous output
+    rather than from the full-resolution source.
+    """
+    results = {size_name: None for size_name in sizes}
+    if not sizes:
+        return results
+
+    ordered = sorted(sizes.items(), key=lambda item: item[1][0] * item[1][1], reverse=True)
+    current = _prepare_image(img, ordered[0][1])
+    for size_name, size in ordered:
+        try:
+            current.thumbnail(size, Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            current.save(buffer, 'JPEG', quality=quality, optimize=True)
+            results[size_name] = buffer.getvalue()
+        except Exception as e:
+            logger.error(f"Thumbnail generation failed for size {size_name}: {e}")
+    return results
+
+
+def render_thumbnails(image_content: bytes, sizes: SizeMap, quality: int = DEFAULT_JPEG_QUALITY) -> Dict[str, Optional[bytes]]:
+    """
+    Decode image bytes once and return {size_name: jpeg_bytes or None}.
+    """
+    try:
+        with Image.open(BytesIO(image_content)) as img:
+            return _render_from_image(img, sizes, quality)
+    except Exception as e:
+        logger.error(f"Thumbnail generation failed: {e}")
+        return {size_name: None for size_name in sizes}
+
+
+def render_thumbnail_files(
+    source_path: str,
+    photo_id: str,
+    sizes: SizeMap,
+    thumbnails_dir: str,
+    quality: int = DEFAULT_JPEG_QUALITY,
+) -> Dict[str, Optional[str]]:
+    """
+    Decode a local file once and write {photo_id}_{size}.jpg for each size.
+    Returns {size_name: thumbnail filename or None}.
+    """
+    try:
+        with Image.open(source_path) as img:
+            rendered = _render_from_image(img, sizes, quality)
+    except Exception as e:
+        logger.error(f"Error generating thumbnails for {photo_id}: {e}")
+        return {size_name: None for size_name in sizes}
+
+    results = {}
+    for size_name, content in rendered.items():
+        thumb_filename = f"{photo_id}_{size_name}.jpg"
+        if not content:
+            results[size_name] = None
+            continue
+        thumb_path = Path(thumbnails_dir) / thumb_filename
+        try:
+            thumb_path.write_bytes(content)
+            results[size_name] = thumb_filename
+        except Exception as e:
+            logger.error(f"Error writing thumbnail {thumb_filename}: {e}")
+            results[size_name] = None
+    return results
+
+
+# ============ Async worker pool ============
+
+class ThumbnailPoolBusy(Exception):
+    """Raised when the thumbnail pool stays saturated past the queue timeout"""
+
+
+class ThumbnailPool:
+    """
+    Async front-end to a ProcessPoolExecutor for thumbnail rendering.
+
+    At most `max_queue` jobs may be submitted or running at once; further
+    callers wait (backpressure) and get ThumbnailPoolBusy if no slot frees up
+    within `queue_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = THUMBNAIL_POOL_WORKERS,
+        max_queue: int = THUMBNAIL_POOL_MAX_QUEUE,
+        queue_timeout: float = THUMBNAIL_POOL_QUEUE_TIMEOUT,
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max(max_queue, max_workers)
+        self.queue_timeout = queue_timeout
+        self._executor = None
+        self._slots = asyncio.Semaphore(self.max_queue)
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+
+    def start(self):
+        """Create the worker processes (idempotent)"""
+        if self._executor is None:
+            # spawn avoids forking the event loop, DB client threads and open sockets
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            logger.info(f"Thumbnail pool started with {self.max_workers} workers (max queue {self.max_queue})")
+
+    async def shutdown(self):
+        """Stop the worker processes, waiting for in-flight jobs"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+            logger.info("Thumbnail pool stopped")
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a slot plus jobs submitted to the workers"""
+        return self._queued + self._running
+
+    def stats(self) -> dict:
+        done = self._completed + self._failed
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.queue_depth,
+            "waiting": self._queued,
+            "running": self._running,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_job_ms": round(self._total_seconds / done * 1000, 1) if done else 0,
+        }
+
+    async def run(self, fn, *args):
+        """Run fn(*args) in a worker process, waiting for a free slot first"""
+        self.start()
+        self._queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise ThumbnailPoolBusy(f"Thumbnail pool saturated ({self.queue_depth} jobs queued)")
+        finally:
+            self._queued -= 1
+
+        self._running += 1
+        started = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._total_seconds += time.perf_counter() - started
+            self._running -= 1
+            self._slots.release()
+
+    async def render(self, image_content: bytes, sizes: SizeMap, quality: int = DEFAULT_JPEG_QUALITY) -> Dict[str, Optional[bytes]]:
+        """Async render_thumbnails"""
+        return await self.run(render_thumbnails, image_content, sizes, quality)
+
+    async def render_files(
+        self,
+        source_path: Path,
+        photo_id: str,
+        sizes: SizeMap,
+        thumbnails_dir: Path,
+        quality: int = DEFAULT_JPEG_QUALITY,
+    ) -> Dict[str, Optional[str]]:
+        """Async render_thumbnail_files"""
+        return await self.run(render_thumbnail_files, str(source_path), photo_id, sizes, str(thumbnails_dir), quality)
+
+
+# Global pool instance
+thumbnail_pool = ThumbnailPool()
+
+
+def get_thumbnail_pool() -> ThumbnailPool:
+    """Get the thumbnail pool instance"""
+    return thumbnail_pool
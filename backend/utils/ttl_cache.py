@@ -0,0 +1,120 @@
+"""
+In-process LRU + TTL cache with single-flight loading
+
+Base class for the per-process read caches (utils/gallery_cache.py,
+utils/user_cache.py):
+
+- Entries are bounded by count (least recently used evicted first) and
+  expire `ttl` seconds after they were loaded, which bounds staleness for
+  writes that don't invalidate explicitly
+- Concurrent misses for the same key share one load
+- A load that was in flight across an invalidation is returned to its
+  callers but not cached, since it may predate the write
+- Callers get deep copies, so mutating a returned value never corrupts the
+  cached entry
+
+Subclasses hook into `_stored` / `_forgotten` to keep secondary indexes and
+override `_cacheable` to skip values such as "not found".
+"""
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class TTLCache:
+    """LRU + TTL cache of key -> loaded value"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> Future
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _cacheable(self, value: Any) -> bool:
+        return True
+
+    def _stored(self, key: Hashable, value: Any):
+        """Called after an entry is stored"""
+
+    def _forgotten(self, key: Hashable, value: Any):
+        """Called after an entry is evicted, expired or invalidated"""
+
+    def _store(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        self._stored(key, value)
+        while len(self._entries) > self.max_entries:
+            evicted_key, (_, evicted) = self._entries.popitem(last=False)
+            self._forgotten(evicted_key, evicted)
+            self.evictions += 1
+
+    def _drop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._forgotten(key, entry[1])
+
+    async def get(self, key: Hashable, loader: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Return a copy of the cached value, loading it on a miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(value)
+            self._drop(key)
+
+        self.misses += 1
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            generation = self._generation
+            try:
+                value = await loader(key)
+            except BaseException as e:
+                future.set_exception(e)
+                # Mark retrieved so an unawaited failure isn't logged as never retrieved
+                future.exception()
+                raise
+            finally:
+                self._inflight.pop(key, None)
+            if generation == self._generation and self._cacheable(value):
+                self._store(key, value)
+            future.set_result(value)
+        else:
+            value = await asyncio.shield(future)
+        return copy.deepcopy(value)
+
+    def invalidate(self, *keys: Hashable):
+        """Drop entries; loads in flight right now will not be cached"""
+        self._generation += 1
+        self.invalidations += 1
+        for key in keys:
+            self._drop(key)
+
+    def clear(self):
+        self._generation += 1
+        for key in list(self._entries):
+            self._drop(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "inflight": len(self._inflight),
+        }
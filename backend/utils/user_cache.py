@@ -0,0 +1,66 @@
+"""
+In-process cache for authenticated user lookups
+
+Every authenticated request resolves its user from the JWT subject, and a
+dashboard page fans out into dozens of API calls that each repeat the same
+users read. This cache keeps a projected user record (no password hash) per
+user id (LRU + TTL, single-flight; see utils/ttl_cache.py). Entries are
+invalidated on profile, plan, override, credit and status writes; counters
+such as storage_used only refresh with the TTL.
+
+On top of the cache, `request_memo()` gives each request its own
+user id -> record dict, so a handler that looks its user up again after
+get_current_user gets the same record without another cache copy or read.
+Each request runs in its own task, so the memo never leaks between requests.
+"""
+import os
+from contextvars import ContextVar
+from typing import Optional
+
+from utils.ttl_cache import TTLCache
+
+USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', '5000'))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '30'))  # seconds
+
+# Projection for cached user records - the password hash never leaves the DB read
+USER_CACHE_PROJECTION = {"_id": 0, "password": 0}
+
+_request_users: ContextVar[Optional[dict]] = ContextVar('request_users', default=None)
+
+
+def request_memo() -> dict:
+    """The current request's user id -> record memo, created on first use"""
+    memo = _request_users.get()
+    if memo is None:
+        memo = {}
+        _request_users.set(memo)
+    return memo
+
+
+class UserCache(TTLCache):
+    """
+    Cache of user id -> projected user record. Missing users are not cached,
+    so a freshly registered account is found on its first request.
+    """
+
+    def __init__(self, max_entries: int = USER_CACHE_MAX_ENTRIES, ttl: float = USER_CACHE_TTL):
+        super().__init__(max_entries, ttl)
+
+    def _cacheable(self, user: Optional[dict]) -> bool:
+        return user is not None
+
+    def invalidate(self, user_id: str):
+        """Drop a user from the cache and from the current request's memo"""
+        super().invalidate(user_id)
+        memo = _request_users.get()
+        if memo:
+            memo.pop(user_id, None)
+
+
+# Global cache instance
+user_cache = UserCache()
+
+
+def get_user_cache() -> UserCache:
+    """Get the user cache instance"""
+    return user_cache
@@ -0,0 +1,256 @@
+"""
+Streaming ZIP writer for gallery downloads
+
+Builds ZIP archives incrementally so download endpoints can hand the output
+straight to StreamingResponse instead of assembling the whole archive in an
+in-memory buffer first. Every entry is written with a data descriptor, so the
+CRC and sizes do not need to be known before the entry's bytes arrive, and
+per-download memory stays bounded to the entry currently being written.
+"""
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Optional, Tuple, Union
+
+import aiofiles
+
+# Formats that are already compressed - deflating them burns CPU for ~0% gain
+STORED_EXTENSIONS = {
+    '.jpg', '.jpeg', '.heic', '.heif', '.png', '.webp', '.gif', '.avif',
+    '.mp4', '.mov', '.m4v', '.webm', '.zip',
+}
+
+FILE_READ_CHUNK_SIZE = 256 * 1024  # 256KB per read when streaming local files
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+_ZIP32_LIMIT = 0xFFFFFFFF
+_ZIP32_COUNT_LIMIT = 0xFFFF
+
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+EntryData = Union[bytes, AsyncIterable[bytes], None]
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    """Convert a unix timestamp into ZIP (MS-DOS) time and date fields"""
+    t = time.localtime(timestamp)
+    year = max(t.tm_year, 1980)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+def should_store(filename: str) -> bool:
+    """Return True if the file should be STORED rather than DEFLATED"""
+    return Path(filename).suffix.lower() in STORED_EXTENSIONS
+
+
+class ZipStreamWriter:
+    """
+    Incremental ZIP encoder.
+
+    Usage: for each entry call start_entry(), write() for every chunk and
+    finish_entry(); then close() once. Every method returns the bytes that
+    must be sent to the client next, in order.
+    """
+
+    def __init__(self):
+        self._offset = 0
+        self._central_directory = []
+        self._current = None
+
+    @property
+    def bytes_written(self) -> int:
+        return self._offset
+
+    def _emit(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return data
+
+    def start_entry(self, name: str, compress: Optional[bool] = None, mtime: Optional[float] = None) -> bytes:
+        """Begin a new entry and return its local file header"""
+        if self._current is not None:
+            raise RuntimeError("Previous ZIP entry was not finished")
+
+        if compress is None:
+            compress = not should_store(name)
+        method = ZIP_DEFLATED if compress else ZIP_STORED
+        encoded_name = name.encode('utf-8')
+        dos_time, dos_date = _dos_datetime(mtime if mtime is not None else time.time())
+        flags = _FLAG_DATA_DESCRIPTOR | _FLAG_UTF8
+
+        self._current = {
+            "name": encoded_name,
+            "method": method,
+            "flags": flags,
+            "dos_time": dos_time,
+            "dos_date": dos_date,
+            "header_offset": self._offset,
+            "crc": 0,
+            "compressed_size": 0,
+            "uncompressed_size": 0,
+            "compressor": zlib.compressobj(6, zlib.DEFLATED, -15) if compress else None,
+        }
+
+        header = struct.pack(
+            '<IHHHHHIIIHH',
+            0x04034b50,     # local file header signature
+            20,             # version needed to extract
+            flags,
+            method,
+            dos_time,
+            dos_date,
+            0, 0, 0,        # crc / sizes live in the data descriptor
+            len(encoded_name),
+            0,              # extra field length
+        )
+        return self._emit(header + encoded_name)
+
+    def write(self, data: bytes) -> bytes:
+        """Feed raw entry bytes and return the encoded output (may be empty)"""
+        entry = self._current
+        if entry is None:
+            raise RuntimeError("No ZIP entry in progress")
+        if not data:
+            return b''
+
+        entry["crc"] = zlib.crc32(data, entry["crc"])
+        entry["uncompressed_size"] += len(data)
+        if entry["compressor"] is not None:
+            data = entry["compressor"].compress(data)
+        entry["compressed_size"] += len(data)
+        return self._emit(data)
+
+    def finish_entry(self) -> bytes:
+        """Flush the current entry and return its trailing data descriptor"""
+        entry = self._current
+        if entry is None:
+            raise RuntimeError("No ZIP entry in progress")
+
+        tail = b''
+        if entry["compressor"] is not None:
+            tail = entry["compressor"].flush()
+            entry["compressed_size"] += len(tail)
+            entry["compressor"] = None
+
+        if entry["compressed_size"] > _ZIP32_LIMIT or entry["uncompressed_size"] > _ZIP32_LIMIT:
+            raise ValueError(f"ZIP entry too large for streaming: {entry['name'].decode('utf-8')}")
+
+        descriptor = struct.pack(
+            '<IIII',
+            0x08074b50,     # data descriptor signature
+            entry["crc"],
+            entry["compressed_size"],
+            entry["uncompressed_size"],
+        )
+        self._central_directory.append(entry)
+        self._current = None
+        return self._emit(tail + descriptor)
+
+    def close(self) -> bytes:
+        """Return the central directory and end-of-archive records"""
+        if self._current is not None:
+            raise RuntimeError("Cannot close ZIP with an unfinished entry")
+
+        cd_offset = self._offset
+        records = []
+        for entry in self._central_directory:
+            header_offset = entry["header_offset"]
+            extra = b''
+            if header_offset > _ZIP32_LIMIT:
+                # ZIP64 extended information: only the overflowing offset
+                extra = struct.pack('<HHQ', 0x0001, 8, header_offset)
+                header_offset = _ZIP32_LIMIT
+            records.append(struct.pack(
+                '<IHHHHHHIIIHHHHHII',
+                0x02014b50,     # central directory header signature
+                45 if extra else 20,  # version made by
+                45 if extra else 20,  # version needed to extract
+                entry["flags"],
+                entry["method"],
+                entry["dos_time"],
+                entry["dos_date"],
+                entry["crc"],
+                entry["compressed_size"],
+                entry["uncompressed_size"],
+                len(entry["name"]),
+                len(extra),
+                0,              # comment length
+                0,              # disk number start
+                0,              # internal attributes
+                0o100644 << 16,  # external attributes: regular file, rw-r--r--
+                header_offset,
+            ) + entry["name"] + extra)
+
+        central_directory = b''.join(records)
+        cd_size = len(central_directory)
+        count = len(self._central_directory)
+        trailer = b''
+
+        needs_zip64 = cd_offset > _ZIP32_LIMIT or cd_size > _ZIP32_LIMIT or count >= _ZIP32_COUNT_LIMIT
+        if needs_zip64:
+            zip64_eocd_offset = cd_offset + cd_size
+            trailer += struct.pack(
+                '<IQHHIIQQQQ',
+                0x06064b50,     # zip64 end of central directory signature
+                44,             # size of the remaining record
+                45, 45,
+                0, 0,
+                count, count,
+                cd_size,
+                cd_offset,
+            )
+            trailer += struct.pack('<IIQI', 0x07064b50, 0, zip64_eocd_offset, 1)
+
+        trailer += struct.pack(
+            '<IHHHHIIH',
+            0x06054b50,         # end of central directory signature
+            0, 0,
+            min(count, _ZIP32_COUNT_LIMIT),
+            min(count, _ZIP32_COUNT_LIMIT),
+            min(cd_size, _ZIP32_LIMIT),
+            min(cd_offset, _ZIP32_LIMIT),
+            0,                  # comment length
+        )
+        self._central_directory = []
+        return self._emit(central_directory + trailer)
+
+
+async def iter_file_chunks(file_path: Path, chunk_size: int = FILE_READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read a local file in fixed-size chunks without blocking the event loop"""
+    async with aiofiles.open(file_path, 'rb') as f:
+        while True:
+            chunk = await f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def stream_zip(entries: AsyncIterable[Tuple[str, EntryData]]) -> AsyncIterator[bytes]:
+    """
+    Encode (archive_name, data) pairs into a ZIP byte stream.
+
+    `data` may be the entry's full bytes, an async iterable of chunks, or None
+    to skip an entry whose fetch failed. Designed to be passed directly to
+    StreamingResponse.
+    """
+    writer = ZipStreamWriter()
+    async for archive_name, data in entries:
+        if data is None:
+            continue
+        yield writer.start_entry(archive_name)
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            out = writer.write(bytes(data))
+            if out:
+                yield out
+        else:
+            async for chunk in data:
+                out = writer.write(chunk)
+                if out:
+                    yield out
+        yield writer.finish_entry()
+    yield writer.close()
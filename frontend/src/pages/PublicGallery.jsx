@@ -185,6 +185,7 @@ const PublicGallery = () => {
   const [loading, setLoading] = useState(true);
   const [passwordRequired, setPasswordRequired] = useState(false);
   const [password, setPassword] = useState('');
+  const [guestToken, setGuestToken] = useState(null); // from verify-password, sent instead of re-checking the password
   const [authenticated, setAuthenticated] = useState(false);
   const [uploading, setUploading] = useState(false);
   const [uploadProgress, setUploadProgress] = useState([]); // Track individual file uploads
@@ -290,17 +291,17 @@ const PublicGallery = () => {
     }
   };
 
-  const fetchPhotos = async (pwd = null) => {
+  const fetchPhotos = async (pwd = null, token = null) => {
     try {
       // Fetch all data in parallel - backend now returns optimized payload
       const [photosRes, videosRes, fotoshareRes, pcloudRes, gdriveRes] = await Promise.all([
         axios.get(
           `${API}/public/gallery/${shareLink}/photos`,
-          { params: { password: pwd || password } }
+          { params: { password: pwd || password, token: token || guestToken || undefined } }
         ),
         axios.get(
           `${API}/public/gallery/${shareLink}/videos`,
-          { params: { password: pwd || password } }
+          { params: { password: pwd || password, token: token || guestToken || undefined } }
         ).catch(() => ({ data: [] })),
         axios.get(`${API}/galleries/${shareLink}/fotoshare-videos`).catch(() => ({ data: [] })),
         axios.get(`${API}/public/gallery/${shareLink}/pcloud-photos`).catch(() => ({ data: [] })),
@@ -325,12 +326,13 @@ const PublicGallery = () => {
   const handlePasswordSubmit = async (e) => {
     e.preventDefault();
     try {
-      await axios.post(`${API}/public/gallery/${shareLink}/verify-password`, {
+      const response = await axios.post(`${API}/public/gallery/${shareLink}/verify-password`, {
         password
       });
+      setGuestToken(response.data.token || null);
       setAuthenticated(true);
       setPasswordRequired(false);
-      fetchPhotos();
+      fetchPhotos(null, response.data.token);
       toast.success('Access granted!');
     } catch (error) {
       toast.error('Invalid password');
@@ -471,6 +473,9 @@ const PublicGallery = () => {
       if (password) {
         formData.append('password', password);
       }
+      if (guestToken) {
+        formData.append('token', guestToken);
+      }
       // Include the content hash for server-side verification
       if (fileHash) {
         formData.append('content_hash', fileHash);
@@ -529,7 +534,7 @@ const PublicGallery = () => {
       setUploadProgress([]);
       setUploading(false);
     }, 2000);
-  }, [shareLink, password, authenticated, gallery, fetchPhotos]);
+  }, [shareLink, password, guestToken, authenticated, gallery, fetchPhotos]);
 
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
     onDrop,
@@ -662,10 +667,10 @@ const PublicGallery = () => {
       // First get download info to check for chunks
       const infoResponse = await axios.post(
         `${API}/public/gallery/${shareLink}/download-info`,
-        { password: downloadAllPassword || null, section_id: sectionId }
+        { password: downloadAllPassword || null, token: downloadInfo?.download_token || undefined, section_id: sectionId }
       );
       
-      const { chunk_count, total_photos, sections } = infoResponse.data;
+      const { chunk_count, total_photos, sections, download_token } = infoResponse.data;
       
       if (total_photos === 0) {
         toast.error('No photos available for download', { id: toastId });
@@ -682,7 +687,7 @@ const PublicGallery = () => {
         
         const response = await axios.post(
           `${API}/public/gallery/${shareLink}/download-section?chunk=${chunk}`,
-          { password: downloadAllPassword || null, section_id: sectionId },
+          { password: downloadAllPassword || null, token: download_token || undefined, section_id: sectionId },
           { 
             responseType: 'blob',
             onDownloadProgress: (progressEvent) => {